@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, SiteSettings
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import User, SiteSettings, ExportJob
 
 
 @admin.register(User)
@@ -17,7 +19,7 @@ class UserAdmin(BaseUserAdmin):
         (None, {'fields': ('username', 'password')}),
         ('Personal Info', {'fields': ('first_name', 'last_name', 'email', 'phone', 'profile_picture')}),
         ('Role & Organization', {'fields': ('role', 'is_owner', 'designation', 'employee_id', 'manager')}),
-        ('Communication Preferences', {'fields': ('whatsapp_opt_in', 'email_opt_in')}),
+        ('Communication Preferences', {'fields': ('whatsapp_opt_in', 'email_opt_in', 'notification_digest_opt_in')}),
         ('Permissions', {
             'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
             'classes': ('collapse',)
@@ -69,3 +71,21 @@ class SiteSettingsAdmin(admin.ModelAdmin):
             return False
         return True
 
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'user', 'status', 'processed_rows', 'total_rows', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = ('user', 'kind', 'params', 'status', 'total_rows', 'processed_rows', 'download',
+                       'error_message', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='File')
+    def download(self, obj):
+        # Export files have no public URL; link to the checked download view
+        if not obj.file or obj.status != ExportJob.Status.COMPLETED:
+            return '-'
+        return format_html('<a href="{}">Download</a>', reverse('accounts:export_job_download', args=[obj.pk]))
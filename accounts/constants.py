@@ -86,6 +86,7 @@ ROLE_NAMESPACE_MAP = {
         "edit_requests", # Edit approvals and direct edit
         "invoices",      # Invoice generation for team
         "agreements",    # Agreement generation
+        "notifications", # Own notifications (the views scope by role)
     ],
     ROLE_SALES: [
         "accounts",      # Sales dashboard, profile
@@ -97,6 +98,7 @@ ROLE_NAMESPACE_MAP = {
         "schemes",       # Scheme catalog (for client recommendations)
         "edit_requests", # Request client edits
         "invoices",      # Invoice generation for own clients
+        "notifications", # Own notifications (the views scope by role)
     ],
     ROLE_CLIENT: [
         "accounts",      # Client portal, profile
@@ -106,6 +108,7 @@ ROLE_NAMESPACE_MAP = {
         "documents",     # Own documents
         "payments",      # Own payments
         "schemes",       # Browse and apply for schemes
+        "notifications", # Own notifications, callback requests
     ],
 }
 
@@ -122,4 +125,5 @@ EXEMPT_URL_PATTERNS = [
     r'^/api/schema/',
     r'^/api/docs/',
     r'^/api/redoc/',
+    r'^/api/autocomplete/',  # Typeahead used by sales/manager forms; the view checks roles itself
 ]
@@ -0,0 +1,86 @@
+"""
+Dashboard cache for Agnivridhi CRM
+
+Role dashboards are cached per role and user (the manager's own id for team
+views). Every key embeds a global version number; any change to a Client,
+Booking, Payment, Application or EditRequest bumps that number (see
+accounts.signals), which orphans all cached dashboards in O(1) without having
+to know which keys exist. Orphaned entries simply expire via their TTL.
+
+This only works when every worker process shares the cache: with the
+per-process LocMem backend a bump in one worker leaves the others serving
+stale data. versioned_caching_enabled() is therefore False under LocMem
+(unless VERSIONED_CACHE_ALLOW_LOCAL is set for a single-process server),
+and callers then compute results directly.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = 'dashboard:version'
+
+
+def versioned_caching_enabled():
+    """True when the default cache is shared by all workers (or local caching is explicitly allowed)."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return not backend.endswith('LocMemCache') or getattr(settings, 'VERSIONED_CACHE_ALLOW_LOCAL', False)
+
+
+def _fresh_version():
+    # Time-based seed so a lost/evicted version key never resurrects old entries
+    return time.time_ns()
+
+
+def current_version():
+    """Return the current dashboard cache version (creating it if missing)."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), None)
+        version = cache.get(VERSION_KEY) or _fresh_version()
+    return version
+
+
+def bump_version():
+    """Invalidate every cached dashboard by moving to a new key version."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _fresh_version(), None)
+
+
+def dashboard_cache_key(scope, user_id, params=None):
+    """
+    Build the versioned cache key for a dashboard.
+
+    Args:
+        scope: dashboard name/role, e.g. 'admin', 'manager'
+        user_id: owner of the cached data (manager id for team views)
+        params: optional dict of filters that change the result
+    """
+    key = f'dashboard:{current_version()}:{scope}:{user_id}'
+    if params:
+        raw = '&'.join(f'{k}={params[k]}' for k in sorted(params) if params[k] not in (None, ''))
+        if raw:
+            key += ':' + hashlib.md5(raw.encode()).hexdigest()
+    return key
+
+
+def get_cached_dashboard(scope, user, builder, params=None, timeout=None):
+    """
+    Return dashboard data from cache, building and storing it on a miss.
+
+    ``builder`` must return picklable data (evaluate querysets to lists).
+    """
+    if not versioned_caching_enabled():
+        return builder()
+    key = dashboard_cache_key(scope, user.pk, params)
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        if timeout is None:
+            timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+        cache.set(key, data, timeout)
+    return data
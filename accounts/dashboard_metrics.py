@@ -0,0 +1,288 @@
+"""
+Dashboard metrics engine for Agnivridhi CRM
+
+Computes the KPIs and chart series shared by the admin and owner dashboards
+with a handful of grouped queries (Trunc-based GROUP BY plus conditional
+aggregation) instead of one query per month/day/counter. Payment figures are
+read from payments.DailyRevenueRollup, so cost does not grow with the
+payments table.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+# Payment statuses that count as realised revenue
+SUCCESS_STATUSES = ['AUTHORIZED', 'CAPTURED']
+
+
+def parse_payment_filters(params):
+    """
+    Extract the dashboard payment filters from request.GET-like params.
+
+    Returns a dict with keys: method, salesperson, date_from, date_to
+    (dates are parsed to ``datetime.date`` or None).
+    """
+    return {
+        'method': params.get('method') or None,
+        'salesperson': params.get('salesperson') or None,
+        'date_from': parse_date(params.get('date_from') or ''),
+        'date_to': parse_date(params.get('date_to') or ''),
+    }
+
+
+def payment_filter_q(method=None, salesperson=None, date_from=None, date_to=None):
+    """Build a Q object over DailyRevenueRollup for the dashboard filters (status not included)."""
+    q = Q()
+    if method:
+        q &= Q(payment_method=method)
+    if salesperson:
+        q &= Q(received_by_id=salesperson)
+    if date_from:
+        q &= Q(day__gte=date_from)
+    if date_to:
+        q &= Q(day__lte=date_to)
+    return q
+
+
+def month_starts(now, months=6):
+    """Return the first instant of each of the last ``months`` months (oldest first)."""
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    starts = [start]
+    for _ in range(months - 1):
+        prev = starts[0]
+        if prev.month == 1:
+            starts.insert(0, prev.replace(year=prev.year - 1, month=12))
+        else:
+            starts.insert(0, prev.replace(month=prev.month - 1))
+    return starts
+
+
+def monthly_revenue_series(filter_q=None, now=None, months=6):
+    """
+    Successful revenue per calendar month for the last ``months`` months.
+
+    Returns (labels, values) with empty months filled as 0.0.
+    """
+    from payments.models import DailyRevenueRollup
+
+    now = now or timezone.now()
+    starts = month_starts(now, months)
+    rows = (
+        DailyRevenueRollup.objects.filter(status__in=SUCCESS_STATUSES, day__gte=starts[0].date())
+        .filter(filter_q or Q())
+        .annotate(month=TruncMonth('day'))
+        .values('month')
+        .annotate(total=Sum('total_amount'))
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        if row['month'] is None:
+            continue
+        key = (row['month'].year, row['month'].month)
+        totals[key] = totals.get(key, 0) + (row['total'] or 0)
+
+    labels = [start.strftime('%b %Y') for start in starts]
+    values = [float(totals.get((start.year, start.month), 0)) for start in starts]
+    return labels, values
+
+
+def daily_revenue_series(filter_q=None, now=None, days=7):
+    """
+    Successful revenue per day for the last ``days`` days (today included).
+
+    Returns (labels, values) with empty days filled as 0.0.
+    """
+    from payments.models import DailyRevenueRollup
+
+    now = now or timezone.now()
+    today = timezone.localdate(now) if timezone.is_aware(now) else now.date()
+    first_day = today - timedelta(days=days - 1)
+    rows = (
+        DailyRevenueRollup.objects.filter(status__in=SUCCESS_STATUSES, day__gte=first_day, day__lte=today)
+        .filter(filter_q or Q())
+        .values('day')
+        .annotate(total=Sum('total_amount'))
+        .order_by()
+    )
+    totals = {row['day']: row['total'] or 0 for row in rows}
+
+    day_list = [first_day + timedelta(days=i) for i in range(days)]
+    labels = [day.strftime('%b %d') for day in day_list]
+    values = [float(totals.get(day, 0)) for day in day_list]
+    return labels, values
+
+
+def method_breakdown(since=None):
+    """Successful revenue grouped by payment method (optionally from ``since`` date). Returns (labels, values)."""
+    from payments.models import DailyRevenueRollup
+
+    qs = DailyRevenueRollup.objects.filter(status__in=SUCCESS_STATUSES)
+    if since is not None:
+        qs = qs.filter(day__gte=since)
+    rows = (
+        qs.values('payment_method')
+        .annotate(total=Sum('total_amount'))
+        .order_by('-total')
+    )
+    labels = [row['payment_method'] or 'UNKNOWN' for row in rows]
+    values = [float(row['total'] or 0) for row in rows]
+    return labels, values
+
+
+def top_sales(limit=5):
+    """Top salespeople by successful revenue."""
+    from payments.models import DailyRevenueRollup
+
+    rows = (
+        DailyRevenueRollup.objects.filter(status__in=SUCCESS_STATUSES, received_by__isnull=False)
+        .values('received_by__username', 'received_by__first_name', 'received_by__last_name')
+        .annotate(total=Sum('total_amount'))
+        .order_by('-total')[:limit]
+    )
+    return [
+        {
+            'name': (f"{r['received_by__first_name']} {r['received_by__last_name']}").strip() or r['received_by__username'],
+            'total': float(r['total'] or 0),
+        }
+        for r in rows
+    ]
+
+
+def status_by_sales():
+    """
+    Pending vs approved payment counts per salesperson.
+
+    Returns (labels, pending_counts, approved_counts).
+    """
+    from payments.models import DailyRevenueRollup
+
+    rows = DailyRevenueRollup.objects.values('received_by__username').annotate(
+        payments=Sum('payment_count'),
+        pending=Coalesce(Sum('payment_count', filter=Q(status='PENDING')), 0),
+        approved=Coalesce(Sum('payment_count', filter=Q(status__in=SUCCESS_STATUSES)), 0),
+    ).filter(payments__gt=0).order_by('-approved', '-pending')
+    labels = [row['received_by__username'] or 'Unassigned' for row in rows]
+    pending = [row['pending'] for row in rows]
+    approved = [row['approved'] for row in rows]
+    return labels, pending, approved
+
+
+def payment_totals(filter_q=None):
+    """
+    Revenue KPIs in a single conditional aggregate.
+
+    ``total_revenue`` honours the dashboard filters; pending/failed totals
+    and the pending count are global, as on the original dashboards.
+    """
+    from payments.models import DailyRevenueRollup
+
+    success_q = Q(status__in=SUCCESS_STATUSES) & (filter_q or Q())
+    totals = DailyRevenueRollup.objects.aggregate(
+        total_revenue=Sum('total_amount', filter=success_q),
+        pending_revenue=Sum('total_amount', filter=Q(status='PENDING')),
+        failed_revenue=Sum('total_amount', filter=Q(status='FAILED')),
+        pending_payments_count=Sum('payment_count', filter=Q(status='PENDING')),
+    )
+    return {k: v or 0 for k, v in totals.items()}
+
+
+def client_totals(since=None):
+    """Client counts and live revenue sums (pitched/with GST/received/pending)."""
+    from clients.models import Client
+
+    qs = Client.objects.all()
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    totals = qs.aggregate(
+        total_clients=Count('id'),
+        active_clients=Count('id', filter=Q(status='ACTIVE')),
+        total_pitched=Sum('total_pitched_amount'),
+        total_with_gst=Sum('total_with_gst'),
+        total_received=Sum('received_amount'),
+        total_pending=Sum('pending_amount'),
+    )
+    return {k: v or 0 for k, v in totals.items()}
+
+
+def sector_breakdown(limit=None):
+    """Client counts (total and active) per sector, largest first."""
+    from clients.models import Client
+
+    rows = Client.objects.values('sector').annotate(
+        count=Count('id'),
+        active_count=Count('id', filter=Q(status='ACTIVE')),
+    ).order_by('-count')
+    if limit:
+        rows = rows[:limit]
+    return list(rows)
+
+
+def pipeline_counts():
+    """Booking and application counts (total + pending) in two queries."""
+    from bookings.models import Booking
+    from applications.models import Application
+
+    bookings = Booking.objects.aggregate(
+        total_bookings=Count('id'),
+        pending_bookings=Count('id', filter=Q(status='PENDING')),
+    )
+    applications = Application.objects.aggregate(
+        total_applications=Count('id'),
+        pending_applications=Count('id', filter=Q(status__in=['DRAFT', 'SUBMITTED', 'UNDER_REVIEW'])),
+    )
+    return {**bookings, **applications}
+
+
+def get_dashboard_metrics(filters=None, now=None, include_charts=True):
+    """
+    Compute every shared admin/owner dashboard metric.
+
+    Args:
+        filters: dict from ``parse_payment_filters`` (optional)
+        now: reference time (defaults to timezone.now())
+        include_charts: also build the chart series; pages that lazy-load
+            charts from the widget endpoints pass False
+
+    Returns:
+        dict of template context values (chart series, KPIs, breakdowns)
+    """
+    filters = filters or {}
+    now = now or timezone.now()
+    filter_q = payment_filter_q(**filters)
+
+    clients = client_totals()
+    metrics = {
+        'total_clients': clients['total_clients'],
+        'active_clients': clients['active_clients'],
+        'client_revenue': {
+            'total_pitched': clients['total_pitched'],
+            'total_with_gst': clients['total_with_gst'],
+            'total_received': clients['total_received'],
+            'total_pending': clients['total_pending'],
+        },
+    }
+    if include_charts:
+        chart_labels, chart_revenue = monthly_revenue_series(filter_q, now=now)
+        daily_labels, daily_values = daily_revenue_series(filter_q, now=now)
+        method_labels, method_values = method_breakdown()
+        status_labels, status_pending, status_approved = status_by_sales()
+        metrics.update({
+            'chart_labels': chart_labels,
+            'chart_revenue': chart_revenue,
+            'daily_labels': daily_labels,
+            'daily_values': daily_values,
+            'method_labels': method_labels,
+            'method_values': method_values,
+            'top_sales': top_sales(),
+            'status_sales_labels': status_labels,
+            'status_sales_pending': status_pending,
+            'status_sales_approved': status_approved,
+        })
+    metrics.update(pipeline_counts())
+    metrics.update(payment_totals(filter_q))
+    return metrics
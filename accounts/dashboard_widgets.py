@@ -0,0 +1,102 @@
+"""
+Dashboard chart widgets for Agnivridhi CRM
+
+Each chart on the admin, owner and reports dashboards is served as its own
+JSON dataset (see accounts.views.dashboard_widget) so pages render without
+waiting for the aggregates. Payloads are cached under the versioned dashboard
+keys and carry an ETag/Last-Modified pair for cheap browser revalidation.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .dashboard_cache import dashboard_cache_key, versioned_caching_enabled
+from .dashboard_metrics import (
+    daily_revenue_series, method_breakdown, monthly_revenue_series,
+    parse_payment_filters, payment_filter_q, sector_breakdown,
+    status_by_sales, top_sales,
+)
+
+
+def _int_param(params, name, default, low, high):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(low, min(high, value))
+
+
+def _monthly_revenue(params):
+    filter_q = payment_filter_q(**parse_payment_filters(params))
+    labels, values = monthly_revenue_series(filter_q, months=_int_param(params, 'months', 6, 1, 24))
+    return {'labels': labels, 'values': values}
+
+
+def _daily_revenue(params):
+    filter_q = payment_filter_q(**parse_payment_filters(params))
+    labels, values = daily_revenue_series(filter_q, days=_int_param(params, 'days', 7, 1, 90))
+    return {'labels': labels, 'values': values}
+
+
+def _method_breakdown(params):
+    since = None
+    if params.get('days'):
+        since = timezone.localdate() - timedelta(days=_int_param(params, 'days', 30, 1, 3650))
+    labels, values = method_breakdown(since=since)
+    return {'labels': labels, 'values': values}
+
+
+def _top_sales(params):
+    return {'rows': top_sales(limit=_int_param(params, 'limit', 5, 1, 50))}
+
+
+def _status_by_sales(params):
+    labels, pending, approved = status_by_sales()
+    return {'labels': labels, 'pending': pending, 'approved': approved}
+
+
+def _clients_by_sector(params):
+    limit = _int_param(params, 'limit', 0, 0, 100) or None
+    return {'rows': sector_breakdown(limit=limit)}
+
+
+# name -> (builder, request params that change the result)
+WIDGETS = {
+    'monthly-revenue': (_monthly_revenue, ('method', 'salesperson', 'date_from', 'date_to', 'months')),
+    'daily-revenue': (_daily_revenue, ('method', 'salesperson', 'date_from', 'date_to', 'days')),
+    'method-breakdown': (_method_breakdown, ('days',)),
+    'top-sales': (_top_sales, ('limit',)),
+    'status-by-sales': (_status_by_sales, ()),
+    'clients-by-sector': (_clients_by_sector, ('limit',)),
+}
+
+
+def get_widget_payload(name, params):
+    """
+    Return the cached payload for widget ``name``.
+
+    The result is a dict with ``data`` (JSON-serialisable), ``etag`` (hash of
+    the serialised data) and ``last_modified`` (epoch seconds of the build).
+    Raises KeyError for unknown widgets.
+    """
+    builder, keys = WIDGETS[name]
+    used = {k: params.get(k) for k in keys}
+    key = dashboard_cache_key(f'widget:{name}', 'shared', used)
+    payload = cache.get(key) if versioned_caching_enabled() else None
+    if payload is None:
+        data = json.loads(json.dumps(builder(used), cls=DjangoJSONEncoder))
+        body = json.dumps(data, sort_keys=True)
+        payload = {
+            'data': data,
+            'etag': hashlib.md5(body.encode()).hexdigest(),
+            'last_modified': int(time.time()),
+        }
+        if versioned_caching_enabled():
+            cache.set(key, payload, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return payload
@@ -1,61 +1,99 @@
 """
 Email notification utilities for Agnivridhi CRM
+
+The send_* helpers render the email and queue it in the notification outbox
+(notifications.outbox); nothing talks to SMTP inside the request. They
+return True when the email was queued.
 """
-from django.core.mail import send_mail, EmailMultiAlternatives
+import logging
+import re
+
 from django.template.loader import render_to_string
-from django.conf import settings
 from django.utils.html import strip_tags
 
+logger = logging.getLogger(__name__)
+
+
+def _plain_text(html_message):
+    """Text alternative for an HTML email: no <head>/<style> content, no runs of blank lines."""
+    body = re.sub(r'<(head|style)\b.*?</\1>', '', html_message, flags=re.S | re.I)
+    text = '\n'.join(line.strip() for line in strip_tags(body).splitlines())
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def queue_email(recipient, notification_type, subject, template, context, email_to,
+                sent_by=None, dispatch=True, digest=False, **related):
+    """
+    Render ``template`` and queue it for ``email_to``; returns the Notification.
+
+    ``digest=True`` lets recipients who opted into digests get it in their next digest.
+    """
+    from notifications.outbox import enqueue
+
+    html_message = render_to_string(template, context)
+    return enqueue(
+        recipient=recipient,
+        notification_type=notification_type,
+        subject=subject,
+        message=_plain_text(html_message),
+        html_content=html_message,
+        email_to=email_to,
+        sent_by=sent_by,
+        dispatch=dispatch,
+        digest=digest,
+        **related,
+    )
+
+
+def _client_email(client):
+    if getattr(client, 'contact_email', None):
+        return client.contact_email
+    if getattr(client, 'user', None) and client.user.email:
+        return client.user.email
+    return None
+
 
 def send_payment_approval_email(payment, approved_by):
-    """Send email notification when payment is approved"""
+    """Queue an email notification when payment is approved"""
     subject = f'Payment Approved - ₹{payment.amount} for {payment.client.company_name}'
-    
+
     # Get recipient email
     recipient_email = None
     if payment.received_by and payment.received_by.email:
         recipient_email = payment.received_by.email
-    
+
     if not recipient_email:
         return False
-    
+
     context = {
         'payment': payment,
         'approved_by': approved_by,
         'client': payment.client,
         'booking': payment.booking,
     }
-    
-    # Render HTML email
-    html_message = render_to_string('emails/payment_approved.html', context)
-    plain_message = strip_tags(html_message)
-    
+
     try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email]
+        queue_email(
+            payment.received_by, 'PAYMENT_SUCCESS', subject, 'emails/payment_approved.html', context,
+            recipient_email, sent_by=approved_by, related_payment=payment, digest=True,
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error queueing email: {e}")
         return False
 
 
 def send_payment_rejection_email(payment, rejected_by, reason=None):
-    """Send email notification when payment is rejected"""
+    """Queue an email notification when payment is rejected"""
     subject = f'Payment Rejected - ₹{payment.amount} for {payment.client.company_name}'
-    
+
     recipient_email = None
     if payment.received_by and payment.received_by.email:
         recipient_email = payment.received_by.email
-    
+
     if not recipient_email:
         return False
-    
+
     context = {
         'payment': payment,
         'rejected_by': rejected_by,
@@ -63,126 +101,88 @@ def send_payment_rejection_email(payment, rejected_by, reason=None):
         'booking': payment.booking,
         'reason': reason,
     }
-    
-    html_message = render_to_string('emails/payment_rejected.html', context)
-    plain_message = strip_tags(html_message)
-    
+
     try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email]
+        queue_email(
+            payment.received_by, 'PAYMENT_FAILED', subject, 'emails/payment_rejected.html', context,
+            recipient_email, sent_by=rejected_by, related_payment=payment, digest=True,
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error queueing email: {e}")
         return False
 
 
 def send_booking_confirmation_email(booking):
-    """Send booking confirmation email to client"""
+    """Queue a booking confirmation email to the client"""
     subject = f'Booking Confirmation - {booking.booking_id}'
-    
-    # Try to get client email
-    recipient_email = None
-    if hasattr(booking.client, 'contact_email') and booking.client.contact_email:
-        recipient_email = booking.client.contact_email
-    elif hasattr(booking.client, 'user') and booking.client.user and booking.client.user.email:
-        recipient_email = booking.client.user.email
-    
+
+    recipient_email = _client_email(booking.client)
     if not recipient_email:
         return False
-    
+
     context = {
         'booking': booking,
         'client': booking.client,
         'service': booking.service,
     }
-    
-    html_message = render_to_string('emails/booking_confirmation.html', context)
-    plain_message = strip_tags(html_message)
-    
+
     try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email]
+        queue_email(
+            booking.client.user, 'BOOKING_CONFIRMATION', subject, 'emails/booking_confirmation.html', context,
+            recipient_email, related_booking=booking,
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error queueing email: {e}")
         return False
 
 
 def send_application_status_email(application):
-    """Send email when application status changes"""
+    """Queue an email when application status changes"""
     subject = f'Application Status Update - {application.application_id}'
-    
-    recipient_email = None
-    if hasattr(application.client, 'contact_email') and application.client.contact_email:
-        recipient_email = application.client.contact_email
-    elif hasattr(application.client, 'user') and application.client.user and application.client.user.email:
-        recipient_email = application.client.user.email
-    
+
+    recipient_email = _client_email(application.client)
     if not recipient_email:
         return False
-    
+
     context = {
         'application': application,
         'client': application.client,
         'scheme': application.scheme,
         'status': application.get_status_display(),
     }
-    
-    html_message = render_to_string('emails/application_status.html', context)
-    plain_message = strip_tags(html_message)
-    
+    notification_type = {
+        'APPROVED': 'APPLICATION_APPROVED',
+        'REJECTED': 'APPLICATION_REJECTED',
+    }.get(application.status, 'APPLICATION_SUBMITTED')
+
     try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email]
+        queue_email(
+            application.client.user, notification_type, subject, 'emails/application_status.html', context,
+            recipient_email, related_application=application,
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error queueing email: {e}")
         return False
 
 
 def send_welcome_email(user):
-    """Send welcome email to new users"""
+    """Queue a welcome email to new users"""
     subject = 'Welcome to Agnivridhi CRM'
-    
+
     if not user.email:
         return False
-    
+
     context = {
         'user': user,
         'role': user.get_role_display() if hasattr(user, 'get_role_display') else 'User',
     }
-    
-    html_message = render_to_string('emails/welcome.html', context)
-    plain_message = strip_tags(html_message)
-    
+
     try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
+        queue_email(user, 'WELCOME', subject, 'emails/welcome.html', context, user.email)
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error(f"Error queueing email: {e}")
         return False
@@ -1,21 +1,16 @@
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
-from django.utils.html import strip_tags
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_client_credentials_email(client_credential, login_url=None):
+def queue_client_credentials_email(client_credential, login_url=None, sent_by=None, dispatch=True):
     """
-    Send client credentials (username, password, login link) to the client via email.
+    Queue the client's credentials (username, password, login link) for email.
+
+    Returns the QUEUED Notification. With ``dispatch=False`` the row is left
+    for the caller to deliver (bulk sends batch them over one connection).
     """
-    subject = 'Your Agnivridhi CRM Login Credentials'
-    recipient_email = client_credential.email
-    
-    if not recipient_email:
-        logger.error("No recipient email provided for client credentials")
-        return False
+    from .email_utils import queue_email
 
     resolved_login_url = (
         login_url
@@ -29,27 +24,33 @@ def send_client_credentials_email(client_credential, login_url=None):
         'password': client_credential.plain_password,
         'login_url': resolved_login_url,
     }
+    return queue_email(
+        client_credential.client.user, 'CREDENTIALS', 'Your Agnivridhi CRM Login Credentials',
+        'emails/client_credentials.html', context, client_credential.email,
+        sent_by=sent_by, dispatch=dispatch,
+    )
+
+
+def send_client_credentials_email(client_credential, login_url=None, sent_by=None):
+    """
+    Queue the client's credentials email in the notification outbox.
+
+    The outbox sends it after the current transaction commits and marks the
+    credentials as sent (by ``sent_by``) once delivery succeeds.
+    Returns True when the email was queued.
+    """
+    recipient_email = client_credential.email
     
+    if not recipient_email:
+        logger.error("No recipient email provided for client credentials")
+        return False
+
     try:
-        html_message = render_to_string('emails/client_credentials.html', context)
-        plain_message = strip_tags(html_message)
-        
-        logger.info(f"Attempting to send credentials email to {recipient_email}")
-        logger.info(f"SMTP Settings - Host: {settings.EMAIL_HOST}, Port: {settings.EMAIL_PORT}, TLS: {settings.EMAIL_USE_TLS}")
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email]
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send(fail_silently=False)
-        
-        logger.info(f"Successfully sent credentials email to {recipient_email}")
+        queue_client_credentials_email(client_credential, login_url=login_url, sent_by=sent_by)
+        logger.info(f"Queued credentials email to {recipient_email}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send client credentials email to {recipient_email}: {type(e).__name__}: {str(e)}")
+        logger.error(f"Failed to queue client credentials email to {recipient_email}: {type(e).__name__}: {str(e)}")
         logger.exception("Full traceback:")
         return False
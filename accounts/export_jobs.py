@@ -0,0 +1,351 @@
+"""
+Export definitions and background export jobs for Agnivridhi CRM
+
+Every export (clients, bookings, payments, revenue report, dashboard data) is
+described once here by a builder that turns request params into a queryset
+plus field specs (see accounts.utils.iter_export_rows). The export views use
+the same builders to answer small exports inline; exports above
+EXPORT_ASYNC_THRESHOLD rows (or requested with ``?async=1``) become an
+ExportJob that a worker writes to private storage (accounts.storage, outside
+MEDIA_ROOT) and announces through a notifications.Notification.
+
+Worker modes (settings.EXPORT_JOB_RUNNER):
+    'command' - leave jobs for ``python manage.py process_export_jobs`` (default)
+    'thread'  - start a daemon thread in the web process once the job is
+                committed (single-process/development setups)
+
+The worker touches ExportJob.updated_at as rows are written. A job whose
+worker dies mid-export stops that heartbeat; fail_stale_jobs() (run by
+process_export_jobs) marks jobs silent for EXPORT_JOB_STALE_MINUTES as
+FAILED so the user can start the export again, and a worker that turns out
+to be alive after all cannot flip such a job back to COMPLETED.
+"""
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .utils import full_name_field, write_csv, write_xlsx
+
+logger = logging.getLogger(__name__)
+
+
+def _amount(value):
+    return float(value or 0)
+
+
+def _datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else None
+
+
+def _clients_export(params):
+    from clients.models import Client
+
+    queryset = Client.objects.all()
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    if params.get('sector'):
+        queryset = queryset.filter(sector=params['sector'])
+
+    return {
+        'queryset': queryset,
+        'filename': 'clients',
+        'fields': [
+            {'name': 'id', 'label': 'ID'},
+            {'name': 'company_name', 'label': 'Company Name'},
+            {'name': 'contact_person', 'label': 'Contact Person'},
+            {'name': 'contact_email', 'label': 'Email'},
+            {'name': 'contact_phone', 'label': 'Phone'},
+            {'name': 'get_business_type_display', 'label': 'Business Type'},
+            {'name': 'get_sector_display', 'label': 'Sector'},
+            {'name': 'funding_required', 'label': 'Funding Required (Lakhs)'},
+            {'name': 'get_status_display', 'label': 'Status'},
+            full_name_field('assigned_manager', 'Manager'),
+            full_name_field('assigned_sales', 'Sales'),
+            {'name': 'created_at', 'label': 'Created Date', 'format': _datetime},
+        ],
+    }
+
+
+def _bookings_export(params):
+    from bookings.models import Booking
+
+    queryset = Booking.objects.all()
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+
+    return {
+        'queryset': queryset,
+        'filename': 'bookings',
+        'fields': [
+            {'name': 'booking_id', 'label': 'Booking ID'},
+            {'name': 'client__company_name', 'label': 'Client'},
+            {'name': 'service__name', 'label': 'Service'},
+            {'name': 'amount', 'label': 'Amount'},
+            {'name': 'discount_percent', 'label': 'Discount (%)'},
+            {'name': 'final_amount', 'label': 'Final Amount'},
+            {'name': 'get_status_display', 'label': 'Status'},
+            full_name_field('assigned_to', 'Assigned To'),
+            {'name': 'booking_date', 'label': 'Booking Date', 'format': lambda d: d.strftime('%Y-%m-%d')},
+            {'name': 'created_at', 'label': 'Created Date', 'format': _datetime},
+        ],
+    }
+
+
+def _payments_export(params):
+    from payments.models import Payment
+
+    queryset = Payment.objects.all()
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    if params.get('method'):
+        queryset = queryset.filter(payment_method=params['method'])
+
+    return {
+        'queryset': queryset,
+        'filename': 'payments',
+        'fields': [
+            {'name': 'id', 'label': 'Payment ID'},
+            {'name': 'client__company_name', 'label': 'Client'},
+            {'name': 'booking__booking_id', 'label': 'Booking', 'default': 'N/A'},
+            {'name': 'amount', 'label': 'Amount'},
+            {'name': 'currency', 'label': 'Currency'},
+            {'name': 'get_payment_method_display', 'label': 'Payment Method'},
+            {'name': 'get_status_display', 'label': 'Status'},
+            {'name': 'reference_id', 'label': 'Reference ID'},
+            full_name_field('received_by', 'Received By'),
+            {'name': 'payment_date', 'label': 'Payment Date', 'format': _datetime, 'default': 'N/A'},
+            {'name': 'notes', 'label': 'Notes'},
+        ],
+    }
+
+
+def _revenue_report_export(params):
+    from .revenue_report import revenue_report_queryset, revenue_report_totals
+
+    queryset = revenue_report_queryset(params)
+
+    def summary():
+        totals = revenue_report_totals(params)
+        return [
+            ('Clients', totals['clients']),
+            ('Total Pitched', _amount(totals['total_pitched'])),
+            ('Total with GST', _amount(totals['total_with_gst'])),
+            ('Total Received', _amount(totals['total_received'])),
+            ('Total Pending', _amount(totals['total_pending'])),
+        ]
+
+    def payment_status(pending, received):
+        return 'Paid' if pending == 0 else ('Partial' if (received or 0) > 0 else 'Unpaid')
+
+    return {
+        'queryset': queryset,
+        'filename': 'client_revenue_report',
+        'format': 'xlsx',
+        'sheet_title': 'Client Revenue',
+        'summary': summary,
+        'fields': [
+            {'name': 'company_name', 'label': 'Client/Company'},
+            full_name_field('assigned_sales', 'Sales Employee', default='', username_fallback=True),
+            full_name_field('assigned_manager', 'Manager', default='', username_fallback=True),
+            {'name': 'total_pitched_amount', 'label': 'Pitched Amount', 'format': _amount},
+            {'name': 'gst_percentage', 'label': 'GST %', 'format': _amount},
+            {'name': 'gst_amount', 'label': 'GST Amount', 'format': _amount},
+            {'name': 'total_with_gst', 'label': 'Total with GST', 'format': _amount},
+            {'name': 'received_amount', 'label': 'Received', 'format': _amount},
+            {'name': 'pending_amount', 'label': 'Pending', 'format': _amount},
+            {'label': 'Status', 'names': ('pending_amount', 'received_amount'), 'format': payment_status},
+        ],
+    }
+
+
+def _dashboard_export(params):
+    from payments.models import DailyRevenueRollup
+    from .dashboard_metrics import SUCCESS_STATUSES, parse_payment_filters, payment_filter_q
+
+    filter_q = payment_filter_q(**parse_payment_filters(params))
+    queryset = DailyRevenueRollup.objects.filter(
+        status__in=SUCCESS_STATUSES, payment_count__gt=0
+    ).filter(filter_q).order_by('day', 'payment_method')
+
+    return {
+        'queryset': queryset,
+        'filename': 'dashboard_revenue',
+        'fields': [
+            {'name': 'day', 'label': 'Date', 'format': lambda d: d.strftime('%Y-%m-%d')},
+            {'name': 'get_payment_method_display', 'label': 'Method', 'default': 'N/A'},
+            full_name_field('received_by', 'Salesperson'),
+            {'name': 'get_status_display', 'label': 'Status'},
+            {'name': 'payment_count', 'label': 'Payments'},
+            {'name': 'total_amount', 'label': 'Amount'},
+        ],
+    }
+
+
+# ExportJob.Kind value -> builder(params) returning the export spec
+EXPORTS = {
+    'CLIENTS': _clients_export,
+    'BOOKINGS': _bookings_export,
+    'PAYMENTS': _payments_export,
+    'REVENUE_REPORT': _revenue_report_export,
+    'DASHBOARD': _dashboard_export,
+}
+
+
+def build_export(kind, params):
+    """Return the export spec for ``kind`` built from a request.GET-like mapping."""
+    return EXPORTS[kind](params)
+
+
+def export_params(query_dict):
+    """Plain JSON-serialisable copy of request.GET (control params dropped)."""
+    return {k: v for k, v in query_dict.items() if k not in ('async', 'format')}
+
+
+def should_run_async(spec, params):
+    """True when the export was explicitly requested async or is above the row threshold."""
+    if str(params.get('async', '')).lower() in ('1', 'true', 'yes'):
+        return True
+    threshold = getattr(settings, 'EXPORT_ASYNC_THRESHOLD', 5000)
+    return spec['queryset'].count() > threshold
+
+
+def enqueue_export(user, kind, params):
+    """Create an ExportJob for ``user`` and hand it to the configured worker."""
+    from .models import ExportJob
+
+    job = ExportJob.objects.create(user=user, kind=kind, params=export_params(params))
+    if getattr(settings, 'EXPORT_JOB_RUNNER', 'command') == 'thread':
+        transaction.on_commit(lambda: _start_thread(job.pk))
+    return job
+
+
+def _start_thread(job_id):
+    thread = threading.Thread(target=_run_in_thread, args=(job_id,), name=f'export-job-{job_id}', daemon=True)
+    thread.start()
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_export_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def fail_stale_jobs(minutes=None):
+    """
+    Mark RUNNING jobs without a heartbeat for ``minutes`` (default
+    EXPORT_JOB_STALE_MINUTES) as FAILED; returns how many.
+    """
+    from .models import ExportJob
+
+    minutes = minutes or getattr(settings, 'EXPORT_JOB_STALE_MINUTES', 60)
+    now = timezone.now()
+    return ExportJob.objects.filter(
+        status=ExportJob.Status.RUNNING, updated_at__lt=now - timedelta(minutes=minutes)
+    ).update(
+        status=ExportJob.Status.FAILED,
+        error_message=f'Export worker stopped responding (no progress for {minutes} minutes)',
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def run_export_job(job_id):
+    """
+    Claim and run a pending export job.
+
+    Returns the ExportJob, or None if another worker already claimed it.
+    """
+    from .models import ExportJob
+
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING, started_at=now, updated_at=now
+    )
+    if not claimed:
+        return None
+    job = ExportJob.objects.select_related('user').get(pk=job_id)
+    running = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.RUNNING)
+
+    try:
+        spec = build_export(job.kind, job.params)
+        job.total_rows = spec['queryset'].count()
+        running.update(total_rows=job.total_rows, updated_at=timezone.now())
+
+        def progress(done):
+            # Doubles as the heartbeat fail_stale_jobs() watches
+            running.update(processed_rows=done, updated_at=timezone.now())
+
+        fmt = spec.get('format', 'csv')
+        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{spec['filename']}_{timestamp}.{fmt}"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, filename)
+            if fmt == 'xlsx':
+                summary = spec.get('summary')
+                write_xlsx(
+                    path, spec['queryset'], spec['fields'],
+                    sheet_title=spec.get('sheet_title', 'Data'),
+                    summary=summary() if summary else None,
+                    progress=progress,
+                )
+            else:
+                with open(path, 'w', newline='', encoding='utf-8') as fh:
+                    write_csv(fh, spec['queryset'], spec['fields'], progress=progress)
+            with open(path, 'rb') as fh:
+                job.file.save(filename, File(fh), save=False)
+
+        job.finished_at = timezone.now()
+        completed = running.update(
+            status=ExportJob.Status.COMPLETED, processed_rows=job.total_rows, file=job.file.name,
+            finished_at=job.finished_at, updated_at=job.finished_at,
+        )
+    except Exception as e:
+        logger.exception('Export job %s failed', job_id)
+        running.update(
+            status=ExportJob.Status.FAILED, error_message=str(e), finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        job.refresh_from_db()
+        return job
+
+    if not completed:
+        # Already given up on by fail_stale_jobs(); the user was told it failed
+        logger.warning('Export job %s finished after it was marked failed; discarding the file', job_id)
+        job.file.delete(save=False)
+        job.refresh_from_db()
+        return job
+
+    job.refresh_from_db()
+    _notify_ready(job)
+    return job
+
+
+def _notify_ready(job):
+    """Queue a Notification telling the requester that the export can be downloaded"""
+    from notifications.models import Notification
+    from notifications.outbox import enqueue
+
+    try:
+        download_url = reverse('accounts:export_job_download', args=[job.pk])
+        enqueue(
+            recipient=job.user,
+            notification_type=Notification.NotificationType.DOCUMENT_READY,
+            subject=f'Your {job.get_kind_display()} export is ready',
+            message=(
+                f'Your {job.get_kind_display()} export ({job.total_rows} rows) is ready. '
+                f'Download it from {download_url}'
+            ),
+            email_to=job.user.email or None,
+        )
+    except Exception:
+        # Don't fail the export if the notification cannot be recorded
+        logger.exception('Could not create notification for export job %s', job.pk)
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.export_jobs import fail_stale_jobs, run_export_job
+from accounts.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending background export jobs (use with EXPORT_JOB_RUNNER=command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls in --loop mode (default: 5)',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=None,
+            help='Fail jobs left RUNNING for longer than this (default: EXPORT_JOB_STALE_MINUTES)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stale = fail_stale_jobs(options['stale_minutes'])
+            if stale:
+                self.stdout.write(self.style.WARNING(f'⚠️  Failed {stale} export job(s) stuck in RUNNING'))
+            processed = self._drain()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'✅ Processed {processed} export job(s)'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _drain(self):
+        processed = 0
+        pending = ExportJob.objects.filter(status=ExportJob.Status.PENDING).order_by('created_at')
+        for job_id in pending.values_list('id', flat=True):
+            job = run_export_job(job_id)
+            if job is None:
+                continue  # claimed by another worker
+            processed += 1
+            if job.status == ExportJob.Status.FAILED:
+                self.stdout.write(self.style.ERROR(f'❌ Export job #{job.pk} failed: {job.error_message}'))
+            else:
+                self.stdout.write(f'📦 Export job #{job.pk}: {job.total_rows} rows → {job.file.name}')
+        return processed
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.search_index import fulltext_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global search index from clients, bookings and applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding global search index...')
+        with transaction.atomic():
+            counts = rebuild_index(chunk_size=options['chunk_size'])
+        for entity_type, written in counts.items():
+            self.stdout.write(f'  {entity_type}: {written}')
+        backend = fulltext_backend() or 'LIKE fallback'
+        self.stdout.write(self.style.SUCCESS(f'✅ Search index rebuilt ({backend})'))
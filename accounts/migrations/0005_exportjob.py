@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CLIENTS', 'Clients'), ('BOOKINGS', 'Bookings'), ('PAYMENTS', 'Payments'), ('REVENUE_REPORT', 'Revenue Report'), ('DASHBOARD', 'Dashboard Revenue Data')], help_text='What is being exported', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Filters/sorting captured from the export request')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', help_text='Job status', max_length=10)),
+                ('total_rows', models.PositiveIntegerField(default=0, help_text='Rows to export (known once the job starts)')),
+                ('processed_rows', models.PositiveIntegerField(default=0, help_text='Rows written so far')),
+                ('file', models.FileField(blank=True, help_text='Generated export file', upload_to='exports/%Y/%m/')),
+                ('error_message', models.TextField(blank=True, help_text='Error message if the export failed', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(help_text='User who requested the export', on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='accounts_ex_user_id_bd896b_idx'), models.Index(fields=['status', 'created_at'], name='accounts_ex_status_d94fed_idx')],
+            },
+        ),
+    ]
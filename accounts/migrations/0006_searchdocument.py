@@ -0,0 +1,126 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+FTS_TABLE = 'accounts_searchdocument_fts'
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, content, content='accounts_searchdocument', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER accounts_searchdocument_ai AFTER INSERT ON accounts_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER accounts_searchdocument_ad AFTER DELETE ON accounts_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER accounts_searchdocument_au AFTER UPDATE ON accounts_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS accounts_searchdocument_ai',
+    'DROP TRIGGER IF EXISTS accounts_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS accounts_searchdocument_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def add_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+                cursor.execute('DROP TABLE temp.fts5_probe')
+        except Exception:
+            # SQLite built without FTS5/trigram (< 3.34): search falls back to LIKE
+            return
+        for sql in SQLITE_FORWARD:
+            schema_editor.execute(sql)
+    elif connection.vendor == 'mysql':
+        try:
+            schema_editor.execute(
+                'ALTER TABLE accounts_searchdocument ADD FULLTEXT INDEX searchdoc_fulltext (title, content) WITH PARSER ngram'
+            )
+        except Exception:
+            # MariaDB has no ngram parser; use the default word parser
+            schema_editor.execute(
+                'ALTER TABLE accounts_searchdocument ADD FULLTEXT INDEX searchdoc_fulltext (title, content)'
+            )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for sql in SQLITE_REVERSE:
+            schema_editor.execute(sql)
+    elif connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE accounts_searchdocument DROP INDEX searchdoc_fulltext')
+
+
+def backfill_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('accounts', 'SearchDocument')
+    Client = apps.get_model('clients', 'Client')
+    Booking = apps.get_model('bookings', 'Booking')
+    Application = apps.get_model('applications', 'Application')
+
+    def join(*parts):
+        return ' '.join(str(p) for p in parts if p)
+
+    sources = (
+        ('CLIENT', Client.objects.all(), lambda c: (c.company_name, join(
+            c.company_name, c.client_id, c.contact_person, c.contact_email,
+            c.contact_phone, c.pan_number, c.gst_number))),
+        ('BOOKING', Booking.objects.select_related('client', 'service'), lambda b: (b.booking_id, join(
+            b.booking_id, b.client.company_name, b.service.name))),
+        ('APPLICATION', Application.objects.select_related('client', 'scheme'), lambda a: (a.application_id, join(
+            a.application_id, a.client.company_name, a.scheme.name))),
+    )
+    for entity_type, queryset, build in sources:
+        batch = []
+        for obj in queryset.order_by('pk').iterator(chunk_size=1000):
+            title, content = build(obj)
+            batch.append(SearchDocument(entity_type=entity_type, object_id=obj.pk, title=title[:255], content=content))
+            if len(batch) >= 1000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_exportjob'),
+        ('clients', '0011_alter_client_sector'),
+        ('bookings', '0004_alter_booking_status_servicedocumentrequirement'),
+        ('applications', '0002_remove_unique_constraint'),
+        ('schemes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('CLIENT', 'Client'), ('BOOKING', 'Booking'), ('APPLICATION', 'Application')], help_text='Kind of record this document points to', max_length=12)),
+                ('object_id', models.PositiveBigIntegerField(help_text='Primary key of the indexed record')),
+                ('title', models.CharField(help_text='Primary display text (company name, booking/application ID)', max_length=255)),
+                ('content', models.TextField(blank=True, help_text='All searchable text for the record')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('entity_type', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
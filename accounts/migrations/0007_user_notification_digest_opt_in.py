@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_digest_opt_in',
+            field=models.BooleanField(default=False, help_text='Receive approval and payment updates as one periodic digest instead of one message each'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:26
+
+import os
+import shutil
+
+import accounts.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_existing_exports(apps, schema_editor):
+    # Files written before this migration sit under the web-served MEDIA_ROOT
+    ExportJob = apps.get_model('accounts', 'ExportJob')
+    storage = accounts.storage.ExportStorage()
+    for job in ExportJob.objects.exclude(file=''):
+        old_path = os.path.join(settings.MEDIA_ROOT, job.file.name)
+        if not os.path.exists(old_path):
+            continue
+        new_path = storage.path(job.file.name)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        shutil.move(old_path, new_path)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_notification_digest_opt_in'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(blank=True, help_text='Generated export file', storage=accounts.storage.ExportStorage(), upload_to=accounts.storage.export_upload_to),
+        ),
+        migrations.RunPython(move_existing_exports, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from .constants import (
     ROLE_ADMIN, ROLE_MANAGER, ROLE_SALES, ROLE_CLIENT,
     ROLE_OWNER, ROLE_SUPERUSER
 )
+from .storage import ExportStorage, export_upload_to
 
 class User(AbstractUser):
     """
@@ -76,6 +77,11 @@ class User(AbstractUser):
         help_text=_('User consent for email notifications')
     )
     
+    notification_digest_opt_in = models.BooleanField(
+        default=False,
+        help_text=_('Receive approval and payment updates as one periodic digest instead of one message each')
+    )
+    
     is_owner = models.BooleanField(
         default=False,
         help_text=_('Marks this Admin as the company owner for special dashboard access')
@@ -225,3 +231,139 @@ class SiteSettings(models.Model):
     def get(cls):
         """Return the single settings row or None if not created yet."""
         return cls.objects.first()
+
+
+class ExportJob(models.Model):
+    """
+    Export that runs outside the request/response cycle.
+
+    The file is written to the private EXPORT_FILES_DIR (accounts.storage) by
+    accounts.export_jobs and the requesting user is notified once it is ready
+    for download through export_job_download.
+    """
+
+    class Kind(models.TextChoices):
+        CLIENTS = 'CLIENTS', _('Clients')
+        BOOKINGS = 'BOOKINGS', _('Bookings')
+        PAYMENTS = 'PAYMENTS', _('Payments')
+        REVENUE_REPORT = 'REVENUE_REPORT', _('Revenue Report')
+        DASHBOARD = 'DASHBOARD', _('Dashboard Revenue Data')
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        COMPLETED = 'COMPLETED', _('Completed')
+        FAILED = 'FAILED', _('Failed')
+
+    user = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        help_text=_('User who requested the export')
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=Kind.choices,
+        help_text=_('What is being exported')
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_('Filters/sorting captured from the export request')
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        help_text=_('Job status')
+    )
+    total_rows = models.PositiveIntegerField(
+        default=0,
+        help_text=_('Rows to export (known once the job starts)')
+    )
+    processed_rows = models.PositiveIntegerField(
+        default=0,
+        help_text=_('Rows written so far')
+    )
+    file = models.FileField(
+        upload_to=export_upload_to,
+        storage=ExportStorage(),
+        blank=True,
+        help_text=_('Generated export file')
+    )
+    error_message = models.TextField(
+        blank=True,
+        null=True,
+        help_text=_('Error message if the export failed')
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text=_('Last progress heartbeat from the worker')
+    )
+
+    class Meta:
+        verbose_name = _('Export Job')
+        verbose_name_plural = _('Export Jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Completion percentage (0-100)"""
+        if self.status == self.Status.COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search row for a Client, Booking or Application.
+
+    Kept in sync by accounts.signals and queried by accounts.search_index,
+    which adds the full-text index for the database backend (SQLite FTS5 or
+    MySQL FULLTEXT) in the migration.
+    """
+
+    class EntityType(models.TextChoices):
+        CLIENT = 'CLIENT', _('Client')
+        BOOKING = 'BOOKING', _('Booking')
+        APPLICATION = 'APPLICATION', _('Application')
+
+    entity_type = models.CharField(
+        max_length=12,
+        choices=EntityType.choices,
+        help_text=_('Kind of record this document points to')
+    )
+    object_id = models.PositiveBigIntegerField(
+        help_text=_('Primary key of the indexed record')
+    )
+    title = models.CharField(
+        max_length=255,
+        help_text=_('Primary display text (company name, booking/application ID)')
+    )
+    content = models.TextField(
+        blank=True,
+        help_text=_('All searchable text for the record')
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} #{self.object_id}: {self.title}"
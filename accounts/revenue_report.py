@@ -0,0 +1,227 @@
+"""
+Revenue report queries for Agnivridhi CRM
+
+The revenue report page and its Excel export compile their filters here, so
+both run the same query (same WHERE, same ORDER BY on sort column + id).
+
+- Totals over the filtered client set are cached under a normalized filter
+  signature and the dashboard cache version, so they are recomputed only
+  after a Client/Booking/Payment change (see accounts.dashboard_cache).
+- The page is paginated with a keyset cursor on (sort column, id): each page
+  is an indexed range read, so page 200 costs the same as page 1 and no
+  COUNT or OFFSET is needed.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+SORT_FIELDS = {
+    'company': 'company_name',
+    'sales': 'assigned_sales__first_name',
+    'manager': 'assigned_manager__first_name',
+    'pitched': 'total_pitched_amount',
+    'gst': 'gst_percentage',
+    'gst_amount': 'gst_amount',
+    'total': 'total_with_gst',
+    'received': 'received_amount',
+    'pending': 'pending_amount',
+    'created_at': 'created_at',
+}
+
+# Sorts on a nullable related column; NULLs become '' so the cursor can compare them
+NULLABLE_SORTS = {'sales', 'manager'}
+
+PAGE_SIZE = 50
+
+CURSOR_SALT = 'accounts.revenue_report.cursor'
+
+
+def report_filters(params):
+    """Normalize the report's search/manager/sales/sort/order params."""
+    sort = (params.get('sort') or '').strip()
+    order = (params.get('order') or '').strip()
+    return {
+        'search': ' '.join((params.get('search') or '').split()),
+        'manager': (params.get('manager') or '').strip(),
+        'sales': (params.get('sales') or '').strip(),
+        'sort': sort if sort in SORT_FIELDS else 'created_at',
+        'order': 'asc' if order == 'asc' else 'desc',
+    }
+
+
+def filter_signature(filters):
+    """Stable digest of the filters that change which clients are included."""
+    raw = '&'.join(f'{key}={filters[key]}' for key in ('search', 'manager', 'sales'))
+    return hashlib.md5(raw.lower().encode()).hexdigest()
+
+
+def filtered_clients(filters):
+    """Clients matching the search/manager/sales filters (unordered)."""
+    from clients.models import Client
+
+    qs = Client.objects.all()
+    search_query = filters['search']
+    if search_query:
+        qs = qs.filter(
+            Q(company_name__icontains=search_query) |
+            Q(contact_person__icontains=search_query) |
+            Q(assigned_sales__username__icontains=search_query) |
+            Q(assigned_sales__first_name__icontains=search_query) |
+            Q(assigned_sales__last_name__icontains=search_query) |
+            Q(assigned_manager__username__icontains=search_query) |
+            Q(assigned_manager__first_name__icontains=search_query) |
+            Q(assigned_manager__last_name__icontains=search_query)
+        )
+    if filters['manager']:
+        qs = qs.filter(assigned_manager_id=filters['manager'])
+    if filters['sales']:
+        qs = qs.filter(assigned_sales_id=filters['sales'])
+    return qs
+
+
+def _sort_expression(sort):
+    field = SORT_FIELDS[sort]
+    if sort in NULLABLE_SORTS:
+        return Coalesce(F(field), Value(''))
+    return F(field)
+
+
+def ordered_clients(filters, reverse=False):
+    """Filtered clients ordered by the sort column, then id (aliased as ``sort_value``)."""
+    descending = (filters['order'] == 'desc') != reverse
+    prefix = '-' if descending else ''
+    return (
+        filtered_clients(filters)
+        .alias(sort_value=_sort_expression(filters['sort']))
+        .order_by(f'{prefix}sort_value', f'{prefix}pk')
+    )
+
+
+def revenue_report_queryset(params):
+    """Clients filtered and sorted by the revenue report's search/manager/sales/sort/order params."""
+    return ordered_clients(report_filters(params))
+
+
+def revenue_report_totals(params):
+    """
+    Client count and revenue sums over the filtered set, cached.
+
+    Keys combine the dashboard cache version with filter_signature(), so any
+    change to a client or payment (which bumps the version) invalidates them.
+    """
+    from .dashboard_cache import current_version, versioned_caching_enabled
+
+    filters = report_filters(params)
+    cached = versioned_caching_enabled()
+    key = f'revenue_report:totals:{current_version()}:{filter_signature(filters)}'
+    totals = cache.get(key) if cached else None
+    if totals is None:
+        totals = filtered_clients(filters).aggregate(
+            clients=Count('id'),
+            total_pitched=Sum('total_pitched_amount'),
+            total_with_gst=Sum('total_with_gst'),
+            total_received=Sum('received_amount'),
+            total_pending=Sum('pending_amount'),
+        )
+        if cached:
+            cache.set(key, totals, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return totals
+
+
+def _encode_cursor(client, sort):
+    value = client.cursor_value
+    return signing.dumps([sort, str(value) if value is not None else '', client.pk], salt=CURSOR_SALT)
+
+
+def _decode_cursor(token, sort):
+    """(value, pk) from a cursor token, or None if it is invalid or for another sort."""
+    from clients.models import Client
+
+    try:
+        cursor_sort, value, pk = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if cursor_sort != sort:
+        return None
+    if sort not in NULLABLE_SORTS:
+        value = Client._meta.get_field(SORT_FIELDS[sort]).to_python(value)
+    return value, pk
+
+
+class KeysetPage:
+    """One page of clients plus the cursors for its neighbours."""
+
+    def __init__(self, object_list, has_next, has_previous, filters):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.sort = filters['sort']
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return _encode_cursor(self.object_list[-1], self.sort)
+        return ''
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return _encode_cursor(self.object_list[0], self.sort)
+        return ''
+
+
+def revenue_report_page(params, page_size=PAGE_SIZE):
+    """
+    One page of the revenue report.
+
+    ``params['after']`` / ``params['before']`` are cursors taken from a
+    previous page's next_cursor/previous_cursor; without either the first
+    page is returned. Invalid cursors also fall back to the first page.
+    """
+    filters = report_filters(params)
+    after = params.get('after')
+    before = params.get('before')
+    cursor = _decode_cursor(after or before, filters['sort']) if (after or before) else None
+    backwards = bool(before) and not after and cursor is not None
+
+    qs = (
+        ordered_clients(filters, reverse=backwards)
+        .select_related('assigned_sales', 'assigned_manager', 'created_by')
+        .annotate(cursor_value=F('sort_value'))
+    )
+    if cursor is not None:
+        value, pk = cursor
+        # Rows strictly after the cursor in the (possibly reversed) ordering
+        descending = (filters['order'] == 'desc') != backwards
+        op = 'lt' if descending else 'gt'
+        qs = qs.filter(
+            Q(**{f'sort_value__{op}': value}) | Q(sort_value=value, **{f'pk__{op}': pk})
+        )
+
+    rows = list(qs[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=more, filters=filters)
+    return KeysetPage(rows, has_next=more, has_previous=cursor is not None, filters=filters)
@@ -0,0 +1,305 @@
+"""
+Global search index for Agnivridhi CRM
+
+Clients, bookings and applications are flattened into SearchDocument rows
+(kept current by accounts.signals) so the global search is one ranked query
+against one table instead of icontains scans over three joined tables.
+
+The full-text index depends on the database backend:
+- SQLite: external-content FTS5 table using the trigram tokenizer, so terms
+  of 3+ characters match anywhere inside a word, like the old icontains
+- MySQL: FULLTEXT index (ngram parser where available)
+- anything else, or any term shorter than 3 characters: LIKE on the document
+
+Identifier-shaped queries (phone, PAN, GSTIN, CLI-/BKG-/APP- IDs) skip the
+index and go straight to the indexed columns on the source tables.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When, Window
+from django.db.models.functions import RowNumber
+
+from .models import SearchDocument
+
+
+FTS_TABLE = 'accounts_searchdocument_fts'
+MIN_FULLTEXT_TERM = 3
+VERSION_KEY = 'search:version'
+
+_backend_cache = {}
+
+
+def index_version():
+    """Return the search index version; it changes whenever a document does."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY) or time.time_ns()
+    return version
+
+
+def bump_index_version():
+    """Invalidate results cached against the search index (see api.typeahead)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _index_changed():
+    bump_index_version()
+    transaction.on_commit(bump_index_version)
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+def client_document(client):
+    """Return (title, content) for a Client."""
+    return client.company_name, _join(
+        client.company_name, client.client_id, client.contact_person,
+        client.contact_email, client.contact_phone, client.pan_number,
+        client.gst_number,
+    )
+
+
+def booking_document(booking):
+    """Return (title, content) for a Booking."""
+    return booking.booking_id, _join(
+        booking.booking_id, booking.client.company_name, booking.service.name,
+    )
+
+
+def application_document(application):
+    """Return (title, content) for an Application."""
+    return application.application_id, _join(
+        application.application_id, application.client.company_name,
+        application.scheme.name,
+    )
+
+
+def _entity_type(instance):
+    return {
+        'Client': SearchDocument.EntityType.CLIENT,
+        'Booking': SearchDocument.EntityType.BOOKING,
+        'Application': SearchDocument.EntityType.APPLICATION,
+    }[type(instance).__name__]
+
+
+_BUILDERS = {
+    SearchDocument.EntityType.CLIENT: client_document,
+    SearchDocument.EntityType.BOOKING: booking_document,
+    SearchDocument.EntityType.APPLICATION: application_document,
+}
+
+
+def index_object(instance):
+    """Create or refresh the search document for a Client/Booking/Application."""
+    entity_type = _entity_type(instance)
+    title, content = _BUILDERS[entity_type](instance)
+    SearchDocument.objects.update_or_create(
+        entity_type=entity_type,
+        object_id=instance.pk,
+        defaults={'title': title[:255], 'content': content},
+    )
+    _index_changed()
+
+
+def remove_object(instance):
+    """Drop the search document for a deleted record."""
+    SearchDocument.objects.filter(entity_type=_entity_type(instance), object_id=instance.pk).delete()
+    _index_changed()
+
+
+def _source_querysets():
+    from clients.models import Client
+    from bookings.models import Booking
+    from applications.models import Application
+    return (
+        (SearchDocument.EntityType.CLIENT, Client.objects.all()),
+        (SearchDocument.EntityType.BOOKING, Booking.objects.select_related('client', 'service')),
+        (SearchDocument.EntityType.APPLICATION, Application.objects.select_related('client', 'scheme')),
+    )
+
+
+def rebuild_index(chunk_size=1000):
+    """
+    Rebuild every search document from the source tables.
+
+    Returns a dict of entity type -> documents written.
+    """
+    counts = {}
+    SearchDocument.objects.all().delete()
+    for entity_type, queryset in _source_querysets():
+        builder = _BUILDERS[entity_type]
+        batch, written = [], 0
+        for obj in queryset.order_by('pk').iterator(chunk_size=chunk_size):
+            title, content = builder(obj)
+            batch.append(SearchDocument(
+                entity_type=entity_type, object_id=obj.pk, title=title[:255], content=content,
+            ))
+            if len(batch) >= chunk_size:
+                SearchDocument.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            written += len(batch)
+        counts[entity_type] = written
+    _index_changed()
+    return counts
+
+
+def fulltext_backend():
+    """Return 'fts5', 'mysql' or None for the default database."""
+    key = (connection.vendor, connection.settings_dict.get('NAME'))
+    if key not in _backend_cache:
+        backend = None
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                if cursor.fetchone():
+                    backend = 'fts5'
+        elif connection.vendor == 'mysql':
+            backend = 'mysql'
+        _backend_cache[key] = backend
+    return _backend_cache[key]
+
+
+def _terms(query):
+    return [t for t in query.split() if t]
+
+
+def _fts5_query(terms):
+    # Quote every term so user input is never parsed as FTS5 syntax
+    return ' '.join('"%s"' % t.replace('"', '""') for t in terms)
+
+
+def _mysql_query(terms):
+    return ' '.join('+"%s"' % t.replace('"', ' ') for t in terms)
+
+
+def _ranked_fts5(terms, limit):
+    sql = f"""
+        SELECT entity_type, object_id FROM (
+            SELECT entity_type, object_id,
+                   ROW_NUMBER() OVER (PARTITION BY entity_type ORDER BY score, object_id DESC) AS rn
+            FROM (
+                SELECT d.entity_type, d.object_id, bm25({FTS_TABLE}, 10.0, 1.0) AS score
+                FROM {FTS_TABLE}
+                JOIN accounts_searchdocument d ON d.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH %s
+            )
+        ) WHERE rn <= %s
+        ORDER BY entity_type, rn
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_fts5_query(terms), limit])
+        return cursor.fetchall()
+
+
+def _ranked_mysql(terms, limit):
+    sql = """
+        SELECT entity_type, object_id FROM (
+            SELECT entity_type, object_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY entity_type
+                       ORDER BY MATCH(title, content) AGAINST (%s IN BOOLEAN MODE) DESC, object_id DESC
+                   ) AS rn
+            FROM accounts_searchdocument
+            WHERE MATCH(title, content) AGAINST (%s IN BOOLEAN MODE)
+        ) ranked WHERE rn <= %s
+        ORDER BY entity_type, rn
+    """
+    match = _mysql_query(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, match, limit])
+        return cursor.fetchall()
+
+
+def _ranked_like(query, terms, limit):
+    qs = SearchDocument.objects.all()
+    for term in terms:
+        qs = qs.filter(content__icontains=term)
+    rank = Case(
+        When(title__iexact=query, then=Value(0)),
+        When(title__istartswith=query, then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+    qs = qs.annotate(rn=Window(
+        RowNumber(), partition_by=F('entity_type'), order_by=[rank.asc(), F('object_id').desc()],
+    )).filter(rn__lte=limit)
+    return list(qs.order_by('entity_type', 'rn').values_list('entity_type', 'object_id'))
+
+
+def identifier_search(query, limit_per_type=10):
+    """
+    Indexed equality/prefix lookup for identifier-shaped queries.
+
+    Returns the same shape as search(), or None when the query is not an
+    identifier or nothing matches it.
+    """
+    from clients.identifiers import classify_identifier, client_identifier_q
+    from clients.models import Client
+    from bookings.models import Booking
+    from applications.models import Application
+
+    identifier = classify_identifier(query)
+    if identifier is None:
+        return None
+    kind, value, exact = identifier
+    lookup = 'exact' if exact else 'startswith'
+
+    results = {entity_type: [] for entity_type in SearchDocument.EntityType.values}
+    if kind == 'booking_id':
+        results[SearchDocument.EntityType.BOOKING] = list(
+            Booking.objects.filter(**{f'booking_id__{lookup}': value})
+            .order_by('-pk').values_list('pk', flat=True)[:limit_per_type]
+        )
+    elif kind == 'application_id':
+        results[SearchDocument.EntityType.APPLICATION] = list(
+            Application.objects.filter(**{f'application_id__{lookup}': value})
+            .order_by('-pk').values_list('pk', flat=True)[:limit_per_type]
+        )
+    else:
+        results[SearchDocument.EntityType.CLIENT] = list(
+            Client.objects.filter(client_identifier_q(kind, value, exact))
+            .order_by('-pk').values_list('pk', flat=True)[:limit_per_type]
+        )
+    return results if any(results.values()) else None
+
+
+def search(query, limit_per_type=10):
+    """
+    Search the index with a single query.
+
+    Identifier-shaped queries are tried against the indexed identifier
+    columns first and only fall through to the index when nothing matches.
+
+    Returns a dict of entity type -> list of object ids, best match first,
+    at most ``limit_per_type`` each.
+    """
+    results = {entity_type: [] for entity_type in SearchDocument.EntityType.values}
+    terms = _terms(query)
+    if not terms:
+        return results
+
+    identifier_hits = identifier_search(query, limit_per_type)
+    if identifier_hits is not None:
+        return identifier_hits
+
+    backend = fulltext_backend() if min(len(t) for t in terms) >= MIN_FULLTEXT_TERM else None
+    if backend == 'fts5':
+        rows = _ranked_fts5(terms, limit_per_type)
+    elif backend == 'mysql':
+        rows = _ranked_mysql(terms, limit_per_type)
+    else:
+        rows = _ranked_like(query, terms, limit_per_type)
+
+    for entity_type, object_id in rows:
+        results[entity_type].append(object_id)
+    return results
@@ -4,8 +4,10 @@ Django signals for accounts app.
 Handles automated actions on user events:
 - Reset user session when role changes (force re-login for security)
 - Log role changes for audit trail
+- Invalidate cached dashboards when business data or users change
 """
-from django.db.models.signals import pre_save, post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.sessions.models import Session
 from .models import User
@@ -77,3 +79,89 @@ def log_user_creation(sender, instance, created, **kwargs):
             f"New user created: {instance.username} "
             f"(Role: {instance.get_role_display()}, Email: {instance.email})"
         )
+
+
+# Models whose changes make cached dashboards stale (see accounts.dashboard_cache)
+DASHBOARD_SOURCE_MODELS = (
+    'clients.Client',
+    'bookings.Booking',
+    'payments.Payment',
+    'applications.Application',
+    'edit_requests.EditRequest',
+)
+
+
+def invalidate_dashboards(sender, **kwargs):
+    """
+    Bump the dashboard cache version.
+    
+    Bumped immediately and again on commit, so a dashboard rebuilt from
+    pre-commit data by a concurrent request cannot outlive the transaction.
+    """
+    from .dashboard_cache import bump_version
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+for _model in DASHBOARD_SOURCE_MODELS:
+    post_save.connect(invalidate_dashboards, sender=_model, dispatch_uid=f'dashboard_cache_save_{_model}')
+    post_delete.connect(invalidate_dashboards, sender=_model, dispatch_uid=f'dashboard_cache_delete_{_model}')
+
+
+@receiver(post_save, sender=User, dispatch_uid='dashboard_cache_save_user')
+def invalidate_dashboards_on_user_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Team and user counts on the manager/admin dashboards follow role changes,
+    new staff and reassignment. The last_login write on every sign-in is
+    not such a change and leaves the caches alone.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_dashboards(sender, **kwargs)
+
+
+post_delete.connect(invalidate_dashboards, sender=User, dispatch_uid='dashboard_cache_delete_user')
+
+
+# Models mirrored into the global search index (see accounts.search_index)
+SEARCH_SOURCE_MODELS = (
+    'clients.Client',
+    'bookings.Booking',
+    'applications.Application',
+)
+
+
+def update_search_document(sender, instance, **kwargs):
+    """
+    Refresh the search document for a saved record.
+    
+    Booking and application documents embed the client's company name, so a
+    renamed client also re-indexes its bookings and applications.
+    """
+    from .models import SearchDocument
+    from .search_index import index_object
+    
+    renamed = False
+    if sender._meta.label == 'clients.Client':
+        renamed = SearchDocument.objects.filter(
+            entity_type=SearchDocument.EntityType.CLIENT, object_id=instance.pk
+        ).exclude(title=instance.company_name).exists()
+    
+    index_object(instance)
+    
+    if renamed:
+        for booking in instance.bookings.select_related('client', 'service'):
+            index_object(booking)
+        for application in instance.applications.select_related('client', 'scheme'):
+            index_object(application)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    """Drop the search document of a deleted record."""
+    from .search_index import remove_object
+    remove_object(instance)
+
+
+for _model in SEARCH_SOURCE_MODELS:
+    post_save.connect(update_search_document, sender=_model, dispatch_uid=f'search_index_save_{_model}')
+    post_delete.connect(remove_search_document, sender=_model, dispatch_uid=f'search_index_delete_{_model}')
@@ -0,0 +1,53 @@
+"""
+Private file storage for Agnivridhi CRM
+
+Background exports (accounts.export_jobs) contain whole client, payment and
+revenue tables, so they are not written under MEDIA_ROOT, which the
+deployment serves as plain static files. ExportStorage keeps them under
+EXPORT_FILES_DIR instead, has no public URL, and the files are only
+handed out by the export_job_download view after its ownership check.
+export_upload_to() also puts every file in a random directory so its path
+cannot be guessed from the export kind and timestamp.
+"""
+import secrets
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+def private_dir(setting, default):
+    """The directory named by ``setting``; refuses locations under the web-served media/static roots."""
+    path = Path(getattr(settings, setting, None) or default)
+    resolved = path.resolve()
+    for served_setting in ('MEDIA_ROOT', 'STATIC_ROOT'):
+        served = getattr(settings, served_setting, None)
+        if served and resolved.is_relative_to(Path(served).resolve()):
+            raise ImproperlyConfigured(f'{setting} must not be inside {served_setting} ({served})')
+    return path
+
+
+@deconstructible
+class ExportStorage(FileSystemStorage):
+    """Export files under EXPORT_FILES_DIR, read from settings on each use; url() is not available."""
+
+    @property
+    def base_location(self):
+        return str(private_dir('EXPORT_FILES_DIR', Path(settings.BASE_DIR) / 'private' / 'exports'))
+
+    @property
+    def location(self):
+        return str(Path(self.base_location).resolve())
+
+    @property
+    def base_url(self):
+        return None
+
+
+def export_upload_to(instance, filename):
+    """exports/YYYY/MM/<random>/<filename>: keeps the readable name for downloads, unguessable path."""
+    now = timezone.now()
+    return f'exports/{now:%Y}/{now:%m}/{secrets.token_urlsafe(16)}/{filename}'
@@ -0,0 +1,143 @@
+"""
+Tests for the versioned dashboard cache.
+
+Run: python manage.py test accounts.tests_dashboard_cache
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.dashboard_cache import current_version, dashboard_cache_key, versioned_caching_enabled
+from accounts.models import User
+from clients.models import Client as BizClient
+from payments.models import Payment
+
+
+@override_settings(VERSIONED_CACHE_ALLOW_LOCAL=True)
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='pass', role='OWNER', is_owner=True)
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+            assigned_manager=self.manager,
+        )
+
+    def _payment(self, amount):
+        return Payment.objects.create(
+            client=self.biz_client, amount=Decimal(amount), status='CAPTURED',
+            payment_date=timezone.now(), received_by=self.manager,
+        )
+
+    def test_keys_are_versioned_and_scoped(self):
+        key = dashboard_cache_key('admin', 1, {'method': 'CASH', 'date_from': None})
+        self.assertIn(f':{current_version()}:admin:1:', key)
+        self.assertNotEqual(key, dashboard_cache_key('admin', 2, {'method': 'CASH'}))
+        self.assertNotEqual(key, dashboard_cache_key('admin', 1, {'method': 'UPI_QR'}))
+        self.assertEqual(dashboard_cache_key('sales', 3, {}), dashboard_cache_key('sales', 3))
+
+    def test_model_change_bumps_version(self):
+        version = current_version()
+        payment = self._payment('10.00')
+        self.assertNotEqual(current_version(), version)
+        version = current_version()
+        payment.delete()
+        self.assertNotEqual(current_version(), version)
+
+    def test_user_changes_bump_version(self):
+        version = current_version()
+        sales = User.objects.create_user(username='sales', password='pass', role='SALES')
+        self.assertNotEqual(current_version(), version)
+
+        version = current_version()
+        sales.role = 'MANAGER'
+        sales.save()
+        self.assertNotEqual(current_version(), version)
+
+        # Signing in only touches last_login
+        version = current_version()
+        self.client.login(username='sales', password='pass')
+        self.assertEqual(current_version(), version)
+
+        sales.delete()
+        self.assertNotEqual(current_version(), version)
+
+    def test_admin_dashboard_served_from_cache_until_data_changes(self):
+        self._payment('100.00')
+        self.client.login(username='owner', password='pass')
+        url = reverse('accounts:admin_dashboard')
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['total_revenue'], Decimal('100.00'))
+
+        # Second hit reuses the cached payload: no payment/rollup/client queries
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.context['total_revenue'], Decimal('100.00'))
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('payments_', sql)
+        self.assertNotIn('clients_client', sql)
+
+        self._payment('50.00')
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['total_revenue'], Decimal('150.00'))
+
+    def test_manager_dashboard_cached_per_manager(self):
+        self.client.login(username='mgr', password='pass')
+        resp = self.client.get(reverse('accounts:manager_dashboard'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['total_clients'], 1)
+        self.assertIsNotNone(cache.get(dashboard_cache_key('manager', self.manager.pk)))
+        self.assertIsNone(cache.get(dashboard_cache_key('manager', self.owner.pk)))
+
+
+@override_settings(VERSIONED_CACHE_ALLOW_LOCAL=False)
+class PerProcessCacheTests(TestCase):
+    """The LocMem fallback is per process, so versioned caching is bypassed."""
+
+    def test_locmem_cache_is_not_used(self):
+        self.assertFalse(versioned_caching_enabled())
+        owner = User.objects.create_user(username='owner', password='pass', role='OWNER', is_owner=True)
+        self.client.force_login(owner)
+        url = reverse('accounts:admin_dashboard')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertIn('clients_client', ' '.join(q['sql'] for q in ctx.captured_queries))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}})
+    def test_shared_backend_enables_caching(self):
+        self.assertTrue(versioned_caching_enabled())
+
+
+class DashboardWidgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='pass', role='OWNER', is_owner=True)
+        self.client.login(username='owner', password='pass')
+
+    def test_widget_json_with_conditional_revalidation(self):
+        url = reverse('accounts:dashboard_widget', args=['monthly-revenue'])
+        resp = self.client.get(url, {'months': 3})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['labels']), 3)
+        self.assertIn('private', resp['Cache-Control'])
+        self.assertTrue(resp.has_header('Last-Modified'))
+
+        resp = self.client.get(url, {'months': 3}, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_unknown_widget_is_404(self):
+        resp = self.client.get(reverse('accounts:dashboard_widget', args=['nope']))
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,99 @@
+"""
+Tests for the shared dashboard metrics engine.
+
+Run: python manage.py test accounts.tests_dashboard_metrics
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.dashboard_metrics import (
+    get_dashboard_metrics, month_starts, payment_filter_q,
+)
+from accounts.models import User
+from clients.models import Client as BizClient
+from payments.models import Payment
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2025, 3, 15, 12, 0))
+        self.sales = User.objects.create_user(username='sales', password='pass', role='SALES', first_name='Sam')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+            total_pitched_amount=Decimal('10000.00'),
+        )
+
+    def _payment(self, amount, when, status='CAPTURED', method='UPI_QR', received_by=None):
+        return Payment.objects.create(
+            client=self.biz_client,
+            amount=Decimal(amount),
+            status=status,
+            payment_method=method,
+            received_by=received_by,
+            payment_date=when,
+        )
+
+    def test_month_starts_cross_year_boundary(self):
+        starts = month_starts(timezone.make_aware(datetime(2025, 2, 10)), months=4)
+        self.assertEqual([(s.year, s.month) for s in starts], [(2024, 11), (2024, 12), (2025, 1), (2025, 2)])
+
+    def test_series_and_totals(self):
+        self._payment('100.00', self.now, received_by=self.sales)
+        self._payment('50.00', self.now - timedelta(days=1), method='CASH')
+        self._payment('200.00', self.now - timedelta(days=40))
+        self._payment('75.00', self.now, status='PENDING', received_by=self.sales)
+        self._payment('25.00', self.now, status='FAILED')
+
+        metrics = get_dashboard_metrics(now=self.now)
+
+        self.assertEqual(metrics['chart_labels'][-1], 'Mar 2025')
+        self.assertEqual(metrics['chart_revenue'][-1], 150.0)
+        self.assertEqual(metrics['chart_revenue'][-2], 200.0)
+        self.assertEqual(metrics['daily_labels'][-1], 'Mar 15')
+        self.assertEqual(metrics['daily_values'][-2:], [50.0, 100.0])
+        self.assertEqual(metrics['total_revenue'], Decimal('350.00'))
+        self.assertEqual(metrics['pending_revenue'], Decimal('75.00'))
+        self.assertEqual(metrics['failed_revenue'], Decimal('25.00'))
+        self.assertEqual(metrics['pending_payments_count'], 1)
+        self.assertEqual(metrics['total_clients'], 1)
+        self.assertEqual(dict(zip(metrics['method_labels'], metrics['method_values'])), {'UPI_QR': 300.0, 'CASH': 50.0})
+        self.assertEqual(metrics['top_sales'], [{'name': 'Sam', 'total': 100.0}])
+        sales_idx = metrics['status_sales_labels'].index('sales')
+        self.assertEqual(metrics['status_sales_pending'][sales_idx], 1)
+        self.assertEqual(metrics['status_sales_approved'][sales_idx], 1)
+
+    def test_filters_apply_to_series(self):
+        self._payment('100.00', self.now, method='UPI_QR')
+        self._payment('50.00', self.now, method='CASH')
+
+        metrics = get_dashboard_metrics({'method': 'CASH'}, now=self.now)
+
+        self.assertEqual(metrics['chart_revenue'][-1], 50.0)
+        self.assertEqual(metrics['daily_values'][-1], 50.0)
+        self.assertEqual(metrics['total_revenue'], Decimal('50.00'))
+        self.assertEqual(payment_filter_q().children, [])
+
+    def test_query_count_is_constant(self):
+        for i in range(10):
+            self._payment('10.00', self.now - timedelta(days=i * 9))
+        with self.assertNumQueries(9):
+            get_dashboard_metrics(now=self.now)
+
+    def test_admin_and_owner_dashboards_render(self):
+        from django.urls import reverse
+        User.objects.create_user(username='owner', password='pass', role='OWNER', is_owner=True)
+        self._payment('100.00', timezone.now(), received_by=self.sales)
+        self.client.login(username='owner', password='pass')
+        resp = self.client.get(reverse('accounts:owner_dashboard'), {'method': 'UPI_QR'})
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(reverse('accounts:admin_dashboard'), {'date_from': '2020-01-01'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['total_revenue'], Decimal('100.00'))
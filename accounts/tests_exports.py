@@ -0,0 +1,188 @@
+"""
+Tests for the streaming CSV exports.
+
+Run: python manage.py test accounts.tests_exports
+"""
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.utils import iter_csv_rows
+from clients.models import Client as BizClient
+from payments.models import Payment
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='pass', role='ADMIN', first_name='Ada', last_name='Admin',
+        )
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+        )
+        Payment.objects.create(
+            client=self.biz_client, amount=Decimal('100.00'), status='CAPTURED',
+            payment_method='CASH', received_by=self.admin, payment_date=timezone.now(),
+        )
+        Payment.objects.create(client=self.biz_client, amount=Decimal('50.00'))
+
+    def _rows(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(StringIO(content)))
+
+    def test_payment_export_streams_labels_from_values(self):
+        self.client.login(username='admin', password='pass')
+        rows = self._rows(self.client.get(reverse('accounts:export_payments')))
+
+        self.assertEqual(rows[0][:3], ['Payment ID', 'Client', 'Booking'])
+        by_amount = {row[3]: row for row in rows[1:]}
+        self.assertEqual(by_amount['100.00'][5], 'Cash')
+        self.assertEqual(by_amount['100.00'][8], 'Ada Admin')
+        self.assertEqual(by_amount['50.00'][2], 'N/A')
+        self.assertEqual(by_amount['50.00'][8], 'N/A')
+        self.assertEqual(by_amount['50.00'][9], 'N/A')
+
+    def test_iter_csv_rows_uses_single_query(self):
+        fields = [{'name': 'client__company_name', 'label': 'Client'}, 'get_status_display']
+        with self.assertNumQueries(1):
+            chunks = list(iter_csv_rows(Payment.objects.order_by('amount'), fields))
+        self.assertEqual(''.join(chunks).splitlines(), ['Client,Status', 'Acme Corp,Pending Verification', 'Acme Corp,Payment Received'])
+
+    def test_revenue_report_excel_has_rows_and_summary(self):
+        from openpyxl import load_workbook
+
+        self.biz_client.total_pitched_amount = Decimal('1000.00')
+        self.biz_client.save()
+        self.client.login(username='admin', password='pass')
+        resp = self.client.get(reverse('accounts:revenue_report_excel'))
+        self.assertEqual(resp.status_code, 200)
+
+        wb = load_workbook(BytesIO(b''.join(resp.streaming_content)), read_only=True)
+        self.assertEqual(wb.sheetnames, ['Client Revenue', 'Summary'])
+        rows = list(wb['Client Revenue'].iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'Client/Company')
+        self.assertEqual(rows[1][0], 'Acme Corp')
+        self.assertEqual(rows[1][3], 1000.0)
+        summary = dict(wb['Summary'].iter_rows(values_only=True))
+        self.assertEqual(summary['Clients'], 1)
+        self.assertEqual(summary['Total Pitched'], 1000.0)
+
+
+@override_settings(EXPORT_JOB_RUNNER='command', EXPORT_FILES_DIR=tempfile.mkdtemp())
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='ADMIN', email='admin@example.com')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+        )
+        for amount in ('10.00', '20.00', '30.00'):
+            Payment.objects.create(client=biz_client, amount=Decimal(amount))
+        self.client.login(username='admin', password='pass')
+
+    @override_settings(EXPORT_ASYNC_THRESHOLD=2)
+    def test_large_export_becomes_job_and_completes(self):
+        from accounts.export_jobs import run_export_job
+        from accounts.models import ExportJob
+        from notifications.models import Notification
+
+        resp = self.client.get(reverse('accounts:export_payments'), {'status': 'PENDING'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(resp.status_code, 202)
+        job = ExportJob.objects.get(pk=resp.json()['job_id'])
+        self.assertEqual(job.params, {'status': 'PENDING'})
+
+        run_export_job(job.pk)
+        status = self.client.get(reverse('accounts:export_job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], 'COMPLETED')
+        self.assertEqual(status['total_rows'], 3)
+        self.assertEqual(status['progress'], 100)
+
+        download = self.client.get(status['download_url'])
+        rows = list(csv.reader(StringIO(b''.join(download.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        # Written outside MEDIA_ROOT, under a random directory, and only reachable through the view
+        job.refresh_from_db()
+        self.assertTrue(job.file.path.startswith(settings.EXPORT_FILES_DIR))
+        self.assertRegex(job.file.name, r'^exports/\d{4}/\d{2}/[\w-]{22}/payments_\d{8}_\d{6}\.csv$')
+        with self.assertRaises(ValueError):
+            job.file.url
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.admin, notification_type='DOCUMENT_READY', status='QUEUED'
+        ).exists())
+
+    def test_small_export_stays_inline(self):
+        resp = self.client.get(reverse('accounts:export_payments'))
+        self.assertIsInstance(resp, StreamingHttpResponse)
+
+    def test_other_users_cannot_poll_job(self):
+        from accounts.models import ExportJob
+        User.objects.create_user(username='sales', password='pass', role='SALES')
+        job = ExportJob.objects.create(user=self.admin, kind='PAYMENTS')
+        self.client.login(username='sales', password='pass')
+        resp = self.client.get(reverse('accounts:export_job_status', args=[job.pk]))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_worker_fails_jobs_stuck_in_running(self):
+        from datetime import timedelta
+
+        from django.core.management import call_command
+
+        from accounts.models import ExportJob
+        two_hours_ago = timezone.now() - timedelta(hours=2)
+        stuck = ExportJob.objects.create(user=self.admin, kind='PAYMENTS', status='RUNNING', started_at=two_hours_ago)
+        ExportJob.objects.filter(pk=stuck.pk).update(updated_at=two_hours_ago)
+        # Long-running but still reporting progress
+        running = ExportJob.objects.create(user=self.admin, kind='PAYMENTS', status='RUNNING', started_at=two_hours_ago)
+
+        call_command('process_export_jobs', stale_minutes=60, stdout=StringIO())
+        stuck.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stuck.status, 'FAILED')
+        self.assertIsNotNone(stuck.finished_at)
+        self.assertEqual(running.status, 'RUNNING')
+
+    @override_settings(EXPORT_ASYNC_THRESHOLD=2)
+    def test_job_failed_as_stale_is_not_revived(self):
+        from accounts.export_jobs import fail_stale_jobs, run_export_job
+        from accounts.models import ExportJob
+
+        job = ExportJob.objects.create(user=self.admin, kind='PAYMENTS')
+
+        def give_up(done):
+            # The stale check runs while the worker is still writing rows
+            ExportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timezone.timedelta(hours=2))
+            fail_stale_jobs(60)
+
+        with mock.patch('accounts.export_jobs.write_csv', side_effect=lambda fh, qs, fields, progress: give_up(0)):
+            job = run_export_job(job.pk)
+        self.assertEqual(job.status, 'FAILED')
+        self.assertFalse(job.file)
+
+    def test_export_files_dir_may_not_be_web_served(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from accounts.storage import ExportStorage
+        media_root = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_root, EXPORT_FILES_DIR=os.path.join(media_root, 'exports')):
+            with self.assertRaises(ImproperlyConfigured):
+                ExportStorage().location
@@ -0,0 +1,98 @@
+"""
+Tests for the revenue report totals cache and keyset pagination.
+
+Run: python manage.py test accounts.tests_revenue_report
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.revenue_report import revenue_report_page, revenue_report_queryset, revenue_report_totals
+from clients.models import Client as BizClient
+
+
+@override_settings(VERSIONED_CACHE_ALLOW_LOCAL=True)
+class RevenueReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='ADMIN')
+        sales = User.objects.create_user(username='sales', password='pass', role='SALES', first_name='Sam')
+        # Repeated amounts and missing sales people exercise the id tie-breaker
+        amounts = ['500.00', '100.00', '300.00', '100.00', '700.00', '300.00', '100.00']
+        for i, amount in enumerate(amounts):
+            user = User.objects.create_user(username=f'c{i}', password='pass', role='CLIENT')
+            BizClient.objects.create(
+                user=user, company_name=f'Company {i}', contact_person='John Doe',
+                contact_email=f'c{i}@example.com', contact_phone='9999999999',
+                total_pitched_amount=Decimal(amount), assigned_sales=sales if i % 2 else None,
+            )
+
+    def _walk(self, params, page_size=3):
+        """Follow next cursors to the end, then previous cursors back to the start."""
+        forward, pages = [], []
+        page = revenue_report_page(params, page_size)
+        pages.append(page)
+        while page.has_next():
+            page = revenue_report_page({**params, 'after': page.next_cursor}, page_size)
+            pages.append(page)
+        for page in pages:
+            forward.extend(c.pk for c in page)
+
+        backward = [c.pk for c in page]
+        while page.has_previous():
+            page = revenue_report_page({**params, 'before': page.previous_cursor}, page_size)
+            backward = [c.pk for c in page] + backward
+        return forward, backward
+
+    def test_keyset_pages_match_full_ordering(self):
+        for params in (
+            {'sort': 'pitched', 'order': 'asc'},
+            {'sort': 'pitched', 'order': 'desc'},
+            {'sort': 'sales', 'order': 'asc'},
+            {},
+        ):
+            expected = list(revenue_report_queryset(params).values_list('pk', flat=True))
+            forward, backward = self._walk(params)
+            self.assertEqual(forward, expected, params)
+            self.assertEqual(backward, expected, params)
+
+    def test_deep_page_uses_range_read(self):
+        first = revenue_report_page({'sort': 'pitched'}, page_size=2)
+        with CaptureQueriesContext(connection) as ctx:
+            revenue_report_page({'sort': 'pitched', 'after': first.next_cursor}, page_size=2)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_cursor_from_another_sort_restarts(self):
+        first = revenue_report_page({'sort': 'pitched'}, page_size=2)
+        page = revenue_report_page({'sort': 'company', 'after': first.next_cursor}, page_size=2)
+        self.assertFalse(page.has_previous())
+        self.assertFalse(revenue_report_page({'after': 'garbage'}).has_previous())
+
+    def test_totals_cached_until_data_changes(self):
+        totals = revenue_report_totals({'search': 'company'})
+        self.assertEqual(totals['clients'], 7)
+        self.assertEqual(totals['total_pitched'], Decimal('2100.00'))
+        with self.assertNumQueries(0):
+            # Same filters, different spelling/sort -> same cache entry
+            revenue_report_totals({'search': '  COMPANY ', 'sort': 'pending'})
+
+        client = BizClient.objects.get(company_name='Company 0')
+        client.total_pitched_amount = Decimal('600.00')
+        client.save()
+        self.assertEqual(revenue_report_totals({'search': 'company'})['total_pitched'], Decimal('2200.00'))
+
+    def test_view_renders_cursor_links(self):
+        self.client.login(username='admin', password='pass')
+        response = self.client.get(reverse('accounts:revenue_report'), {'sort': 'pitched', 'order': 'asc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['clients']), 7)
+        self.assertEqual(response.context['totals']['clients'], 7)
+        self.assertFalse(response.context['clients'].has_other_pages())
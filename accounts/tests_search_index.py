@@ -0,0 +1,150 @@
+"""
+Tests for the global search index.
+
+Run: python manage.py test accounts.tests_search_index
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import SearchDocument, User
+from accounts.search_index import fulltext_backend, rebuild_index, search
+from applications.models import Application
+from bookings.models import Booking, Service
+from clients.identifiers import classify_identifier
+from clients.models import Client as BizClient
+from clients.viewsets import ClientSearchFilter, ClientViewSet
+from schemes.models import Scheme
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='ADMIN')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9876543210',
+            pan_number='ABCDE1234F',
+        )
+        self.service = Service.objects.create(
+            name='Consulting', category='CONSULTING', description='Desc',
+            short_description='Short', price=Decimal('5000.00'), duration_days=30,
+        )
+        self.booking = Booking.objects.create(
+            client=self.biz_client, service=self.service,
+            amount=Decimal('5000.00'), final_amount=Decimal('5000.00'),
+        )
+        self.scheme = Scheme.objects.create(
+            name='Startup Loan', full_name='Startup Loan Scheme', scheme_code='TST001',
+            category='LOAN', status='ACTIVE', description='A test scheme', benefits='Benefits',
+            eligible_sectors=['SERVICE'], eligible_business_types=['PVT_LTD'],
+        )
+        self.application = Application.objects.create(
+            client=self.biz_client, scheme=self.scheme, applied_amount=25,
+            purpose='Growth', created_by=self.admin,
+        )
+
+    def test_uses_fts5_on_sqlite(self):
+        self.assertEqual(fulltext_backend(), 'fts5')
+
+    def test_signals_keep_documents_in_sync(self):
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        hits = search('acme')
+        self.assertEqual(hits['CLIENT'], [self.biz_client.pk])
+        self.assertEqual(hits['BOOKING'], [self.booking.pk])
+        self.assertEqual(hits['APPLICATION'], [self.application.pk])
+
+        # Renaming the client re-indexes its bookings and applications
+        self.biz_client.company_name = 'Globex Industries'
+        self.biz_client.save()
+        self.assertEqual(search('acme')['BOOKING'], [])
+        self.assertEqual(search('globex')['APPLICATION'], [self.application.pk])
+
+        self.booking.delete()
+        self.assertEqual(search('globex')['BOOKING'], [])
+
+    def test_substring_identifier_and_short_queries(self):
+        self.assertEqual(search('1234F')['CLIENT'], [self.biz_client.pk])
+        self.assertEqual(search('543')['CLIENT'], [self.biz_client.pk])
+        self.assertEqual(search(self.booking.booking_id)['BOOKING'], [self.booking.pk])
+        # Terms below the trigram length use the LIKE fallback
+        self.assertEqual(search('Ac')['CLIENT'], [self.biz_client.pk])
+        self.assertEqual(search('"acme" OR')['CLIENT'], [])
+
+    def test_title_matches_rank_first(self):
+        other_user = User.objects.create_user(username='c2', password='pass', role='CLIENT')
+        other = BizClient.objects.create(
+            user=other_user, company_name='Zenith Traders', contact_person='Acme Contact',
+            contact_email='z@example.com', contact_phone='9000000000',
+        )
+        self.assertEqual(search('acme')['CLIENT'], [self.biz_client.pk, other.pk])
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        counts = rebuild_index()
+        self.assertEqual(counts, {'CLIENT': 1, 'BOOKING': 1, 'APPLICATION': 1})
+        self.assertEqual(search('consulting')['BOOKING'], [self.booking.pk])
+
+    def test_global_search_view_single_index_query(self):
+        self.client.login(username='admin', password='pass')
+        fulltext_backend()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('accounts:global_search'), {'q': 'acme'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['total_results'], 3)
+        self.assertEqual(resp.context['clients'], [self.biz_client])
+        sql = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(sum('accounts_searchdocument' in q for q in sql), 1)
+        self.assertFalse(any('LIKE' in q for q in sql))
+
+
+class IdentifierLookupTests(TestCase):
+    def setUp(self):
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.biz_client = BizClient.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='+91 98765-43210',
+            pan_number='abcde1234f',
+            gst_number='27abcde1234f1z5',
+        )
+
+    def test_normalized_columns_populated_on_save(self):
+        self.assertEqual(self.biz_client.contact_phone_normalized, '9876543210')
+        self.assertEqual(self.biz_client.pan_normalized, 'ABCDE1234F')
+        self.assertEqual(self.biz_client.gst_normalized, '27ABCDE1234F1Z5')
+
+        self.biz_client.alternate_phone = '022 2345 6789'
+        self.biz_client.save(update_fields=['alternate_phone'])
+        self.biz_client.refresh_from_db()
+        self.assertEqual(self.biz_client.alternate_phone_normalized, '2223456789')
+
+    def test_classify_identifier(self):
+        self.assertEqual(classify_identifier('ABCDE1234F'), ('pan', 'ABCDE1234F', True))
+        self.assertEqual(classify_identifier('098765 43210'), ('phone', '9876543210', True))
+        self.assertEqual(classify_identifier('987654'), ('phone', '987654', False))
+        self.assertEqual(classify_identifier('bkg-20240101'), ('booking_id', 'BKG-20240101', False))
+        self.assertIsNone(classify_identifier('Acme'))
+        self.assertIsNone(classify_identifier('123'))
+
+    def test_global_search_identifier_fast_path(self):
+        for query in ('9876543210', '+919876543210', 'abcde1234f', '27ABCDE1234F1Z5', '98765'):
+            hits = search(query)
+            self.assertEqual(hits['CLIENT'], [self.biz_client.pk], query)
+
+    def test_client_api_search_filter(self):
+        factory = APIRequestFactory()
+        request = Request(factory.get('/api/clients/', {'search': '+91-9876543210'}))
+        queryset = ClientSearchFilter().filter_queryset(request, BizClient.objects.all(), ClientViewSet())
+        self.assertEqual(list(queryset), [self.biz_client])
+        self.assertIn('contact_phone_normalized', str(queryset.query))
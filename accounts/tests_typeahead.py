@@ -0,0 +1,72 @@
+"""
+Tests for the autocomplete API and its cache layers.
+
+Run: python manage.py test accounts.tests_typeahead
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from api.typeahead import LRUCache, local_cache
+from clients.models import Client as BizClient
+
+
+@override_settings(VERSIONED_CACHE_ALLOW_LOCAL=True)
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.sales = User.objects.create_user(username='sales', password='pass', role='SALES')
+        self.client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.acme = BizClient.objects.create(
+            user=self.client_user, company_name='Acme Corp', contact_person='John Doe',
+            contact_email='john@example.com', contact_phone='9876543210',
+        )
+        self.url = reverse('api:autocomplete')
+
+    def test_returns_matches_and_serves_repeats_from_cache(self):
+        self.client.login(username='sales', password='pass')
+        resp = self.client.get(self.url, {'q': 'acm'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['clients'], [{'id': self.acme.pk, 'title': 'Acme Corp'}])
+
+        local_cache.clear()  # shared cache still answers
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'q': 'ACM '})
+        self.assertFalse(any('accounts_searchdocument' in q['sql'] for q in ctx.captured_queries))
+
+    @override_settings(VERSIONED_CACHE_ALLOW_LOCAL=False)
+    def test_per_process_cache_is_bypassed(self):
+        self.client.login(username='sales', password='pass')
+        self.client.get(self.url, {'q': 'acm'})
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {'q': 'acm'})
+        self.assertTrue(any('accounts_searchdocument' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(resp.json()['clients'], [{'id': self.acme.pk, 'title': 'Acme Corp'}])
+
+    def test_index_change_invalidates_cached_results(self):
+        self.client.login(username='sales', password='pass')
+        self.client.get(self.url, {'q': 'acme'})
+        self.acme.company_name = 'Acme Holdings'
+        self.acme.save()
+        resp = self.client.get(self.url, {'q': 'acme'})
+        self.assertEqual(resp.json()['clients'][0]['title'], 'Acme Holdings')
+
+    def test_short_prefix_and_client_role(self):
+        self.client.login(username='sales', password='pass')
+        self.assertEqual(self.client.get(self.url, {'q': 'a'}).json()['clients'], [])
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(self.url, {'q': 'acme'}).status_code, 403)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(len(lru), 2)
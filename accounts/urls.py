@@ -47,12 +47,15 @@ urlpatterns = [
     path('export/bookings/', views.export_bookings, name='export_bookings'),
     path('export/payments/', views.export_payments, name='export_payments'),
     path('export/dashboard/', views.export_dashboard_data, name='export_dashboard_data'),
+    path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
     
     # Search
     path('search/', views.global_search, name='global_search'),
     
     # Reports
     path('reports/', views.reports_dashboard, name='reports_dashboard'),
+    path('dashboard/widgets/<slug:name>/', views.dashboard_widget, name='dashboard_widget'),
     path('revenue/report/', views.revenue_report, name='revenue_report'),
     path('revenue/report/export-excel/', views.revenue_report_excel, name='revenue_report_excel'),
 
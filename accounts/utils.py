@@ -2,8 +2,7 @@
 Utility functions for accounts app
 """
 import csv
-from io import StringIO
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from datetime import datetime
 from .constants import (
     ROLE_SUPERUSER, ROLE_OWNER, ROLE_ADMIN,
@@ -95,59 +94,199 @@ def staff_required(view_func):
     return role_required(ROLE_SALES, ROLE_MANAGER, ROLE_ADMIN, ROLE_OWNER, ROLE_SUPERUSER)(view_func)
 
 
+class _Echo:
+    """File-like object whose write() just returns the value (for csv.writer streaming)"""
+    def write(self, value):
+        return value
+
+
+def _lookup_field(model, lookup):
+    """Return the model field a ``values()`` lookup such as 'client__status' points at (or None)."""
+    field = None
+    for part in lookup.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except Exception:
+            return None
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    return field
+
+
+def full_name_field(prefix, label, default='N/A', username_fallback=False):
+    """
+    Export field spec rendering a user FK as ``get_full_name()`` from values().
+    
+    Example: full_name_field('assigned_sales', 'Sales')
+    """
+    def _format(first, last, username):
+        if username is None:
+            return default
+        name = f"{first or ''} {last or ''}".strip()
+        return name or (username if username_fallback else name)
+    return {
+        'label': label,
+        'names': (f'{prefix}__first_name', f'{prefix}__last_name', f'{prefix}__username'),
+        'format': _format,
+    }
+
+
+def _normalize_export_field(model, field):
+    """
+    Turn an export field spec into (label, lookups, formatter).
+    
+    Spec keys: 'name' (a values() lookup, ``get_<field>_display`` is mapped to
+    the choice label) or 'names' (several lookups passed to 'format'),
+    'label', 'format' (callable on the raw value(s)), 'choices' (True to use
+    the model field's labels, or a dict), 'default' (used for None).
+    """
+    if not isinstance(field, dict):
+        field = {'name': field}
+    name = field.get('name', '')
+    choices = field.get('choices')
+    if name.startswith('get_') and name.endswith('_display'):
+        name = name[len('get_'):-len('_display')]
+        choices = choices or True
+    label = field.get('label') or name.replace('_', ' ').title()
+    lookups = tuple(field.get('names') or (name,))
+    if choices is True:
+        model_field = _lookup_field(model, lookups[0])
+        choices = dict(model_field.flatchoices) if model_field is not None else {}
+    choices = {k: str(v) for k, v in (choices or {}).items()}
+    fmt = field.get('format')
+    default = field.get('default', '')
+    
+    def formatter(*values):
+        if fmt is not None:
+            value = fmt(*values)
+        else:
+            value = values[0]
+        if value is None:
+            return default
+        if choices:
+            return choices.get(value, value)
+        return value
+    return label, lookups, formatter
+
+
+def iter_export_rows(queryset, fields, chunk_size=2000, progress=None):
+    """
+    Yield the header row, then one list of formatted values per record.
+    
+    Rows come from a ``values_list()`` projection read with ``.iterator()``,
+    and choice labels are resolved from precomputed maps, so no model
+    instances are built and memory stays constant regardless of row count.
+    ``progress(rows_done)`` is called after every ``chunk_size`` rows and once
+    at the end.
+    """
+    specs = [_normalize_export_field(queryset.model, f) for f in fields]
+    lookups = []
+    columns = []
+    for _label, field_lookups, fmt in specs:
+        start = len(lookups)
+        lookups.extend(field_lookups)
+        columns.append((fmt, start, len(lookups)))
+    
+    yield [label for label, _lookups, _fmt in specs]
+    done = 0
+    for raw in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield [fmt(*raw[start:end]) for fmt, start, end in columns]
+        done += 1
+        if progress is not None and done % chunk_size == 0:
+            progress(done)
+    if progress is not None:
+        progress(done)
+
+
+def iter_csv_rows(queryset, fields, chunk_size=2000):
+    """Yield CSV text for ``queryset`` in batches of rows (see iter_export_rows)."""
+    writer = csv.writer(_Echo())
+    buffer = []
+    for row in iter_export_rows(queryset, fields, chunk_size):
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= 500:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
 def export_to_csv(queryset, fields, filename_prefix='export'):
     """
-    Generic function to export queryset to CSV
+    Stream a queryset to the browser as CSV
     
     Args:
         queryset: Django queryset to export
-        fields: List of field names to include
+        fields: List of field specs (see _normalize_export_field)
         filename_prefix: Prefix for the downloaded filename
     
     Returns:
-        HttpResponse with CSV content
+        StreamingHttpResponse with CSV content
     """
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(iter_csv_rows(queryset, fields), content_type='text/csv')
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     response['Content-Disposition'] = f'attachment; filename="{filename_prefix}_{timestamp}.csv"'
+    return response
+
+
+def write_csv(target, queryset, fields, progress=None):
+    """Write ``queryset`` as CSV to a text file object (see iter_export_rows)."""
+    writer = csv.writer(target)
+    for row in iter_export_rows(queryset, fields, progress=progress):
+        writer.writerow(row)
+
+
+def write_xlsx(target, queryset, fields, sheet_title='Data', summary=None, progress=None):
+    """
+    Write ``queryset`` to an XLSX file with xlsxwriter in constant_memory mode.
     
-    writer = csv.writer(response)
+    Rows are flushed to disk as they are written, so memory does not grow
+    with the number of rows.
     
-    # Write header row
-    headers = []
-    for field in fields:
-        if isinstance(field, dict):
-            headers.append(field.get('label', field.get('name', '')))
-        else:
-            headers.append(field.replace('_', ' ').title())
-    writer.writerow(headers)
-    
-    # Write data rows
-    for obj in queryset:
-        row = []
-        for field in fields:
-            if isinstance(field, dict):
-                field_name = field.get('name')
-                accessor = field.get('accessor')
-                if accessor:
-                    # Custom accessor function
-                    value = accessor(obj)
-                else:
-                    # Standard field access
-                    value = getattr(obj, field_name, '')
-            else:
-                value = getattr(obj, field, '')
-            
-            # Handle special types
-            if hasattr(value, 'all'):  # ManyToMany or reverse FK
-                value = ', '.join(str(v) for v in value.all())
-            elif callable(value):
-                value = value()
-            
-            row.append(str(value))
-        writer.writerow(row)
+    Args:
+        target: filename or binary file object
+        queryset: Django queryset to export
+        fields: List of field specs (see _normalize_export_field)
+        sheet_title: Name of the data sheet
+        summary: Optional list of (label, value) pairs for a 'Summary' sheet
+        progress: Optional callback, see iter_export_rows
+    """
+    import xlsxwriter
     
-    return response
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'in_memory': False})
+    try:
+        data_sheet = workbook.add_worksheet(sheet_title)
+        if summary is not None:
+            summary_sheet = workbook.add_worksheet('Summary')
+            bold = workbook.add_format({'bold': True})
+            for row_idx, (label, value) in enumerate(summary):
+                summary_sheet.write(row_idx, 0, label, bold)
+                summary_sheet.write(row_idx, 1, value)
+        for row_idx, row in enumerate(iter_export_rows(queryset, fields, progress=progress)):
+            data_sheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+
+
+def export_to_xlsx(queryset, fields, filename, sheet_title='Data', summary=None):
+    """
+    Return a FileResponse streaming an XLSX export built by write_xlsx().
+    
+    The workbook is assembled in an anonymous temporary file, which is
+    removed once the response has been sent.
+    """
+    import tempfile
+    from django.http import FileResponse
+    
+    tmp = tempfile.TemporaryFile(suffix='.xlsx')
+    write_xlsx(tmp, queryset, fields, sheet_title=sheet_title, summary=summary)
+    tmp.seek(0)
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
 
 
 def get_field_value(obj, field_path):
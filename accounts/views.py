@@ -214,18 +214,9 @@ def admin_dashboard(request):
     from applications.models import Application
     from payments.models import Payment
     from edit_requests.models import EditRequest
-    from django.db.models import Sum, Count, Q
     from accounts.models import User
-    
-    # Analytics
-    total_clients = Client.objects.count()
-    active_clients = Client.objects.filter(status='ACTIVE').count()
-    
-    total_bookings = Booking.objects.count()
-    pending_bookings = Booking.objects.filter(status='PENDING').count()
-    
-    total_applications = Application.objects.count()
-    pending_applications = Application.objects.filter(status__in=['DRAFT', 'SUBMITTED', 'UNDER_REVIEW']).count()
+    from .dashboard_cache import get_cached_dashboard
+    from .dashboard_metrics import get_dashboard_metrics, parse_payment_filters
     
     # Filters
     method_filter = request.GET.get('method')
@@ -233,105 +224,25 @@ def admin_dashboard(request):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    base_success = Payment.objects.filter(status__in=['AUTHORIZED', 'CAPTURED'])
-    if method_filter:
-        base_success = base_success.filter(payment_method=method_filter)
-    if salesperson_filter:
-        base_success = base_success.filter(received_by_id=salesperson_filter)
-    if date_from:
-        from django.utils.dateparse import parse_date
-        parsed_from = parse_date(date_from)
-        if parsed_from:
-            base_success = base_success.filter(payment_date__date__gte=parsed_from)
-    if date_to:
-        from django.utils.dateparse import parse_date
-        parsed_to = parse_date(date_to)
-        if parsed_to:
-            base_success = base_success.filter(payment_date__date__lte=parsed_to)
-    
-    total_revenue = base_success.aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Live client revenue totals (pitched/received/pending with GST)
-    client_revenue = Client.objects.aggregate(
-        total_pitched=Sum('total_pitched_amount'),
-        total_with_gst=Sum('total_with_gst'),
-        total_received=Sum('received_amount'),
-        total_pending=Sum('pending_amount'),
-    )
-    client_revenue = {k: v or 0 for k, v in client_revenue.items()}
-    
-    # Pending revenue (awaiting approval)
-    pending_revenue = Payment.objects.filter(status='PENDING').aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Failed/disputed revenue
-    failed_revenue = Payment.objects.filter(status='FAILED').aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # All recent payments (not just pending) for comprehensive view
-    all_recent_payments = Payment.objects.select_related('client', 'booking', 'received_by').order_by('-created_at')[:20]
-    
-    pending_edit_requests = EditRequest.objects.filter(status='PENDING').count()
-
-    # Pending payments (awaiting approval)
-    pending_payments = Payment.objects.filter(status='PENDING').order_by('-created_at')[:10]
-    pending_payments_count = Payment.objects.filter(status='PENDING').count()
-    
-    # Recent items
-    recent_clients = Client.objects.order_by('-created_at')[:5]
-    recent_bookings = Booking.objects.order_by('-booking_date')[:5]
-    recent_applications = Application.objects.order_by('-application_date')[:5]
-    pending_edits = EditRequest.objects.filter(status='PENDING').order_by('-created_at')[:10]
-    
-    # Revenue by month (last 6 months)
-    from django.utils import timezone
-    from datetime import timedelta
-    now = timezone.now()
-    labels = []
-    revenue_series = []
-    from payments.models import Payment as _P
-    for i in range(5, -1, -1):
-        start = (now.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-        # Compute end by moving to next month start
-        if start.month == 12:
-            end = start.replace(year=start.year+1, month=1, day=1)
-        else:
-            end = start.replace(month=start.month+1, day=1)
-        month_qs = base_success.filter(payment_date__gte=start, payment_date__lt=end)
-        month_sum = month_qs.aggregate(Sum('amount'))['amount__sum'] or 0
-        labels.append(start.strftime('%b %Y'))
-        revenue_series.append(float(month_sum))
-
-    # Revenue by method
-    method_breakdown_qs = Payment.objects.filter(status__in=['AUTHORIZED','CAPTURED']).values('payment_method').annotate(total=Sum('amount')).order_by('-total')
-    method_labels = [row['payment_method'] or 'UNKNOWN' for row in method_breakdown_qs]
-    method_values = [float(row['total'] or 0) for row in method_breakdown_qs]
-
-    # Top sales by revenue
-    top_sales_qs = Payment.objects.filter(status__in=['AUTHORIZED','CAPTURED'], received_by__isnull=False).values('received_by__username', 'received_by__first_name', 'received_by__last_name').annotate(total=Sum('amount')).order_by('-total')[:5]
-    top_sales = [
-        {
-            'name': (f"{r['received_by__first_name']} {r['received_by__last_name']}").strip() or r['received_by__username'],
-            'total': float(r['total'] or 0)
+    # KPIs and recent items (cached per user and filter set); charts load from dashboard_widget
+    payment_filters = parse_payment_filters(request.GET)
+    
+    def build():
+        return {
+            **get_dashboard_metrics(payment_filters, include_charts=False),
+            # All recent payments (not just pending) for comprehensive view
+            'all_recent_payments': list(Payment.objects.select_related('client', 'booking', 'received_by').order_by('-created_at')[:20]),
+            # Pending payments (awaiting approval)
+            'pending_payments': list(Payment.objects.filter(status='PENDING').order_by('-created_at')[:10]),
+            # Recent items
+            'recent_clients': list(Client.objects.order_by('-created_at')[:5]),
+            'recent_bookings': list(Booking.objects.order_by('-booking_date')[:5]),
+            'recent_applications': list(Application.objects.order_by('-application_date')[:5]),
+            'pending_edits': list(EditRequest.objects.filter(status='PENDING').order_by('-created_at')[:10]),
+            'pending_edit_requests': EditRequest.objects.filter(status='PENDING').count(),
         }
-        for r in top_sales_qs
-    ]
-
-    # Daily totals last 7 days
-    daily_labels = []
-    daily_values = []
-    for i in range(6, -1, -1):
-        day = now.date() - timedelta(days=i)
-        day_sum = base_success.filter(payment_date__date=day).aggregate(total=Sum('amount'))['total'] or 0
-        daily_labels.append(day.strftime('%b %d'))
-        daily_values.append(float(day_sum))
-
-    # Pending vs approved by salesperson
-    status_by_sales = Payment.objects.values('received_by__username').annotate(
-        pending=Count('id', filter=Q(status='PENDING')),
-        approved=Count('id', filter=Q(status__in=['AUTHORIZED','CAPTURED']))
-    ).order_by('-approved', '-pending')
-    status_sales_labels = [row['received_by__username'] or 'Unassigned' for row in status_by_sales]
-    status_sales_pending = [row['pending'] for row in status_by_sales]
-    status_sales_approved = [row['approved'] for row in status_by_sales]
+    
+    dashboard = get_cached_dashboard('admin', request.user, build, params=payment_filters)
 
     # Sales team for filter dropdown
     sales_team = User.objects.filter(role='SALES').order_by('first_name', 'last_name')
@@ -341,34 +252,7 @@ def admin_dashboard(request):
     recent_activities = ActivityLog.objects.select_related('user').order_by('-timestamp')[:15]
 
     context = {
-        'total_clients': total_clients,
-        'active_clients': active_clients,
-        'total_bookings': total_bookings,
-        'pending_bookings': pending_bookings,
-        'total_applications': total_applications,
-        'pending_applications': pending_applications,
-        'total_revenue': total_revenue,
-        'pending_revenue': pending_revenue,
-        'failed_revenue': failed_revenue,
-        'client_revenue': client_revenue,
-        'all_recent_payments': all_recent_payments,
-        'pending_edit_requests': pending_edit_requests,
-        'pending_payments': pending_payments,
-        'pending_payments_count': pending_payments_count,
-        'recent_clients': recent_clients,
-        'recent_bookings': recent_bookings,
-        'recent_applications': recent_applications,
-        'pending_edits': pending_edits,
-        'chart_labels': labels,
-        'chart_revenue': revenue_series,
-        'method_labels': method_labels,
-        'method_values': method_values,
-        'top_sales': top_sales,
-        'daily_labels': daily_labels,
-        'daily_values': daily_values,
-        'status_sales_labels': status_sales_labels,
-        'status_sales_pending': status_sales_pending,
-        'status_sales_approved': status_sales_approved,
+        **dashboard,
         'selected_method': method_filter or '',
         'selected_salesperson': salesperson_filter or '',
         'date_from': date_from or '',
@@ -380,11 +264,8 @@ def admin_dashboard(request):
     return render(request, 'dashboards/admin_dashboard.html', context)
 
 
-@manager_required
-def manager_dashboard(request):
-    """
-    Manager dashboard with team metrics
-    """
+def _build_manager_dashboard(manager):
+    """Compute the manager dashboard context (querysets evaluated so it can be cached)"""
     from clients.models import Client
     from bookings.models import Booking
     from applications.models import Application
@@ -392,77 +273,89 @@ def manager_dashboard(request):
     from accounts.models import User
     
     # Team members under this manager
-    team_members = User.objects.filter(manager=request.user, role='SALES')
+    team_members = list(User.objects.filter(manager=manager, role='SALES'))
     
     # Clients assigned to team
-    team_clients = Client.objects.filter(assigned_manager=request.user)
+    team_clients = list(Client.objects.filter(assigned_manager=manager))
     
     # Bookings with payment info - include bookings where:
     # 1. Client is assigned to this manager, OR
     # 2. The sales employee who recorded payment reports to this manager
     from django.db.models import Q
     team_bookings = Booking.objects.filter(
-        Q(client__assigned_manager=request.user) |
-        Q(assigned_to__manager=request.user)
+        Q(client__assigned_manager=manager) |
+        Q(assigned_to__manager=manager)
     ).select_related('client', 'service', 'assigned_to').order_by('-booking_date').distinct()
     
     # Pending applications count for sidebar badge
     pending_count = Application.objects.filter(
-        client__assigned_manager=request.user,
+        client__assigned_manager=manager,
         status__in=['SUBMITTED', 'UNDER_REVIEW']
     ).count()
     
     # Pending payments count (awaiting manager approval) - check both client assignment and sales team
     pending_payments_count = Payment.objects.filter(
-        Q(client__assigned_manager=request.user) |
-        Q(received_by__manager=request.user),
+        Q(client__assigned_manager=manager) |
+        Q(received_by__manager=manager),
         status='PENDING'
     ).distinct().count()
     
     # Get actual pending payments for display
     pending_payments = Payment.objects.filter(
-        Q(client__assigned_manager=request.user) |
-        Q(received_by__manager=request.user),
+        Q(client__assigned_manager=manager) |
+        Q(received_by__manager=manager),
         status='PENDING'
     ).select_related('client', 'booking', 'received_by').order_by('-created_at').distinct()[:10]
     
     # Get all payments for team bookings and attach to booking objects
     all_team_payments = Payment.objects.filter(
-        Q(client__assigned_manager=request.user) |
-        Q(received_by__manager=request.user),
+        Q(client__assigned_manager=manager) |
+        Q(received_by__manager=manager),
         booking__isnull=False
     ).select_related('booking')
     
     # Create payment lookup and annotate bookings
     booking_payments_dict = {payment.booking_id: payment for payment in all_team_payments}
+    team_bookings = list(team_bookings)
     for booking in team_bookings:
         booking.payment = booking_payments_dict.get(booking.id)
     
     # Recent team applications (last 10)
     team_applications = Application.objects.filter(
-        Q(client__assigned_manager=request.user) |
-        Q(assigned_to__manager=request.user)
+        Q(client__assigned_manager=manager) |
+        Q(assigned_to__manager=manager)
     ).select_related('client', 'scheme', 'assigned_to').order_by('-created_at').distinct()[:10]
     
     # Pending client approvals count
     pending_clients_count = Client.objects.filter(
-        Q(assigned_manager=request.user) | Q(created_by__manager=request.user),
+        Q(assigned_manager=manager) | Q(created_by__manager=manager),
         is_approved=False
     ).count()
     
-    context = {
+    return {
         'team_members': team_members,
         'team_clients': team_clients,
         'team_bookings': team_bookings,
-        'team_applications': team_applications,
-        'pending_payments': pending_payments,
-        'total_team_members': team_members.count(),
-        'total_clients': team_clients.count(),
-        'total_bookings': team_bookings.count(),
+        'team_applications': list(team_applications),
+        'pending_payments': list(pending_payments),
+        'total_team_members': len(team_members),
+        'total_clients': len(team_clients),
+        'total_bookings': len(team_bookings),
         'pending_count': pending_count,
         'pending_payments_count': pending_payments_count,
         'pending_clients_count': pending_clients_count,
     }
+
+
+@manager_required
+def manager_dashboard(request):
+    """
+    Manager dashboard with team metrics
+    """
+    from .dashboard_cache import get_cached_dashboard
+    
+    # Team data is cached per manager and invalidated when team records change
+    context = get_cached_dashboard('manager', request.user, lambda: _build_manager_dashboard(request.user))
     
     return render(request, 'dashboards/manager_dashboard.html', context)
 
@@ -626,28 +519,32 @@ def sales_dashboard(request):
     from clients.models import Client
     from bookings.models import Booking
     from applications.models import Application
+    from .dashboard_cache import get_cached_dashboard
     
-    # Assigned clients (only approved ones)
-    assigned_clients = Client.objects.filter(assigned_sales=request.user, is_approved=True)
-    
-    # Bookings for assigned clients
-    my_bookings = Booking.objects.filter(client__assigned_sales=request.user).select_related('client', 'service')
-    
-    # Applications
-    my_applications = Application.objects.filter(assigned_to=request.user).select_related('client', 'scheme')
-    
-    # Pending client approvals created by this sales person
-    pending_clients_count = Client.objects.filter(created_by=request.user, is_approved=False).count()
+    def build():
+        # Assigned clients (only approved ones)
+        assigned_clients = list(Client.objects.filter(assigned_sales=request.user, is_approved=True))
+        
+        # Bookings for assigned clients
+        my_bookings = list(Booking.objects.filter(client__assigned_sales=request.user).select_related('client', 'service'))
+        
+        # Applications
+        my_applications = list(Application.objects.filter(assigned_to=request.user).select_related('client', 'scheme'))
+        
+        # Pending client approvals created by this sales person
+        pending_clients_count = Client.objects.filter(created_by=request.user, is_approved=False).count()
+        
+        return {
+            'assigned_clients': assigned_clients,
+            'my_bookings': my_bookings,
+            'my_applications': my_applications,
+            'total_clients': len(assigned_clients),
+            'total_bookings': len(my_bookings),
+            'total_applications': len(my_applications),
+            'pending_clients_count': pending_clients_count,
+        }
     
-    context = {
-        'assigned_clients': assigned_clients,
-        'my_bookings': my_bookings,
-        'my_applications': my_applications,
-        'total_clients': assigned_clients.count(),
-        'total_bookings': my_bookings.count(),
-        'total_applications': my_applications.count(),
-        'pending_clients_count': pending_clients_count,
-    }
+    context = get_cached_dashboard('sales', request.user, build)
     
     return render(request, 'dashboards/sales_dashboard.html', context)
 
@@ -729,22 +626,44 @@ def approve_payment(request, payment_id):
     from activity_logs.models import ActivityLog
     from .email_utils import send_payment_approval_email
     
+    from django.db import transaction
+    
     payment = get_object_or_404(Payment, id=payment_id)
     old_status = payment.status
-    payment.status = 'CAPTURED'
-    payment.save(update_fields=['status'])
-    
-    # Log activity
-    ActivityLog.log_action(
-        user=request.user,
-        action='APPROVE',
-        entity_type='PAYMENT',
-        entity_id=payment.id,
-        description=f'Approved payment #{payment.id} for {payment.client.company_name} - Amount: ₹{payment.amount}',
-        old_value=old_status,
-        new_value='CAPTURED',
-        request=request
-    )
+    booking = payment.booking
+    old_booking_status = booking.status if booking else None
+    with transaction.atomic():
+        # Status, rollup, booking and client revenue are posted atomically by the model
+        if not payment.approve(request.user):
+            messages.warning(request, 'Payment is already approved.')
+            if getattr(request.user, 'is_manager', False):
+                return redirect('accounts:manager_dashboard')
+            return redirect('accounts:admin_dashboard')
+        
+        # Log activity
+        ActivityLog.log_action(
+            user=request.user,
+            action='APPROVE',
+            entity_type='PAYMENT',
+            entity_id=payment.id,
+            description=f'Approved payment #{payment.id} for {payment.client.company_name} - Amount: ₹{payment.amount}',
+            old_value=old_status,
+            new_value='CAPTURED',
+            request=request
+        )
+        
+        if booking:
+            # Log booking status change
+            ActivityLog.log_action(
+                user=request.user,
+                action='STATUS_CHANGE',
+                entity_type='BOOKING',
+                entity_id=booking.id,
+                description=f'Changed booking {booking.booking_id} status to PAID due to payment approval',
+                old_value=old_booking_status,
+                new_value='PAID',
+                request=request
+            )
     
     # Send email notification
     try:
@@ -752,26 +671,6 @@ def approve_payment(request, payment_id):
     except Exception as e:
         print(f"Email notification failed: {e}")
     
-    try:
-        booking = payment.booking
-        old_booking_status = booking.status
-        booking.status = 'PAID'
-        booking.save(update_fields=['status'])
-        
-        # Log booking status change
-        ActivityLog.log_action(
-            user=request.user,
-            action='STATUS_CHANGE',
-            entity_type='BOOKING',
-            entity_id=booking.id,
-            description=f'Changed booking {booking.booking_id} status to PAID due to payment approval',
-            old_value=old_booking_status,
-            new_value='PAID',
-            request=request
-        )
-    except Exception:
-        pass
-    
     messages.success(request, 'Payment approved and notification sent.')
     # Redirect back to where the action was initiated, prefer manager dashboard if manager
     next_url = request.GET.get('next') or request.META.get('HTTP_REFERER')
@@ -796,22 +695,25 @@ def reject_payment(request, payment_id):
     from activity_logs.models import ActivityLog
     from .email_utils import send_payment_rejection_email
     
+    from django.db import transaction
+    
     payment = get_object_or_404(Payment, id=payment_id)
     old_status = payment.status
-    payment.status = 'FAILED'
-    payment.save(update_fields=['status'])
-    
-    # Log activity
-    ActivityLog.log_action(
-        user=request.user,
-        action='REJECT',
-        entity_type='PAYMENT',
-        entity_id=payment.id,
-        description=f'Rejected payment #{payment.id} for {payment.client.company_name} - Amount: ₹{payment.amount}',
-        old_value=old_status,
-        new_value='FAILED',
-        request=request
-    )
+    with transaction.atomic():
+        payment.status = 'FAILED'
+        payment.save(update_fields=['status'])  # also updates the daily revenue rollup
+        
+        # Log activity
+        ActivityLog.log_action(
+            user=request.user,
+            action='REJECT',
+            entity_type='PAYMENT',
+            entity_id=payment.id,
+            description=f'Rejected payment #{payment.id} for {payment.client.company_name} - Amount: ₹{payment.amount}',
+            old_value=old_status,
+            new_value='FAILED',
+            request=request
+        )
     
     # Send email notification
     try:
@@ -949,38 +851,35 @@ def superuser_dashboard(request):
     from clients.models import Client
     from bookings.models import Booking
     from applications.models import Application
-    from payments.models import Payment
+    from payments.models import DailyRevenueRollup
     from edit_requests.models import EditRequest
-    from django.db.models import Sum
+    from django.db.models import Count, Q, Sum
     from accounts.models import User
+    from .dashboard_cache import get_cached_dashboard
+
+    def build():
+        # User metrics in a single conditional aggregate
+        users = User.objects.aggregate(
+            total_users=Count('id'),
+            admins=Count('id', filter=Q(role='ADMIN')),
+            managers=Count('id', filter=Q(role='MANAGER')),
+            sales=Count('id', filter=Q(role='SALES')),
+            clients_count=Count('id', filter=Q(role='CLIENT')),
+            staff_count=Count('id', filter=Q(is_staff=True)),
+        )
+        total_revenue = DailyRevenueRollup.objects.filter(
+            status__in=['AUTHORIZED', 'CAPTURED']
+        ).aggregate(total=Sum('total_amount'))['total'] or 0
+        return {
+            'total_clients': Client.objects.count(),
+            'total_bookings': Booking.objects.count(),
+            'total_applications': Application.objects.count(),
+            'total_revenue': total_revenue,
+            'pending_edit_requests': EditRequest.objects.filter(status='PENDING').count(),
+            **users,
+        }
 
-    total_clients = Client.objects.count()
-    total_bookings = Booking.objects.count()
-    total_applications = Application.objects.count()
-    total_revenue = Payment.objects.filter(status__in=['AUTHORIZED', 'CAPTURED']).aggregate(Sum('amount'))['amount__sum'] or 0
-    pending_edit_requests = EditRequest.objects.filter(status='PENDING').count()
-
-    # User metrics
-    total_users = User.objects.count()
-    admins = User.objects.filter(role='ADMIN').count()
-    managers = User.objects.filter(role='MANAGER').count()
-    sales = User.objects.filter(role='SALES').count()
-    clients_count = User.objects.filter(role='CLIENT').count()
-    staff_count = User.objects.filter(is_staff=True).count()
-
-    context = {
-        'total_clients': total_clients,
-        'total_bookings': total_bookings,
-        'total_applications': total_applications,
-        'total_revenue': total_revenue,
-        'pending_edit_requests': pending_edit_requests,
-        'total_users': total_users,
-        'admins': admins,
-        'managers': managers,
-        'sales': sales,
-        'clients_count': clients_count,
-        'staff_count': staff_count,
-    }
+    context = get_cached_dashboard('superuser', request.user, build)
 
     return render(request, 'dashboards/superuser_dashboard.html', context)
 
@@ -996,129 +895,41 @@ def owner_dashboard(request):
         messages.error(request, 'Only the company owner can access this dashboard.')
         return redirect('accounts:admin_dashboard')
 
-    from clients.models import Client, ClientCredential
-    from bookings.models import Booking
-    from applications.models import Application
+    from clients.models import ClientCredential
     from payments.models import Payment
-    from django.db.models import Sum, Count, Q
     from django.utils import timezone
     from datetime import timedelta
-
-    total_clients = Client.objects.count()
-    active_clients = Client.objects.filter(status='ACTIVE').count()
-    total_bookings = Booking.objects.count()
-    total_applications = Application.objects.count()
+    from .dashboard_cache import get_cached_dashboard
+    from .dashboard_metrics import get_dashboard_metrics, client_totals
     
     # Get unsent client credentials
     unsent_credentials = ClientCredential.objects.filter(is_sent=False).select_related('client').order_by('-created_at')
     
     # Filter support
     method_filter = request.GET.get('method')
-    base_success = Payment.objects.filter(status__in=['AUTHORIZED', 'CAPTURED'])
-    if method_filter:
-        base_success = base_success.filter(payment_method=method_filter)
-    total_revenue = base_success.aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Live client revenue totals (pitched/received/pending with GST)
-    client_revenue = Client.objects.aggregate(
-        total_pitched=Sum('total_pitched_amount'),
-        total_with_gst=Sum('total_with_gst'),
-        total_received=Sum('received_amount'),
-        total_pending=Sum('pending_amount'),
-    )
-    client_revenue = {k: v or 0 for k, v in client_revenue.items()}
-
-    # Last 10 days client revenue (new clients only)
-    ten_days_ago = timezone.now() - timedelta(days=10)
-    last10_revenue = Client.objects.filter(created_at__gte=ten_days_ago).aggregate(
-        total_pitched=Sum('total_pitched_amount'),
-        total_with_gst=Sum('total_with_gst'),
-        total_received=Sum('received_amount'),
-        total_pending=Sum('pending_amount'),
-    )
-    last10_revenue = {k: v or 0 for k, v in last10_revenue.items()}
-
-    top_sectors = Client.objects.values('sector').annotate(c=Count('id')).order_by('-c')[:5]
-
-    # Revenue by month (last 6 months)
-    now = timezone.now()
-    labels = []
-    revenue_series = []
-    for i in range(5, -1, -1):
-        start = (now.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-        if start.month == 12:
-            end = start.replace(year=start.year+1, month=1, day=1)
-        else:
-            end = start.replace(month=start.month+1, day=1)
-        month_qs = base_success.filter(payment_date__gte=start, payment_date__lt=end)
-        month_sum = month_qs.aggregate(Sum('amount'))['amount__sum'] or 0
-        labels.append(start.strftime('%b %Y'))
-        revenue_series.append(float(month_sum))
-
-    # Revenue by method
-    method_breakdown_qs = Payment.objects.filter(status__in=['AUTHORIZED','CAPTURED']).values('payment_method').annotate(total=Sum('amount')).order_by('-total')
-    method_labels = [row['payment_method'] or 'UNKNOWN' for row in method_breakdown_qs]
-    method_values = [float(row['total'] or 0) for row in method_breakdown_qs]
-
-    # Top sales by revenue
-    top_sales_qs = Payment.objects.filter(status__in=['AUTHORIZED','CAPTURED'], received_by__isnull=False).values('received_by__username', 'received_by__first_name', 'received_by__last_name').annotate(total=Sum('amount')).order_by('-total')[:5]
-    top_sales = [
-        {
-            'name': (f"{r['received_by__first_name']} {r['received_by__last_name']}").strip() or r['received_by__username'],
-            'total': float(r['total'] or 0)
+
+    def build():
+        # KPIs (grouped queries, see dashboard_metrics); charts load from dashboard_widget
+        metrics = get_dashboard_metrics({'method': method_filter}, include_charts=False)
+
+        # Last 10 days client revenue (new clients only)
+        ten_days_ago = timezone.now() - timedelta(days=10)
+        last10 = client_totals(since=ten_days_ago)
+        metrics['last10_revenue'] = {
+            'total_pitched': last10['total_pitched'],
+            'total_with_gst': last10['total_with_gst'],
+            'total_received': last10['total_received'],
+            'total_pending': last10['total_pending'],
         }
-        for r in top_sales_qs
-    ]
-
-    # Daily totals last 7 days
-    daily_labels = []
-    daily_values = []
-    for i in range(6, -1, -1):
-        day = now.date() - timedelta(days=i)
-        day_sum = base_success.filter(payment_date__date=day).aggregate(total=Sum('amount'))['total'] or 0
-        daily_labels.append(day.strftime('%b %d'))
-        daily_values.append(float(day_sum))
-
-    # Pending vs approved by salesperson
-    status_by_sales = Payment.objects.values('received_by__username').annotate(
-        pending=Count('id', filter=Q(status='PENDING')),
-        approved=Count('id', filter=Q(status__in=['AUTHORIZED','CAPTURED']))
-    ).order_by('-approved', '-pending')
-    status_sales_labels = [row['received_by__username'] or 'Unassigned' for row in status_by_sales]
-    status_sales_pending = [row['pending'] for row in status_by_sales]
-    status_sales_approved = [row['approved'] for row in status_by_sales]
 
-    # Pending payments summary for owner view
-    pending_payments_count = Payment.objects.filter(status='PENDING').count()
-    
-    # Revenue breakdown
-    pending_revenue = Payment.objects.filter(status='PENDING').aggregate(Sum('amount'))['amount__sum'] or 0
-    failed_revenue = Payment.objects.filter(status='FAILED').aggregate(Sum('amount'))['amount__sum'] or 0
-    all_recent_payments = Payment.objects.select_related('client', 'booking', 'received_by').order_by('-created_at')[:20]
+        metrics['all_recent_payments'] = list(Payment.objects.select_related('client', 'booking', 'received_by').order_by('-created_at')[:20])
+        return metrics
+
+    # Cached per owner and method filter; credentials list stays live
+    dashboard = get_cached_dashboard('owner', request.user, build, params={'method': method_filter})
 
     context = {
-        'total_clients': total_clients,
-        'active_clients': active_clients,
-        'total_bookings': total_bookings,
-        'total_applications': total_applications,
-        'total_revenue': total_revenue,
-        'client_revenue': client_revenue,
-        'last10_revenue': last10_revenue,
-        'top_sectors': top_sectors,
-        'chart_labels': labels,
-        'chart_revenue': revenue_series,
-        'method_labels': method_labels,
-        'method_values': method_values,
-        'top_sales': top_sales,
-        'daily_labels': daily_labels,
-        'daily_values': daily_values,
-        'status_sales_labels': status_sales_labels,
-        'status_sales_pending': status_sales_pending,
-        'status_sales_approved': status_sales_approved,
-        'pending_payments_count': pending_payments_count,
-        'pending_revenue': pending_revenue,
-        'failed_revenue': failed_revenue,
-        'all_recent_payments': all_recent_payments,
+        **dashboard,
         'selected_method': method_filter or '',
         'unsent_credentials': unsent_credentials,
     }
@@ -1135,17 +946,17 @@ def mark_credential_as_sent(request, credential_id):
     
     if request.method == 'POST':
         login_url = getattr(settings, 'CLIENT_LOGIN_URL', None) or request.build_absolute_uri(reverse('accounts:login'))
-        email_sent = send_client_credentials_email(credential, login_url=login_url)
-        if email_sent:
-            credential.mark_as_sent(request.user)
+        # The notification outbox marks the credential as sent once delivered
+        email_queued = send_client_credentials_email(credential, login_url=login_url, sent_by=request.user)
+        if email_queued:
             messages.success(
                 request,
-                f'Login email sent to {credential.email} for {credential.client.company_name}.',
+                f'Login email queued to {credential.email} for {credential.client.company_name}.',
             )
         else:
             messages.error(
                 request,
-                f'Could not send email to {credential.email}. Please verify SMTP settings and try again.',
+                f'Could not queue email to {credential.email}. Please try again.',
             )
         return redirect('accounts:owner_dashboard')
     
@@ -1155,73 +966,17 @@ def mark_credential_as_sent(request, credential_id):
 @admin_required
 def revenue_report(request):
     """Detailed revenue report showing all clients with sales/manager assignments."""
-    from clients.models import Client
     from accounts.models import User
-    from django.db.models import Sum, Q
-    from django.core.paginator import Paginator
+    from accounts.revenue_report import report_filters, revenue_report_page, revenue_report_totals
+    from urllib.parse import urlencode
 
-    def base_queryset():
-        return Client.objects.select_related(
-            'assigned_sales', 'assigned_manager', 'created_by'
-        )
-
-    clients_qs = base_queryset()
-
-    # Filters
-    search_query = request.GET.get('search', '').strip()
-    manager_id = request.GET.get('manager', '').strip()
-    sales_id = request.GET.get('sales', '').strip()
-
-    if search_query:
-        clients_qs = clients_qs.filter(
-            Q(company_name__icontains=search_query) |
-            Q(contact_person__icontains=search_query) |
-            Q(assigned_sales__username__icontains=search_query) |
-            Q(assigned_sales__first_name__icontains=search_query) |
-            Q(assigned_sales__last_name__icontains=search_query) |
-            Q(assigned_manager__username__icontains=search_query) |
-            Q(assigned_manager__first_name__icontains=search_query) |
-            Q(assigned_manager__last_name__icontains=search_query)
-        )
+    filters = report_filters(request.GET)
 
-    if manager_id:
-        clients_qs = clients_qs.filter(assigned_manager_id=manager_id)
-    if sales_id:
-        clients_qs = clients_qs.filter(assigned_sales_id=sales_id)
-
-    # Sorting
-    sort = request.GET.get('sort', '').strip() or 'created_at'
-    order = request.GET.get('order', '').strip() or 'desc'
-    sort_map = {
-        'company': 'company_name',
-        'sales': 'assigned_sales__first_name',
-        'manager': 'assigned_manager__first_name',
-        'pitched': 'total_pitched_amount',
-        'gst': 'gst_percentage',
-        'gst_amount': 'gst_amount',
-        'total': 'total_with_gst',
-        'received': 'received_amount',
-        'pending': 'pending_amount',
-        'created_at': 'created_at',
-    }
-    sort_field = sort_map.get(sort, 'created_at')
-    if order == 'asc':
-        clients_qs = clients_qs.order_by(sort_field)
-    else:
-        clients_qs = clients_qs.order_by(f'-{sort_field}')
-
-    # Totals computed on filtered set
-    totals = clients_qs.aggregate(
-        total_pitched=Sum('total_pitched_amount'),
-        total_with_gst=Sum('total_with_gst'),
-        total_received=Sum('received_amount'),
-        total_pending=Sum('pending_amount')
-    )
+    # Totals over the filtered set (cached per filter signature)
+    totals = revenue_report_totals(request.GET)
 
-    # Pagination
-    paginator = Paginator(clients_qs, 50)
-    page_number = request.GET.get('page')
-    clients = paginator.get_page(page_number)
+    # Keyset pagination on (sort column, id)
+    clients = revenue_report_page(request.GET)
 
     # Filter dropdowns
     managers = User.objects.filter(role__in=['ADMIN', 'MANAGER']).order_by('first_name', 'last_name')
@@ -1230,13 +985,14 @@ def revenue_report(request):
     context = {
         'clients': clients,
         'totals': totals,
-        'search_query': search_query,
+        'search_query': filters['search'],
         'managers': managers,
         'sales_people': sales_people,
-        'selected_manager': manager_id,
-        'selected_sales': sales_id,
-        'sort': sort,
-        'order': order,
+        'selected_manager': filters['manager'],
+        'selected_sales': filters['sales'],
+        'sort': filters['sort'],
+        'order': filters['order'],
+        'filter_query': urlencode({k: v for k, v in filters.items() if v}),
     }
 
     return render(request, 'accounts/revenue_report.html', context)
@@ -1244,86 +1000,8 @@ def revenue_report(request):
 
 @admin_required
 def revenue_report_excel(request):
-    """Export filtered revenue report to Excel."""
-    from clients.models import Client
-    from accounts.models import User
-    from django.db.models import Q
-    from openpyxl import Workbook
-    from django.http import HttpResponse
-
-    # Reuse filtering logic
-    qs = Client.objects.select_related('assigned_sales', 'assigned_manager')
-
-    search_query = request.GET.get('search', '').strip()
-    manager_id = request.GET.get('manager', '').strip()
-    sales_id = request.GET.get('sales', '').strip()
-
-    if search_query:
-        qs = qs.filter(
-            Q(company_name__icontains=search_query) |
-            Q(contact_person__icontains=search_query) |
-            Q(assigned_sales__username__icontains=search_query) |
-            Q(assigned_sales__first_name__icontains=search_query) |
-            Q(assigned_sales__last_name__icontains=search_query) |
-            Q(assigned_manager__username__icontains=search_query) |
-            Q(assigned_manager__first_name__icontains=search_query) |
-            Q(assigned_manager__last_name__icontains=search_query)
-        )
-    if manager_id:
-        qs = qs.filter(assigned_manager_id=manager_id)
-    if sales_id:
-        qs = qs.filter(assigned_sales_id=sales_id)
-
-    # Sorting params
-    sort = request.GET.get('sort', '').strip() or 'created_at'
-    order = request.GET.get('order', '').strip() or 'desc'
-    sort_map = {
-        'company': 'company_name',
-        'sales': 'assigned_sales__first_name',
-        'manager': 'assigned_manager__first_name',
-        'pitched': 'total_pitched_amount',
-        'gst': 'gst_percentage',
-        'gst_amount': 'gst_amount',
-        'total': 'total_with_gst',
-        'received': 'received_amount',
-        'pending': 'pending_amount',
-        'created_at': 'created_at',
-    }
-    sort_field = sort_map.get(sort, 'created_at')
-    if order == 'asc':
-        qs = qs.order_by(sort_field)
-    else:
-        qs = qs.order_by(f'-{sort_field}')
-
-    # Build workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Client Revenue'
-    headers = [
-        'Client/Company', 'Sales Employee', 'Manager', 'Pitched Amount', 'GST %', 'GST Amount',
-        'Total with GST', 'Received', 'Pending', 'Status'
-    ]
-    ws.append(headers)
-
-    for c in qs:
-        status = 'Paid' if c.pending_amount == 0 else ('Partial' if c.received_amount > 0 else 'Unpaid')
-        ws.append([
-            c.company_name,
-            (c.assigned_sales.get_full_name() or c.assigned_sales.username) if c.assigned_sales else '',
-            (c.assigned_manager.get_full_name() or c.assigned_manager.username) if c.assigned_manager else '',
-            float(c.total_pitched_amount or 0),
-            float(c.gst_percentage or 0),
-            float(c.gst_amount or 0),
-            float(c.total_with_gst or 0),
-            float(c.received_amount or 0),
-            float(c.pending_amount or 0),
-            status,
-        ])
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=client_revenue_report.xlsx'
-    wb.save(response)
-    return response
+    """Export filtered revenue report to Excel (with a summary sheet of filtered totals)."""
+    return _export_response(request, 'REVENUE_REPORT')
 
 
 @admin_required
@@ -1413,154 +1091,120 @@ def change_password(request):
 
 
 # Export Views
+def _export_response(request, kind):
+    """
+    Answer an export request inline, or hand it to a background ExportJob when
+    it is large (see accounts.export_jobs).
+    """
+    from django.http import JsonResponse
+    from .export_jobs import build_export, enqueue_export, should_run_async
+    from .utils import export_to_csv, export_to_xlsx
+    
+    spec = build_export(kind, request.GET)
+    if should_run_async(spec, request.GET):
+        job = enqueue_export(request.user, kind, request.GET)
+        status_url = reverse('accounts:export_job_status', args=[job.pk])
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse({'job_id': job.pk, 'status': job.status, 'status_url': status_url}, status=202)
+        return render(request, 'accounts/export_job.html', {'job': job, 'status_url': status_url})
+    
+    if spec.get('format') == 'xlsx':
+        summary = spec.get('summary')
+        return export_to_xlsx(
+            spec['queryset'], spec['fields'], f"{spec['filename']}.xlsx",
+            sheet_title=spec.get('sheet_title', 'Data'),
+            summary=summary() if summary else None,
+        )
+    return export_to_csv(spec['queryset'], spec['fields'], spec['filename'])
+
+
 @staff_required
 def export_clients(request):
     """Export clients to CSV"""
-    from clients.models import Client
-    from .utils import export_to_csv
-    
-    queryset = Client.objects.all().select_related('assigned_manager', 'assigned_sales')
-    
-    # Apply filters if provided
-    status_filter = request.GET.get('status')
-    sector_filter = request.GET.get('sector')
-    if status_filter:
-        queryset = queryset.filter(status=status_filter)
-    if sector_filter:
-        queryset = queryset.filter(sector=sector_filter)
-    
-    fields = [
-        {'name': 'id', 'label': 'ID'},
-        {'name': 'company_name', 'label': 'Company Name'},
-        {'name': 'contact_person', 'label': 'Contact Person'},
-        {'name': 'email', 'label': 'Email'},
-        {'name': 'phone', 'label': 'Phone'},
-        {'name': 'get_business_type_display', 'label': 'Business Type'},
-        {'name': 'get_sector_display', 'label': 'Sector'},
-        {'name': 'funding_required', 'label': 'Funding Required (Lakhs)'},
-        {'name': 'get_status_display', 'label': 'Status'},
-        {'name': 'assigned_manager', 'label': 'Manager', 'accessor': lambda obj: obj.assigned_manager.get_full_name() if obj.assigned_manager else 'N/A'},
-        {'name': 'assigned_sales', 'label': 'Sales', 'accessor': lambda obj: obj.assigned_sales.get_full_name() if obj.assigned_sales else 'N/A'},
-        {'name': 'created_at', 'label': 'Created Date', 'accessor': lambda obj: obj.created_at.strftime('%Y-%m-%d %H:%M')},
-    ]
-    
-    return export_to_csv(queryset, fields, 'clients')
+    return _export_response(request, 'CLIENTS')
 
 
 @staff_required
 def export_bookings(request):
     """Export bookings to CSV"""
-    from bookings.models import Booking
-    from .utils import export_to_csv
-    
-    queryset = Booking.objects.all().select_related('client', 'service', 'assigned_to')
-    
-    # Apply filters
-    status_filter = request.GET.get('status')
-    if status_filter:
-        queryset = queryset.filter(status=status_filter)
-    
-    fields = [
-        {'name': 'booking_id', 'label': 'Booking ID'},
-        {'name': 'client', 'label': 'Client', 'accessor': lambda obj: obj.client.company_name},
-        {'name': 'service', 'label': 'Service', 'accessor': lambda obj: obj.service.name},
-        {'name': 'amount', 'label': 'Amount'},
-        {'name': 'discount', 'label': 'Discount'},
-        {'name': 'final_amount', 'label': 'Final Amount'},
-        {'name': 'get_status_display', 'label': 'Status'},
-        {'name': 'assigned_to', 'label': 'Assigned To', 'accessor': lambda obj: obj.assigned_to.get_full_name() if obj.assigned_to else 'N/A'},
-        {'name': 'booking_date', 'label': 'Booking Date', 'accessor': lambda obj: obj.booking_date.strftime('%Y-%m-%d')},
-        {'name': 'created_at', 'label': 'Created Date', 'accessor': lambda obj: obj.created_at.strftime('%Y-%m-%d %H:%M')},
-    ]
-    
-    return export_to_csv(queryset, fields, 'bookings')
+    return _export_response(request, 'BOOKINGS')
 
 
 @staff_required
 def export_payments(request):
     """Export payments to CSV"""
-    from payments.models import Payment
-    from .utils import export_to_csv
-    
-    queryset = Payment.objects.all().select_related('client', 'booking', 'received_by')
-    
-    # Apply filters
-    status_filter = request.GET.get('status')
-    method_filter = request.GET.get('method')
-    if status_filter:
-        queryset = queryset.filter(status=status_filter)
-    if method_filter:
-        queryset = queryset.filter(payment_method=method_filter)
-    
-    fields = [
-        {'name': 'id', 'label': 'Payment ID'},
-        {'name': 'client', 'label': 'Client', 'accessor': lambda obj: obj.client.company_name},
-        {'name': 'booking', 'label': 'Booking', 'accessor': lambda obj: obj.booking.booking_id if obj.booking else 'N/A'},
-        {'name': 'amount', 'label': 'Amount'},
-        {'name': 'currency', 'label': 'Currency'},
-        {'name': 'get_payment_method_display', 'label': 'Payment Method'},
-        {'name': 'get_status_display', 'label': 'Status'},
-        {'name': 'reference_id', 'label': 'Reference ID'},
-        {'name': 'received_by', 'label': 'Received By', 'accessor': lambda obj: obj.received_by.get_full_name() if obj.received_by else 'N/A'},
-        {'name': 'payment_date', 'label': 'Payment Date', 'accessor': lambda obj: obj.payment_date.strftime('%Y-%m-%d %H:%M') if obj.payment_date else 'N/A'},
-        {'name': 'notes', 'label': 'Notes'},
-    ]
-    
-    return export_to_csv(queryset, fields, 'payments')
+    return _export_response(request, 'PAYMENTS')
 
 
 @admin_required
 def export_dashboard_data(request):
-    """Export filtered dashboard revenue data to CSV"""
-    from payments.models import Payment
-    from django.http import HttpResponse
-    import csv
-    from datetime import datetime
-    
-    # Get filters from request
-    method_filter = request.GET.get('method')
-    salesperson_filter = request.GET.get('salesperson')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    
-    # Build queryset
-    queryset = Payment.objects.filter(status__in=['AUTHORIZED', 'CAPTURED']).select_related('client', 'booking', 'received_by')
-    
-    if method_filter:
-        queryset = queryset.filter(payment_method=method_filter)
-    if salesperson_filter:
-        queryset = queryset.filter(received_by_id=salesperson_filter)
-    if date_from:
-        from django.utils.dateparse import parse_date
-        parsed_from = parse_date(date_from)
-        if parsed_from:
-            queryset = queryset.filter(payment_date__date__gte=parsed_from)
-    if date_to:
-        from django.utils.dateparse import parse_date
-        parsed_to = parse_date(date_to)
-        if parsed_to:
-            queryset = queryset.filter(payment_date__date__lte=parsed_to)
-    
-    # Create CSV
-    response = HttpResponse(content_type='text/csv')
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    response['Content-Disposition'] = f'attachment; filename="dashboard_revenue_{timestamp}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Payment ID', 'Client', 'Booking', 'Amount', 'Method', 'Salesperson', 'Payment Date', 'Status'])
-    
-    for payment in queryset:
-        writer.writerow([
-            payment.id,
-            payment.client.company_name,
-            payment.booking.booking_id if payment.booking else 'N/A',
-            payment.amount,
-            payment.get_payment_method_display(),
-            payment.received_by.get_full_name() if payment.received_by else 'N/A',
-            payment.payment_date.strftime('%Y-%m-%d %H:%M') if payment.payment_date else 'N/A',
-            payment.get_status_display(),
-        ])
+    """Export filtered dashboard revenue data (daily rollup rows) to CSV"""
+    return _export_response(request, 'DASHBOARD')
+
+
+@login_required
+def export_job_status(request, job_id):
+    """Progress poll for a background export job (JSON)"""
+    from django.http import JsonResponse
+    from .models import ExportJob
+    
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if job.user_id != request.user.id and not request.user.is_superuser:
+        return JsonResponse({'error': 'Not found'}, status=404)
+    
+    data = {
+        'job_id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'download_url': reverse('accounts:export_job_download', args=[job.pk]) if job.status == ExportJob.Status.COMPLETED else None,
+        'error': job.error_message if job.status == ExportJob.Status.FAILED else None,
+    }
+    return JsonResponse(data)
+
+
+@login_required
+def export_job_download(request, job_id):
+    """Download the file produced by a completed export job"""
+    import os
+    from django.http import FileResponse, Http404
+    from .models import ExportJob
     
+    job = get_object_or_404(ExportJob, pk=job_id, status=ExportJob.Status.COMPLETED)
+    if job.user_id != request.user.id and not request.user.is_superuser:
+        raise Http404('Export not found')
+    if not job.file or not job.file.storage.exists(job.file.name):
+        raise Http404('Export file missing')
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
+
+
+@admin_required
+def dashboard_widget(request, name):
+    """
+    JSON dataset for a single dashboard chart, fetched by the page after
+    first paint. Sends ETag/Last-Modified and answers revalidation with 304.
+    """
+    from django.http import Http404, JsonResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+    from django.utils.http import http_date
+    from .dashboard_widgets import WIDGETS, get_widget_payload
+    
+    if name not in WIDGETS:
+        raise Http404('Unknown dashboard widget')
+    
+    payload = get_widget_payload(name, request.GET)
+    etag = quote_etag(payload['etag'])
+    last_modified = payload['last_modified']
+    
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(payload['data'])
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Per-user data behind login: browsers may keep it but must revalidate
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
@@ -1570,7 +1214,8 @@ def global_search(request):
     from clients.models import Client
     from bookings.models import Booking
     from applications.models import Application
-    from django.db.models import Q
+    from .models import SearchDocument
+    from .search_index import search
     
     query = request.GET.get('q', '').strip()
     
@@ -1582,36 +1227,32 @@ def global_search(request):
             'applications': [],
         })
     
-    # Search clients
-    clients = Client.objects.filter(
-        Q(company_name__icontains=query) |
-        Q(contact_person__icontains=query) |
-        Q(contact_email__icontains=query) |
-        Q(contact_phone__icontains=query) |
-        Q(pan_number__icontains=query) |
-        Q(gst_number__icontains=query)
-    ).select_related('assigned_manager', 'assigned_sales')[:10]
-    
-    # Search bookings
-    bookings = Booking.objects.filter(
-        Q(booking_id__icontains=query) |
-        Q(client__company_name__icontains=query) |
-        Q(service__name__icontains=query)
-    ).select_related('client', 'service', 'assigned_to')[:10]
-    
-    # Search applications
-    applications = Application.objects.filter(
-        Q(application_id__icontains=query) |
-        Q(client__company_name__icontains=query) |
-        Q(scheme__name__icontains=query)
-    ).select_related('client', 'scheme', 'assigned_to')[:10]
+    # Indexed identifier lookup or one ranked index query, then fetch hits by pk
+    hits = search(query, limit_per_type=10)
+    
+    def hydrate(queryset, ids):
+        objects = queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+    
+    clients = hydrate(
+        Client.objects.select_related('assigned_manager', 'assigned_sales'),
+        hits[SearchDocument.EntityType.CLIENT],
+    )
+    bookings = hydrate(
+        Booking.objects.select_related('client', 'service', 'assigned_to'),
+        hits[SearchDocument.EntityType.BOOKING],
+    )
+    applications = hydrate(
+        Application.objects.select_related('client', 'scheme', 'assigned_to'),
+        hits[SearchDocument.EntityType.APPLICATION],
+    )
     
     context = {
         'query': query,
         'clients': clients,
         'bookings': bookings,
         'applications': applications,
-        'total_results': clients.count() + bookings.count() + applications.count(),
+        'total_results': len(clients) + len(bookings) + len(applications),
     }
     
     return render(request, 'accounts/search_results.html', context)
@@ -1623,9 +1264,9 @@ def reports_dashboard(request):
     from clients.models import Client
     from bookings.models import Booking
     from applications.models import Application
-    from payments.models import Payment
-    from django.db.models import Sum, Count, Avg, Q
-    from django.db.models.functions import TruncMonth, TruncWeek
+    from payments.models import DailyRevenueRollup
+    from django.db.models import Sum, Count, Q
+    from django.db.models.functions import TruncWeek
     from django.utils import timezone
     from datetime import timedelta
     from collections import defaultdict
@@ -1639,50 +1280,32 @@ def reports_dashboard(request):
     
     start_date = timezone.now() - timedelta(days=days)
     
-    # Revenue Analysis
-    revenue_data = Payment.objects.filter(
-        status__in=['AUTHORIZED', 'CAPTURED'],
-        payment_date__gte=start_date
-    ).aggregate(
-        total=Sum('amount'),
-        count=Count('id'),
-        average=Avg('amount')
+    # Revenue Analysis (read from the daily rollup instead of scanning payments)
+    rollup_success = DailyRevenueRollup.objects.filter(status__in=['AUTHORIZED', 'CAPTURED'])
+    revenue_data = rollup_success.filter(day__gte=start_date.date()).aggregate(
+        total=Sum('total_amount'),
+        count=Sum('payment_count'),
     )
+    revenue_data['count'] = revenue_data['count'] or 0
+    revenue_data['average'] = (revenue_data['total'] / revenue_data['count']) if revenue_data['count'] else None
     
-    # Revenue by method
-    revenue_by_method = Payment.objects.filter(
-        status__in=['AUTHORIZED', 'CAPTURED'],
-        payment_date__gte=start_date
-    ).values('payment_method').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-    
-    # Monthly revenue trend (last 12 months)
-    monthly_revenue = Payment.objects.filter(
-        status__in=['AUTHORIZED', 'CAPTURED'],
-        payment_date__gte=timezone.now() - timedelta(days=365)
-    ).annotate(
-        month=TruncMonth('payment_date')
-    ).values('month').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('month')
+    # Revenue by method, monthly trend and clients by sector are served
+    # lazily by dashboard_widget
     
     # Sales Performance
-    sales_performance = Payment.objects.filter(
-        status__in=['AUTHORIZED', 'CAPTURED'],
-        payment_date__gte=start_date,
+    sales_performance = list(rollup_success.filter(
+        day__gte=start_date.date(),
         received_by__isnull=False
     ).values(
         'received_by__username',
         'received_by__first_name',
         'received_by__last_name'
     ).annotate(
-        total_revenue=Sum('amount'),
-        total_payments=Count('id'),
-        avg_payment=Avg('amount')
-    ).order_by('-total_revenue')[:10]
+        total_revenue=Sum('total_amount'),
+        total_payments=Sum('payment_count')
+    ).filter(total_payments__gt=0).order_by('-total_revenue')[:10])
+    for row in sales_performance:
+        row['avg_payment'] = row['total_revenue'] / row['total_payments']
     
     # Client Acquisition
     new_clients = Client.objects.filter(
@@ -1693,12 +1316,6 @@ def reports_dashboard(request):
         count=Count('id')
     ).order_by('week')
     
-    # Client by sector
-    clients_by_sector = Client.objects.values('sector').annotate(
-        count=Count('id'),
-        active_count=Count('id', filter=Q(status='ACTIVE'))
-    ).order_by('-count')
-    
     # Booking Statistics
     booking_stats = Booking.objects.filter(
         created_at__gte=start_date
@@ -1745,25 +1362,18 @@ def reports_dashboard(request):
     booking_to_payment_rate = (paid_bookings / total_bookings * 100) if total_bookings > 0 else 0
     
     # Format data for charts
-    monthly_labels = [item['month'].strftime('%b %Y') for item in monthly_revenue]
-    monthly_values = [float(item['total'] or 0) for item in monthly_revenue]
-    
     weekly_labels = [item['week'].strftime('%b %d') for item in new_clients]
     weekly_values = [item['count'] for item in new_clients]
     
     context = {
         'period_days': days,
         'revenue_data': revenue_data,
-        'revenue_by_method': revenue_by_method,
         'sales_performance': sales_performance,
         'booking_stats': booking_stats,
         'app_stats': app_stats,
         'top_schemes': top_schemes,
-        'clients_by_sector': clients_by_sector,
         'client_to_booking_rate': round(client_to_booking_rate, 1),
         'booking_to_payment_rate': round(booking_to_payment_rate, 1),
-        'monthly_labels': monthly_labels,
-        'monthly_values': monthly_values,
         'weekly_labels': weekly_labels,
         'weekly_values': weekly_values,
         'total_clients': total_clients,
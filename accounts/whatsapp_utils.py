@@ -9,6 +9,7 @@ Setup Instructions:
    TWILIO_ACCOUNT_SID=your_account_sid
    TWILIO_AUTH_TOKEN=your_auth_token
    TWILIO_WHATSAPP_FROM=whatsapp:+14155238886  # Sandbox number
+4. Set WHATSAPP_RATE_PER_SECOND to the sender's messages-per-second limit
 
 For production:
 - Apply for WhatsApp Business API approval
@@ -16,32 +17,20 @@ For production:
 - Get your production WhatsApp number
 """
 
-from django.conf import settings
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 import logging
 
-logger = logging.getLogger(__name__)
-
+from notifications.whatsapp import WhatsAppError, get_dispatcher
 
-def get_twilio_client():
-    """Initialize and return Twilio client"""
-    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-        logger.warning("Twilio credentials not configured. WhatsApp notifications disabled.")
-        return None
-    
-    try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        return client
-    except Exception as e:
-        logger.error(f"Error initializing Twilio client: {e}")
-        return None
+logger = logging.getLogger(__name__)
 
 
 def send_whatsapp_message(to_number, message):
     """
     Send WhatsApp message via Twilio
     
+    Goes through the shared notifications.whatsapp dispatcher, which reuses
+    one pooled HTTP session and applies the Twilio rate limit.
+    
     Args:
         to_number (str): Recipient phone number with country code (e.g., +919876543210)
         message (str): Message content
@@ -49,26 +38,15 @@ def send_whatsapp_message(to_number, message):
     Returns:
         bool: True if sent successfully, False otherwise
     """
-    client = get_twilio_client()
-    if not client:
-        logger.warning(f"Cannot send WhatsApp to {to_number}: Twilio client not configured")
+    dispatcher = get_dispatcher()
+    if not dispatcher.configured:
+        logger.warning(f"Cannot send WhatsApp to {to_number}: Twilio credentials not configured")
         return False
     
     try:
-        # Ensure number has whatsapp: prefix
-        if not to_number.startswith('whatsapp:'):
-            to_number = f'whatsapp:{to_number}'
-        
-        message = client.messages.create(
-            from_=settings.TWILIO_WHATSAPP_FROM,
-            body=message,
-            to=to_number
-        )
-        
-        logger.info(f"WhatsApp sent successfully. SID: {message.sid}")
+        dispatcher.send(to_number, message)
         return True
-        
-    except TwilioRestException as e:
+    except WhatsAppError as e:
         logger.error(f"Twilio error sending WhatsApp to {to_number}: {e}")
         return False
     except Exception as e:
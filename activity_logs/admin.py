@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ActivityLog
+from .models import ActivityLog, ActivityLogDailyCount, ActivityLogSegment
 
 
 @admin.register(ActivityLog)
@@ -25,3 +25,24 @@ class ActivityLogAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Only superusers can delete activity logs"""
         return request.user.is_superuser
+
+
+@admin.register(ActivityLogSegment)
+class ActivityLogSegmentAdmin(admin.ModelAdmin):
+    list_display = ['month', 'entry_count', 'size_bytes', 'first_timestamp', 'last_timestamp', 'updated_at']
+    readonly_fields = ['month', 'path', 'entry_count', 'size_bytes', 'first_timestamp', 'last_timestamp', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ActivityLogDailyCount)
+class ActivityLogDailyCountAdmin(admin.ModelAdmin):
+    list_display = ['date', 'user', 'action', 'count']
+    list_filter = ['action', 'date']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['date', 'user', 'action', 'count']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
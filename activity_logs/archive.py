@@ -0,0 +1,237 @@
+"""
+Activity log archival
+
+ActivityLog rows older than ACTIVITY_LOG_RETENTION_DAYS are moved out of the
+table into one gzipped JSON-lines segment per month under
+ACTIVITY_ARCHIVE_DIR (ActivityLogSegment tracks them), so the live table and
+its indexes stay small. The directory is kept out of MEDIA_ROOT/STATIC_ROOT:
+archived entries are only served through the admin-only activity_archive
+view. Each archival run appends a new gzip member to the
+month's file; readers see the members as one stream.
+
+While rows are archived their per-user, per-action daily totals are added to
+ActivityLogDailyCount, which keeps history available for analytics without
+opening the segments. daily_counts() combines it with the live table.
+
+Archived entries are read back on demand with iter_archived(), which streams
+the relevant segments line by line.
+
+Run ``python manage.py archive_activity_logs`` daily (cron) or schedule the
+activity_logs.archive_activity_logs Celery task.
+"""
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivityLog, ActivityLogDailyCount, ActivityLogSegment
+
+FIELDS = [
+    'action', 'entity_type', 'entity_id', 'description', 'old_value', 'new_value', 'ip_address', 'user_agent',
+]
+
+
+def archive_dir():
+    """The segment directory; refuses locations under the web-served media/static roots."""
+    path = Path(getattr(settings, 'ACTIVITY_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'private' / 'activity_archive'))
+    resolved = path.resolve()
+    for setting in ('MEDIA_ROOT', 'STATIC_ROOT'):
+        served = getattr(settings, setting, None)
+        if served and resolved.is_relative_to(Path(served).resolve()):
+            raise ImproperlyConfigured(f'ACTIVITY_ARCHIVE_DIR must not be inside {setting} ({served})')
+    return path
+
+
+def retention_days():
+    return getattr(settings, 'ACTIVITY_LOG_RETENTION_DAYS', 90)
+
+
+def default_cutoff(now=None, days=None):
+    """Midnight (local time) ``days`` (default retention_days()) ago, so only whole days are archived."""
+    days = retention_days() if days is None else days
+    day = timezone.localdate(now or timezone.now()) - timedelta(days=days)
+    return timezone.make_aware(datetime(day.year, day.month, day.day))
+
+
+def _month_bounds(moment):
+    local = timezone.localtime(moment)
+    start = timezone.make_aware(datetime(local.year, local.month, 1))
+    if local.month == 12:
+        end = timezone.make_aware(datetime(local.year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(local.year, local.month + 1, 1))
+    return start, end
+
+
+def segment_path(month):
+    return f'{month.year}/activity-{month.year}-{month.month:02d}.jsonl.gz'
+
+
+def serialize(entry):
+    data = {
+        'id': entry.pk,
+        'timestamp': entry.timestamp.isoformat(),
+        'user_id': entry.user_id,
+        'user': entry.user.username if entry.user else None,
+    }
+    data.update({field: getattr(entry, field) for field in FIELDS})
+    return data
+
+
+def _append(path, entries):
+    """Append ``entries`` to the segment file as a new gzip member and flush it to disk."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            for entry in entries:
+                gz.write(json.dumps(serialize(entry), ensure_ascii=False, separators=(',', ':')).encode())
+                gz.write(b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+        return raw.tell()
+
+
+def _add_daily_counts(entries):
+    totals = Counter((timezone.localdate(entry.timestamp), entry.user_id, entry.action) for entry in entries)
+    for (date, user_id, action), count in totals.items():
+        updated = ActivityLogDailyCount.objects.filter(date=date, user_id=user_id, action=action).update(
+            count=F('count') + count
+        )
+        if not updated:
+            ActivityLogDailyCount.objects.create(date=date, user_id=user_id, action=action, count=count)
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Archive up to ``batch_size`` of the oldest entries before ``cutoff``, all from one month.
+
+    The segment is written before the rows are deleted, so a failed run can
+    leave entries in both places but never in neither; iter_archived()
+    skips such repeats. Returns the number of entries archived.
+    """
+    oldest = ActivityLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp', 'pk').first()
+    if oldest is None:
+        return 0
+    month_start, month_end = _month_bounds(oldest.timestamp)
+
+    with transaction.atomic():
+        segment, _ = ActivityLogSegment.objects.get_or_create(
+            month=timezone.localtime(month_start).date(),
+            defaults={'path': segment_path(month_start)},
+        )
+        # One archiver per month at a time
+        segment = ActivityLogSegment.objects.select_for_update().get(pk=segment.pk)
+        entries = list(
+            ActivityLog.objects.filter(timestamp__gte=month_start, timestamp__lt=min(month_end, cutoff))
+            .select_related('user').order_by('timestamp', 'pk')[:batch_size]
+        )
+        if not entries:
+            return 0
+
+        segment.size_bytes = _append(archive_dir() / segment.path, entries)
+        segment.entry_count += len(entries)
+        if segment.first_timestamp is None or entries[0].timestamp < segment.first_timestamp:
+            segment.first_timestamp = entries[0].timestamp
+        if segment.last_timestamp is None or entries[-1].timestamp > segment.last_timestamp:
+            segment.last_timestamp = entries[-1].timestamp
+        segment.save()
+
+        _add_daily_counts(entries)
+        ActivityLog.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+    return len(entries)
+
+
+def archive(cutoff=None, batch_size=None):
+    """Archive every entry older than ``cutoff`` (default: default_cutoff()); returns how many."""
+    cutoff = cutoff or default_cutoff()
+    batch_size = batch_size or getattr(settings, 'ACTIVITY_ARCHIVE_BATCH_SIZE', 5000)
+    total = 0
+    while True:
+        archived = archive_batch(cutoff, batch_size)
+        if not archived:
+            return total
+        total += archived
+
+
+def _matches(entry, start, end, user_id, action, entity_type, entity_id, q):
+    if action and entry['action'] != action:
+        return False
+    if entity_type and entry['entity_type'] != entity_type:
+        return False
+    if entity_id is not None and entry['entity_id'] != int(entity_id):
+        return False
+    if user_id is not None and entry['user_id'] != int(user_id):
+        return False
+    if q and q.lower() not in (entry['description'] or '').lower():
+        return False
+    if start or end:
+        timestamp = parse_datetime(entry['timestamp'])
+        if start and timestamp < start:
+            return False
+        if end and timestamp >= end:
+            return False
+    return True
+
+
+def iter_archived(start=None, end=None, user_id=None, action=None, entity_type=None, entity_id=None, q=None):
+    """
+    Stream archived entries (as dicts) from ``start`` up to ``end`` (datetimes), oldest month first.
+
+    Only the segments overlapping the range are opened, one line at a time,
+    so memory use does not grow with the archive.
+    """
+    segments = ActivityLogSegment.objects.order_by('month')
+    if start:
+        segments = segments.filter(month__gte=_month_bounds(start)[0].date())
+    if end:
+        segments = segments.filter(month__lte=timezone.localtime(end).date())
+    for segment in segments:
+        path = archive_dir() / segment.path
+        if not path.exists():
+            continue
+        seen = set()
+        with gzip.open(path, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                entry = json.loads(line)
+                if entry['id'] in seen:
+                    continue
+                seen.add(entry['id'])
+                if _matches(entry, start, end, user_id, action, entity_type, entity_id, q):
+                    yield entry
+
+
+def daily_counts(start_date, end_date, user_id=None):
+    """
+    {(date, user_id, action): count} for ``start_date``..``end_date`` inclusive.
+
+    Archived days come from ActivityLogDailyCount, the rest from the live table.
+    """
+    counts = Counter()
+    archived = ActivityLogDailyCount.objects.filter(date__gte=start_date, date__lte=end_date)
+    live = ActivityLog.objects.filter(
+        timestamp__gte=timezone.make_aware(datetime(start_date.year, start_date.month, start_date.day)),
+        timestamp__lt=timezone.make_aware(datetime(end_date.year, end_date.month, end_date.day)) + timedelta(days=1),
+    )
+    if user_id is not None:
+        archived = archived.filter(user_id=user_id)
+        live = live.filter(user_id=user_id)
+
+    for row in archived.values('date', 'user_id', 'action', 'count'):
+        counts[(row['date'], row['user_id'], row['action'])] += row['count']
+    rows = (
+        live.annotate(date=TruncDate('timestamp', tzinfo=timezone.get_current_timezone()))
+        .values('date', 'user_id', 'action').annotate(count=Count('id')).order_by()
+    )
+    for row in rows:
+        counts[(row['date'], row['user_id'], row['action'])] += row['count']
+    return dict(counts)
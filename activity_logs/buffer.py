@@ -0,0 +1,191 @@
+"""
+Buffered activity-log writes
+
+ActivityLog.log_action() hands each entry to record(), which writes it
+according to ACTIVITY_LOG_MODE:
+
+    'direct'   - INSERT immediately, one query per entry (the old behaviour)
+    'buffered' - entries logged inside a transaction are collected and written
+                 with a single bulk_create once it commits; a rolled-back
+                 transaction (or savepoint) discards its entries with it.
+                 Entries logged outside a transaction during a request are
+                 written together when the request finishes
+                 (ActivityLogBufferMiddleware). This is the default.
+    'queue'    - like 'buffered', but committed entries are handed to a
+                 background writer thread that bulk-inserts them in batches
+                 of ACTIVITY_LOG_BATCH_SIZE. Requests never wait on the
+                 insert; entries still queued when the process is killed
+                 are lost, so only use it where that trade-off is acceptable.
+
+Entries are only ever written after the data change they describe has been
+committed, so the log never mentions something that did not happen.
+"""
+import atexit
+import contextvars
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Entries logged outside a transaction while a request is being handled
+_request_entries = contextvars.ContextVar('activity_log_request_entries', default=None)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def log_mode():
+    return getattr(settings, 'ACTIVITY_LOG_MODE', 'buffered')
+
+
+def batch_size():
+    return getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 200)
+
+
+class _PendingBatch:
+    """on_commit callback holding the entries logged at one savepoint level."""
+
+    def __init__(self):
+        self.entries = []
+
+    def __call__(self):
+        entries = _request_entries.get()
+        if entries is not None:
+            entries.extend(self.entries)
+        else:
+            write(self.entries)
+
+
+def _pending_batch():
+    """This savepoint level's batch, registering a new one on first use."""
+    savepoints = set(connection.savepoint_ids)
+    for sids, func, _robust in reversed(connection.run_on_commit):
+        if isinstance(func, _PendingBatch) and sids == savepoints:
+            return func
+    batch = _PendingBatch()
+    transaction.on_commit(batch)
+    return batch
+
+
+def record(entry):
+    """Write an unsaved ActivityLog ``entry`` according to ACTIVITY_LOG_MODE."""
+    if log_mode() == 'direct':
+        entry.save()
+    elif connection.in_atomic_block:
+        _pending_batch().entries.append(entry)
+    elif _request_entries.get() is not None:
+        _request_entries.get().append(entry)
+    else:
+        write([entry])
+    return entry
+
+
+def write(entries):
+    """Persist committed ``entries`` now, or queue them for the background writer."""
+    if not entries:
+        return
+    if log_mode() == 'queue':
+        _get_writer().put(entries)
+    else:
+        _bulk_insert(entries)
+
+
+def _bulk_insert(entries):
+    from .models import ActivityLog
+
+    ActivityLog.objects.bulk_create(entries, batch_size=batch_size())
+
+
+class request_buffer:
+    """
+    Collect the entries logged outside a transaction until the block exits.
+
+    Entries from transactions committed inside the block join them, so a
+    request's whole trail goes out in one bulk_create. The entries are
+    written even if the block raises: whatever they describe has already
+    been committed.
+    """
+
+    def __enter__(self):
+        self._token = _request_entries.set([])
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        entries = _request_entries.get()
+        _request_entries.reset(self._token)
+        try:
+            write(entries)
+        except Exception:
+            if exc_type is None:
+                raise
+            logger.exception('Could not write %d activity log entries', len(entries))
+        return False
+
+
+class QueueWriter:
+    """Daemon thread that bulk-inserts queued entries in batches."""
+
+    def __init__(self, size=None):
+        self.size = size or batch_size()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, entries):
+        self.queue.put(list(entries))
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batches = [self.queue.get()]
+            pending = len(batches[0])
+            while pending < self.size:
+                try:
+                    batches.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+                pending += len(batches[-1])
+            try:
+                close_old_connections()
+                self._write([entry for batch in batches for entry in batch])
+            finally:
+                close_old_connections()
+                for _ in batches:
+                    self.queue.task_done()
+
+    def _write(self, entries):
+        try:
+            _bulk_insert(entries)
+            return
+        except Exception:
+            logger.exception('Bulk insert of %d activity log entries failed; saving them one by one', len(entries))
+        for entry in entries:
+            try:
+                entry.pk = None
+                entry.save(force_insert=True)
+            except Exception:
+                logger.exception('Dropping activity log entry: %s', entry.description)
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.thread.is_alive():
+            _writer = QueueWriter()
+        return _writer
+
+
+def flush_queue():
+    """Wait for the background writer to drain (tests, shutdown)."""
+    if _writer is not None and _writer.thread.is_alive():
+        _writer.flush()
+
+
+atexit.register(flush_queue)
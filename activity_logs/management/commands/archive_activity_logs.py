@@ -0,0 +1,39 @@
+"""
+Move old activity logs into the monthly compressed archive.
+
+Run daily from cron. Entries older than ACTIVITY_LOG_RETENTION_DAYS (whole
+days) are appended to ACTIVITY_ARCHIVE_DIR/<year>/activity-<year>-<month>.jsonl.gz,
+counted into the daily summary and deleted from the live table.
+
+Usage:
+    python manage.py archive_activity_logs
+    python manage.py archive_activity_logs --days 30
+    python manage.py archive_activity_logs --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from activity_logs.archive import archive, default_cutoff
+from activity_logs.models import ActivityLog
+
+
+class Command(BaseCommand):
+    help = 'Archive activity logs older than the retention period into monthly JSONL.gz segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Keep this many days in the live table (default: ACTIVITY_LOG_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='Entries archived per transaction (default: ACTIVITY_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many entries would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = default_cutoff(days=options['days'])
+
+        if options['dry_run']:
+            count = ActivityLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f'{count} activity log entries before {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        archived = archive(cutoff, options['batch_size'])
+        if archived:
+            self.stdout.write(self.style.SUCCESS(f'🗄️ Archived {archived} activity log entries before {cutoff:%Y-%m-%d}'))
+        else:
+            self.stdout.write('No activity logs to archive')
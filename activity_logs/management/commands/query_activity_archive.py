@@ -0,0 +1,52 @@
+"""
+Print archived activity logs as JSON lines, streamed from the monthly segments.
+
+Usage:
+    python manage.py query_activity_archive --from 2025-01-01 --to 2025-04-01
+    python manage.py query_activity_archive --user 12 --action APPROVE
+    python manage.py query_activity_archive --entity PAYMENT --entity-id 345 > payment-345.jsonl
+"""
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from activity_logs.archive import iter_archived
+
+
+def _day_start(value):
+    day = parse_date(value or '')
+    if day is None:
+        raise CommandError(f'Invalid date {value!r}; use YYYY-MM-DD')
+    return timezone.make_aware(datetime(day.year, day.month, day.day))
+
+
+class Command(BaseCommand):
+    help = 'Stream archived activity logs matching the filters as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Day to stop before (YYYY-MM-DD)')
+        parser.add_argument('--user', type=int, help='User id')
+        parser.add_argument('--action', help='Action, e.g. APPROVE')
+        parser.add_argument('--entity', help='Entity type, e.g. PAYMENT')
+        parser.add_argument('--entity-id', type=int)
+        parser.add_argument('-q', '--query', help='Text to look for in the description')
+
+    def handle(self, *args, **options):
+        entries = iter_archived(
+            start=_day_start(options['start']) if options['start'] else None,
+            end=_day_start(options['end']) if options['end'] else None,
+            user_id=options['user'],
+            action=(options['action'] or '').upper() or None,
+            entity_type=(options['entity'] or '').upper() or None,
+            entity_id=options['entity_id'],
+            q=options['query'],
+        )
+        count = 0
+        for entry in entries:
+            self.stdout.write(json.dumps(entry, ensure_ascii=False))
+            count += 1
+        self.stderr.write(f'{count} archived entries')
@@ -0,0 +1,16 @@
+from .buffer import request_buffer
+
+
+class ActivityLogBufferMiddleware:
+    """Write each request's activity log entries together when it finishes.
+
+    See activity_logs.buffer; entries logged inside a transaction are still
+    only written once it commits.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_buffer():
+            return self.get_response(request)
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('activity_logs', '0002_activitylog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month', unique=True)),
+                ('path', models.CharField(help_text='Segment file, relative to ACTIVITY_ARCHIVE_DIR', max_length=255)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0)),
+                ('first_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Activity Log Segment',
+                'verbose_name_plural': 'Activity Log Segments',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActivityLogDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('action', models.CharField(choices=[('CREATE', 'Created'), ('UPDATE', 'Updated'), ('DELETE', 'Deleted'), ('APPROVE', 'Approved'), ('REJECT', 'Rejected'), ('ASSIGN', 'Assigned'), ('STATUS_CHANGE', 'Status Changed'), ('LOGIN', 'Logged In'), ('LOGOUT', 'Logged Out'), ('EXPORT', 'Exported Data'), ('PAYMENT', 'Payment Action')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_daily_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Activity Daily Count',
+                'verbose_name_plural': 'Activity Daily Counts',
+                'ordering': ['-date', 'action'],
+                'indexes': [models.Index(fields=['user', 'date'], name='activity_lo_user_id_10463c_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='activitylogdailycount',
+            constraint=models.UniqueConstraint(fields=('date', 'user', 'action'), name='unique_activity_daily_count'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class ActivityLog(models.Model):
@@ -88,8 +89,10 @@ class ActivityLog(models.Model):
         help_text='Browser/device information'
     )
     
+    # Set when the entry is logged, not when a buffered write reaches the database
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text='When the action was performed'
     )
     
@@ -113,6 +116,11 @@ class ActivityLog(models.Model):
                    old_value=None, new_value=None, request=None):
         """
         Convenience method to create activity logs
+
+        The entry is written according to ACTIVITY_LOG_MODE (see
+        activity_logs.buffer): by default inside a transaction it is only
+        inserted once that commits, so the returned instance may not have a
+        pk yet.
         
         Usage:
             ActivityLog.log_action(
@@ -138,7 +146,9 @@ class ActivityLog(models.Model):
             # Get user agent
             user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        return cls.objects.create(
+        from .buffer import record
+
+        return record(cls(
             user=user,
             action=action,
             entity_type=entity_type,
@@ -148,4 +158,62 @@ class ActivityLog(models.Model):
             new_value=new_value,
             ip_address=ip_address,
             user_agent=user_agent
-        )
+        ))
+
+
+class ActivityLogSegment(models.Model):
+    """
+    A month of archived activity logs in a gzipped JSON-lines file
+    (see activity_logs.archive)
+    """
+    month = models.DateField(
+        unique=True,
+        help_text='First day of the archived month'
+    )
+    path = models.CharField(
+        max_length=255,
+        help_text='Segment file, relative to ACTIVITY_ARCHIVE_DIR'
+    )
+    entry_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    first_timestamp = models.DateTimeField(null=True, blank=True)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name = 'Activity Log Segment'
+        verbose_name_plural = 'Activity Log Segments'
+
+    def __str__(self):
+        return f"{self.month.strftime('%Y-%m')} ({self.entry_count} entries)"
+
+
+class ActivityLogDailyCount(models.Model):
+    """
+    Per-user, per-action daily totals of archived activity logs
+    """
+    date = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='activity_daily_counts'
+    )
+    action = models.CharField(max_length=20, choices=ActivityLog.ACTION_TYPES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'action']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user', 'action'], name='unique_activity_daily_count'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+        verbose_name = 'Activity Daily Count'
+        verbose_name_plural = 'Activity Daily Counts'
+
+    def __str__(self):
+        return f"{self.date} {self.user_id} {self.action}: {self.count}"
@@ -0,0 +1,12 @@
+"""
+Celery tasks for activity log archival
+"""
+from agnivridhi_crm.celery import app
+
+from .archive import archive
+
+
+@app.task(name='activity_logs.archive_activity_logs')
+def archive_activity_logs_task():
+    """Schedule with celery beat (daily) to move old entries into the monthly archive."""
+    return archive()
@@ -0,0 +1,227 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from activity_logs.archive import archive, archive_dir, daily_counts, iter_archived
+from activity_logs.buffer import flush_queue, request_buffer
+from activity_logs.models import ActivityLog, ActivityLogDailyCount, ActivityLogSegment
+
+
+def _log(user, description, **kwargs):
+    return ActivityLog.log_action(user=user, action='UPDATE', description=description, **kwargs)
+
+
+def _inserts(ctx):
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "activity_logs_activitylog"')]
+
+
+class BufferedActivityLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+
+    def test_entries_written_in_one_insert_on_commit(self):
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='10.0.0.7, 10.0.0.1', HTTP_USER_AGENT='pytest')
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    entry = _log(self.user, 'first', request=request)
+                    _log(self.user, 'second', entity_type='PAYMENT', entity_id=3)
+                    _log(self.user, 'third')
+                    self.assertFalse(ActivityLog.objects.exists())
+                    self.assertIsNone(entry.pk)
+
+        self.assertEqual(len(_inserts(ctx)), 1)
+        self.assertEqual(
+            list(ActivityLog.objects.order_by('timestamp', 'pk').values_list('description', flat=True)),
+            ['first', 'second', 'third'],
+        )
+        logged = ActivityLog.objects.get(description='first')
+        self.assertEqual((logged.ip_address, logged.user_agent), ('10.0.0.7', 'pytest'))
+
+    def test_rollback_writes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    _log(self.user, 'doomed')
+                    raise IntegrityError('boom')
+        self.assertFalse(ActivityLog.objects.exists())
+
+    def test_rolled_back_savepoint_drops_only_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                _log(self.user, 'kept')
+                try:
+                    with transaction.atomic():
+                        _log(self.user, 'discarded')
+                        raise ValueError
+                except ValueError:
+                    pass
+                _log(self.user, 'also kept')
+        self.assertEqual(
+            sorted(ActivityLog.objects.values_list('description', flat=True)), ['also kept', 'kept']
+        )
+
+    @override_settings(ACTIVITY_LOG_MODE='direct')
+    def test_direct_mode_inserts_immediately(self):
+        with transaction.atomic():
+            entry = _log(self.user, 'now')
+            self.assertIsNotNone(entry.pk)
+
+
+class ActivityLogRequestBufferTests(TransactionTestCase):
+    def test_request_entries_written_together_after_commits(self):
+        user = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        with CaptureQueriesContext(connection) as ctx:
+            with request_buffer():
+                with transaction.atomic():
+                    _log(user, 'approved')
+                with transaction.atomic():
+                    _log(user, 'status changed')
+                _log(user, 'outside a transaction')
+                self.assertFalse(ActivityLog.objects.exists())
+        self.assertEqual(len(_inserts(ctx)), 1)
+        self.assertEqual(ActivityLog.objects.count(), 3)
+
+    def test_entries_survive_an_error_after_commit(self):
+        user = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        with self.assertRaises(RuntimeError):
+            with request_buffer():
+                with transaction.atomic():
+                    _log(user, 'approved')
+                raise RuntimeError('view failed after committing')
+        self.assertTrue(ActivityLog.objects.filter(description='approved').exists())
+
+
+@override_settings(ACTIVITY_LOG_MODE='queue', ACTIVITY_LOG_BATCH_SIZE=50)
+class QueuedActivityLogTests(TransactionTestCase):
+    def test_background_writer_drains_committed_entries(self):
+        user = User.objects.create_user(username='sales', password='pass', role='SALES')
+        for i in range(3):
+            with transaction.atomic():
+                _log(user, f'kept {i}')
+                _log(user, f'kept {i} again')
+        try:
+            with transaction.atomic():
+                _log(user, 'rolled back')
+                raise ValueError
+        except ValueError:
+            pass
+
+        flush_queue()
+        self.assertEqual(ActivityLog.objects.count(), 6)
+        self.assertFalse(ActivityLog.objects.filter(description='rolled back').exists())
+
+
+class ActivityLogArchiveTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        settings_override = override_settings(ACTIVITY_ARCHIVE_DIR=self.archive_root, ACTIVITY_LOG_RETENTION_DAYS=30)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = User.objects.create_user(username='owner', password='pass', role='OWNER', is_owner=True)
+        self.sales = User.objects.create_user(username='sales', password='pass', role='SALES')
+
+    def _entry(self, user, action, when, **kwargs):
+        return ActivityLog.objects.create(
+            user=user, action=action, description=kwargs.pop('description', f'{action} by {user}'),
+            timestamp=when, **kwargs
+        )
+
+    def _at(self, year, month, day, hour=12):
+        return timezone.make_aware(datetime(year, month, day, hour))
+
+    def test_old_entries_move_to_monthly_segments(self):
+        self._entry(self.sales, 'CREATE', self._at(2025, 1, 5))
+        self._entry(self.sales, 'CREATE', self._at(2025, 1, 5, 15))
+        self._entry(self.owner, 'APPROVE', self._at(2025, 1, 20), entity_type='PAYMENT', entity_id=7)
+        self._entry(self.sales, 'UPDATE', self._at(2025, 2, 1))
+        recent = self._entry(self.sales, 'UPDATE', timezone.now())
+
+        self.assertEqual(archive(batch_size=2), 4)
+
+        self.assertEqual(list(ActivityLog.objects.values_list('pk', flat=True)), [recent.pk])
+        segments = {segment.month.strftime('%Y-%m'): segment for segment in ActivityLogSegment.objects.all()}
+        self.assertEqual(sorted(segments), ['2025-01', '2025-02'])
+        self.assertEqual(segments['2025-01'].entry_count, 3)
+
+        # Two batches went into January: the file holds two gzip members read as one stream
+        with gzip.open(archive_dir() / segments['2025-01'].path, 'rt') as fh:
+            lines = [json.loads(line) for line in fh]
+        self.assertEqual([line['action'] for line in lines], ['CREATE', 'CREATE', 'APPROVE'])
+        self.assertEqual(lines[2]['user'], 'owner')
+        self.assertEqual(lines[2]['entity_id'], 7)
+
+        self.assertEqual(
+            ActivityLogDailyCount.objects.get(date='2025-01-05', user=self.sales, action='CREATE').count, 2
+        )
+        self.assertEqual(ActivityLogDailyCount.objects.count(), 3)
+
+    def test_iter_archived_streams_matching_entries(self):
+        self._entry(self.sales, 'CREATE', self._at(2025, 3, 2), description='Created client Acme')
+        self._entry(self.owner, 'APPROVE', self._at(2025, 3, 9), entity_type='PAYMENT', entity_id=11)
+        self._entry(self.owner, 'APPROVE', self._at(2025, 4, 2), entity_type='PAYMENT', entity_id=12)
+        archive()
+
+        march = list(iter_archived(start=self._at(2025, 3, 1, 0), end=self._at(2025, 4, 1, 0)))
+        self.assertEqual(len(march), 2)
+        self.assertEqual([e['entity_id'] for e in iter_archived(action='APPROVE')], [11, 12])
+        self.assertEqual([e['description'] for e in iter_archived(q='acme')], ['Created client Acme'])
+        self.assertEqual(list(iter_archived(user_id=self.sales.pk, entity_type='PAYMENT')), [])
+
+    def test_daily_counts_combine_archive_and_live_table(self):
+        old = timezone.now() - timedelta(days=40)
+        self._entry(self.sales, 'CREATE', old)
+        archive()
+        self._entry(self.sales, 'CREATE', timezone.now())
+
+        counts = daily_counts(timezone.localdate(old), timezone.localdate(), user_id=self.sales.pk)
+        self.assertEqual(counts[(timezone.localdate(old), self.sales.pk, 'CREATE')], 1)
+        self.assertEqual(counts[(timezone.localdate(), self.sales.pk, 'CREATE')], 1)
+
+    def test_command_dry_run_leaves_entries(self):
+        self._entry(self.sales, 'CREATE', self._at(2025, 1, 5))
+        out = StringIO()
+        call_command('archive_activity_logs', '--dry-run', stdout=out)
+        self.assertIn('1 activity log entries', out.getvalue())
+        self.assertEqual(ActivityLog.objects.count(), 1)
+
+        call_command('archive_activity_logs', stdout=StringIO())
+        self.assertFalse(ActivityLog.objects.exists())
+
+    def test_archive_dir_may_not_be_web_served(self):
+        with override_settings(MEDIA_ROOT=self.archive_root, ACTIVITY_ARCHIVE_DIR=f'{self.archive_root}/activity'):
+            with self.assertRaises(ImproperlyConfigured):
+                archive_dir()
+
+    def test_archive_download_is_streamed_for_owners_only(self):
+        self._entry(self.sales, 'CREATE', self._at(2025, 1, 5))
+        self._entry(self.owner, 'APPROVE', self._at(2025, 1, 6))
+        archive()
+        url = reverse('notifications:activity_archive')
+
+        self.client.force_login(self.sales)
+        self.assertNotEqual(self.client.get(url, {'month': '2025-01'}).status_code, 200)
+
+        self.client.force_login(self.owner)
+        resp = self.client.get(url, {'month': '2025-01', 'action': 'APPROVE'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        lines = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual([line['action'] for line in lines], ['APPROVE'])
+
+        feed = self.client.get(reverse('notifications:activity_feed'))
+        self.assertContains(feed, '?month=2025-01')
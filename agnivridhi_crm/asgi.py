@@ -3,6 +3,11 @@ ASGI config for agnivridhi_crm project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live notifications stream (/notifications/stream/) only works under ASGI:
+    uvicorn agnivridhi_crm.asgi:application --workers 2
+With more than one worker, set NOTIFICATION_EVENTS_REDIS_URL so events reach
+every worker's connections.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,15 @@
+"""
+Celery application for Agnivridhi CRM
+
+Only needed when NOTIFICATION_OUTBOX_RUNNER='celery'. Start a worker with:
+    celery -A agnivridhi_crm.celery worker -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agnivridhi_crm.settings')
+
+app = Celery('agnivridhi_crm')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -79,6 +79,8 @@ MIDDLEWARE = [
     'accounts.middleware.RoleAccessMiddleware',
     # Custom idle timeout middleware MUST run after AuthenticationMiddleware
     'accounts.middleware.SessionIdleTimeoutMiddleware',
+    # Batches the request's ActivityLog inserts (see ACTIVITY_LOG_MODE)
+    'activity_logs.middleware.ActivityLogBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'agnivridhi_crm.urls'
@@ -96,6 +98,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'applications.context_processors.pending_applications_count',
                 'accounts.context_processors.dashboard_link',
+                'notifications.context_processors.unread_notifications_count',
             ],
         },
     },
@@ -136,6 +139,97 @@ else:
     }
 
 
+# Cache
+# Uses Redis when REDIS_URL is set (shared across workers); otherwise a
+# per-process in-memory cache.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'agnivridhi',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'agnivridhi-crm',
+        }
+    }
+
+# Version-keyed caches (dashboards, revenue report totals, pending/unread
+# badges, typeahead) are invalidated by bumping a version in the cache, which
+# only reaches every worker through a shared backend. Without REDIS_URL they
+# are bypassed, unless VERSIONED_CACHE_ALLOW_LOCAL=True for a single-process
+# server (runserver, one uvicorn worker).
+VERSIONED_CACHE_ALLOW_LOCAL = os.getenv('VERSIONED_CACHE_ALLOW_LOCAL', 'False') == 'True'
+
+# Seconds a computed dashboard stays cached (data changes invalidate it earlier)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# Autocomplete API (api.typeahead): per-process LRU size and shared-cache TTL
+TYPEAHEAD_LRU_SIZE = int(os.getenv('TYPEAHEAD_LRU_SIZE', '512'))
+TYPEAHEAD_CACHE_TIMEOUT = int(os.getenv('TYPEAHEAD_CACHE_TIMEOUT', '300'))
+
+# Background exports (accounts.export_jobs): exports above this many rows run
+# as an ExportJob. Runner 'command' leaves jobs for a separate
+# `python manage.py process_export_jobs --loop` worker; 'thread' runs them in
+# the web process (development only). Jobs RUNNING longer than
+# EXPORT_JOB_STALE_MINUTES are marked FAILED by the worker.
+EXPORT_ASYNC_THRESHOLD = int(os.getenv('EXPORT_ASYNC_THRESHOLD', '5000'))
+EXPORT_JOB_RUNNER = os.getenv('EXPORT_JOB_RUNNER', 'command')
+EXPORT_JOB_STALE_MINUTES = int(os.getenv('EXPORT_JOB_STALE_MINUTES', '60'))
+# Finished export files hold whole client/payment tables: they are kept here,
+# outside MEDIA_ROOT/STATIC_ROOT, and only downloaded through export_job_download.
+EXPORT_FILES_DIR = os.getenv('EXPORT_FILES_DIR', BASE_DIR / 'private' / 'exports')
+
+# Notification outbox (notifications.outbox): emails/WhatsApp messages are
+# queued as Notification rows and sent after commit. Runner 'command' leaves
+# rows for a separate `python manage.py process_notification_outbox --loop`
+# worker; 'thread' uses an in-process pool of NOTIFICATION_OUTBOX_THREADS
+# workers inside the web process (development only); 'celery' sends them via
+# the notifications.deliver_notification task on CELERY_BROKER_URL.
+NOTIFICATION_OUTBOX_RUNNER = os.getenv('NOTIFICATION_OUTBOX_RUNNER', 'command')
+NOTIFICATION_OUTBOX_THREADS = int(os.getenv('NOTIFICATION_OUTBOX_THREADS', '4'))
+# Failed sends are retried by `python manage.py retry_notifications` after
+# base * 2^(failures-1) seconds (capped, with jitter); after
+# NOTIFICATION_MAX_RETRIES failures the notification is dead-lettered.
+NOTIFICATION_MAX_RETRIES = int(os.getenv('NOTIFICATION_MAX_RETRIES', '3'))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv('NOTIFICATION_RETRY_BASE_SECONDS', '60'))
+NOTIFICATION_RETRY_MAX_SECONDS = int(os.getenv('NOTIFICATION_RETRY_MAX_SECONDS', '3600'))
+# Digests (users with notification_digest_opt_in): approval/payment updates are
+# held and sent as one message per recipient and channel once the oldest is
+# NOTIFICATION_DIGEST_INTERVAL_MINUTES old or NOTIFICATION_DIGEST_MAX_ITEMS pile up.
+NOTIFICATION_DIGEST_INTERVAL_MINUTES = int(os.getenv('NOTIFICATION_DIGEST_INTERVAL_MINUTES', '30'))
+NOTIFICATION_DIGEST_MAX_ITEMS = int(os.getenv('NOTIFICATION_DIGEST_MAX_ITEMS', '25'))
+# Under the 'thread' outbox runner a background thread flushes due digests this often (seconds)
+NOTIFICATION_DIGEST_FLUSH_SECONDS = int(os.getenv('NOTIFICATION_DIGEST_FLUSH_SECONDS', '60'))
+# notification_list status badges and the navbar unread badge are cached (seconds)
+NOTIFICATION_FACETS_CACHE_SECONDS = int(os.getenv('NOTIFICATION_FACETS_CACHE_SECONDS', '30'))
+NOTIFICATION_UNREAD_CACHE_SECONDS = int(os.getenv('NOTIFICATION_UNREAD_CACHE_SECONDS', '300'))
+# Live updates (/notifications/stream/, ASGI only). Events fan out in-process;
+# set NOTIFICATION_EVENTS_REDIS_URL when running more than one ASGI worker.
+NOTIFICATION_EVENTS_REDIS_URL = os.getenv('NOTIFICATION_EVENTS_REDIS_URL', '')
+NOTIFICATION_STREAM_KEEPALIVE = int(os.getenv('NOTIFICATION_STREAM_KEEPALIVE', '15'))
+# Activity log writes (activity_logs.buffer): 'buffered' collects a request's
+# entries and inserts them with one bulk_create after its transaction commits;
+# 'queue' hands committed entries to a background writer thread; 'direct'
+# inserts each entry immediately.
+ACTIVITY_LOG_MODE = os.getenv('ACTIVITY_LOG_MODE', 'buffered')
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '200'))
+# `python manage.py archive_activity_logs` moves entries older than
+# ACTIVITY_LOG_RETENTION_DAYS into monthly JSONL.gz segments under
+# ACTIVITY_ARCHIVE_DIR and keeps their per-user, per-action daily counts.
+# The segments hold IPs, user agents and old/new values: the directory must
+# not be web-served, so it may not sit under MEDIA_ROOT or STATIC_ROOT.
+ACTIVITY_ARCHIVE_DIR = os.getenv('ACTIVITY_ARCHIVE_DIR', BASE_DIR / 'private' / 'activity_archive')
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', '90'))
+ACTIVITY_ARCHIVE_BATCH_SIZE = int(os.getenv('ACTIVITY_ARCHIVE_BATCH_SIZE', '5000'))
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -210,6 +304,8 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', 'noreply@agnivridhiindia.com')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', 'NoReply@121')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Agnivridhi CRM <noreply@agnivridhiindia.com>')
 EMAIL_TIMEOUT = 30  # 30 seconds timeout for SMTP operations
+# Messages sent on one SMTP session before notifications.mailer reconnects
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '50'))
 
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
@@ -251,6 +347,12 @@ SPECTACULAR_SETTINGS = {
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', '')
 TWILIO_WHATSAPP_FROM = os.getenv('TWILIO_WHATSAPP_FROM', 'whatsapp:+14155238886')  # Twilio Sandbox
+TWILIO_API_URL = os.getenv('TWILIO_API_URL', 'https://api.twilio.com')
+# notifications.whatsapp dispatcher: sender's messages/second limit at Twilio,
+# concurrent sends, and window (seconds) in which identical messages are sent once
+WHATSAPP_RATE_PER_SECOND = float(os.getenv('WHATSAPP_RATE_PER_SECOND', '1'))
+WHATSAPP_DISPATCH_THREADS = int(os.getenv('WHATSAPP_DISPATCH_THREADS', '4'))
+WHATSAPP_DEDUPE_SECONDS = int(os.getenv('WHATSAPP_DEDUPE_SECONDS', '60'))
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
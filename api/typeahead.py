@@ -0,0 +1,116 @@
+"""
+Typeahead results for the autocomplete API
+
+Lookups go through two cache layers keyed by the search index version
+(accounts.search_index.index_version), so any change to a client, booking or
+application makes every cached entry unreachable at once:
+
+1. a small in-process LRU, which answers repeat keystrokes without a
+   network round trip
+2. the shared Django cache, which lets worker processes reuse each other's
+   results
+
+The index version lives in the cache, so both layers are only safe when
+that cache is shared between workers; on the per-process LocMem fallback
+every lookup goes to the database (see
+accounts.dashboard_cache.versioned_caching_enabled).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+ENTITY_KEYS = {
+    'CLIENT': 'clients',
+    'BOOKING': 'bookings',
+    'APPLICATION': 'applications',
+}
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LRUCache(getattr(settings, 'TYPEAHEAD_LRU_SIZE', 512))
+
+
+def _lookup(prefix, limit):
+    from accounts.models import SearchDocument
+    from accounts.search_index import search
+    from django.db.models import Q
+
+    hits = search(prefix, limit_per_type=limit)
+    wanted = Q(pk__in=[])
+    for entity_type, ids in hits.items():
+        if ids:
+            wanted |= Q(entity_type=entity_type, object_id__in=ids)
+    titles = {
+        (entity_type, object_id): title
+        for entity_type, object_id, title in
+        SearchDocument.objects.filter(wanted).values_list('entity_type', 'object_id', 'title')
+    }
+    return {
+        ENTITY_KEYS[entity_type]: [
+            {'id': object_id, 'title': titles[(entity_type, object_id)]}
+            for object_id in ids if (entity_type, object_id) in titles
+        ]
+        for entity_type, ids in hits.items()
+    }
+
+
+def typeahead(prefix, limit=8):
+    """
+    Return the top ``limit`` clients, bookings and applications for ``prefix``.
+
+    The result maps 'clients'/'bookings'/'applications' to lists of
+    ``{'id': ..., 'title': ...}`` dicts, best match first.
+    """
+    from accounts.dashboard_cache import versioned_caching_enabled
+    from accounts.search_index import index_version
+
+    prefix = ' '.join(prefix.split()).lower()
+    if not versioned_caching_enabled():
+        return _lookup(prefix, limit)
+    digest = hashlib.md5(prefix.encode()).hexdigest()
+    key = f'typeahead:{index_version()}:{limit}:{digest}'
+
+    result = local_cache.get(key)
+    if result is not None:
+        return result
+
+    result = cache.get(key)
+    if result is None:
+        result = _lookup(prefix, limit)
+        cache.set(key, result, getattr(settings, 'TYPEAHEAD_CACHE_TIMEOUT', 300))
+    local_cache.set(key, result)
+    return result
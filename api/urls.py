@@ -7,6 +7,7 @@ from clients.viewsets import ClientViewSet
 from bookings.viewsets import BookingViewSet, ServiceViewSet
 from payments.viewsets import PaymentViewSet
 from applications.viewsets import ApplicationViewSet
+from . import views
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -20,5 +21,6 @@ router.register(r'applications', ApplicationViewSet, basename='application')
 app_name = 'api'
 
 urlpatterns = [
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
     path('', include(router.urls)),
 ]
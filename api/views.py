@@ -0,0 +1,45 @@
+"""
+API views for Agnivridhi CRM (endpoints that are not model viewsets)
+"""
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from .typeahead import typeahead
+
+
+MIN_PREFIX_LENGTH = 2
+MAX_LIMIT = 20
+
+
+class IsStaffRole(BasePermission):
+    """Any non-client role (sales, manager, admin, owner, superuser)"""
+    
+    def has_permission(self, request, view):
+        return request.user.is_superuser or getattr(request.user, 'role', None) not in (None, 'CLIENT')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffRole])
+def autocomplete(request):
+    """
+    Typeahead for clients, bookings and applications.
+    
+    Query params:
+    - q: prefix typed so far (at least 2 characters)
+    - limit: results per type (default 8, max 20)
+    
+    Returns {"query": q, "clients": [...], "bookings": [...], "applications": [...]}
+    where each entry is {"id": pk, "title": display text}.
+    """
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = max(1, min(MAX_LIMIT, int(request.query_params.get('limit', 8))))
+    except ValueError:
+        limit = 8
+    
+    if len(query) < MIN_PREFIX_LENGTH:
+        results = {'clients': [], 'bookings': [], 'applications': []}
+    else:
+        results = typeahead(query, limit=limit)
+    return Response({'query': query, **results})
@@ -318,10 +318,10 @@ def create_application(request, scheme_id):
 
 def _notify_sales_employee(application, sales_user):
     """Create notification for sales employee about new application"""
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=sales_user,
             channel='EMAIL',
             notification_type='CUSTOM',
@@ -337,9 +337,9 @@ Application ID: {application.application_id}
 Please track the application status and coordinate with the manager for approval.
             '''.strip(),
             email_to=sales_user.email,
-            status='QUEUED',
             related_application=application,
-            sent_by=application.client.user
+            sent_by=application.client.user,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating sales notification: {str(e)}")
@@ -347,10 +347,10 @@ Please track the application status and coordinate with the manager for approval
 
 def _notify_manager_for_approval(application, manager_user):
     """Create notification for manager to approve application"""
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=manager_user,
             channel='EMAIL',
             notification_type='CUSTOM',
@@ -367,9 +367,9 @@ Purpose: {application.purpose}
 Please review and approve/reject this application in the system.
             '''.strip(),
             email_to=manager_user.email,
-            status='QUEUED',
             related_application=application,
-            sent_by=application.client.user
+            sent_by=application.client.user,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating manager notification: {str(e)}")
@@ -528,9 +528,9 @@ def reject_application(request, pk):
 
 
 def _notify_sales_on_approval(application, sales_user):
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=sales_user,
             channel='EMAIL',
             notification_type='APPLICATION_APPROVED',
@@ -544,18 +544,18 @@ Approved Amount: ₹{application.approved_amount or application.applied_amount}
 Application ID: {application.application_id}
             '''.strip(),
             email_to=sales_user.email,
-            status='QUEUED',
             related_application=application,
-            sent_by=None
+            sent_by=None,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating sales approval notification: {str(e)}")
 
 
 def _notify_client_on_approval(application):
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=application.client.user,
             channel='EMAIL',
             notification_type='APPLICATION_APPROVED',
@@ -568,18 +568,18 @@ Approved Amount: ₹{application.approved_amount or application.applied_amount}
 Application ID: {application.application_id}
             '''.strip(),
             email_to=application.client.contact_email,
-            status='QUEUED',
             related_application=application,
-            sent_by=None
+            sent_by=None,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating client approval notification: {str(e)}")
 
 
 def _notify_sales_on_rejection(application, sales_user):
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=sales_user,
             channel='EMAIL',
             notification_type='APPLICATION_REJECTED',
@@ -593,18 +593,18 @@ Reason: {application.rejection_reason}
 Application ID: {application.application_id}
             '''.strip(),
             email_to=sales_user.email,
-            status='QUEUED',
             related_application=application,
-            sent_by=None
+            sent_by=None,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating sales rejection notification: {str(e)}")
 
 
 def _notify_client_on_rejection(application):
-    from notifications.models import Notification
+    from notifications.outbox import enqueue
     try:
-        Notification.objects.create(
+        enqueue(
             recipient=application.client.user,
             channel='EMAIL',
             notification_type='APPLICATION_REJECTED',
@@ -617,9 +617,9 @@ Reason: {application.rejection_reason}
 Application ID: {application.application_id}
             '''.strip(),
             email_to=application.client.contact_email,
-            status='QUEUED',
             related_application=application,
-            sent_by=None
+            sent_by=None,
+            digest=True,
         )
     except Exception as e:
         print(f"Error creating client rejection notification: {str(e)}")
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from bookings.models import Booking
-from clients.models import Client
+from clients.revenue_recompute import recompute_client_revenue
 from decimal import Decimal
 
 
@@ -54,22 +54,15 @@ class Command(BaseCommand):
         # Now recalculate all client received amounts
         print(f"\nRecalculating client received amounts...")
         
-        if not dry_run:
-            for client in Client.objects.all():
-                old_received = client.received_amount
-                client.calculate_aggregated_revenue()
-                
-                Client.objects.filter(pk=client.pk).update(
-                    received_amount=client.received_amount,
-                    pending_amount=client.pending_amount
-                )
-                
-                if client.received_amount != old_received:
-                    clients_updated += 1
-                    self.stdout.write(
-                        f"  ✓ {client.company_name}: "
-                        f"Received: ₹{old_received} → ₹{client.received_amount}"
-                    )
+        result = recompute_client_revenue(
+            dry_run=dry_run, fields=('received_amount', 'pending_amount'),
+        )
+        for change in result.changes:
+            self.stdout.write(
+                f"  ✓ {change.company_name}: "
+                f"Received: ₹{change.old['received_amount']} → ₹{change.new['received_amount']}"
+            )
+        clients_updated = result.updated
         
         print(f"\n{clients_updated} clients updated")
         
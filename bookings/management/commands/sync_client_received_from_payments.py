@@ -1,7 +1,26 @@
 from django.core.management.base import BaseCommand
 from clients.models import Client
+from clients.revenue_recompute import update_client_revenue
 from payments.models import Payment
-from django.db.models import Sum, Q
+from django.db.models import Sum
+
+
+def received_from_payments(clients):
+    """received/pending for clients with nothing received yet but CAPTURED/AUTHORIZED payments on record"""
+    totals = dict(
+        Payment.objects.filter(client_id__in=[client.pk for client in clients], status__in=['CAPTURED', 'AUTHORIZED'])
+        .values('client_id').annotate(total=Sum('amount')).values_list('client_id', 'total')
+    )
+    synced = {}
+    for client in clients:
+        received = totals.get(client.pk) or 0
+        # If received_amount is 0 but payments exist, update it
+        if client.received_amount == 0 and received > 0:
+            synced[client.pk] = {
+                'received_amount': received,
+                'pending_amount': max(0, client.total_with_gst - received),
+            }
+    return synced
 
 
 class Command(BaseCommand):
@@ -24,42 +43,23 @@ class Command(BaseCommand):
         print("SYNC CLIENT RECEIVED AMOUNT FROM PAYMENTS")
         print("="*70 + "\n")
         
-        updated_count = 0
+        # Only clients with nothing received can change
+        client_ids = Client.objects.filter(received_amount=0).order_by('pk').values_list('pk', flat=True)
+        print(f"Processing {Client.objects.count()} clients...\n")
         
-        # Get all clients
-        clients = Client.objects.all()
-        print(f"Processing {clients.count()} clients...\n")
+        result = update_client_revenue(
+            client_ids, received_from_payments, fields=('received_amount', 'pending_amount'),
+            note='Received amount synced from captured payments', dry_run=dry_run,
+        )
         
-        for client in clients:
-            # Get total received from CAPTURED payments
-            received_from_payments = Payment.objects.filter(
-                client=client,
-                status__in=['CAPTURED', 'AUTHORIZED']
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            old_received = client.received_amount
-            
-            # If received_amount is 0 but payments exist, update it
-            if client.received_amount == 0 and received_from_payments > 0:
-                client.received_amount = received_from_payments
-                
-                # Also update pending
-                client.pending_amount = max(0, client.total_with_gst - received_from_payments)
-                
-                if not dry_run:
-                    Client.objects.filter(pk=client.pk).update(
-                        received_amount=client.received_amount,
-                        pending_amount=client.pending_amount
-                    )
-                
-                updated_count += 1
-                self.stdout.write(
-                    f"✓ {client.company_name}\n"
-                    f"  Received: ₹{old_received} → ₹{client.received_amount}\n"
-                    f"  Pending: ₹{client.total_with_gst - old_received} → ₹{client.pending_amount}\n"
-                )
+        for change in result.changes:
+            self.stdout.write(
+                f"✓ {change.company_name}\n"
+                f"  Received: ₹{change.old['received_amount']} → ₹{change.new['received_amount']}\n"
+                f"  Pending: ₹{change.old['pending_amount']} → ₹{change.new['pending_amount']}\n"
+            )
         
         print()
         print("="*70)
-        print(f"UPDATED {updated_count} CLIENTS")
+        print(f"UPDATED {result.updated} CLIENTS")
         print("="*70 + "\n")
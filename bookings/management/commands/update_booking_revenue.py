@@ -5,9 +5,28 @@ Supports both legacy clients (revenue in Client fields) and new multi-booking cl
 from django.core.management.base import BaseCommand
 from bookings.models import Booking
 from clients.models import Client
+from clients.revenue_recompute import recompute_client_revenue, update_client_revenue
 from decimal import Decimal
 
 
+def legacy_revenue(clients):
+    """GST/total/pending re-derived from a legacy client's own pitched/received amounts"""
+    derived = {}
+    for client in clients:
+        gst_pct = Decimal(client.gst_percentage or 18)
+        total = Decimal(client.total_pitched_amount or 0)
+        received = Decimal(client.received_amount or 0)
+        
+        gst_amt = (total * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
+        total_with_gst = total + gst_amt
+        derived[client.pk] = {
+            'gst_amount': gst_amt,
+            'total_with_gst': total_with_gst,
+            'pending_amount': max(Decimal('0.00'), total_with_gst - received),
+        }
+    return derived
+
+
 class Command(BaseCommand):
     help = 'Update revenue fields for bookings and recalculate/preserve client totals'
 
@@ -81,47 +100,33 @@ class Command(BaseCommand):
         clients_with_bookings = 0
         
         if not dry_run:
-            for client in Client.objects.all():
-                # Check if client has bookings with revenue data
-                has_booking_revenue = client.bookings.filter(pitched_amount__gt=0).exists()
-                has_client_revenue = client.total_pitched_amount > 0
-                
-                if has_booking_revenue:
-                    # Use booking aggregation
-                    client.calculate_aggregated_revenue()
-                    Client.objects.filter(pk=client.pk).update(
-                        total_pitched_amount=client.total_pitched_amount,
-                        gst_amount=client.gst_amount,
-                        gst_percentage=client.gst_percentage,
-                        total_with_gst=client.total_with_gst,
-                        received_amount=client.received_amount,
-                        pending_amount=client.pending_amount
-                    )
-                    clients_with_bookings += 1
+            # Clients with booking revenue: set-based aggregation + bulk_update
+            booking_client_ids = set(
+                Booking.objects.filter(pitched_amount__gt=0).values_list('client_id', flat=True)
+            )
+            result = recompute_client_revenue(client_ids=booking_client_ids)
+            clients_with_bookings = len(booking_client_ids)
+            for change in result.changes:
+                self.stdout.write(
+                    f'  ✓ {change.company_name} (from bookings): ₹{change.new["total_with_gst"]}'
+                )
+            
+            if preserve_legacy:
+                # Keep existing client-level revenue (legacy), with all fields
+                # properly calculated, in bulk
+                legacy_ids = list(
+                    Client.objects.filter(total_pitched_amount__gt=0).exclude(pk__in=booking_client_ids)
+                    .order_by('pk').values_list('pk', flat=True)
+                )
+                result = update_client_revenue(
+                    legacy_ids, legacy_revenue, fields=('gst_amount', 'total_with_gst', 'pending_amount'),
+                    note='update_booking_revenue (legacy client)',
+                )
+                clients_with_legacy_revenue = len(legacy_ids)
+                for change in result.changes:
                     self.stdout.write(
-                        f'  ✓ {client.company_name} (from bookings): ₹{client.total_with_gst}'
+                        f'  ✓ {change.company_name} (legacy): ₹{change.new["total_with_gst"]}'
                     )
-                elif has_client_revenue and preserve_legacy:
-                    # Keep existing client-level revenue (legacy)
-                    # Ensure all fields are properly calculated
-                    gst_pct = Decimal(client.gst_percentage or 18)
-                    total = Decimal(client.total_pitched_amount or 0)
-                    received = Decimal(client.received_amount or 0)
-                    
-                    if total > 0:
-                        gst_amt = (total * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
-                        total_with_gst = total + gst_amt
-                        pending = max(Decimal('0.00'), total_with_gst - received)
-                        
-                        Client.objects.filter(pk=client.pk).update(
-                            gst_amount=gst_amt,
-                            total_with_gst=total_with_gst,
-                            pending_amount=pending
-                        )
-                        clients_with_legacy_revenue += 1
-                        self.stdout.write(
-                            f'  ✓ {client.company_name} (legacy): ₹{total_with_gst}'
-                        )
             
             self.stdout.write(f'\\n{self.style.SUCCESS(str(clients_with_bookings))} clients using booking aggregation')
             self.stdout.write(f'{self.style.SUCCESS(str(clients_with_legacy_revenue))} clients using legacy data')
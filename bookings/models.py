@@ -352,6 +352,10 @@ class Booking(models.Model):
         """Generate booking ID and calculate final amount"""
         if not self.booking_id:
             self.booking_id = self.generate_booking_id()
+        else:
+            # Keep hand-entered IDs in the canonical form so ID lookups stay exact
+            from clients.identifiers import normalize_code
+            self.booking_id = normalize_code(self.booking_id)
         
         # Calculate final amount after discount
         if self.amount:
@@ -219,23 +219,12 @@ class QuickClientCreationForm(forms.Form):
             client.approved_by = self.created_by
             client.approved_at = timezone.now()
         
-        client.save()
-
-        # Create initial revenue log entry
-        try:
-            from payments.models import RevenueEntry
-            RevenueEntry.objects.create(
-                client=client,
-                recorded_by=self.created_by,
-                total_pitched_amount=client.total_pitched_amount,
-                received_amount=client.received_amount,
-                pending_amount=client.pending_amount,
-                source='CLIENT_CREATION',
-                note='Initial revenue captured during client creation'
-            )
-        except Exception:
-            # Avoid breaking flow if revenue logging fails
-            pass
+        # The initial revenue is recorded in the ledger by Client.save()
+        client.save(
+            revenue_source='CLIENT_CREATION',
+            revenue_recorded_by=self.created_by,
+            revenue_note='Initial revenue captured during client creation',
+        )
         
         # Create initial service booking if provided
         initial_service_text = self.cleaned_data.get('initial_service')
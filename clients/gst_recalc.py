@@ -0,0 +1,240 @@
+"""
+Batched GST recalculation for Agnivridhi CRM
+
+Re-deriving gst_amount/total_with_gst/pending_amount (e.g. after a GST rate
+change) used to load and save() every client. Here clients are walked in
+primary-key batches; each batch is a short transaction that locks only its
+own rows (select_for_update), so a payment posted meanwhile waits for the
+batch instead of being overwritten. Only the derived columns
+(DERIVED_FIELDS) are written; pitched and received amounts are inputs and
+stay as they are:
+
+- 'python' mode reads the batch with values(), recomputes with
+  Client.calculate_revenue() (the same arithmetic save() uses) and writes
+  only the changed rows with bulk_update()
+- 'sql' mode pushes the arithmetic into one UPDATE ... SET per batch
+
+Both modes append ADJUSTMENT entries to the revenue ledger for changed
+balances and can save a checkpoint (the last finished pk, with the rate and
+mode of the run) after every batch, so an interrupted run resumes where it
+stopped. Resuming with a different rate or mode is refused: the clients
+before the checkpoint were computed with the old settings.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Greatest, Round
+from django.db.models.lookups import GreaterThan
+
+from payments.ledger import BALANCE_FIELDS, build_revenue_entry, catch_up_entries
+from payments.models import RevenueEntry
+
+from .models import Client
+
+
+GST_FIELDS = ('total_pitched_amount', 'received_amount', 'gst_percentage', 'gst_amount', 'total_with_gst', 'pending_amount')
+
+# The columns a recalculation writes
+DERIVED_FIELDS = ('gst_percentage', 'gst_amount', 'total_with_gst', 'pending_amount')
+
+MODES = ('python', 'sql')
+
+
+@dataclass
+class GstRecalcResult:
+    scanned: int = 0
+    updated: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    resumed_from: int = 0
+    last_pk: int = 0
+    changes: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+class Checkpoint:
+    """Last fully processed client pk plus the run's rate and mode, kept in a small JSON file."""
+
+    def __init__(self, path, rate=None, mode='python'):
+        self.path = path
+        self.rate = rate
+        self.mode = mode
+
+    def load(self):
+        """The pk to resume after; ValueError if the checkpoint was written by a run with other settings."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding='utf-8') as fp:
+            data = json.load(fp)
+        rate = Decimal(data['rate']) if data.get('rate') is not None else None
+        if data.get('mode') != self.mode or rate != self.rate:
+            raise ValueError(
+                f"Checkpoint {self.path} was written with rate={data.get('rate')} mode={data.get('mode')}, "
+                f"not rate={self.rate} mode={self.mode}; restart to discard it"
+            )
+        return int(data.get('last_pk', 0))
+
+    def save(self, last_pk):
+        if not self.path:
+            return
+        tmp = f'{self.path}.tmp'
+        rate = str(self.rate) if self.rate is not None else None
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            json.dump({'last_pk': last_pk, 'rate': rate, 'mode': self.mode}, fp)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _money(expression):
+    return Round(expression, 2, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _sql_assignments(rate=None):
+    """
+    UPDATE ... SET expressions for DERIVED_FIELDS, equivalent to Client.calculate_revenue().
+
+    Negative inputs count as zero, a missing/negative rate becomes 18%, and
+    a client that received more than pitched + GST is treated as fully paid.
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    zero = Value(Decimal('0.00'), output_field=money)
+    total = Greatest(F('total_pitched_amount'), zero)
+    received = Greatest(F('received_amount'), zero)
+    if rate is not None:
+        pct = Value(Decimal(rate), output_field=money)
+    else:
+        pct = Case(
+            When(gst_percentage__gt=0, then=F('gst_percentage')),
+            default=Value(Decimal('18.00')), output_field=money,
+        )
+    gst = _money(total * pct / Value(Decimal('100')))
+    with_gst = total + gst
+    overpaid = When(GreaterThan(received, with_gst), then=received)
+    # The rate last: MySQL evaluates SET assignments left to right with
+    # already-updated values, and the other columns are derived from it
+    return {
+        'gst_amount': Case(When(GreaterThan(received, with_gst), then=zero), default=gst, output_field=money),
+        'total_with_gst': Case(overpaid, default=with_gst, output_field=money),
+        'pending_amount': Greatest(with_gst - received, zero),
+        'gst_percentage': pct,
+    }
+
+
+def _balances(pks):
+    """The batch's current values, row-locked until the surrounding transaction ends."""
+    return {
+        row['pk']: row
+        for row in Client.objects.select_for_update().filter(pk__in=pks).values('pk', 'company_name', *GST_FIELDS)
+    }
+
+
+def _adjustments(before, after):
+    changed = {pk: old for pk, old in before.items() if any(old[f] != after[pk][f] for f in BALANCE_FIELDS)}
+    entries = catch_up_entries(changed)
+    for pk, old in changed.items():
+        entries.append(build_revenue_entry(pk, old, after[pk], 'ADJUSTMENT', note='GST recalculation'))
+    return entries
+
+
+def _record_change(result, pk, old, new):
+    result.changes.append((pk, old['company_name'], {f: old[f] for f in GST_FIELDS}, {f: new[f] for f in GST_FIELDS}))
+
+
+def _python_batch(pks, rate, dry_run, result):
+    with transaction.atomic():
+        before = _balances(pks)
+        changed = []
+        after = {}
+        for pk, old in before.items():
+            pct = rate if rate is not None else (old['gst_percentage'] or None)
+            derived = Client.calculate_revenue(old['total_pitched_amount'], old['received_amount'], pct)
+            new = after[pk] = {**old, **{f: derived[f] for f in DERIVED_FIELDS}}
+            if any(old[f] != new[f] for f in DERIVED_FIELDS):
+                changed.append(Client(pk=pk, **{f: new[f] for f in DERIVED_FIELDS}))
+                _record_change(result, pk, old, new)
+        if changed and not dry_run:
+            Client.objects.bulk_update(changed, list(DERIVED_FIELDS))
+            RevenueEntry.objects.bulk_create(_adjustments(before, after))
+    return len(changed)
+
+
+def _sql_batch(pks, rate, dry_run, result):
+    if dry_run:
+        raise ValueError('dry_run is not supported in sql mode')
+    with transaction.atomic():
+        before = _balances(pks)
+        Client.objects.filter(pk__in=pks).update(**_sql_assignments(rate))
+        after = _balances(pks)
+        changed = [pk for pk in before if any(before[pk][f] != after[pk][f] for f in DERIVED_FIELDS)]
+        RevenueEntry.objects.bulk_create(_adjustments(before, after))
+    for pk in changed:
+        _record_change(result, pk, before[pk], after[pk])
+    return len(changed)
+
+
+def recalculate_gst(batch_size=500, rate=None, mode='python', dry_run=False,
+                    checkpoint_path=None, restart=False, progress=None):
+    """
+    Recompute GST-derived client revenue columns in pk batches.
+
+    Args:
+        batch_size: clients per batch/transaction
+        rate: optional new GST percentage applied to every client; by default
+            each client's own rate is kept (18% when unset)
+        mode: 'python' (values() + bulk_update) or 'sql' (UPDATE ... SET)
+        dry_run: compute the diff without writing (python mode only)
+        checkpoint_path: JSON file storing the last finished pk, rate and
+            mode; a run resumes after it and removes it on completion
+        restart: ignore an existing checkpoint (required to resume with a
+            different rate or mode, which otherwise raises ValueError)
+        progress: optional callback(result) invoked after every batch
+
+    Returns a GstRecalcResult with counts, changes and throughput.
+    """
+    from accounts.dashboard_cache import bump_version
+
+    if mode not in MODES:
+        raise ValueError(f'mode must be one of {", ".join(MODES)}')
+    run_batch = _python_batch if mode == 'python' else _sql_batch
+    if rate is not None:
+        rate = Decimal(rate)
+
+    checkpoint = Checkpoint(None if dry_run else checkpoint_path, rate=rate, mode=mode)
+    if restart:
+        checkpoint.clear()
+    last_pk = checkpoint.load()
+    result = GstRecalcResult(resumed_from=last_pk, last_pk=last_pk)
+
+    started = time.monotonic()
+    while True:
+        pks = list(
+            Client.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        result.updated += run_batch(pks, rate, dry_run, result)
+        result.scanned += len(pks)
+        result.batches += 1
+        last_pk = result.last_pk = pks[-1]
+        checkpoint.save(last_pk)
+        result.elapsed = time.monotonic() - started
+        if progress:
+            progress(result)
+
+    result.elapsed = time.monotonic() - started
+    checkpoint.clear()
+    if result.updated and not dry_run:
+        # bulk_update()/update() skip the post_save dashboard invalidation
+        bump_version()
+    return result
@@ -0,0 +1,91 @@
+"""
+Identifier normalization and lookup for Agnivridhi CRM
+
+Phone numbers, PAN and GSTIN are stored twice on Client: as typed, and in a
+normalized, indexed column filled in Client.save(). Searches that look like
+one of these identifiers (or a CLI-/BKG-/APP- record ID) are answered with an
+indexed equality or prefix lookup instead of an icontains table scan.
+"""
+import re
+
+
+PAN_RE = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]$')
+GSTIN_RE = re.compile(r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][0-9A-Z]{3}$')
+RECORD_ID_RE = re.compile(r'^(CLI|BKG|APP)-[0-9]{0,8}(-[0-9A-Z]{0,4})?$')
+PHONE_CHARS_RE = re.compile(r'^\+?[0-9][0-9 ()\-.]*$')
+
+# Shortest digit string treated as a phone number prefix
+MIN_PHONE_PREFIX = 6
+
+RECORD_ID_KINDS = {'CLI': 'client_id', 'BKG': 'booking_id', 'APP': 'application_id'}
+
+
+def normalize_phone(value):
+    """
+    Digits-only phone number without the Indian country code or trunk 0.
+
+    '+91 98765-43210', '098765 43210' and '9876543210' all become '9876543210'.
+    """
+    if not value:
+        return ''
+    digits = re.sub(r'\D', '', str(value))
+    if len(digits) == 12 and digits.startswith('91'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_code(value):
+    """Uppercase a PAN/GSTIN/record ID and drop whitespace."""
+    if not value:
+        return ''
+    return re.sub(r'\s', '', str(value)).upper()
+
+
+def classify_identifier(query):
+    """
+    Detect an identifier-shaped search query.
+
+    Returns (kind, value, exact) where kind is one of 'pan', 'gst', 'phone',
+    'client_id', 'booking_id' or 'application_id', value is the normalized
+    search value and exact says whether to match by equality (True) or prefix.
+    Returns None for free-text queries.
+    """
+    query = (query or '').strip()
+    if not query:
+        return None
+
+    code = normalize_code(query)
+    if PAN_RE.match(code):
+        return 'pan', code, True
+    if GSTIN_RE.match(code):
+        return 'gst', code, True
+    match = RECORD_ID_RE.match(code)
+    if match:
+        return RECORD_ID_KINDS[match.group(1)], code, len(code) == 17
+
+    if PHONE_CHARS_RE.match(query):
+        digits = normalize_phone(query)
+        if len(digits) >= MIN_PHONE_PREFIX:
+            return 'phone', digits, len(digits) == 10
+    return None
+
+
+def client_identifier_q(kind, value, exact):
+    """Q object matching Clients by a classified identifier (None if n/a)."""
+    from django.db.models import Q
+
+    lookup = 'exact' if exact else 'startswith'
+    if kind == 'phone':
+        return (
+            Q(**{f'contact_phone_normalized__{lookup}': value})
+            | Q(**{f'alternate_phone_normalized__{lookup}': value})
+        )
+    if kind == 'pan':
+        return Q(pan_normalized=value)
+    if kind == 'gst':
+        return Q(gst_normalized=value)
+    if kind == 'client_id':
+        return Q(**{f'client_id__{lookup}': value})
+    return None
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from clients.models import Client
 from payments.models import RevenueEntry
+from payments.ledger import ledger_balance, record_revenue_change
 from accounts.models import User
 from decimal import Decimal
 from datetime import datetime
@@ -53,13 +54,16 @@ class Command(BaseCommand):
                 ).exists()
 
                 if not existing:
-                    entry = RevenueEntry.objects.create(
-                        client=client,
-                        total_pitched_amount=Decimal(str(item['pitched'])),
-                        received_amount=Decimal(str(item['received'])),
-                        pending_amount=Decimal(str(item['pending'])),
+                    record_revenue_change(
+                        client.pk,
+                        before=ledger_balance(client.pk),
+                        after={
+                            'total_pitched_amount': Decimal(str(item['pitched'])),
+                            'received_amount': Decimal(str(item['received'])),
+                            'pending_amount': Decimal(str(item['pending'])),
+                        },
+                        source='CLIENT_CREATION',
                         recorded_by=user,
-                        source='CLIENT_CREATION'
                     )
                     self.stdout.write(
                         f'✅ {client.company_name}: '
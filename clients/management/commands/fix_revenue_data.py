@@ -2,56 +2,63 @@
 Fix clients with broken revenue data:
 - If total_with_gst = 0 but total_pitched_amount > 0, recalculate total_with_gst
 - Recalculate pending_amount = total_with_gst - received_amount
+
+Broken clients are found with one query and fixed in bulk through
+clients.revenue_recompute.update_client_revenue (ledger entries included).
 """
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from clients.models import Client
+from clients.revenue_recompute import update_client_revenue
 from decimal import Decimal
 
 
+def fixed_revenue(clients):
+    """gst_amount/total_with_gst/pending_amount re-derived from pitched, received and GST%"""
+    fixed = {}
+    for client in clients:
+        pitched = client.total_pitched_amount or Decimal('0.00')
+        gst_pct = client.gst_percentage or Decimal('18.00')
+        
+        # Recalculate GST
+        gst_amount = (pitched * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
+        total_with_gst = pitched + gst_amount
+        
+        # Fix received if it's > new total
+        received = client.received_amount or Decimal('0.00')
+        if received > total_with_gst:
+            total_with_gst = received
+            gst_amount = Decimal('0.00')
+        
+        # Calculate pending
+        pending = total_with_gst - received
+        if pending < 0:
+            pending = Decimal('0.00')
+        
+        fixed[client.pk] = {'gst_amount': gst_amount, 'total_with_gst': total_with_gst, 'pending_amount': pending}
+    return fixed
+
+
 class Command(BaseCommand):
     help = 'Fix clients with broken total_with_gst calculations'
 
     def handle(self, *args, **kwargs):
         self.stdout.write('\n=== Fixing Broken Revenue Data ===\n')
         
-        clients = Client.objects.all()
-        fixed_count = 0
+        broken_ids = Client.objects.filter(total_with_gst=0).filter(
+            Q(total_pitched_amount__gt=0) | Q(received_amount__gt=0)
+        ).order_by('pk').values_list('pk', flat=True)
+        result = update_client_revenue(
+            broken_ids, fixed_revenue, fields=('gst_amount', 'total_with_gst', 'pending_amount'),
+            note='fix_revenue_data',
+        )
         
-        for client in clients:
-            # Check if total_with_gst is broken
-            if client.total_with_gst == 0 and (client.total_pitched_amount > 0 or client.received_amount > 0):
-                self.stdout.write(f'\n❌ BROKEN: {client.id}. {client.company_name}')
-                self.stdout.write(f'   Before: Pitched={client.total_pitched_amount}, GST={client.gst_amount}, Total+GST={client.total_with_gst}, Received={client.received_amount}')
-                
-                # Recalculate
-                pitched = client.total_pitched_amount or Decimal('0.00')
-                gst_pct = client.gst_percentage or Decimal('18.00')
-                
-                # Recalculate GST
-                gst_amount = (pitched * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
-                total_with_gst = pitched + gst_amount
-                
-                # Fix received if it's > new total
-                received = client.received_amount or Decimal('0.00')
-                if received > total_with_gst:
-                    total_with_gst = received
-                    gst_amount = Decimal('0.00')
-                
-                # Calculate pending
-                pending = total_with_gst - received
-                if pending < 0:
-                    pending = Decimal('0.00')
-                
-                # Update
-                client.gst_amount = gst_amount
-                client.total_with_gst = total_with_gst
-                client.pending_amount = pending
-                client.save()
-                
-                self.stdout.write(f'   After: Pitched={client.total_pitched_amount}, GST={client.gst_amount}, Total+GST={client.total_with_gst}, Received={client.received_amount}')
-                fixed_count += 1
+        for change in result.changes:
+            self.stdout.write(f'\n❌ BROKEN: {change.client_id}. {change.company_name}')
+            self.stdout.write(f'   Before: GST={change.old["gst_amount"]}, Total+GST={change.old["total_with_gst"]}, Pending={change.old["pending_amount"]}')
+            self.stdout.write(f'   After: GST={change.new["gst_amount"]}, Total+GST={change.new["total_with_gst"]}, Pending={change.new["pending_amount"]}')
         
-        if fixed_count == 0:
+        if not result.changes:
             self.stdout.write(self.style.SUCCESS('\n✅ No broken clients found - all data is consistent!'))
         else:
-            self.stdout.write(self.style.SUCCESS(f'\n✅ Fixed {fixed_count} clients'))
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Fixed {result.updated} clients'))
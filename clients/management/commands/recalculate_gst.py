@@ -1,46 +1,78 @@
-from django.core.management.base import BaseCommand
-from clients.models import Client
-from decimal import Decimal
+"""
+Recalculate GST-derived revenue columns for all clients in batches.
+
+Usage:
+    python manage.py recalculate_gst
+    python manage.py recalculate_gst --rate 18 --batch-size 1000
+    python manage.py recalculate_gst --sql            # arithmetic in one UPDATE per batch
+    python manage.py recalculate_gst --restart        # ignore a leftover checkpoint (e.g. from another --rate)
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.gst_recalc import recalculate_gst
 
 
 class Command(BaseCommand):
     help = 'Recalculate and update GST fields for all clients'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', help='Apply this GST percentage to every client (default: keep each client\'s rate)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Clients per batch/transaction')
+        parser.add_argument('--sql', action='store_true', help='Compute the new values in a single SQL UPDATE per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without saving')
+        parser.add_argument(
+            '--checkpoint', default=str(settings.BASE_DIR / '.recalculate_gst.checkpoint'),
+            help='File recording the last finished client pk so an interrupted run can resume',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start from the first client')
+
     def handle(self, *args, **options):
+        rate = None
+        if options['rate'] is not None:
+            try:
+                rate = Decimal(options['rate'])
+            except InvalidOperation:
+                raise CommandError('--rate must be a number')
+        if options['sql'] and options['dry_run']:
+            raise CommandError('--dry-run is not supported with --sql')
+
         self.stdout.write(self.style.SUCCESS('\n📊 RECALCULATING GST FOR ALL CLIENTS:\n'))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be saved'))
+
+        def progress(result):
+            self.stdout.write(
+                f'  batch {result.batches}: up to client #{result.last_pk}, '
+                f'{result.scanned} scanned, {result.updated} changed ({result.rows_per_second:,.0f} rows/s)'
+            )
+
+        try:
+            result = recalculate_gst(
+                batch_size=options['batch_size'],
+                rate=rate,
+                mode='sql' if options['sql'] else 'python',
+                dry_run=options['dry_run'],
+                checkpoint_path=options['checkpoint'],
+                restart=options['restart'],
+                progress=progress if options['verbosity'] > 1 else None,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if result.resumed_from:
+            self.stdout.write(self.style.WARNING(f'Resumed after client #{result.resumed_from}'))
+        for pk, company_name, old, new in result.changes:
+            self.stdout.write(
+                f'✅ {company_name}: '
+                f'GST ₹{old["gst_amount"]} → ₹{new["gst_amount"]}, '
+                f'Total ₹{old["total_with_gst"]} → ₹{new["total_with_gst"]}'
+            )
 
-        updated_count = 0
-
-        for client in Client.objects.all():
-            old_gst_amount = client.gst_amount
-            old_total_with_gst = client.total_with_gst
-
-            # Set default GST percentage if not set
-            if not client.gst_percentage or client.gst_percentage == 0:
-                client.gst_percentage = Decimal('18.00')
-
-            # Calculate GST amount
-            if client.total_pitched_amount > 0:
-                client.gst_amount = client.total_pitched_amount * (client.gst_percentage / Decimal('100'))
-                client.total_with_gst = client.total_pitched_amount + client.gst_amount
-            else:
-                client.gst_amount = Decimal('0.00')
-                client.total_with_gst = Decimal('0.00')
-
-            # Recalculate pending
-            if client.total_with_gst > 0:
-                client.pending_amount = client.total_with_gst - client.received_amount
-            else:
-                client.pending_amount = Decimal('0.00')
-
-            # Save if changed
-            if old_gst_amount != client.gst_amount or old_total_with_gst != client.total_with_gst:
-                client.save(update_fields=['gst_percentage', 'gst_amount', 'total_with_gst', 'pending_amount'])
-                self.stdout.write(
-                    f'✅ {client.company_name}: '
-                    f'GST ₹{old_gst_amount} → ₹{client.gst_amount}, '
-                    f'Total ₹{old_total_with_gst} → ₹{client.total_with_gst}'
-                )
-                updated_count += 1
-
-        self.stdout.write(self.style.SUCCESS(f'\n✅ COMPLETE: {updated_count} clients updated\n'))
+        verb = 'would be updated' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ COMPLETE: {result.scanned} clients scanned, {result.updated} {verb} '
+            f'in {result.batches} batches, {result.elapsed:.2f}s ({result.rows_per_second:,.0f} rows/s)\n'
+        ))
@@ -0,0 +1,55 @@
+"""
+Recompute client revenue columns from bookings and captured payments in bulk.
+
+Usage:
+    python manage.py recompute_client_revenue --dry-run
+    python manage.py recompute_client_revenue --client-ids 12,15
+    python manage.py recompute_client_revenue --since 2025-01-01
+"""
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from clients.revenue_recompute import recompute_client_revenue
+
+
+class Command(BaseCommand):
+    help = 'Recompute client revenue from bookings/payments with set-based queries and bulk updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without saving')
+        parser.add_argument('--client-ids', help='Comma-separated client primary keys to recompute')
+        parser.add_argument('--since', help='Only clients changed (or with bookings/payments changed) since YYYY-MM-DD')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Clients per aggregate/update batch')
+
+    def handle(self, *args, **options):
+        client_ids = None
+        if options['client_ids']:
+            try:
+                client_ids = [int(pk) for pk in options['client_ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--client-ids must be a comma-separated list of integers')
+
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.combine(datetime.strptime(options['since'], '%Y-%m-%d').date(), time.min))
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be saved'))
+
+        result = recompute_client_revenue(
+            client_ids=client_ids, since=since, dry_run=options['dry_run'], batch_size=options['batch_size'],
+        )
+
+        for change in result.changes:
+            diffs = ', '.join(f'{f}: ₹{change.old[f]} → ₹{change.new[f]}' for f in change.changed_fields)
+            self.stdout.write(f'  ✓ {change.company_name} (#{change.client_id}): {diffs}')
+
+        verb = 'would be updated' if result.dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {result.scanned} clients scanned, {result.updated} {verb}'
+        ))
@@ -0,0 +1,71 @@
+"""
+Reconcile client revenue against bookings, payments and the revenue ledger.
+
+Usage:
+    python manage.py reconcile_revenue
+    python manage.py reconcile_revenue --output reports/revenue_audit.csv
+    python manage.py reconcile_revenue --output reports/revenue_audit.json --client-ids 12,15
+"""
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.revenue_reconciliation import DEFAULT_TOLERANCE, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Find revenue mismatches between clients, bookings, payments and the ledger (vectorized)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the mismatch report to this .csv or .json file')
+        parser.add_argument('--format', choices=('csv', 'json'), help='Report format (default: from --output extension)')
+        parser.add_argument('--client-ids', help='Comma-separated client primary keys to audit')
+        parser.add_argument('--tolerance', default=str(DEFAULT_TOLERANCE), help='Ignore differences up to this many rupees')
+        parser.add_argument('--fail-on-mismatch', action='store_true', help='Exit with an error if any mismatch is found')
+
+    def handle(self, *args, **options):
+        client_ids = None
+        if options['client_ids']:
+            try:
+                client_ids = [int(pk) for pk in options['client_ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--client-ids must be a comma-separated list of integers')
+        try:
+            tolerance = Decimal(options['tolerance'])
+        except InvalidOperation:
+            raise CommandError('--tolerance must be a number')
+
+        output = options['output']
+        fmt = options['format']
+        if output and not fmt:
+            fmt = 'json' if output.lower().endswith('.json') else 'csv'
+
+        started = time.monotonic()
+        report = reconcile(client_ids=client_ids, tolerance=tolerance)
+        elapsed = time.monotonic() - started
+        summary = report.summary()
+
+        rows = ', '.join(f'{count} {name}' for name, count in summary['rows_scanned'].items())
+        self.stdout.write(f'\n📊 Scanned {rows} in {elapsed:.2f}s\n')
+        for check, result in summary['checks'].items():
+            line = f'  {check:<30} {result["mismatches"]:>6} mismatches  ₹{result["amount"]:,.2f}'
+            self.stdout.write(self.style.WARNING(line) if result['mismatches'] else line)
+
+        if output:
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, 'w', encoding='utf-8', newline='') as fp:
+                report.to_json(fp) if fmt == 'json' else report.to_csv(fp)
+            self.stdout.write(f'\n📝 Report written to {output}')
+
+        total = summary['total_mismatches']
+        if total:
+            message = f'\n⚠️  {total} revenue mismatches found'
+            if options['fail_on_mismatch']:
+                raise CommandError(message.strip())
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Revenue data reconciles'))
@@ -0,0 +1,73 @@
+"""
+Email login credentials to every approved client that has not received them.
+
+The emails are queued in the notification outbox and then sent over one
+pooled SMTP connection (re-opened every --batch-size messages) instead of
+one connection per client.
+
+Usage:
+    python manage.py send_client_credentials
+    python manage.py send_client_credentials --batch-size 25
+    python manage.py send_client_credentials --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.email_utils_client_credentials import queue_client_credentials_email
+from clients.models import ClientCredential
+from notifications.mailer import PooledMailer
+from notifications.models import Notification
+from notifications.outbox import deliver_many
+
+
+class Command(BaseCommand):
+    help = 'Send pending login credentials to approved clients over a pooled SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'EMAIL_BATCH_SIZE', 50),
+            help='Emails sent per SMTP session before reconnecting (default: EMAIL_BATCH_SIZE)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='List the clients without sending anything')
+
+    def handle(self, *args, **options):
+        # Skip clients whose credentials email is already waiting in the outbox
+        in_flight = Notification.objects.filter(
+            notification_type=Notification.NotificationType.CREDENTIALS,
+            status__in=[Notification.Status.QUEUED, Notification.Status.SENDING],
+        ).values('recipient_id')
+        credentials = (
+            ClientCredential.objects.filter(is_sent=False, client__is_approved=True)
+            .exclude(email='')
+            .exclude(client__user_id__in=in_flight)
+            .select_related('client__user')
+            .order_by('created_at')
+        )
+
+        if options['dry_run']:
+            for credential in credentials:
+                self.stdout.write(f'  {credential.client.company_name} <{credential.email}>')
+            self.stdout.write(self.style.WARNING(f'🔍 Dry run: {len(credentials)} client(s) would be emailed'))
+            return
+
+        with transaction.atomic():
+            ids = [queue_client_credentials_email(credential, dispatch=False).pk for credential in credentials]
+        if not ids:
+            self.stdout.write(self.style.SUCCESS('✅ No pending credentials to send'))
+            return
+
+        with PooledMailer(batch_size=options['batch_size']) as mailer:
+            delivered = deliver_many(ids, mailer=mailer)
+
+        sent = sum(1 for n in delivered if n.status == Notification.Status.SENT)
+        failed = len(delivered) - sent
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Sent {sent} credential email(s) over {mailer.connections_opened} SMTP connection(s)'
+        ))
+        if failed:
+            self.stdout.write(self.style.ERROR(
+                f'❌ {failed} email(s) failed; see the FAILED notifications for details'
+            ))
@@ -1,50 +1,53 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from clients.models import Client
-from payments.models import RevenueEntry
+from clients.revenue_recompute import update_client_revenue
+from payments.ledger import ledger_balances
 from decimal import Decimal
 
 
+SYNCED_FIELDS = ('total_pitched_amount', 'received_amount', 'pending_amount', 'gst_percentage')
+
+
+def revenue_from_ledger(clients):
+    """Each client's ledger balance (latest snapshot + deltas since); clients without history are skipped"""
+    balances = ledger_balances([client.pk for client in clients])
+    synced = {}
+    for client in clients:
+        if client.pk not in balances:
+            continue
+        values = synced[client.pk] = dict(balances[client.pk])
+        # Recalculate GST if pitched amount exists
+        if values['total_pitched_amount'] > 0 and not client.gst_percentage:
+            values['gst_percentage'] = Decimal('18.00')
+    return synced
+
+
 class Command(BaseCommand):
     help = 'Sync RevenueEntry data to Client model fields'
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('\n🔄 SYNCING REVENUE DATA FROM REVENUEENTRY TO CLIENT:\n'))
 
-        # Get all clients with revenue entries
-        from django.db.models import Q
-        clients_with_entries = Client.objects.filter(revenue_entries__isnull=False).distinct()
+        # Clients with ledger history; after compact_revenue_ledger --prune
+        # some only have a snapshot left
+        client_ids = list(
+            Client.objects.filter(Q(revenue_entries__isnull=False) | Q(revenue_snapshots__isnull=False))
+            .distinct().order_by('pk').values_list('pk', flat=True)
+        )
         
-        self.stdout.write(f'Found {clients_with_entries.count()} clients with revenue entries')
+        self.stdout.write(f'Found {len(client_ids)} clients with revenue entries')
         
-        clients_updated = 0
+        # Only the revenue columns, in bulk; any change is appended to the ledger
+        result = update_client_revenue(
+            client_ids, revenue_from_ledger, fields=SYNCED_FIELDS, note='Synced from the revenue ledger',
+        )
         
-        for client in clients_with_entries:
-            try:
-                latest_entry = client.revenue_entries.latest('created_at')
-                
-                old_pitched = client.total_pitched_amount
-                old_received = client.received_amount
-                
-                # Update client with latest revenue entry data
-                client.total_pitched_amount = latest_entry.total_pitched_amount
-                client.received_amount = latest_entry.received_amount
-                client.pending_amount = latest_entry.pending_amount
-                
-                # Recalculate GST if pitched amount exists
-                if client.total_pitched_amount > 0 and not client.gst_percentage:
-                    client.gst_percentage = Decimal('18.00')
-                
-                # Save without triggering signals
-                client.save(update_fields=['total_pitched_amount', 'received_amount', 'pending_amount', 'gst_percentage'])
-                
-                self.stdout.write(
-                    f'✅ {client.company_name}: '
-                    f'Pitched ₹{old_pitched} → ₹{client.total_pitched_amount}, '
-                    f'Received ₹{old_received} → ₹{client.received_amount}'
-                )
-                clients_updated += 1
-                
-            except RevenueEntry.DoesNotExist:
-                pass
-
-        self.stdout.write(self.style.SUCCESS(f'\n✅ SYNC COMPLETE: {clients_updated} clients updated\n'))
+        for change in result.changes:
+            self.stdout.write(
+                f'✅ {change.company_name}: '
+                f'Pitched ₹{change.old["total_pitched_amount"]} → ₹{change.new["total_pitched_amount"]}, '
+                f'Received ₹{change.old["received_amount"]} → ₹{change.new["received_amount"]}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ SYNC COMPLETE: {result.updated} clients updated\n'))
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+from clients.identifiers import normalize_code, normalize_phone
+
+
+def populate_normalized_identifiers(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    batch = []
+    for client in Client.objects.only(
+        'id', 'contact_phone', 'alternate_phone', 'pan_number', 'gst_number'
+    ).iterator(chunk_size=1000):
+        client.contact_phone_normalized = normalize_phone(client.contact_phone)[:15]
+        client.alternate_phone_normalized = normalize_phone(client.alternate_phone)[:15]
+        client.pan_normalized = normalize_code(client.pan_number)[:10]
+        client.gst_normalized = normalize_code(client.gst_number)[:15]
+        batch.append(client)
+        if len(batch) >= 1000:
+            Client.objects.bulk_update(batch, [
+                'contact_phone_normalized', 'alternate_phone_normalized', 'pan_normalized', 'gst_normalized',
+            ])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, [
+            'contact_phone_normalized', 'alternate_phone_normalized', 'pan_normalized', 'gst_normalized',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0011_alter_client_sector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='alternate_phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Alternate phone digits without country code', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='contact_phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Contact phone digits without country code', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='gst_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Uppercased GSTIN for exact lookups', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='pan_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Uppercased PAN for exact lookups', max_length=10),
+        ),
+        migrations.RunPython(populate_normalized_identifiers, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -6,6 +6,9 @@ from decimal import Decimal
 import secrets
 import string
 
+# The revenue columns mirrored by the ledger (payments.ledger.BALANCE_FIELDS)
+BALANCE_FIELD_NAMES = frozenset({'total_pitched_amount', 'received_amount', 'pending_amount'})
+
 class Client(models.Model):
     """
     Client/Company model for businesses seeking funding and consultancy services
@@ -207,6 +210,43 @@ class Client(models.Model):
         help_text=_('Alternate contact phone')
     )
     
+    # Normalized identifiers (filled in save(), see clients.identifiers)
+    contact_phone_normalized = models.CharField(
+        max_length=15,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text=_('Contact phone digits without country code')
+    )
+    
+    alternate_phone_normalized = models.CharField(
+        max_length=15,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text=_('Alternate phone digits without country code')
+    )
+    
+    pan_normalized = models.CharField(
+        max_length=10,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text=_('Uppercased PAN for exact lookups')
+    )
+    
+    gst_normalized = models.CharField(
+        max_length=15,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text=_('Uppercased GSTIN for exact lookups')
+    )
+    
     # Address
     address_line1 = models.CharField(
         max_length=200,
@@ -345,45 +385,32 @@ class Client(models.Model):
             models.Index(fields=['company_name']),
             models.Index(fields=['assigned_sales', 'status']),
             models.Index(fields=['sector', 'annual_turnover']),
+            # Revenue report keyset pagination (default sort)
+            models.Index(fields=['created_at', 'id']),
         ]
     
+    NORMALIZED_FIELDS = (
+        'contact_phone_normalized', 'alternate_phone_normalized',
+        'pan_normalized', 'gst_normalized',
+    )
+    
     def __str__(self):
         return f"{self.company_name} ({self.client_id})"
     
-    def save(self, *args, **kwargs):
-        """Generate unique client ID if not exists"""
+    def save(self, *args, revenue_source=None, revenue_recorded_by=None, revenue_note='', **kwargs):
+        """
+        Generate unique client ID if not exists
+
+        A change to the revenue balance is appended to the revenue ledger
+        (payments.ledger) in the same transaction; ``revenue_source``,
+        ``revenue_recorded_by`` and ``revenue_note`` describe that entry.
+        """
         # Normalize revenue numbers and keep consistency
         try:
-            total = Decimal(self.total_pitched_amount or 0)
-            received = Decimal(self.received_amount or 0)
-            gst_pct = Decimal(self.gst_percentage or 18)
-            
-            if received < 0:
-                received = Decimal('0.00')
-            if total < 0:
-                total = Decimal('0.00')
-            if gst_pct < 0:
-                gst_pct = Decimal('18.00')
-            
-            # Calculate GST
-            self.gst_amount = (total * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
-            self.total_with_gst = total + self.gst_amount
-            
-            # Ensure received does not exceed total with GST
-            if self.total_with_gst >= 0 and received > self.total_with_gst:
-                self.total_with_gst = received
-                self.gst_amount = Decimal('0.00')
-                total = received
-            
-            self.total_pitched_amount = total
-            self.received_amount = received
-            self.gst_percentage = gst_pct
-            
-            # Compute pending based on total with GST
-            computed_pending = self.total_with_gst - received
-            if computed_pending < 0:
-                computed_pending = Decimal('0.00')
-            self.pending_amount = computed_pending
+            for field, value in self.calculate_revenue(
+                self.total_pitched_amount, self.received_amount, self.gst_percentage
+            ).items():
+                setattr(self, field, value)
         except Exception:
             # Fail-safe: ensure fields exist even if parsing fails
             self.total_pitched_amount = self.total_pitched_amount or Decimal('0.00')
@@ -393,9 +420,113 @@ class Client(models.Model):
             self.gst_amount = self.gst_amount or Decimal('0.00')
             self.total_with_gst = self.total_with_gst or Decimal('0.00')
 
+        self.normalize_identifiers()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & {'contact_phone', 'alternate_phone', 'pan_number', 'gst_number'}:
+            kwargs['update_fields'] = set(update_fields) | set(self.NORMALIZED_FIELDS)
         if not self.client_id:
             self.client_id = self.generate_client_id()
-        super().save(*args, **kwargs)
+
+        from payments.ledger import BALANCE_FIELDS, record_revenue_change
+
+        adding = self._state.adding or not self.pk
+        update_fields = kwargs.get('update_fields')
+        tracked = update_fields is None or bool(set(update_fields) & set(BALANCE_FIELDS))
+        after = self._balance()
+        if tracked and not adding and self._same_balance(self.__dict__.get('_loaded_balance'), after):
+            # Balance untouched since it was loaded: no ledger work at all
+            tracked = False
+        with transaction.atomic():
+            before = None
+            if tracked and not adding:
+                before = Client.objects.select_for_update().filter(pk=self.pk).values(*BALANCE_FIELDS).first()
+            super().save(*args, **kwargs)
+            self._loaded_balance = after
+            if not tracked:
+                return
+            if before is None and not any(after.values()):
+                return
+            if before is not None and self._same_balance(before, after):
+                return
+            record_revenue_change(
+                self.pk, before, after,
+                source=revenue_source or ('CLIENT_CREATION' if before is None else 'MANUAL_UPDATE'),
+                recorded_by=revenue_recorded_by,
+                note=revenue_note,
+            )
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What save() compares against to skip the ledger when the balance is untouched
+        if BALANCE_FIELD_NAMES.issubset(field_names):
+            instance._loaded_balance = instance._balance()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self._loaded_balance = self._balance()
+        elif BALANCE_FIELD_NAMES.intersection(fields):
+            self.__dict__.pop('_loaded_balance', None)
+    
+    def _balance(self):
+        return {field: getattr(self, field) for field in BALANCE_FIELD_NAMES}
+    
+    @staticmethod
+    def _same_balance(before, after):
+        return before is not None and all(Decimal(before[f] or 0) == Decimal(after[f] or 0) for f in BALANCE_FIELD_NAMES)
+    
+    @staticmethod
+    def calculate_revenue(total_pitched_amount, received_amount, gst_percentage):
+        """
+        Derive the stored revenue columns from pitched/received/GST%.
+        
+        Returns a dict with total_pitched_amount, received_amount,
+        gst_percentage, gst_amount, total_with_gst and pending_amount.
+        """
+        total = Decimal(total_pitched_amount or 0)
+        received = Decimal(received_amount or 0)
+        gst_pct = Decimal(gst_percentage or 18)
+        
+        if received < 0:
+            received = Decimal('0.00')
+        if total < 0:
+            total = Decimal('0.00')
+        if gst_pct < 0:
+            gst_pct = Decimal('18.00')
+        
+        # Calculate GST
+        gst_amount = (total * gst_pct / Decimal('100')).quantize(Decimal('0.01'))
+        total_with_gst = total + gst_amount
+        
+        # Ensure received does not exceed total with GST
+        if total_with_gst >= 0 and received > total_with_gst:
+            total_with_gst = received
+            gst_amount = Decimal('0.00')
+            total = received
+        
+        # Compute pending based on total with GST
+        pending = total_with_gst - received
+        if pending < 0:
+            pending = Decimal('0.00')
+        
+        return {
+            'total_pitched_amount': total,
+            'received_amount': received,
+            'gst_percentage': gst_pct,
+            'gst_amount': gst_amount,
+            'total_with_gst': total_with_gst,
+            'pending_amount': pending,
+        }
+    
+    def normalize_identifiers(self):
+        """Refresh the indexed lookup columns from phone/PAN/GST"""
+        from .identifiers import normalize_code, normalize_phone
+        self.contact_phone_normalized = normalize_phone(self.contact_phone)[:15]
+        self.alternate_phone_normalized = normalize_phone(self.alternate_phone)[:15]
+        self.pan_normalized = normalize_code(self.pan_number)[:10]
+        self.gst_normalized = normalize_code(self.gst_number)[:15]
     
     @staticmethod
     def generate_client_id():
@@ -453,44 +584,73 @@ class Client(models.Model):
             total_pending=Sum('pending_amount')
         )
         
+        for field, value in self.aggregate_revenue(self, payments_received, aggregated).items():
+            setattr(self, field, value)
+        
+        return {
+            'total_pitched': self.total_pitched_amount,
+            'gst_amount': self.gst_amount,
+            'total_with_gst': self.total_with_gst,
+            'received_amount': self.received_amount,
+            'pending_amount': self.pending_amount
+        }
+    
+    @staticmethod
+    def aggregate_revenue(current, payments_received, aggregated):
+        """
+        Revenue columns derived from payment/booking aggregates.
+        
+        Args:
+            current: object with the client's current revenue attributes
+            payments_received: sum of CAPTURED payment amounts
+            aggregated: dict with total_pitched, total_gst, total_with_gst and
+                total_pending summed over the client's bookings
+        
+        Returns a dict of the revenue fields to store (unchanged ones included).
+        Used by calculate_aggregated_revenue() and the bulk recompute in
+        clients.revenue_recompute.
+        """
+        result = {
+            'total_pitched_amount': current.total_pitched_amount,
+            'gst_amount': current.gst_amount,
+            'gst_percentage': current.gst_percentage,
+            'total_with_gst': current.total_with_gst,
+            'received_amount': current.received_amount,
+            'pending_amount': current.pending_amount,
+        }
+        
         # Check if bookings have revenue data
         has_booking_data = aggregated['total_pitched'] and aggregated['total_pitched'] > 0
         
         if has_booking_data:
             # Use aggregated booking data
-            self.total_pitched_amount = aggregated['total_pitched'] or Decimal('0.00')
-            self.gst_amount = aggregated['total_gst'] or Decimal('0.00')
-            self.total_with_gst = aggregated['total_with_gst'] or Decimal('0.00')
+            result['total_pitched_amount'] = aggregated['total_pitched'] or Decimal('0.00')
+            result['gst_amount'] = aggregated['total_gst'] or Decimal('0.00')
+            result['total_with_gst'] = aggregated['total_with_gst'] or Decimal('0.00')
             
             # Use payments if available, else use booking data
             if payments_received > 0:
-                self.received_amount = payments_received
-                self.pending_amount = self.total_with_gst - payments_received
+                result['received_amount'] = payments_received
+                result['pending_amount'] = result['total_with_gst'] - payments_received
             else:
-                self.received_amount = Decimal('0.00')
-                self.pending_amount = aggregated['total_pending'] or Decimal('0.00')
+                result['received_amount'] = Decimal('0.00')
+                result['pending_amount'] = aggregated['total_pending'] or Decimal('0.00')
             
             # Calculate average GST percentage from bookings
-            if self.total_pitched_amount > 0 and aggregated['total_gst']:
-                self.gst_percentage = (aggregated['total_gst'] / self.total_pitched_amount * Decimal('100.00')).quantize(Decimal('0.01'))
+            if result['total_pitched_amount'] > 0 and aggregated['total_gst']:
+                result['gst_percentage'] = (aggregated['total_gst'] / result['total_pitched_amount'] * Decimal('100.00')).quantize(Decimal('0.01'))
         else:
             # No booking data - use Payment records to update received amount
             # But preserve existing total_pitched_amount (legacy)
             if payments_received > 0:
-                self.received_amount = payments_received
+                result['received_amount'] = payments_received
                 # Recalc pending based on total_with_gst and received
-                if self.total_with_gst > 0:
-                    self.pending_amount = self.total_with_gst - payments_received
-                    if self.pending_amount < 0:
-                        self.pending_amount = Decimal('0.00')
+                if result['total_with_gst'] > 0:
+                    result['pending_amount'] = result['total_with_gst'] - payments_received
+                    if result['pending_amount'] < 0:
+                        result['pending_amount'] = Decimal('0.00')
         
-        return {
-            'total_pitched': self.total_pitched_amount,
-            'gst_amount': self.gst_amount,
-            'total_with_gst': self.total_with_gst,
-            'received_amount': self.received_amount,
-            'pending_amount': self.pending_amount
-        }
+        return result
     
     def get_payment_status(self):
         """
@@ -0,0 +1,221 @@
+"""
+Set-based client revenue recompute for Agnivridhi CRM
+
+Client.calculate_aggregated_revenue() runs two aggregate queries per client,
+so resyncing every client one save() at a time takes minutes. This module
+does the same computation in bulk: for each batch of clients it runs one
+GROUP BY over captured payments and one over bookings, diffs the derived
+values against the stored ones in memory and bulk_update()s only the rows
+that actually changed. Each batch is one transaction holding row locks on
+its clients, so concurrent payment postings are not overwritten. Each
+change is also appended to the revenue ledger as an ADJUSTMENT entry (see
+payments.ledger).
+
+update_client_revenue() is the shared write path: the legacy repair
+commands (fix_revenue_data, sync_revenue_from_entries,
+sync_client_received_from_payments, update_booking_revenue) plug their own
+per-batch computation into it instead of saving clients one by one.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from payments.ledger import BALANCE_FIELDS, build_revenue_entry, catch_up_entries
+from payments.models import RevenueEntry
+
+from .models import Client
+
+
+REVENUE_FIELDS = (
+    'total_pitched_amount', 'gst_amount', 'gst_percentage',
+    'total_with_gst', 'received_amount', 'pending_amount',
+)
+
+
+@dataclass
+class RevenueChange:
+    """Stored vs. recomputed revenue values for one client"""
+    client_id: int
+    company_name: str
+    old: dict
+    new: dict
+
+    @property
+    def changed_fields(self):
+        return [f for f in self.new if self.old[f] != self.new[f]]
+
+
+@dataclass
+class RecomputeResult:
+    scanned: int = 0
+    changes: list = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def updated(self):
+        return len(self.changes)
+
+
+def candidate_client_ids(client_ids=None, since=None):
+    """
+    Ids of clients to recompute, in ascending order.
+
+    ``client_ids=None`` means every client; an empty collection means none.
+
+    ``since`` limits the run to clients whose own row, bookings or payments
+    changed on/after that datetime.
+    """
+    from bookings.models import Booking
+    from payments.models import Payment
+
+    queryset = Client.objects.all()
+    if client_ids is not None:
+        client_ids = list(client_ids)
+        if not client_ids:
+            return []
+        queryset = queryset.filter(pk__in=client_ids)
+    if since is not None:
+        touched = (
+            Q(updated_at__gte=since)
+            | Q(pk__in=Booking.objects.filter(updated_at__gte=since).values('client_id'))
+            | Q(pk__in=Payment.objects.filter(
+                Q(created_at__gte=since) | Q(approval_date__gte=since)
+            ).values('client_id'))
+        )
+        queryset = queryset.filter(touched)
+    return list(queryset.order_by('pk').values_list('pk', flat=True))
+
+
+def _payment_totals(ids):
+    from payments.models import Payment
+    rows = (
+        Payment.objects.filter(client_id__in=ids, status='CAPTURED')
+        .values('client_id')
+        .annotate(total=Sum('amount'))
+        .values_list('client_id', 'total')
+    )
+    return dict(rows)
+
+
+def _booking_totals(ids):
+    from bookings.models import Booking
+    rows = (
+        Booking.objects.filter(client_id__in=ids)
+        .values('client_id')
+        .annotate(
+            total_pitched=Sum('pitched_amount'),
+            total_gst=Sum('gst_amount'),
+            total_with_gst=Sum('total_with_gst'),
+            total_pending=Sum('pending_amount'),
+        )
+    )
+    return {row.pop('client_id'): row for row in rows}
+
+
+_NO_BOOKINGS = {'total_pitched': None, 'total_gst': None, 'total_with_gst': None, 'total_pending': None}
+
+
+def _write_batch(batch_ids, compute, fields, note, dry_run, result):
+    """
+    Diff and write one batch; runs inside the caller's transaction.
+
+    The batch's client rows are locked before ``compute`` reads anything
+    else, so a payment posted meanwhile (post_payment_revenue locks the same
+    row) either lands before the read or waits until this batch is written.
+    Returns the number of clients scanned.
+    """
+    clients = Client.objects.filter(pk__in=batch_ids).only('pk', 'company_name', *REVENUE_FIELDS)
+    if not dry_run:
+        clients = clients.select_for_update()
+    clients = list(clients)
+    computed = compute(clients)
+
+    to_update = []
+    befores = {}
+    adjustments = []
+    for client in clients:
+        if computed.get(client.pk) is None:
+            continue
+        old = {f: getattr(client, f) for f in fields}
+        new = {f: computed[client.pk].get(f, old[f]) for f in fields}
+        change = RevenueChange(client.pk, client.company_name, old, new)
+        if change.changed_fields:
+            result.changes.append(change)
+            before = {f: getattr(client, f) for f in BALANCE_FIELDS}
+            for f, value in new.items():
+                setattr(client, f, value)
+            after = {f: getattr(client, f) for f in BALANCE_FIELDS}
+            to_update.append(client)
+            if before != after:
+                befores[client.pk] = before
+                adjustments.append(build_revenue_entry(client.pk, before, after, 'ADJUSTMENT', note=note))
+
+    if to_update and not dry_run:
+        Client.objects.bulk_update(to_update, list(fields))
+        RevenueEntry.objects.bulk_create(catch_up_entries(befores) + adjustments)
+    return len(clients)
+
+
+def update_client_revenue(client_ids, compute, fields=REVENUE_FIELDS, note='', dry_run=False, batch_size=1000):
+    """
+    Set-based write path for client revenue columns.
+
+    Args:
+        client_ids: client pks to consider
+        compute: callable(clients) -> {client_pk: {field: new value}} for a
+            locked batch of clients (loaded with REVENUE_FIELDS); clients
+            left out, or mapped to None, are not changed
+        fields: revenue fields to diff and write
+        note: note on the ADJUSTMENT ledger entries
+        dry_run: compute and report the diff without writing
+        batch_size: clients per transaction/bulk_update round
+
+    Changed rows are bulk_update()d, every balance change is appended to the
+    ledger and the dashboard caches are invalidated. Returns a RecomputeResult.
+    """
+    from accounts.dashboard_cache import bump_version
+
+    result = RecomputeResult(dry_run=dry_run)
+    ids = list(client_ids)
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            result.scanned += _write_batch(ids[start:start + batch_size], compute, fields, note, dry_run, result)
+
+    if result.changes and not dry_run:
+        # bulk_update() skips the post_save dashboard invalidation
+        bump_version()
+    return result
+
+
+def _aggregated_revenue(clients):
+    ids = [client.pk for client in clients]
+    payments = _payment_totals(ids)
+    bookings = _booking_totals(ids)
+    return {
+        client.pk: Client.aggregate_revenue(
+            client, payments.get(client.pk) or Decimal('0.00'), bookings.get(client.pk, _NO_BOOKINGS),
+        )
+        for client in clients
+    }
+
+
+def recompute_client_revenue(client_ids=None, since=None, dry_run=False,
+                             fields=REVENUE_FIELDS, batch_size=1000):
+    """
+    Recompute stored client revenue from bookings and captured payments.
+
+    Args:
+        client_ids: optional iterable of client pks to limit the run (empty: nothing to do)
+        since: optional datetime; only clients touched since then
+        dry_run: compute and report the diff without writing
+        fields: revenue fields to diff and write (default: all six)
+        batch_size: clients per aggregate/bulk_update round
+
+    Returns a RecomputeResult listing every client whose values changed.
+    """
+    return update_client_revenue(
+        candidate_client_ids(client_ids, since), _aggregated_revenue, fields=fields,
+        note='Bulk revenue recompute', dry_run=dry_run, batch_size=batch_size,
+    )
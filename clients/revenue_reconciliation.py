@@ -0,0 +1,251 @@
+"""
+Vectorized revenue reconciliation for Agnivridhi CRM
+
+The old audit commands and root scripts walk clients one at a time and fire
+a few queries per row. Here Client, Booking, Payment and the revenue ledger
+are each read once as projected columns into pandas DataFrames, and every
+check is a join/groupby over those frames, so a full audit is a handful of
+queries plus in-memory work.
+
+Checks (``check`` column of the report):
+    client_pitched_vs_bookings   stored pitched != sum of booking pitched amounts
+    client_received_vs_payments  stored received != sum of CAPTURED payments
+    client_pending_arithmetic    stored pending != total_with_gst - received
+    client_vs_ledger             stored columns != revenue ledger balance
+    booking_overpaid             CAPTURED payments exceed the booking total
+    payment_client_mismatch      payment client differs from its booking's client
+"""
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+
+CHECKS = (
+    'client_pitched_vs_bookings',
+    'client_received_vs_payments',
+    'client_pending_arithmetic',
+    'client_vs_ledger',
+    'booking_overpaid',
+    'payment_client_mismatch',
+)
+
+REPORT_COLUMNS = [
+    'check', 'client_id', 'company_name', 'object_type', 'object_id',
+    'field', 'expected', 'actual', 'difference',
+]
+
+LEDGER_FIELDS = {
+    'total_pitched_amount': 'pitched_delta',
+    'received_amount': 'received_delta',
+    'pending_amount': 'pending_delta',
+}
+
+DEFAULT_TOLERANCE = Decimal('0.01')
+
+
+def _frame(queryset, columns, amounts=()):
+    """DataFrame of ``queryset.values_list(*columns)`` with money columns as floats."""
+    frame = pd.DataFrame.from_records(list(queryset.values_list(*columns)), columns=list(columns))
+    for column in amounts:
+        frame[column] = frame[column].astype(float).fillna(0.0)
+    return frame
+
+
+def load_frames(client_ids=None):
+    """
+    Load the projected columns every check needs, one query per table.
+
+    Returns a dict of DataFrames keyed clients/bookings/payments/entries/snapshots.
+    """
+    from bookings.models import Booking
+    from clients.models import Client
+    from payments.models import Payment, RevenueEntry, RevenueSnapshot
+
+    clients = Client.objects.all()
+    bookings = Booking.objects.all()
+    payments = Payment.objects.all()
+    entries = RevenueEntry.objects.all()
+    snapshots = RevenueSnapshot.objects.all()
+    if client_ids is not None:
+        clients = clients.filter(pk__in=client_ids)
+        bookings = bookings.filter(client_id__in=client_ids)
+        payments = payments.filter(client_id__in=client_ids)
+        entries = entries.filter(client_id__in=client_ids)
+        snapshots = snapshots.filter(client_id__in=client_ids)
+
+    money = ('total_pitched_amount', 'gst_amount', 'total_with_gst', 'received_amount', 'pending_amount')
+    return {
+        'clients': _frame(clients, ('id', 'company_name', *money), money),
+        'bookings': _frame(
+            bookings, ('id', 'client_id', 'pitched_amount', 'total_with_gst'),
+            ('pitched_amount', 'total_with_gst'),
+        ),
+        'payments': _frame(payments, ('id', 'client_id', 'booking_id', 'status', 'amount'), ('amount',)),
+        'entries': _frame(entries, ('id', 'client_id', *LEDGER_FIELDS.values()), LEDGER_FIELDS.values()),
+        'snapshots': _frame(snapshots, ('client_id', 'last_entry_id', *LEDGER_FIELDS), LEDGER_FIELDS),
+    }
+
+
+def _mismatches(check, frame, field, expected, actual, tolerance,
+                object_type='client', object_id='id', client_id='id'):
+    """Rows of ``frame`` where ``expected`` and ``actual`` differ by more than ``tolerance``."""
+    if frame.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    difference = (frame[actual] - frame[expected]).round(2)
+    bad = frame[difference.abs() > tolerance]
+    return pd.DataFrame({
+        'check': check,
+        'client_id': bad[client_id],
+        'company_name': bad.get('company_name', ''),
+        'object_type': object_type,
+        'object_id': bad[object_id],
+        'field': field,
+        'expected': bad[expected].round(2),
+        'actual': bad[actual].round(2),
+        'difference': difference[bad.index],
+    }, columns=REPORT_COLUMNS)
+
+
+def ledger_frame(entries, snapshots):
+    """Per-client ledger balance: latest snapshot + deltas recorded after it."""
+    columns = list(LEDGER_FIELDS)
+    if snapshots.empty:
+        latest = pd.DataFrame(columns=['client_id', 'last_entry_id', *columns])
+    else:
+        latest = snapshots.sort_values('last_entry_id').drop_duplicates('client_id', keep='last')
+
+    pending = entries.merge(latest[['client_id', 'last_entry_id']], on='client_id', how='left')
+    pending = pending[pending['id'] > pending['last_entry_id'].fillna(0)]
+    deltas = (
+        pending.groupby('client_id')[list(LEDGER_FIELDS.values())].sum()
+        .rename(columns={delta: f for f, delta in LEDGER_FIELDS.items()})
+    )
+    base = latest.set_index('client_id')[columns].astype(float)
+    return base.add(deltas, fill_value=0.0).reset_index().rename(columns={'index': 'client_id'})
+
+
+def _client_checks(frames, tolerance):
+    clients = frames['clients']
+    bookings = frames['bookings']
+    payments = frames['payments']
+
+    pitched = bookings.groupby('client_id')['pitched_amount'].sum().rename('booking_pitched')
+    captured = (
+        payments[payments['status'] == 'CAPTURED']
+        .groupby('client_id')['amount'].sum().rename('captured_total')
+    )
+    joined = clients.join(pitched, on='id').join(captured, on='id')
+    joined['expected_pending'] = (joined['total_with_gst'] - joined['received_amount']).clip(lower=0)
+
+    # Same precedence as Client.aggregate_revenue(): bookings and payments only
+    # override the stored values when they actually carry amounts
+    with_bookings = joined[joined['booking_pitched'] > 0]
+    with_payments = joined[joined['captured_total'] > 0]
+    yield _mismatches('client_pitched_vs_bookings', with_bookings, 'total_pitched_amount',
+                      'booking_pitched', 'total_pitched_amount', tolerance)
+    yield _mismatches('client_received_vs_payments', with_payments, 'received_amount',
+                      'captured_total', 'received_amount', tolerance)
+    yield _mismatches('client_pending_arithmetic', joined, 'pending_amount',
+                      'expected_pending', 'pending_amount', tolerance)
+
+    ledger = ledger_frame(frames['entries'], frames['snapshots'])
+    with_ledger = clients.merge(ledger, left_on='id', right_on='client_id', how='inner', suffixes=('', '_ledger'))
+    for column in LEDGER_FIELDS:
+        yield _mismatches('client_vs_ledger', with_ledger, column,
+                          f'{column}_ledger', column, tolerance)
+
+
+def _booking_checks(frames, tolerance):
+    clients = frames['clients'][['id', 'company_name']]
+    bookings = frames['bookings']
+    payments = frames['payments']
+    linked = payments[payments['booking_id'].notna()]
+
+    paid = (
+        linked[linked['status'] == 'CAPTURED']
+        .groupby('booking_id')['amount'].sum().rename('captured_total')
+    )
+    overpaid = bookings.join(paid, on='id')
+    overpaid = overpaid[(overpaid['total_with_gst'] > 0) & (overpaid['captured_total'] > overpaid['total_with_gst'] + tolerance)]
+    overpaid = overpaid.merge(clients, left_on='client_id', right_on='id', how='left', suffixes=('', '_client'))
+    yield _mismatches('booking_overpaid', overpaid, 'amount', 'total_with_gst', 'captured_total',
+                      tolerance, object_type='booking', client_id='client_id')
+
+    crossed = linked.merge(
+        bookings[['id', 'client_id']], left_on='booking_id', right_on='id', suffixes=('', '_booking'),
+    )
+    crossed = crossed[crossed['client_id'] != crossed['client_id_booking']]
+    crossed = crossed.merge(clients, left_on='client_id', right_on='id', how='left', suffixes=('', '_client'))
+    yield pd.DataFrame({
+        'check': 'payment_client_mismatch',
+        'client_id': crossed['client_id'],
+        'company_name': crossed['company_name'],
+        'object_type': 'payment',
+        'object_id': crossed['id'],
+        'field': 'client_id',
+        'expected': crossed['client_id_booking'].astype(float),
+        'actual': crossed['client_id'].astype(float),
+        # Amount booked against the wrong client
+        'difference': crossed['amount'].round(2),
+    }, columns=REPORT_COLUMNS)
+
+
+@dataclass
+class ReconciliationReport:
+    mismatches: pd.DataFrame
+    row_counts: dict = field(default_factory=dict)
+    generated_at: object = field(default_factory=timezone.now)
+
+    def summary(self):
+        """Mismatch count and absolute difference per check, plus rows scanned."""
+        counts = self.mismatches.groupby('check').size()
+        amounts = self.mismatches['difference'].abs().groupby(self.mismatches['check']).sum()
+        return {
+            'generated_at': self.generated_at.isoformat(),
+            'rows_scanned': self.row_counts,
+            'total_mismatches': int(len(self.mismatches)),
+            'checks': {
+                check: {
+                    'mismatches': int(counts.get(check, 0)),
+                    'amount': round(float(amounts.get(check, 0.0)), 2),
+                }
+                for check in CHECKS
+            },
+        }
+
+    def to_csv(self, path_or_buf):
+        self.mismatches.to_csv(path_or_buf, index=False)
+
+    def to_json(self, fp):
+        records = self.mismatches.replace({np.nan: None}).to_dict(orient='records')
+        json.dump({'summary': self.summary(), 'mismatches': records}, fp, indent=2, default=str)
+
+
+def reconcile(client_ids=None, tolerance=DEFAULT_TOLERANCE, frames=None):
+    """
+    Run every reconciliation check and return a ReconciliationReport.
+
+    Args:
+        client_ids: optional iterable of client pks to limit the audit
+        tolerance: largest difference (in rupees) not reported as a mismatch
+        frames: pre-loaded frames from load_frames() (mainly for tests)
+    """
+    frames = frames if frames is not None else load_frames(client_ids)
+    tolerance = float(tolerance)
+
+    parts = [
+        part for part in (*_client_checks(frames, tolerance), *_booking_checks(frames, tolerance))
+        if not part.empty
+    ]
+    mismatches = (
+        pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=REPORT_COLUMNS)
+    )
+    mismatches = mismatches.sort_values(['check', 'client_id', 'object_id'], kind='stable', ignore_index=True)
+    return ReconciliationReport(
+        mismatches=mismatches,
+        row_counts={name: int(len(frame)) for name, frame in frames.items()},
+    )
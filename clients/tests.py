@@ -1,3 +1,292 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.dashboard_cache import current_version
+from accounts.models import User
+from bookings.models import Booking, Service
+from clients.models import Client
+from clients.gst_recalc import recalculate_gst
+from clients.revenue_reconciliation import reconcile
+from clients.revenue_recompute import recompute_client_revenue
+from payments.ledger import audit_client_balances
+from payments.models import Payment, RevenueEntry
+
+
+def revenue_fixture(client_count):
+    """A bookable service and ``client_count`` clients ('Company 0', ...) with their users."""
+    service = Service.objects.create(
+        name='Consulting', category='CONSULTING', description='Desc',
+        short_description='Short', price=Decimal('5000.00'), duration_days=30,
+    )
+    clients = []
+    for i in range(client_count):
+        user = User.objects.create_user(username=f'c{i}', password='pass', role='CLIENT')
+        clients.append(Client.objects.create(
+            user=user, company_name=f'Company {i}', contact_person='John Doe',
+            contact_email=f'c{i}@example.com', contact_phone='9999999999',
+        ))
+    return service, clients
+
+
+class RevenueRecomputeTests(TestCase):
+    def setUp(self):
+        self.service, self.clients = revenue_fixture(3)
+        # Client 0: booking revenue + a captured payment
+        Booking.objects.create(
+            client=self.clients[0], service=self.service, amount=Decimal('1000.00'),
+            pitched_amount=Decimal('1000.00'), gst_percentage=Decimal('18.00'),
+        )
+        Payment.objects.create(
+            client=self.clients[0], amount=Decimal('300.00'), status='CAPTURED', payment_date=timezone.now(),
+        )
+        # Client 1: legacy revenue only, a captured payment
+        Client.objects.filter(pk=self.clients[1].pk).update(total_with_gst=Decimal('500.00'))
+        Payment.objects.create(
+            client=self.clients[1], amount=Decimal('200.00'), status='CAPTURED', payment_date=timezone.now(),
+        )
+
+    def test_matches_per_client_calculation(self):
+        expected = {}
+        for client in Client.objects.all():
+            client.calculate_aggregated_revenue()
+            expected[client.pk] = (client.total_with_gst, client.received_amount, client.pending_amount)
+
+        result = recompute_client_revenue()
+        self.assertEqual(result.scanned, 3)
+        self.assertEqual(result.updated, 2)  # client 2 has nothing to change
+        for client in Client.objects.all():
+            self.assertEqual(
+                (client.total_with_gst, client.received_amount, client.pending_amount), expected[client.pk]
+            )
+
+    def test_dry_run_and_filters(self):
+        result = recompute_client_revenue(dry_run=True, client_ids=[self.clients[1].pk])
+        self.assertEqual([c.client_id for c in result.changes], [self.clients[1].pk])
+        self.assertEqual(result.changes[0].new['pending_amount'], Decimal('300.00'))
+        self.clients[1].refresh_from_db()
+        self.assertEqual(self.clients[1].received_amount, Decimal('0.00'))
+
+        future = timezone.now() + timezone.timedelta(days=1)
+        self.assertEqual(recompute_client_revenue(since=future).scanned, 0)
+        # An empty selection is nothing, not everything
+        self.assertEqual(recompute_client_revenue(client_ids=set()).scanned, 0)
+
+    def test_writes_invalidate_dashboard_cache(self):
+        version = current_version()
+        recompute_client_revenue(dry_run=True)
+        self.assertEqual(current_version(), version)
+        recompute_client_revenue()
+        self.assertNotEqual(current_version(), version)
+
+    def test_constant_queries_and_second_run_is_noop(self):
+        with CaptureQueriesContext(connection) as ctx:
+            recompute_client_revenue()
+        selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 6)  # ids, clients, payments, bookings, ledger snapshots + deltas
+        self.assertEqual(recompute_client_revenue().updated, 0)
+
+    def test_command_options(self):
+        out = StringIO()
+        call_command('recompute_client_revenue', '--dry-run', f'--client-ids={self.clients[0].pk}', stdout=out)
+        self.assertIn('1 clients scanned, 1 would be updated', out.getvalue())
+
+
+class RevenueReconciliationTests(TestCase):
+    def setUp(self):
+        service, self.clients = revenue_fixture(2)
+        self.booking = Booking.objects.create(
+            client=self.clients[0], service=service, amount=Decimal('1000.00'),
+            pitched_amount=Decimal('1000.00'), gst_percentage=Decimal('18.00'),
+        )
+        Payment.objects.create(
+            client=self.clients[0], booking=self.booking, amount=Decimal('300.00'),
+            status='CAPTURED', payment_date=timezone.now(),
+        )
+        # Recorded against client 1 but linked to client 0's booking
+        self.crossed = Payment.objects.create(
+            client=self.clients[1], booking=self.booking, amount=Decimal('50.00'),
+            status='PENDING', payment_date=timezone.now(),
+        )
+
+    def _rows(self, report, check):
+        return report.mismatches[report.mismatches['check'] == check]
+
+    def test_detects_mismatches_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            report = reconcile()
+        self.assertEqual(len(ctx.captured_queries), 5)  # one per table
+
+        received = self._rows(report, 'client_received_vs_payments')
+        self.assertEqual(list(received['client_id']), [self.clients[0].pk])
+        self.assertEqual(float(received['expected'].iloc[0]), 300.0)
+
+        crossed = self._rows(report, 'payment_client_mismatch')
+        self.assertEqual(list(crossed['object_id']), [self.crossed.pk])
+        self.assertEqual(report.summary()['checks']['booking_overpaid']['mismatches'], 0)
+
+    def test_recompute_clears_source_mismatches(self):
+        recompute_client_revenue()
+        report = reconcile()
+        self.assertTrue(self._rows(report, 'client_received_vs_payments').empty)
+        self.assertTrue(self._rows(report, 'client_pitched_vs_bookings').empty)
+
+    def test_command_writes_json_and_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'audit.json')
+            call_command('reconcile_revenue', output=json_path, stdout=StringIO())
+            with open(json_path) as fp:
+                data = json.load(fp)
+            self.assertEqual(data['summary']['total_mismatches'], len(data['mismatches']))
+            self.assertEqual(data['summary']['rows_scanned']['payments'], 2)
+
+            csv_path = os.path.join(tmp, 'audit.csv')
+            call_command('reconcile_revenue', output=csv_path, stdout=StringIO())
+            with open(csv_path) as fp:
+                self.assertTrue(fp.readline().startswith('check,client_id,company_name'))
+
+
+class LegacyRevenueCommandTests(TestCase):
+    def setUp(self):
+        _, self.clients = revenue_fixture(3)
+        # Legacy imports: pitched/received set, derived columns left at zero
+        for client, received in zip(self.clients, ('0.00', '100.00', '0.00')):
+            Client.objects.filter(pk=client.pk).update(
+                total_pitched_amount=Decimal('1000.00'), received_amount=Decimal(received),
+                gst_percentage=Decimal('18.00'), gst_amount=0, total_with_gst=0, pending_amount=0,
+            )
+
+    def _client_updates(self, command, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command(command, *args, stdout=StringIO())
+        return [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "clients_client"')]
+
+    def test_fix_revenue_data_writes_in_bulk(self):
+        self.assertEqual(len(self._client_updates('fix_revenue_data')), 1)
+        stored = Client.objects.get(pk=self.clients[1].pk)
+        self.assertEqual((stored.total_with_gst, stored.pending_amount), (Decimal('1180.00'), Decimal('1080.00')))
+        self.assertEqual(audit_client_balances(), [])
+
+    def test_update_booking_revenue_legacy_clients_in_bulk(self):
+        self.assertEqual(len(self._client_updates('update_booking_revenue')), 1)
+        self.assertEqual(
+            sorted(Client.objects.values_list('pending_amount', flat=True)),
+            [Decimal('1080.00'), Decimal('1180.00'), Decimal('1180.00')],
+        )
+        self.assertEqual(audit_client_balances(), [])
+
+    def test_sync_received_from_payments_in_bulk(self):
+        for client in self.clients:
+            Payment.objects.create(
+                client=client, amount=Decimal('50.00'), status='CAPTURED', payment_date=timezone.now(),
+            )
+        call_command('fix_revenue_data', stdout=StringIO())
+        self.assertEqual(len(self._client_updates('sync_client_received_from_payments')), 1)
+        # Client 1 already had revenue received and is left alone
+        self.assertEqual(
+            list(Client.objects.order_by('pk').values_list('received_amount', flat=True)),
+            [Decimal('50.00'), Decimal('100.00'), Decimal('50.00')],
+        )
+        self.assertEqual(audit_client_balances(), [])
+
+
+class GstRecalcTests(TestCase):
+    CASES = [
+        # pitched, received, gst %
+        ('1000.00', '0.00', '18.00'),
+        ('1000.00', '2000.00', '18.00'),   # overpaid
+        ('333.33', '100.00', '0.00'),      # unset rate -> 18%
+        ('2500.00', '500.00', '5.00'),
+    ]
+
+    def setUp(self):
+        _, self.clients = revenue_fixture(len(self.CASES))
+        for client, (pitched, received, pct) in zip(self.clients, self.CASES):
+            # Raw values as left behind by legacy imports
+            Client.objects.filter(pk=client.pk).update(
+                total_pitched_amount=Decimal(pitched), received_amount=Decimal(received),
+                gst_percentage=Decimal(pct), gst_amount=0, total_with_gst=0, pending_amount=0,
+            )
+
+    def _expected(self, rate=None):
+        expected = {}
+        for client, (pitched, received, pct) in zip(self.clients, self.CASES):
+            derived = Client.calculate_revenue(
+                Decimal(pitched), Decimal(received), rate if rate is not None else Decimal(pct) or None,
+            )
+            # Pitched/received are inputs and are never rewritten (the overpaid case included)
+            expected[client.pk] = {
+                **derived, 'total_pitched_amount': Decimal(pitched), 'received_amount': Decimal(received),
+            }
+        return expected
+
+    def _stored(self):
+        fields = ('total_pitched_amount', 'received_amount', 'gst_percentage', 'gst_amount', 'total_with_gst', 'pending_amount')
+        return {row.pop('pk'): row for row in Client.objects.values('pk', *fields)}
+
+    def test_python_mode_matches_calculate_revenue(self):
+        result = recalculate_gst(batch_size=3)
+        self.assertEqual((result.scanned, result.updated, result.batches), (4, 4, 2))
+        self.assertEqual(self._stored(), self._expected())
+        # The overpaid client's balances (pitched, received, pending 0) do not move
+        self.assertEqual(RevenueEntry.objects.filter(note='GST recalculation').count(), 3)
+        # Changed clients' raw legacy values were caught up first, so only the
+        # untouched overpaid client still differs from its (empty) ledger
+        self.assertEqual({row[0] for row in audit_client_balances()}, {self.clients[1].pk})
+
+    def test_sql_mode_matches_python_mode(self):
+        result = recalculate_gst(mode='sql', batch_size=2)
+        self.assertEqual(result.updated, 4)
+        self.assertEqual(self._stored(), self._expected())
+
+    def test_only_derived_columns_are_written(self):
+        for mode in ('python', 'sql'):
+            with CaptureQueriesContext(connection) as ctx:
+                recalculate_gst(rate='12' if mode == 'python' else '5', mode=mode)
+            updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "clients_client"')]
+            self.assertTrue(updates)
+            for sql in updates:
+                self.assertNotIn('"received_amount" =', sql)
+                self.assertNotIn('"total_pitched_amount" =', sql)
+
+    def test_rate_change(self):
+        recalculate_gst(rate='12')
+        self.assertEqual(self._stored(), self._expected(rate=Decimal('12')))
+
+    def test_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'gst.checkpoint')
+            with open(path, 'w') as fp:
+                json.dump({'last_pk': self.clients[1].pk, 'rate': None, 'mode': 'python'}, fp)
+
+            result = recalculate_gst(checkpoint_path=path)
+            self.assertEqual((result.resumed_from, result.scanned), (self.clients[1].pk, 2))
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(Client.objects.get(pk=self.clients[0].pk).total_with_gst, Decimal('0.00'))
+
+    def test_checkpoint_from_other_settings_is_refused(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'gst.checkpoint')
+            with open(path, 'w') as fp:
+                json.dump({'last_pk': self.clients[1].pk, 'rate': '12', 'mode': 'python'}, fp)
+
+            with self.assertRaises(CommandError):
+                call_command('recalculate_gst', rate='18', checkpoint=path, stdout=StringIO())
+            with self.assertRaises(ValueError):
+                recalculate_gst(rate='12', mode='sql', checkpoint_path=path)
+            self.assertEqual(recalculate_gst(rate='12.00', checkpoint_path=path).resumed_from, self.clients[1].pk)
 
-# Create your tests here.
+            with open(path, 'w') as fp:
+                json.dump({'last_pk': self.clients[1].pk, 'rate': '12', 'mode': 'python'}, fp)
+            result = recalculate_gst(rate='18', checkpoint_path=path, restart=True)
+            self.assertEqual((result.resumed_from, result.scanned), (0, 4))
+        self.assertEqual(self._stored(), self._expected(rate=Decimal('18')))
@@ -46,14 +46,12 @@ def create_client(request):
                     site = get_current_site(request)
                     login_url = f"https://{site.domain}/accounts/login/"
                 
-                logger.info(f"Attempting to send email to: {credentials.email}")
-                logger.info(f"SMTP Host: {settings.EMAIL_HOST}, Port: {settings.EMAIL_PORT}")
+                logger.info(f"Queueing credentials email to: {credentials.email}")
                 
                 try:
-                    if send_client_credentials_email(credentials, login_url=login_url):
-                        credentials.mark_as_sent(request.user)
+                    # Marked as sent by the notification outbox once delivered
+                    if send_client_credentials_email(credentials, login_url=login_url, sent_by=request.user):
                         email_sent = True
-                        logger.info(f"Email sent successfully to {credentials.email}")
                     else:
                         email_error_msg = f"Email function returned False for {credentials.email}"
                         logger.error(email_error_msg)
@@ -67,7 +65,7 @@ def create_client(request):
             if request.user.role == 'SALES':
                 success_msg += 'Waiting for your manager approval. '
                 if email_sent:
-                    success_msg += "✅ Credentials email sent to client."
+                    success_msg += "✅ Credentials email queued for the client."
                 else:
                     success_msg += f"⚠️ Could not send email. {email_error_msg if email_error_msg else 'Check logs for details.'}"
                 messages.success(request, success_msg)
@@ -75,14 +73,14 @@ def create_client(request):
                 return redirect('clients:sales_clients_list')
             elif request.user.role == 'MANAGER':
                 if email_sent:
-                    success_msg += "✅ Credentials email sent to client."
+                    success_msg += "✅ Credentials email queued for the client."
                 else:
                     success_msg += f"⚠️ Could not send email. {email_error_msg if email_error_msg else 'Check logs for details.'}"
                 messages.success(request, success_msg)
                 return redirect('accounts:dashboard')  # Manager dashboard
             else:  # ADMIN or OWNER
                 if email_sent:
-                    success_msg += "✅ Credentials email sent to client."
+                    success_msg += "✅ Credentials email queued for the client."
                 else:
                     success_msg += f"⚠️ Could not send email. {email_error_msg if email_error_msg else 'Check logs for details.'}"
                 messages.success(request, success_msg)
@@ -157,11 +155,10 @@ def approve_client(request, pk):
                     if not login_url:
                         site = get_current_site(request)
                         login_url = f"https://{site.domain}/accounts/login/"
-                    if send_client_credentials_email(credentials, login_url=login_url):
-                        credentials.mark_as_sent(request.user)
-                        messages.success(request, f'Client "{client.company_name}" has been approved and credentials emailed!')
+                    if send_client_credentials_email(credentials, login_url=login_url, sent_by=request.user):
+                        messages.success(request, f'Client "{client.company_name}" has been approved and credentials are being emailed!')
                     else:
-                        messages.success(request, f'Client "{client.company_name}" has been approved, but email could not be sent.')
+                        messages.success(request, f'Client "{client.company_name}" has been approved, but email could not be queued.')
                 else:
                     messages.success(request, f'Client "{client.company_name}" has been approved!')
                 status = 'APPROVED'
@@ -6,10 +6,30 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from .identifiers import classify_identifier, client_identifier_q
 from .models import Client
 from .serializers import ClientSerializer, ClientListSerializer
 
 
+class ClientSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter with an identifier fast-path.
+    
+    Phone numbers, PAN, GSTIN and client IDs are matched by equality/prefix
+    on the indexed normalized columns; anything else falls back to the
+    regular icontains search over ``search_fields``.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        identifier = classify_identifier(query)
+        if identifier is not None:
+            q = client_identifier_q(*identifier)
+            if q is not None:
+                return queryset.filter(q)
+        return super().filter_queryset(request, queryset, view)
+
+
 class ClientViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Client CRUD operations
@@ -20,9 +40,9 @@ class ClientViewSet(viewsets.ModelViewSet):
     """
     queryset = Client.objects.select_related('salesperson', 'created_by').all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ClientSearchFilter, filters.OrderingFilter]
     filterset_fields = ['sector', 'status', 'salesperson']
-    search_fields = ['company_name', 'contact_name', 'contact_email', 'contact_phone', 'pan_number', 'gst_number']
+    search_fields = ['company_name', 'contact_person', 'contact_email', 'contact_phone', 'pan_number', 'gst_number']
     ordering_fields = ['created_at', 'updated_at', 'company_name']
     ordering = ['-created_at']
     
@@ -160,7 +160,10 @@ def approve_edit_request(request, request_id):
             if edit_request.entity_type == 'CLIENT':
                 client = Client.objects.get(pk=edit_request.entity_id)
                 setattr(client, edit_request.field_name, edit_request.requested_value)
-                client.save()
+                client.save(
+                    revenue_recorded_by=request.user,
+                    revenue_note=f'Edit request #{edit_request.pk} applied',
+                )
                 
                 edit_request.status = 'APPLIED'
                 edit_request.save()
@@ -281,7 +284,7 @@ def edit_client_direct(request, client_id):
                     updated = True
 
         if updated:
-            client.save()
+            client.save(revenue_recorded_by=request.user, revenue_note='Direct client edit')
             messages.success(request, f'Client "{client.company_name}" updated successfully!')
 
         return redirect('clients:client_detail', pk=client_id)
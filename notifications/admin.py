@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Notification
 
 
@@ -30,14 +31,14 @@ class NotificationAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Tracking', {
-            'fields': ('sent_at', 'failed_at', 'error_message', 'retry_count')
+            'fields': ('sent_at', 'failed_at', 'error_message', 'retry_count', 'next_attempt_at')
         }),
         ('External IDs', {
             'fields': ('email_message_id', 'whatsapp_message_id'),
             'classes': ('collapse',)
         }),
         ('Related Objects', {
-            'fields': ('related_booking', 'related_application', 'related_payment'),
+            'fields': ('related_booking', 'related_application', 'related_payment', 'digest'),
             'classes': ('collapse',)
         }),
         ('Sender', {
@@ -45,7 +46,7 @@ class NotificationAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ('sent_at', 'failed_at', 'created_at', 'updated_at')
+    readonly_fields = ('sent_at', 'failed_at', 'created_at', 'updated_at', 'digest')
     
     autocomplete_fields = ['recipient', 'sent_by', 'related_booking', 
                            'related_application', 'related_payment']
@@ -53,11 +54,10 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['retry_failed_notifications']
     
     def retry_failed_notifications(self, request, queryset):
-        count = 0
-        for notification in queryset.filter(status='FAILED'):
-            if notification.can_retry():
-                notification.status = 'PENDING'
-                notification.save()
-                count += 1
+        # Due immediately for `manage.py retry_notifications`; dead-lettered
+        # rows get one more attempt
+        count = queryset.filter(status__in=['FAILED', 'DEAD']).update(
+            status='FAILED', next_attempt_at=timezone.now()
+        )
         self.message_user(request, f"{count} notifications queued for retry.")
     retry_failed_notifications.short_description = "Retry failed notifications"
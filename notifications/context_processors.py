@@ -0,0 +1,13 @@
+"""
+Context processor for the navbar notifications badge
+"""
+from .listing import unread_count
+
+
+def unread_notifications_count(request):
+    """
+    Add unread_notifications_count to template context (cached per user, see notifications.listing)
+    """
+    if not request.user.is_authenticated:
+        return {'unread_notifications_count': 0}
+    return {'unread_notifications_count': unread_count(request.user)}
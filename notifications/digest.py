@@ -0,0 +1,118 @@
+"""
+Per-recipient notification digests
+
+Approval and payment flows queue their notifications with
+``enqueue(..., digest=True)``. For recipients who opted in
+(User.notification_digest_opt_in) those rows are HELD instead of sent.
+flush_due() folds each recipient's held rows for a channel into one DIGEST
+notification once the oldest has waited NOTIFICATION_DIGEST_INTERVAL_MINUTES,
+or as soon as NOTIFICATION_DIGEST_MAX_ITEMS have piled up. The held rows
+are marked SENT when their digest goes out.
+
+flush_due() runs on every round of ``process_notification_outbox``, from
+``python manage.py flush_notification_digests`` (cron) or the
+notifications.flush_notification_digests Celery task, and on a background
+thread under the 'thread' outbox runner (see notifications.outbox).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .listing import forget_unread_count
+from .models import Notification
+
+
+def digest_interval():
+    return timedelta(minutes=getattr(settings, 'NOTIFICATION_DIGEST_INTERVAL_MINUTES', 30))
+
+
+def digest_max_items():
+    return getattr(settings, 'NOTIFICATION_DIGEST_MAX_ITEMS', 25)
+
+
+def wants_digest(recipient):
+    return bool(getattr(recipient, 'notification_digest_opt_in', False))
+
+
+def held():
+    """Notifications waiting to be folded into a digest."""
+    return Notification.objects.filter(status=Notification.Status.HELD, digest__isnull=True)
+
+
+def due_groups(now=None):
+    """(recipient_id, channel) groups whose digest is due, oldest first."""
+    cutoff = (now or timezone.now()) - digest_interval()
+    return (
+        held().order_by().values('recipient_id', 'channel')
+        .annotate(oldest=Min('created_at'), items=Count('id'))
+        .filter(Q(oldest__lte=cutoff) | Q(items__gte=digest_max_items()))
+        .order_by('oldest')
+    )
+
+
+def flush_due(now=None):
+    """Flush every due group; returns the notifications that were queued."""
+    flushed = [flush_group(group['recipient_id'], group['channel']) for group in due_groups(now)]
+    return [notification for notification in flushed if notification is not None]
+
+
+def flush_if_full(recipient_id, channel):
+    """Flush a recipient's held notifications early once the size threshold is reached."""
+    if held().filter(recipient_id=recipient_id, channel=channel).count() >= digest_max_items():
+        return flush_group(recipient_id, channel)
+    return None
+
+
+def _digest_text(items):
+    lines = [f'You have {len(items)} updates from Agnivridhi CRM.', '']
+    for item in items:
+        lines.extend([f'• {item.subject}', item.message, ''])
+    return '\n'.join(lines).strip()
+
+
+def flush_group(recipient_id, channel):
+    """
+    Queue one combined notification for a recipient's held rows on ``channel``.
+
+    A lone held row is simply released as itself. Rows another flusher has
+    locked are skipped. Returns the queued Notification, or None.
+    """
+    from .outbox import _dispatch, enqueue
+
+    with transaction.atomic():
+        items = list(
+            held().filter(recipient_id=recipient_id, channel=channel)
+            .select_for_update(skip_locked=True).select_related('recipient').order_by('created_at')
+        )
+        if not items:
+            return None
+
+        latest = items[-1]
+        if len(items) == 1:
+            released = held().filter(pk=latest.pk).update(
+                status=Notification.Status.QUEUED, updated_at=timezone.now()
+            )
+            if not released:
+                return None
+            transaction.on_commit(lambda: _dispatch(latest.pk))
+            transaction.on_commit(lambda: forget_unread_count(recipient_id))
+            latest.status = Notification.Status.QUEUED
+            return latest
+
+        context = {'recipient': latest.recipient, 'items': items}
+        digest = enqueue(
+            recipient=latest.recipient,
+            notification_type=Notification.NotificationType.DIGEST,
+            subject=f'{len(items)} updates from Agnivridhi CRM',
+            message=_digest_text(items),
+            html_content=render_to_string('emails/notification_digest.html', context),
+            channel=channel,
+            email_to=latest.email_to,
+            whatsapp_to=latest.whatsapp_to,
+        )
+        held().filter(pk__in=[item.pk for item in items]).update(digest=digest, updated_at=timezone.now())
+    return digest
@@ -0,0 +1,191 @@
+"""
+Live event broadcasting for the server-sent-events stream
+
+Saving a Notification or any record behind the pending-approval badges
+publishes a small event once the transaction commits. Every open
+``/notifications/stream/`` connection in the process is subscribed to the
+broadcaster. It forwards the user's own new notifications and recomputed
+pending counts to the browser, so badges update without page reloads.
+
+Backends:
+    LocalBroadcaster - in-process fan-out (default; enough for one ASGI worker)
+    RedisBroadcaster - publishes on a Redis pub/sub channel and relays
+                       messages from it to the local subscribers, so events
+                       reach connections held by other workers/servers.
+                       Used when NOTIFICATION_EVENTS_REDIS_URL is set.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL = 'agnivridhi:notification-events'
+
+# Events queued per connection before further ones are dropped for it
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class LocalBroadcaster:
+    """Fans events out to asyncio queues of the streams connected to this process."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Register the running event loop's stream; returns its queue."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((queue, asyncio.get_running_loop()))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {(q, loop) for q, loop in self._subscribers if q is not queue}
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        """Deliver ``event`` to every subscriber; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone
+                self.unsubscribe(queue)
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.debug('Dropping event for a slow event-stream subscriber')
+
+
+class RedisBroadcaster(LocalBroadcaster):
+    """LocalBroadcaster whose events travel through Redis pub/sub between processes."""
+
+    def __init__(self, url, channel=REDIS_CHANNEL):
+        super().__init__()
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener = None
+
+    def subscribe(self):
+        self._ensure_listener()
+        return super().subscribe()
+
+    def publish(self, event):
+        try:
+            self.redis.publish(self.channel, json.dumps(event))
+        except Exception:
+            logger.exception('Redis publish failed; delivering the event locally only')
+            super().publish(event)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='notification-events', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                LocalBroadcaster.publish(self, json.loads(message['data']))
+            except (TypeError, ValueError):
+                logger.warning('Ignoring malformed notification event: %r', message.get('data'))
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """The process-wide broadcaster (Redis-backed when NOTIFICATION_EVENTS_REDIS_URL is set)."""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            url = getattr(settings, 'NOTIFICATION_EVENTS_REDIS_URL', '')
+            _broadcaster = RedisBroadcaster(url) if url else LocalBroadcaster()
+        return _broadcaster
+
+
+def publish(event_type, user_id=None, **data):
+    """Publish an event; ``user_id`` limits it to that user's streams."""
+    get_broadcaster().publish({'type': event_type, 'user_id': user_id, 'data': data})
+
+
+def notification_event(notification):
+    return {
+        'id': notification.pk,
+        'subject': notification.subject,
+        'type': notification.notification_type,
+        'type_display': notification.get_notification_type_display(),
+        'status': notification.status,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def pending_counts(user):
+    """
+    Items waiting on ``user``'s approval, by kind.
+
+    Scoped like the pending-approval pages: admins/owners see everything,
+    managers their team, sales their own clients. Cached under the dashboard
+    cache version, which every Client/Payment/Application/EditRequest change
+    bumps (see accounts.signals).
+    """
+    from accounts.dashboard_cache import current_version, versioned_caching_enabled
+    from applications.models import Application
+    from clients.models import Client
+    from edit_requests.models import EditRequest
+    from payments.models import Payment
+
+    cached = versioned_caching_enabled()
+    key = f'notifications:pending:{current_version()}:{user.pk}'
+    counts = cache.get(key) if cached else None
+    if counts is not None:
+        return counts
+
+    role = (getattr(user, 'role', '') or '').upper()
+    applications = Application.objects.filter(status__in=['SUBMITTED', 'UNDER_REVIEW'])
+    payments = Payment.objects.filter(status='PENDING')
+    edit_requests = EditRequest.objects.filter(status='PENDING')
+    clients = Client.objects.filter(is_approved=False)
+    if user.is_superuser or role in ['ADMIN', 'OWNER']:
+        pass
+    elif role == 'MANAGER':
+        team = Q(client__assigned_manager=user) | Q(client__assigned_sales__manager=user)
+        applications = applications.filter(team)
+        payments = payments.filter(team | Q(received_by__manager=user))
+        edit_requests = edit_requests.filter(Q(requested_by=user) | Q(requested_by__manager=user))
+        clients = clients.filter(Q(assigned_manager=user) | Q(created_by__manager=user))
+    else:
+        applications = applications.filter(client__assigned_sales=user)
+        payments = payments.filter(Q(client__assigned_sales=user) | Q(received_by=user))
+        edit_requests = edit_requests.filter(requested_by=user)
+        clients = clients.filter(Q(assigned_sales=user) | Q(created_by=user))
+
+    counts = {
+        'applications': applications.distinct().count(),
+        'payments': payments.distinct().count(),
+        'edit_requests': edit_requests.count(),
+        'clients': clients.distinct().count(),
+    }
+    if cached:
+        cache.set(key, counts, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return counts
@@ -0,0 +1,187 @@
+"""
+Notification list queries for Agnivridhi CRM
+
+- Status badges are one grouped COUNT per status, done by the database and
+  cached for NOTIFICATION_FACETS_CACHE_SECONDS per viewer scope and filter.
+- The list is paginated with a keyset cursor on (created_at, id), newest
+  first: each page is an indexed range read with no COUNT or OFFSET, so it
+  stays fast for admins looking at every notification.
+- unread_count() backs the navbar badge and the unread-count API. It is
+  cached per user and dropped whenever the user gets a notification or
+  marks theirs read.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Notification
+
+PAGE_SIZE = 100
+
+CURSOR_SALT = 'notifications.listing.cursor'
+
+
+def sees_all(user):
+    return getattr(user, 'role', None) in ['ADMIN', 'OWNER'] or getattr(user, 'is_superuser', False)
+
+
+def list_filters(params):
+    """Normalize the list's status/channel/q params."""
+    return {
+        'status': (params.get('status') or '').strip().upper(),
+        'channel': (params.get('channel') or '').strip().upper(),
+        'q': ' '.join((params.get('q') or '').split()),
+    }
+
+
+def filtered_notifications(user, filters):
+    """Notifications ``user`` may see, narrowed by the list filters (unordered)."""
+    qs = Notification.objects.all() if sees_all(user) else Notification.objects.filter(recipient=user)
+    if filters['status']:
+        qs = qs.filter(status=filters['status'])
+    if filters['channel']:
+        qs = qs.filter(channel=filters['channel'])
+    if filters['q']:
+        qs = qs.filter(Q(subject__icontains=filters['q']) | Q(message__icontains=filters['q']))
+    return qs
+
+
+def _cache_scope(user):
+    return 'all' if sees_all(user) else f'user{user.pk}'
+
+
+def status_facets(user, filters):
+    """[(status, count), ...] over the filtered notifications, most frequent first; briefly cached."""
+    raw = '&'.join(f'{key}={filters[key]}' for key in ('status', 'channel', 'q'))
+    key = f'notifications:facets:{_cache_scope(user)}:{hashlib.md5(raw.lower().encode()).hexdigest()}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = [
+            (row['status'], row['count'])
+            for row in filtered_notifications(user, filters).order_by()
+            .values('status').annotate(count=Count('id')).order_by('-count', 'status')
+        ]
+        cache.set(key, facets, getattr(settings, 'NOTIFICATION_FACETS_CACHE_SECONDS', 30))
+    return facets
+
+
+def _encode_cursor(notification):
+    return signing.dumps([notification.created_at.isoformat(), notification.pk], salt=CURSOR_SALT)
+
+
+def _decode_cursor(token):
+    """(created_at, pk) from a cursor token, or None if it is invalid."""
+    try:
+        created_at, pk = signing.loads(token, salt=CURSOR_SALT)
+        created_at = parse_datetime(created_at)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+class NotificationPage:
+    """One page of notifications plus the cursors for its neighbours."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return _encode_cursor(self.object_list[-1])
+        return ''
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return _encode_cursor(self.object_list[0])
+        return ''
+
+
+def notification_page(user, params, page_size=PAGE_SIZE):
+    """
+    One page of ``user``'s notification list, newest first.
+
+    ``params['after']`` / ``params['before']`` are cursors from a previous
+    page's next_cursor/previous_cursor; without either (or with an invalid
+    one) the first page is returned.
+    """
+    after = params.get('after')
+    before = params.get('before')
+    cursor = _decode_cursor(after or before) if (after or before) else None
+    backwards = bool(before) and not after and cursor is not None
+
+    qs = filtered_notifications(user, list_filters(params)).select_related('recipient')
+    qs = qs.order_by('created_at', 'pk') if backwards else qs.order_by('-created_at', '-pk')
+    if cursor is not None:
+        created_at, pk = cursor
+        op = 'gt' if backwards else 'lt'
+        qs = qs.filter(
+            Q(**{f'created_at__{op}': created_at}) | Q(created_at=created_at, **{f'pk__{op}': pk})
+        )
+
+    rows = list(qs[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        return NotificationPage(rows, has_next=True, has_previous=more)
+    return NotificationPage(rows, has_next=more, has_previous=cursor is not None)
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    """Unread notifications addressed to ``user`` (digested ones count once, as their digest)."""
+    from accounts.dashboard_cache import versioned_caching_enabled
+
+    # Invalidated by delete in whichever worker changed it: needs a shared cache
+    cached = versioned_caching_enabled()
+    key = _unread_key(user.pk)
+    count = cache.get(key) if cached else None
+    if count is None:
+        count = (
+            Notification.objects.filter(recipient=user, read_at__isnull=True, digest__isnull=True)
+            .exclude(status=Notification.Status.HELD).count()
+        )
+        if cached:
+            cache.set(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_SECONDS', 300))
+    return count
+
+
+def forget_unread_count(user_id):
+    cache.delete(_unread_key(user_id))
+
+
+def mark_all_read(user):
+    """Mark every notification addressed to ``user`` as read; returns how many changed."""
+    now = timezone.now()
+    updated = Notification.objects.filter(recipient=user, read_at__isnull=True).update(read_at=now, updated_at=now)
+    forget_unread_count(user.pk)
+    return updated
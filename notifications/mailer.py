@@ -0,0 +1,115 @@
+"""
+Pooled email sending for Agnivridhi CRM
+
+Opening an SMTP connection to the mail host costs a TCP connect, STARTTLS
+and AUTH. PooledMailer keeps one authenticated backend connection (from
+django.core.mail.get_connection) open and sends message after message on
+it, reconnecting when the server drops the session and starting a fresh
+session every ``batch_size`` messages, since mail hosts cap messages per
+session. The outbox worker holds one PooledMailer per worker thread.
+"""
+import logging
+import smtplib
+import threading
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is assumed dead and re-opened once
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class PooledMailer:
+    """
+    Reusable email connection with reconnect-on-failure.
+
+    Usage:
+        with PooledMailer() as mailer:
+            for message in messages:
+                mailer.send(message)
+    """
+
+    def __init__(self, batch_size=None, backend=None, **backend_kwargs):
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 50)
+        self.backend = backend
+        self.email_backend = backend or settings.EMAIL_BACKEND
+        self.backend_kwargs = backend_kwargs
+        self.connection = None
+        self.sent_on_connection = 0
+        self.connections_opened = 0
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False, **self.backend_kwargs)
+            self.connection.open()
+            self.connections_opened += 1
+            self.sent_on_connection = 0
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.debug('Error closing mail connection', exc_info=True)
+            self.connection = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _send_once(self, message):
+        if self.sent_on_connection >= self.batch_size:
+            self.close()
+        connection = self.open()
+        sent = connection.send_messages([message])
+        self.sent_on_connection += 1
+        return sent
+
+    def send(self, message):
+        """
+        Send one EmailMessage on the pooled connection.
+
+        A dropped connection is re-opened and the message retried once; any
+        other error (e.g. a rejected recipient) is raised to the caller and
+        the connection kept for the next message.
+        """
+        try:
+            return self._send_once(message)
+        except RECONNECT_ERRORS as e:
+            logger.info('Mail connection lost (%s), reconnecting', e)
+            self.close()
+            return self._send_once(message)
+
+    def send_messages(self, messages):
+        """
+        Send ``messages`` in batches of ``batch_size`` per connection.
+
+        Returns a list of (message, error) pairs; error is None on success.
+        """
+        results = []
+        for message in messages:
+            try:
+                self.send(message)
+                results.append((message, None))
+            except Exception as e:
+                results.append((message, e))
+        return results
+
+
+_local = threading.local()
+
+
+def thread_mailer():
+    """The calling thread's PooledMailer (re-created if EMAIL_BACKEND changed)."""
+    mailer = getattr(_local, 'mailer', None)
+    if mailer is None or mailer.email_backend != settings.EMAIL_BACKEND:
+        if mailer is not None:
+            mailer.close()
+        mailer = _local.mailer = PooledMailer()
+    return mailer
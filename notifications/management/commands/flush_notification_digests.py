@@ -0,0 +1,32 @@
+"""
+Send due notification digests (for deployments without a process_notification_outbox loop).
+
+Run from cron every few minutes.
+
+Usage:
+    python manage.py flush_notification_digests
+    python manage.py flush_notification_digests --all    # flush everything held, due or not
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.digest import digest_interval, flush_due
+
+
+class Command(BaseCommand):
+    help = 'Combine held notifications into one digest per recipient and channel once they are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Flush every held notification, even if not yet due')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['all']:
+            now += digest_interval() + timedelta(seconds=1)
+        digests = flush_due(now)
+        if digests:
+            self.stdout.write(self.style.SUCCESS(f'📬 Queued {len(digests)} digest(s)'))
+        else:
+            self.stdout.write('No digests due')
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from notifications.digest import flush_due
+from notifications.models import Notification
+from notifications.outbox import deliver_many
+
+
+def _deliver_chunk(notification_ids):
+    """Deliver one worker's share of a batch over a single pooled mail connection."""
+    close_old_connections()
+    try:
+        return deliver_many(notification_ids)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Send queued notifications concurrently (use with NOTIFICATION_OUTBOX_RUNNER=command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_OUTBOX_THREADS', 4),
+            help='Notifications sent in parallel (default: NOTIFICATION_OUTBOX_THREADS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=100, help='Queued rows fetched per round (default: 100)')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new notifications instead of exiting when the outbox is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls in --loop mode (default: 2)',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=15,
+            help='Re-queue notifications stuck in SENDING for longer than this (default: 15)',
+        )
+
+    def handle(self, *args, **options):
+        self._requeue_stale(options['stale_minutes'])
+        executor = ThreadPoolExecutor(max_workers=options['workers']) if options['workers'] > 1 else None
+        try:
+            while True:
+                digests = flush_due()
+                if digests:
+                    self.stdout.write(self.style.SUCCESS(f'📬 Queued {len(digests)} digest(s)'))
+                sent, failed = self._drain(executor, options['batch_size'], options['workers'])
+                if sent or failed:
+                    self.stdout.write(self.style.SUCCESS(f'✅ Sent {sent} notification(s)'))
+                    if failed:
+                        self.stdout.write(self.style.ERROR(f'❌ {failed} notification(s) failed'))
+                    continue  # more may be waiting
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def _requeue_stale(self, minutes):
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        stale = Notification.objects.filter(status=Notification.Status.SENDING, updated_at__lt=cutoff).update(
+            status=Notification.Status.QUEUED, updated_at=timezone.now()
+        )
+        if stale:
+            self.stdout.write(self.style.WARNING(f'⚠️  Re-queued {stale} notification(s) stuck in SENDING'))
+
+    def _drain(self, executor, batch_size, workers):
+        ids = list(
+            Notification.objects.filter(status=Notification.Status.QUEUED)
+            .order_by('created_at').values_list('id', flat=True)[:batch_size]
+        )
+        if executor:
+            # One chunk (and so one SMTP session) per worker thread
+            chunks = [ids[i::workers] for i in range(workers) if ids[i::workers]]
+            results = [n for chunk in executor.map(_deliver_chunk, chunks) for n in chunk]
+        else:
+            results = deliver_many(ids)
+
+        sent = failed = 0
+        for notification in results:
+            if notification.status == Notification.Status.SENT:
+                sent += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'❌ Notification #{notification.pk}: {notification.error_message}'))
+        return sent, failed
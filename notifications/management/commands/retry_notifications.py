@@ -0,0 +1,54 @@
+"""
+Retry failed notifications whose backoff has expired.
+
+Safe to run several copies at once: each claims its own rows.
+
+Usage:
+    python manage.py retry_notifications
+    python manage.py retry_notifications --loop --interval 30
+    python manage.py retry_notifications --batch-size 50
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.models import Notification
+from notifications.retry import retry_due
+
+
+class Command(BaseCommand):
+    help = 'Resend FAILED notifications that are due for retry (exponential backoff, dead-letter after the cap)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Due rows claimed per round (default: 100)')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for due notifications instead of exiting when none are due',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=15.0,
+            help='Seconds to wait between polls in --loop mode (default: 15)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            results = retry_due(options['batch_size'])
+            if results:
+                self._report(results)
+                continue  # more may be due
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _report(self, results):
+        counts = {status: 0 for status in Notification.Status.values}
+        for notification in results:
+            counts[notification.status] += 1
+        self.stdout.write(self.style.SUCCESS(f"✅ Retried {len(results)}: {counts['SENT']} sent"))
+        if counts['FAILED']:
+            self.stdout.write(self.style.WARNING(f"🔁 {counts['FAILED']} rescheduled with backoff"))
+        if counts['DEAD']:
+            self.stdout.write(self.style.ERROR(f"💀 {counts['DEAD']} moved to dead-letter after too many failures"))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+def retire_legacy_queued(apps, schema_editor):
+    # Before the outbox, views saved notifications as QUEUED and nothing ever
+    # sent them. Park those as FAILED (with no retry scheduled) so the first
+    # outbox run does not email the whole history.
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(status='QUEUED').update(
+        status='FAILED',
+        error_message='Not sent: queued before the notification outbox was introduced',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_support_request'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent Successfully'), ('FAILED', 'Failed'), ('QUEUED', 'Queued for Sending'), ('SENDING', 'Sending')], default='PENDING', help_text='Notification status', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'created_at'], name='notificatio_status_9a4505_idx'),
+        ),
+        migrations.RunPython(retire_legacy_queued, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_retry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='digest',
+            field=models.ForeignKey(blank=True, help_text='Digest notification that delivered this one', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='digest_items', to='notifications.notification'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('WELCOME', 'Welcome Message'), ('CREDENTIALS', 'Login Credentials'), ('BOOKING_CONFIRMATION', 'Booking Confirmation'), ('PAYMENT_SUCCESS', 'Payment Successful'), ('PAYMENT_FAILED', 'Payment Failed'), ('APPLICATION_SUBMITTED', 'Application Submitted'), ('APPLICATION_APPROVED', 'Application Approved'), ('APPLICATION_REJECTED', 'Application Rejected'), ('DOCUMENT_READY', 'Document Ready for Download'), ('EDIT_REQUEST_APPROVED', 'Edit Request Approved'), ('EDIT_REQUEST_REJECTED', 'Edit Request Rejected'), ('REMINDER', 'Reminder/Follow-up'), ('CUSTOM', 'Custom Message'), ('DIGEST', 'Notification Digest')], help_text='Type of notification', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent Successfully'), ('FAILED', 'Failed'), ('QUEUED', 'Queued for Sending'), ('SENDING', 'Sending'), ('DEAD', 'Dead Letter (retries exhausted)'), ('HELD', 'Held for Digest')], default='PENDING', help_text='Notification status', max_length=10),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_read(apps, schema_editor):
+    # Notifications sent before read tracking existed would otherwise all
+    # count as unread and fill every user's badge with their history
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(read_at__isnull=True).update(read_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='read_at',
+            field=models.DateTimeField(blank=True, help_text='When the recipient marked the notification as read', null=True),
+        ),
+        migrations.RunPython(mark_existing_read, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notificatio_recipie_a972ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'read_at'], name='notificatio_recipie_564b1f_idx'),
+        ),
+    ]
@@ -17,6 +17,9 @@ class Notification(models.Model):
         SENT = 'SENT', _('Sent Successfully')
         FAILED = 'FAILED', _('Failed')
         QUEUED = 'QUEUED', _('Queued for Sending')
+        SENDING = 'SENDING', _('Sending')
+        DEAD = 'DEAD', _('Dead Letter (retries exhausted)')
+        HELD = 'HELD', _('Held for Digest')
     
     class NotificationType(models.TextChoices):
         WELCOME = 'WELCOME', _('Welcome Message')
@@ -32,6 +35,7 @@ class Notification(models.Model):
         EDIT_REQUEST_REJECTED = 'EDIT_REQUEST_REJECTED', _('Edit Request Rejected')
         REMINDER = 'REMINDER', _('Reminder/Follow-up')
         CUSTOM = 'CUSTOM', _('Custom Message')
+        DIGEST = 'DIGEST', _('Notification Digest')
     
     # Recipient
     recipient = models.ForeignKey(
@@ -122,6 +126,12 @@ class Notification(models.Model):
         help_text=_('Number of retry attempts')
     )
     
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_('When a FAILED notification is due to be retried')
+    )
+    
     # External IDs
     email_message_id = models.CharField(
         max_length=200,
@@ -165,6 +175,22 @@ class Notification(models.Model):
         help_text=_('Related payment (if applicable)')
     )
     
+    read_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_('When the recipient marked the notification as read')
+    )
+    
+    # Digest this notification was folded into (HELD notifications only)
+    digest = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='digest_items',
+        help_text=_('Digest notification that delivered this one')
+    )
+    
     # Sender
     sent_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -187,6 +213,10 @@ class Notification(models.Model):
             models.Index(fields=['recipient', 'status']),
             models.Index(fields=['notification_type', 'status']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', 'read_at']),
         ]
     
     def __str__(self):
@@ -197,20 +227,28 @@ class Notification(models.Model):
         from django.utils import timezone
         self.status = self.Status.SENT
         self.sent_at = timezone.now()
+        self.next_attempt_at = None
         self.save()
     
     def mark_failed(self, error):
-        """Mark notification as failed"""
+        """Mark notification as failed and schedule a retry (dead-letter once retries run out)"""
         from django.utils import timezone
-        self.status = self.Status.FAILED
+        from .retry import backoff_delay, max_retries
         self.failed_at = timezone.now()
         self.error_message = str(error)
         self.retry_count += 1
+        if self.retry_count < max_retries():
+            self.status = self.Status.FAILED
+            self.next_attempt_at = self.failed_at + backoff_delay(self.retry_count)
+        else:
+            self.status = self.Status.DEAD
+            self.next_attempt_at = None
         self.save()
     
     def can_retry(self):
         """Check if notification can be retried"""
-        return self.status == self.Status.FAILED and self.retry_count < 3
+        from .retry import max_retries
+        return self.status == self.Status.FAILED and self.retry_count < max_retries()
 
 
 class SupportRequest(models.Model):
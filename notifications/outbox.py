@@ -0,0 +1,257 @@
+"""
+Notification outbox for Agnivridhi CRM
+
+Request handlers never talk to SMTP or Twilio directly. They call enqueue(),
+which writes a QUEUED Notification row in the caller's transaction; once
+that transaction commits, the row is handed to the configured runner and
+the request returns straight away. deliver() claims a row, sends it and
+records the outcome on the row. With ``digest=True`` the row may instead be
+HELD for a combined digest (see notifications.digest).
+
+Runner modes (settings.NOTIFICATION_OUTBOX_RUNNER):
+    'command' - leave rows for ``python manage.py process_notification_outbox``,
+                run as a separate worker (default)
+    'thread'  - deliver on a small in-process thread pool in the web process;
+                a daemon thread also runs digest.flush_due() every
+                NOTIFICATION_DIGEST_FLUSH_SECONDS so HELD rows go out
+    'celery'  - deliver through the notifications.tasks Celery task
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.message import DNS_NAME, make_msgid
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .digest import flush_due, flush_if_full, wants_digest
+from .listing import forget_unread_count
+from .mailer import PooledMailer, thread_mailer
+from .models import Notification
+from .whatsapp import get_dispatcher
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_digest_flusher = None
+
+
+def enqueue(recipient, notification_type, subject, message, channel=Notification.Channel.EMAIL,
+            html_content=None, email_to=None, whatsapp_to=None, sent_by=None, dispatch=True,
+            digest=False, **related):
+    """
+    Queue a notification for delivery once the current transaction commits.
+
+    ``related`` may carry related_booking/related_application/related_payment.
+    With ``dispatch=False`` the row is only written; the caller (or the
+    process_notification_outbox worker) delivers it. With ``digest=True`` and
+    a recipient who opted into digests, the row is HELD for the next digest
+    instead. Returns the Notification.
+    """
+    held = digest and wants_digest(recipient)
+    notification = Notification.objects.create(
+        recipient=recipient,
+        channel=channel,
+        notification_type=notification_type,
+        status=Notification.Status.HELD if held else Notification.Status.QUEUED,
+        subject=subject[:200],
+        message=message,
+        html_content=html_content,
+        email_to=email_to,
+        whatsapp_to=whatsapp_to,
+        sent_by=sent_by,
+        **related,
+    )
+    transaction.on_commit(lambda: forget_unread_count(recipient.pk))
+    if held:
+        transaction.on_commit(lambda: _after_hold(recipient.pk, channel))
+    elif dispatch:
+        transaction.on_commit(lambda: _dispatch(notification.pk))
+    return notification
+
+
+def deliver_many(notification_ids, mailer=None):
+    """
+    Deliver several queued notifications over one pooled mail connection.
+
+    Returns the delivered Notifications (rows claimed elsewhere are skipped).
+    """
+    own_mailer = mailer is None
+    mailer = mailer or PooledMailer()
+    try:
+        delivered = [deliver(pk, mailer=mailer) for pk in notification_ids]
+    finally:
+        if own_mailer:
+            mailer.close()
+    return [n for n in delivered if n is not None]
+
+
+def _dispatch(notification_id):
+    """Hand a committed notification to the configured runner."""
+    runner = getattr(settings, 'NOTIFICATION_OUTBOX_RUNNER', 'command')
+    if runner == 'thread':
+        _get_executor().submit(_deliver_in_thread, notification_id)
+    elif runner == 'celery':
+        from .tasks import deliver_notification_task
+        deliver_notification_task.delay(notification_id)
+    # 'command': process_notification_outbox picks the row up
+
+
+def _after_hold(recipient_id, channel):
+    flush_if_full(recipient_id, channel)
+    if getattr(settings, 'NOTIFICATION_OUTBOX_RUNNER', 'command') == 'thread':
+        _start_digest_flusher()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'NOTIFICATION_OUTBOX_THREADS', 4),
+                thread_name_prefix='notification-outbox',
+            )
+    _start_digest_flusher()
+    return _executor
+
+
+def _start_digest_flusher():
+    """Without a separate worker nothing else flushes due digests, so the thread runner does it."""
+    global _digest_flusher
+    with _executor_lock:
+        if _digest_flusher is None or not _digest_flusher.is_alive():
+            _digest_flusher = threading.Thread(target=_flush_digests_forever, name='notification-digests', daemon=True)
+            _digest_flusher.start()
+
+
+def _flush_digests_forever():
+    while True:
+        time.sleep(getattr(settings, 'NOTIFICATION_DIGEST_FLUSH_SECONDS', 60))
+        flush_digests_now()
+
+
+def flush_digests_now():
+    """One round of the thread runner's digest flusher; returns the queued notifications."""
+    close_old_connections()
+    try:
+        return flush_due()
+    except Exception:
+        logger.exception('Flushing notification digests failed')
+        return []
+    finally:
+        close_old_connections()
+
+
+def _deliver_in_thread(notification_id):
+    close_old_connections()
+    try:
+        deliver(notification_id)
+    except Exception:
+        logger.exception('Notification %s could not be delivered', notification_id)
+    finally:
+        close_old_connections()
+
+
+def _send_email(notification, mailer):
+    message_id = make_msgid(domain=DNS_NAME)
+    email = EmailMultiAlternatives(
+        subject=notification.subject,
+        body=notification.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notification.email_to],
+        headers={'Message-ID': message_id},
+    )
+    if notification.html_content:
+        email.attach_alternative(notification.html_content, 'text/html')
+    mailer.send(email)
+    return message_id
+
+
+def _send_whatsapp(notification):
+    return get_dispatcher().send(notification.whatsapp_to, notification.message)
+
+
+CREDENTIALS_SENT_MESSAGE = 'Login credentials were emailed to {email}. The message body was removed after delivery.'
+
+
+def _mark_credentials_sent(notification):
+    from clients.models import ClientCredential
+
+    for credential in ClientCredential.objects.filter(client__user_id=notification.recipient_id, is_sent=False):
+        credential.mark_as_sent(notification.sent_by)
+    # The body carries the plaintext password; it is only needed until it has gone out
+    notification.message = CREDENTIALS_SENT_MESSAGE.format(email=notification.email_to)
+    notification.html_content = None
+    Notification.objects.filter(pk=notification.pk).update(
+        message=notification.message, html_content=None, updated_at=timezone.now()
+    )
+
+
+def _mark_digest_items_sent(notification):
+    notification.digest_items.update(
+        status=Notification.Status.SENT, sent_at=notification.sent_at, updated_at=timezone.now()
+    )
+
+
+# Side effects that must only happen once a notification has really gone out
+ON_SENT = {
+    Notification.NotificationType.CREDENTIALS: _mark_credentials_sent,
+    Notification.NotificationType.DIGEST: _mark_digest_items_sent,
+}
+
+
+def claim(notification_id):
+    """Move a QUEUED notification to SENDING; False if someone else got it first."""
+    return bool(
+        Notification.objects.filter(pk=notification_id, status=Notification.Status.QUEUED)
+        .update(status=Notification.Status.SENDING, updated_at=timezone.now())
+    )
+
+
+def deliver(notification_id, mailer=None):
+    """
+    Claim and send one queued notification.
+
+    Emails go out on ``mailer`` (a notifications.mailer.PooledMailer),
+    defaulting to the calling thread's pooled connection.
+    Returns the Notification, or None if it was not QUEUED (already claimed).
+    """
+    if not claim(notification_id):
+        return None
+    return attempt(Notification.objects.get(pk=notification_id), mailer=mailer)
+
+
+def attempt(notification, mailer=None):
+    """
+    Send a notification this worker has already claimed (status SENDING).
+
+    Records SENT, or FAILED with a scheduled retry (see notifications.retry).
+    """
+    try:
+        channels = (
+            [Notification.Channel.EMAIL, Notification.Channel.WHATSAPP]
+            if notification.channel == Notification.Channel.BOTH else [notification.channel]
+        )
+        # A channel that already went out on an earlier attempt is not resent
+        if Notification.Channel.EMAIL in channels and notification.email_to and not notification.email_message_id:
+            notification.email_message_id = _send_email(notification, mailer or thread_mailer())
+        if (Notification.Channel.WHATSAPP in channels and notification.whatsapp_to
+                and not notification.whatsapp_message_id):
+            notification.whatsapp_message_id = _send_whatsapp(notification)
+    except Exception as e:
+        logger.warning('Notification %s failed: %s', notification.pk, e)
+        notification.mark_failed(e)
+        return notification
+
+    notification.mark_sent()
+    hook = ON_SENT.get(notification.notification_type)
+    if hook:
+        try:
+            hook(notification)
+        except Exception:
+            logger.exception('Post-send hook for notification %s failed', notification.pk)
+    return notification
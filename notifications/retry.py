@@ -0,0 +1,91 @@
+"""
+Retry scheduling for failed notifications
+
+Notification.mark_failed() puts a failed row back on the schedule with
+``next_attempt_at`` set by backoff_delay(): exponential in the number of
+failures, capped, with jitter so that rows failing together (an SMTP
+outage) do not all come back in the same second. Once
+NOTIFICATION_MAX_RETRIES attempts have failed the row becomes DEAD.
+
+retry_due() claims due rows in batches and sends them again. Claiming
+uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it, so
+any number of ``python manage.py retry_notifications`` workers can drain
+the queue side by side without sending a row twice.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+
+
+def max_retries():
+    return getattr(settings, 'NOTIFICATION_MAX_RETRIES', 3)
+
+
+def backoff_delay(failures, rng=random):
+    """
+    Delay before the next attempt after ``failures`` failed attempts.
+
+    base * 2^(failures - 1) capped at NOTIFICATION_RETRY_MAX_SECONDS, of which
+    the second half is random ("equal jitter").
+    """
+    base = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60)
+    cap = getattr(settings, 'NOTIFICATION_RETRY_MAX_SECONDS', 3600)
+    delay = min(cap, base * 2 ** max(failures - 1, 0))
+    return timedelta(seconds=delay / 2 + rng.uniform(0, delay / 2))
+
+
+def due(now=None):
+    """FAILED notifications whose retry time has come."""
+    return Notification.objects.filter(
+        status=Notification.Status.FAILED,
+        next_attempt_at__lte=now or timezone.now(),
+    )
+
+
+def claim_due(batch_size=100):
+    """
+    Move up to ``batch_size`` due notifications to SENDING and return them.
+
+    Rows locked by another worker are skipped rather than waited for. On
+    databases without SKIP LOCKED (SQLite) each row is claimed with its own
+    conditional UPDATE instead, which is slower but just as exclusive.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            due(now).order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            Notification.objects.filter(pk__in=ids).update(status=Notification.Status.SENDING, updated_at=now)
+            claimed = ids
+        else:
+            claimed = [
+                pk for pk in ids
+                if Notification.objects.filter(pk=pk, status=Notification.Status.FAILED)
+                .update(status=Notification.Status.SENDING, updated_at=now)
+            ]
+    return list(Notification.objects.filter(pk__in=claimed).order_by('next_attempt_at'))
+
+
+def retry_due(batch_size=100, mailer=None):
+    """Claim one batch of due notifications and attempt them again; returns them."""
+    from .mailer import PooledMailer
+    from .outbox import attempt
+
+    notifications = claim_due(batch_size)
+    if not notifications:
+        return []
+    own_mailer = mailer is None
+    mailer = mailer or PooledMailer()
+    try:
+        return [attempt(notification, mailer=mailer) for notification in notifications]
+    finally:
+        if own_mailer:
+            mailer.close()
@@ -0,0 +1,37 @@
+"""
+Signal handlers feeding the live event stream (see notifications.events)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import notification_event, publish
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def publish_new_notification(sender, instance, created, **kwargs):
+    """Push a new notification to its recipient's open streams once it is committed."""
+    if not created or instance.status == Notification.Status.HELD:
+        return
+    payload = notification_event(instance)
+    transaction.on_commit(lambda: publish('notification', user_id=instance.recipient_id, **payload))
+
+
+# Models behind the pending-approval badges
+PENDING_SOURCE_MODELS = (
+    'applications.Application',
+    'payments.Payment',
+    'edit_requests.EditRequest',
+    'clients.Client',
+)
+
+
+def publish_pending_changed(sender, **kwargs):
+    """Tell open streams to recompute their pending counts."""
+    transaction.on_commit(lambda: publish('pending'))
+
+
+for _model in PENDING_SOURCE_MODELS:
+    post_save.connect(publish_pending_changed, sender=_model, dispatch_uid=f'pending_events_save_{_model}')
+    post_delete.connect(publish_pending_changed, sender=_model, dispatch_uid=f'pending_events_delete_{_model}')
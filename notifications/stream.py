@@ -0,0 +1,83 @@
+"""
+Server-sent-events stream for staff users
+
+GET /notifications/stream/ (served under ASGI) keeps the connection open and
+writes:
+
+    event: notification   a new notification for the user (id = notification id)
+    event: pending        {"applications": n, "payments": n, "edit_requests": n, "clients": n}
+
+plus a comment line every NOTIFICATION_STREAM_KEEPALIVE seconds so proxies
+keep the connection open. When the browser reconnects with Last-Event-ID,
+notifications created while it was away are replayed first.
+
+Run the site under an ASGI server for this endpoint, e.g.
+    uvicorn agnivridhi_crm.asgi:application
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .events import get_broadcaster, notification_event, pending_counts
+from .models import Notification
+
+# Notifications replayed to a reconnecting browser at most
+REPLAY_LIMIT = 50
+
+
+def format_event(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _missed_notifications(user, last_event_id):
+    qs = (
+        Notification.objects.filter(recipient=user, pk__gt=last_event_id)
+        .exclude(status=Notification.Status.HELD).order_by('pk')[:REPLAY_LIMIT]
+    )
+    return [notification_event(notification) for notification in qs]
+
+
+async def event_stream(user, last_event_id=None):
+    """Async iterator of SSE messages for ``user`` until the client disconnects."""
+    broadcaster = get_broadcaster()
+    queue = broadcaster.subscribe()
+    keepalive = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+    debounce = getattr(settings, 'NOTIFICATION_STREAM_DEBOUNCE', 1.0)
+    try:
+        yield f'retry: {int(keepalive * 1000)}\n\n'
+        if last_event_id:
+            for payload in await sync_to_async(_missed_notifications)(user, last_event_id):
+                yield format_event('notification', payload, payload['id'])
+
+        counts = await sync_to_async(pending_counts)(user)
+        yield format_event('pending', counts)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            if event['type'] == 'notification' and event['user_id'] == user.pk:
+                yield format_event('notification', event['data'], event['data']['id'])
+            elif event['type'] == 'pending':
+                # An approval usually saves several rows; recount once they settle
+                await asyncio.sleep(debounce)
+                while not queue.empty():
+                    queued = queue.get_nowait()
+                    if queued['type'] == 'notification' and queued['user_id'] == user.pk:
+                        yield format_event('notification', queued['data'], queued['data']['id'])
+                latest = await sync_to_async(pending_counts)(user)
+                if latest != counts:
+                    counts = latest
+                    yield format_event('pending', counts)
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,25 @@
+"""
+Celery tasks for the notification outbox (NOTIFICATION_OUTBOX_RUNNER='celery')
+"""
+from agnivridhi_crm.celery import app
+
+from .digest import flush_due
+from .outbox import deliver
+from .retry import retry_due
+
+
+@app.task(name='notifications.deliver_notification')
+def deliver_notification_task(notification_id):
+    deliver(notification_id)
+
+
+@app.task(name='notifications.retry_due_notifications')
+def retry_due_notifications_task(batch_size=100):
+    """Schedule with celery beat to retry failed notifications without a separate worker loop."""
+    return len(retry_due(batch_size))
+
+
+@app.task(name='notifications.flush_notification_digests')
+def flush_notification_digests_task():
+    """Schedule with celery beat (every few minutes) to send due digests."""
+    return len(flush_due())
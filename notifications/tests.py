@@ -1,3 +1,750 @@
-from django.test import TestCase
+import asyncio
+import json
+import socketserver
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from clients.models import Client, ClientCredential
+from notifications.digest import flush_due
+from notifications.events import LocalBroadcaster
+from notifications.listing import mark_all_read, notification_page, status_facets, unread_count
+from notifications.mailer import PooledMailer
+from notifications.models import Notification
+from notifications.outbox import deliver, enqueue
+from notifications.stream import event_stream, format_event
+from notifications.retry import backoff_delay, claim_due, retry_due
+from notifications.whatsapp import TokenBucket, WhatsAppDispatcher, WhatsAppError
+from payments.models import Payment
+
+
+@override_settings(
+    NOTIFICATION_OUTBOX_RUNNER='command',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='mgr', password='pass', role='MANAGER', email='mgr@example.com',
+        )
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.client_obj = Client.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+        )
+
+    def _queue(self, **kwargs):
+        return enqueue(
+            recipient=self.manager, notification_type='CUSTOM', subject='Hello',
+            message='Body', email_to='mgr@example.com', **kwargs,
+        )
+
+    def test_approval_queues_email_without_sending(self):
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal('100.00'), payment_date=timezone.now(), received_by=self.manager,
+        )
+        self.client.login(username='mgr', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('accounts:approve_payment', args=[payment.pk]))
+
+        self.assertEqual(mail.outbox, [])
+        notification = Notification.objects.get(related_payment=payment)
+        self.assertEqual(notification.status, Notification.Status.QUEUED)
+        self.assertEqual(notification.notification_type, 'PAYMENT_SUCCESS')
+
+        call_command('process_notification_outbox', workers=1, stdout=StringIO())
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.Status.SENT)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['mgr@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_deliver_claims_once(self):
+        notification = self._queue()
+        self.assertEqual(deliver(notification.pk).status, Notification.Status.SENT)
+        self.assertIsNone(deliver(notification.pk))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failure_is_recorded(self):
+        notification = self._queue()
+        with mock.patch('notifications.mailer.PooledMailer.send', side_effect=OSError('SMTP down')):
+            deliver(notification.pk)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.Status.FAILED)
+        self.assertEqual(notification.retry_count, 1)
+        self.assertIn('SMTP down', notification.error_message)
+
+    def test_credentials_marked_sent_only_after_delivery(self):
+        from accounts.email_utils_client_credentials import send_client_credentials_email
+
+        # Created for the client by the clients signals
+        credential = ClientCredential.objects.get(client=self.client_obj)
+        self.assertFalse(credential.is_sent)
+        self.assertTrue(send_client_credentials_email(credential, sent_by=self.manager))
+        credential.refresh_from_db()
+        self.assertFalse(credential.is_sent)
+
+        notification = Notification.objects.get(notification_type='CREDENTIALS', recipient=self.client_obj.user)
+        self.assertIn(credential.plain_password, notification.html_content)
+
+        call_command('process_notification_outbox', workers=1, stdout=StringIO())
+        credential.refresh_from_db()
+        self.assertTrue(credential.is_sent)
+        self.assertEqual(credential.sent_by, self.manager)
+        # The password went out in the email but is not kept on the row
+        self.assertIn(credential.plain_password, mail.outbox[0].alternatives[0][0])
+        notification.refresh_from_db()
+        self.assertIsNone(notification.html_content)
+        self.assertNotIn(credential.plain_password, notification.message)
+
+    def test_thread_runner_dispatches_after_commit(self):
+        with override_settings(NOTIFICATION_OUTBOX_RUNNER='thread'), \
+                mock.patch('notifications.outbox._get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                notification = self._queue()
+                get_executor.assert_not_called()
+        get_executor.return_value.submit.assert_called_once()
+        self.assertEqual(get_executor.return_value.submit.call_args[0][1], notification.pk)
+
+
+
+@override_settings(
+    NOTIFICATION_OUTBOX_RUNNER='command',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    NOTIFICATION_MAX_RETRIES=3,
+    NOTIFICATION_RETRY_BASE_SECONDS=60,
+    NOTIFICATION_RETRY_MAX_SECONDS=600,
+)
+class NotificationRetryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+
+    def _failed(self, **kwargs):
+        notification = enqueue(
+            recipient=self.user, notification_type='CUSTOM', subject='Hello', message='Body',
+            email_to='mgr@example.com', **kwargs,
+        )
+        with mock.patch('notifications.mailer.PooledMailer.send', side_effect=OSError('SMTP down')):
+            deliver(notification.pk)
+        notification.refresh_from_db()
+        return notification
+
+    def _make_due(self):
+        Notification.objects.filter(status=Notification.Status.FAILED).update(next_attempt_at=timezone.now())
+
+    def test_backoff_is_exponential_capped_and_jittered(self):
+        low, high = mock.Mock(uniform=lambda a, b: a), mock.Mock(uniform=lambda a, b: b)
+        self.assertEqual([backoff_delay(n, rng=high).total_seconds() for n in (1, 2, 3, 4, 5)], [60, 120, 240, 480, 600])
+        self.assertEqual(backoff_delay(3, rng=low).total_seconds(), 120)
+
+    def test_failure_schedules_retry_then_dead_letters(self):
+        notification = self._failed()
+        self.assertEqual(notification.status, Notification.Status.FAILED)
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+        self.assertEqual(claim_due(), [])  # not due yet
+
+        with mock.patch('notifications.mailer.PooledMailer.send', side_effect=OSError('SMTP down')):
+            for expected in (Notification.Status.FAILED, Notification.Status.DEAD):
+                self._make_due()
+                [retried] = retry_due()
+                self.assertEqual(retried.status, expected)
+        notification.refresh_from_db()
+        self.assertEqual(notification.retry_count, 3)
+        self.assertIsNone(notification.next_attempt_at)
+        self.assertFalse(notification.can_retry())
+        self._make_due()
+        self.assertEqual(retry_due(), [])
+
+    def test_command_resends_due_notifications(self):
+        notification = self._failed()
+        self._make_due()
+        out = StringIO()
+        call_command('retry_notifications', stdout=out)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.Status.SENT)
+        self.assertIsNone(notification.next_attempt_at)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Retried 1: 1 sent', out.getvalue())
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        for _ in range(3):
+            self._failed()
+        self._make_due()
+        first = claim_due(batch_size=2)
+        second = claim_due(batch_size=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({n.pk for n in first} & {n.pk for n in second})
+        self.assertEqual(claim_due(), [])
+        self.assertTrue(all(n.status == Notification.Status.SENDING for n in first + second))
+
+    def test_retry_skips_channel_that_already_went_out(self):
+        notification = enqueue(
+            recipient=self.user, notification_type='CUSTOM', subject='Hello', message='Body',
+            channel=Notification.Channel.BOTH, email_to='mgr@example.com', whatsapp_to='+919999900000',
+        )
+        with mock.patch('notifications.outbox._send_whatsapp', side_effect=RuntimeError('Twilio down')):
+            deliver(notification.pk)
+        self.assertEqual(len(mail.outbox), 1)
+
+        self._make_due()
+        with mock.patch('notifications.outbox._send_whatsapp', return_value='SM1'):
+            [retried] = retry_due()
+        self.assertEqual(retried.status, Notification.Status.SENT)
+        self.assertEqual(retried.whatsapp_message_id, 'SM1')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_admin_retry_action_makes_dead_letters_due(self):
+        from notifications.admin import NotificationAdmin
+        from django.contrib.admin.sites import AdminSite
+
+        notification = self._failed()
+        Notification.objects.filter(pk=notification.pk).update(status=Notification.Status.DEAD, next_attempt_at=None)
+        admin = NotificationAdmin(Notification, AdminSite())
+        with mock.patch.object(admin, 'message_user'):
+            admin.retry_failed_notifications(None, Notification.objects.all())
+        self.assertEqual([n.pk for n in claim_due()], [notification.pk])
+
+
+@override_settings(
+    NOTIFICATION_OUTBOX_RUNNER='command',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    NOTIFICATION_DIGEST_INTERVAL_MINUTES=30,
+    NOTIFICATION_DIGEST_MAX_ITEMS=3,
+)
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username='mgr', password='pass', role='MANAGER', email='mgr@example.com',
+            notification_digest_opt_in=True,
+        )
+
+    def _queue(self, subject='Update', recipient=None, **kwargs):
+        return enqueue(
+            recipient=recipient or self.manager, notification_type='APPLICATION_APPROVED', subject=subject,
+            message=f'{subject} body', email_to='mgr@example.com', digest=True, **kwargs,
+        )
+
+    def _later(self):
+        return timezone.now() + timezone.timedelta(minutes=31)
+
+    def test_opted_out_recipient_gets_individual_notification(self):
+        other = User.objects.create_user(username='sales', password='pass', role='SALES', email='s@example.com')
+        self.assertEqual(self._queue(recipient=other).status, Notification.Status.QUEUED)
+        self.assertEqual(self._queue().status, Notification.Status.HELD)
+
+    def test_held_notifications_flush_as_one_digest(self):
+        first, second = self._queue('Application A approved'), self._queue('Application B approved')
+        self.assertEqual(flush_due(), [])  # not due yet
+
+        [digest] = flush_due(self._later())
+        self.assertEqual(digest.notification_type, Notification.NotificationType.DIGEST)
+        self.assertEqual(digest.status, Notification.Status.QUEUED)
+        self.assertEqual(digest.subject, '2 updates from Agnivridhi CRM')
+        self.assertEqual(set(digest.digest_items.values_list('pk', flat=True)), {first.pk, second.pk})
+        self.assertEqual(flush_due(self._later()), [])
+
+        call_command('process_notification_outbox', workers=1, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Application A approved', mail.outbox[0].body)
+        self.assertIn('Application B approved', mail.outbox[0].alternatives[0][0])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Notification.Status.SENT)
+        self.assertEqual(first.sent_at, Notification.objects.get(pk=digest.pk).sent_at)
+
+    def test_size_threshold_flushes_early(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._queue('One')
+            self._queue('Two')
+        self.assertFalse(Notification.objects.filter(notification_type='DIGEST').exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self._queue('Three')
+        digest = Notification.objects.get(notification_type='DIGEST')
+        self.assertEqual(digest.digest_items.count(), 3)
+
+    def test_single_held_notification_is_released_as_is(self):
+        notification = self._queue('Only one')
+        [released] = flush_due(self._later())
+        self.assertEqual(released.pk, notification.pk)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.Status.QUEUED)
+        self.assertFalse(Notification.objects.filter(notification_type='DIGEST').exists())
+
+    def test_thread_runner_flushes_due_digests(self):
+        from notifications import outbox
+
+        with override_settings(NOTIFICATION_OUTBOX_RUNNER='thread'), \
+                mock.patch('notifications.outbox._start_digest_flusher') as start_flusher:
+            with self.captureOnCommitCallbacks(execute=True):
+                notification = self._queue('Held')
+        start_flusher.assert_called_once_with()
+
+        with mock.patch('notifications.digest.timezone.now', return_value=self._later()), \
+                mock.patch('notifications.outbox._dispatch'):
+            with self.captureOnCommitCallbacks(execute=True):
+                [released] = outbox.flush_digests_now()
+        self.assertEqual(released.pk, notification.pk)
+
+    def test_payment_approvals_are_digested(self):
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        client = Client.objects.create(
+            user=client_user, company_name='Acme Corp', contact_person='John Doe',
+            contact_email='john@example.com', contact_phone='9999999999',
+        )
+        self.client.login(username='mgr', password='pass')
+        for amount in ('100.00', '200.00'):
+            payment = Payment.objects.create(
+                client=client, amount=Decimal(amount), payment_date=timezone.now(), received_by=self.manager,
+            )
+            self.client.get(reverse('accounts:approve_payment', args=[payment.pk]))
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.HELD).count(), 2)
+
+        call_command('flush_notification_digests', all=True, stdout=StringIO())
+        call_command('process_notification_outbox', workers=1, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Payment Approved', mail.outbox[0].body)
+        self.assertNotIn('font-family', mail.outbox[0].body)
+
+
+@override_settings(NOTIFICATION_OUTBOX_RUNNER='command', VERSIONED_CACHE_ALLOW_LOCAL=True)
+class NotificationListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='ADMIN')
+        self.sales = User.objects.create_user(username='sales', password='pass', role='SALES')
+        statuses = ['SENT', 'SENT', 'FAILED', 'QUEUED', 'SENT', 'DEAD', 'SENT']
+        for i, status in enumerate(statuses):
+            Notification.objects.create(
+                recipient=self.sales if i % 2 else self.admin, channel='EMAIL', notification_type='CUSTOM',
+                status=status, subject=f'Notification {i}', message='Body',
+            )
+        # Identical timestamps exercise the id tie-breaker
+        Notification.objects.filter(subject__in=['Notification 2', 'Notification 3', 'Notification 4']).update(
+            created_at=timezone.now()
+        )
+
+    def _walk(self, user, params, page_size=2):
+        pages = [notification_page(user, params, page_size)]
+        while pages[-1].has_next():
+            pages.append(notification_page(user, {**params, 'after': pages[-1].next_cursor}, page_size))
+        forward = [n.pk for page in pages for n in page]
+        page = pages[-1]
+        backward = [n.pk for n in page]
+        while page.has_previous():
+            page = notification_page(user, {**params, 'before': page.previous_cursor}, page_size)
+            backward = [n.pk for n in page] + backward
+        return forward, backward
+
+    def test_keyset_pages_match_full_ordering(self):
+        for user, params in ((self.admin, {}), (self.sales, {}), (self.admin, {'status': 'sent'})):
+            qs = Notification.objects.order_by('-created_at', '-pk')
+            if user == self.sales:
+                qs = qs.filter(recipient=user)
+            if params.get('status'):
+                qs = qs.filter(status='SENT')
+            expected = list(qs.values_list('pk', flat=True))
+            forward, backward = self._walk(user, params)
+            self.assertEqual(forward, expected)
+            self.assertEqual(backward, expected)
+
+    def test_deep_page_is_one_range_read(self):
+        first = notification_page(self.admin, {}, page_size=2)
+        with CaptureQueriesContext(connection) as ctx:
+            notification_page(self.admin, {'after': first.next_cursor}, page_size=2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'])
+        self.assertNotIn('COUNT(', ctx.captured_queries[0]['sql'])
+
+    def test_status_facets_grouped_and_cached(self):
+        filters = {'status': '', 'channel': '', 'q': ''}
+        self.assertEqual(status_facets(self.admin, filters), [('SENT', 4), ('DEAD', 1), ('FAILED', 1), ('QUEUED', 1)])
+        self.assertEqual(status_facets(self.sales, filters), [('DEAD', 1), ('QUEUED', 1), ('SENT', 1)])
+        with self.assertNumQueries(0):
+            status_facets(self.admin, filters)
+
+    def test_view_lists_page_and_facets(self):
+        self.client.force_login(self.sales)
+        response = self.client.get(reverse('notifications:notification_list'), {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertTrue(response.context['page_obj'].has_next())
+        self.assertEqual(dict(response.context['status_counts_items']), {'DEAD': 1, 'QUEUED': 1, 'SENT': 1})
+        self.assertContains(response, 'after=')
+
+    def test_unread_count_cached_and_invalidated(self):
+        self.assertEqual(unread_count(self.sales), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.sales), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(recipient=self.sales, notification_type='CUSTOM', subject='New', message='Body')
+        self.assertEqual(unread_count(self.sales), 4)
+
+        self.client.force_login(self.sales)
+        self.assertEqual(self.client.get(reverse('notifications:unread_count')).json(), {'unread': 4})
+        self.client.post(reverse('notifications:mark_read'))
+        self.assertEqual(self.client.get(reverse('notifications:unread_count')).json(), {'unread': 0})
+        self.assertEqual(unread_count(self.admin), 4)
+        self.assertEqual(mark_all_read(self.admin), 4)
+
+
+@override_settings(NOTIFICATION_OUTBOX_RUNNER='command', NOTIFICATION_STREAM_DEBOUNCE=0.01)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        self.client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+
+    def _events(self, raw):
+        return [
+            (dict(line.split(': ', 1) for line in chunk.splitlines() if line and not line.startswith(':')))
+            for chunk in raw
+        ]
+
+    def test_format_event(self):
+        self.assertEqual(format_event('pending', {'clients': 2}, 7), 'id: 7\nevent: pending\ndata: {"clients":2}\n\n')
+
+    def test_local_broadcaster_delivers_across_threads(self):
+        broadcaster = LocalBroadcaster()
+
+        async def scenario():
+            queue = broadcaster.subscribe()
+            thread = threading.Thread(target=broadcaster.publish, args=({'type': 'pending'},))
+            thread.start()
+            event = await asyncio.wait_for(queue.get(), 2)
+            broadcaster.unsubscribe(queue)
+            return event
+
+        self.assertEqual(async_to_sync(scenario)(), {'type': 'pending'})
+        self.assertEqual(broadcaster.subscriber_count, 0)
+
+    def test_stream_pushes_notifications_and_pending_counts(self):
+        def create_notification(recipient):
+            with self.captureOnCommitCallbacks(execute=True):
+                return enqueue(recipient=recipient, notification_type='CUSTOM', subject='Live', message='Body').pk
+
+        def create_pending_client():
+            with self.captureOnCommitCallbacks(execute=True):
+                Client.objects.create(
+                    user=self.client_user, company_name='Acme Corp', contact_person='John Doe',
+                    contact_email='john@example.com', contact_phone='9999999999',
+                    assigned_manager=self.manager, is_approved=False,
+                )
+
+        async def scenario():
+            stream = event_stream(self.manager)
+            raw = [await stream.__anext__(), await stream.__anext__()]
+            await sync_to_async(create_notification)(self.client_user)  # someone else's: not streamed
+            notification_id = await sync_to_async(create_notification)(self.manager)
+            raw.append(await asyncio.wait_for(stream.__anext__(), 2))
+            await sync_to_async(create_pending_client)()
+            raw.append(await asyncio.wait_for(stream.__anext__(), 2))
+            await stream.aclose()
+            return notification_id, raw
+
+        notification_id, raw = async_to_sync(scenario)()
+        self.assertTrue(raw[0].startswith('retry: '))
+        events = self._events(raw[1:])
+        self.assertEqual(events[0]['event'], 'pending')
+        self.assertEqual(json.loads(events[0]['data'])['clients'], 0)
+        self.assertEqual(events[1]['event'], 'notification')
+        self.assertEqual(events[1]['id'], str(notification_id))
+        self.assertEqual(json.loads(events[1]['data'])['subject'], 'Live')
+        self.assertEqual(events[2]['event'], 'pending')
+        self.assertEqual(json.loads(events[2]['data'])['clients'], 1)
+
+    def test_reconnect_replays_missed_notifications(self):
+        first = enqueue(recipient=self.manager, notification_type='CUSTOM', subject='Seen', message='Body')
+        enqueue(recipient=self.manager, notification_type='CUSTOM', subject='Missed', message='Body')
+
+        async def scenario():
+            stream = event_stream(self.manager, last_event_id=first.pk)
+            raw = [await stream.__anext__() for _ in range(3)]
+            await stream.aclose()
+            return raw
+
+        events = self._events(async_to_sync(scenario)()[1:])
+        self.assertEqual(events[0]['event'], 'notification')
+        self.assertEqual(json.loads(events[0]['data'])['subject'], 'Missed')
+        self.assertEqual(events[1]['event'], 'pending')
+
+    def test_view_requires_staff_and_asgi(self):
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(reverse('notifications:stream')).status_code, 403)
+        self.client.force_login(self.manager)
+        # The WSGI test client cannot hold a stream open: tell EventSource to stop
+        self.assertEqual(self.client.get(reverse('notifications:stream')).status_code, 204)
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts every message and records it."""
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        received = 0
+        self.wfile.write(b'220 localhost stand-in\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.wfile.write(b'250-localhost\r\n250 OK\r\n')
+            elif command == b'DATA':
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                body = []
+                for data in iter(self.rfile.readline, b''):
+                    if data == b'.\r\n':
+                        break
+                    body.append(data)
+                with server.lock:
+                    server.messages.append(b''.join(body))
+                self.wfile.write(b'250 Queued\r\n')
+                received += 1
+                if server.drop_after and received >= server.drop_after:
+                    return  # hang up without QUIT, like an idle-timeout on the mail host
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class SMTPStandInMixin:
+    """Run a local SMTP stand-in and point the smtp email backend at it."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        cls.smtp.daemon_threads = True
+        cls.smtp.lock = threading.Lock()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+        cls.smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=cls.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_TIMEOUT=5,
+        )
+        cls.smtp_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.smtp_settings.disable()
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.connections = 0
+        self.smtp.messages = []
+        self.smtp.drop_after = 0
+
+
+class PooledMailerTests(SMTPStandInMixin, SimpleTestCase):
+    def _messages(self, count):
+        return [EmailMessage(f'Message {i}', 'Body', 'crm@example.com', [f'user{i}@example.com']) for i in range(count)]
+
+    def test_batch_shares_one_connection(self):
+        with PooledMailer(batch_size=10) as mailer:
+            results = mailer.send_messages(self._messages(5))
+        self.assertEqual([error for _, error in results], [None] * 5)
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_batch_size_starts_new_session(self):
+        with PooledMailer(batch_size=2) as mailer:
+            mailer.send_messages(self._messages(5))
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(mailer.connections_opened, 3)
+        self.assertEqual(self.smtp.connections, 3)
+
+    def test_reconnects_when_server_drops_connection(self):
+        self.smtp.drop_after = 2
+        with PooledMailer(batch_size=50) as mailer:
+            results = mailer.send_messages(self._messages(5))
+        self.assertEqual([error for _, error in results], [None] * 5)
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(mailer.connections_opened, 3)
+
+
+@override_settings(NOTIFICATION_OUTBOX_RUNNER='command')
+class SendClientCredentialsCommandTests(SMTPStandInMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        for i in range(3):
+            user = User.objects.create_user(username=f'client{i}', password='pass', role='CLIENT')
+            Client.objects.create(
+                user=user, company_name=f'Company {i}', contact_person='John Doe',
+                contact_email=f'client{i}@example.com', contact_phone='9999999999',
+                is_approved=i != 2,
+            )
+
+    def test_sends_pending_credentials_over_one_connection(self):
+        out = StringIO()
+        call_command('send_client_credentials', stdout=out)
+
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertIn('Sent 2 credential email(s) over 1 SMTP connection(s)', out.getvalue())
+        sent = ClientCredential.objects.filter(is_sent=True).values_list('client__company_name', flat=True)
+        self.assertEqual(sorted(sent), ['Company 0', 'Company 1'])
+        self.assertEqual(
+            Notification.objects.filter(notification_type='CREDENTIALS', status=Notification.Status.SENT).count(), 2
+        )
+
+        # Nothing left to send the second time round
+        call_command('send_client_credentials', stdout=StringIO())
+        self.assertEqual(len(self.smtp.messages), 2)
+
+    def test_dry_run_sends_nothing(self):
+        out = StringIO()
+        call_command('send_client_credentials', dry_run=True, stdout=out)
+        self.assertIn('2 client(s) would be emailed', out.getvalue())
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertFalse(Notification.objects.exists())
+
+
+class _TwilioHandler(BaseHTTPRequestHandler):
+    """Fake Twilio Messages endpoint; a To of whatsapp:+10000000000 is rejected."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        server = self.server
+        with server.lock:
+            server.requests.append((self.client_address, self.path, form))
+            sid = f'SM{len(server.requests):032d}'
+        time.sleep(server.latency)
+        if form['To'] == 'whatsapp:+10000000000':
+            status, payload = 400, {'code': 63003, 'message': 'Invalid destination'}
+        else:
+            status, payload = 201, {'sid': sid, 'status': 'queued'}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class WhatsAppDispatcherTests(SimpleTestCase):
+    """WhatsAppDispatcher against a local fake Twilio endpoint."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.twilio = ThreadingHTTPServer(('127.0.0.1', 0), _TwilioHandler)
+        cls.twilio.daemon_threads = True
+        cls.twilio.lock = threading.Lock()
+        threading.Thread(target=cls.twilio.serve_forever, daemon=True).start()
+        cls.api_url = f'http://127.0.0.1:{cls.twilio.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.twilio.shutdown()
+        cls.twilio.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.twilio.requests = []
+        self.twilio.latency = 0
+
+    def _dispatcher(self, **kwargs):
+        options = {'rate': 1000, 'workers': 3, 'dedupe_seconds': 60, **kwargs}
+        dispatcher = WhatsAppDispatcher(
+            account_sid='AC123', auth_token='token', from_number='+14155238886', api_url=self.api_url, **options
+        )
+        self.addCleanup(dispatcher.close)
+        return dispatcher
+
+    def test_concurrent_sends_reuse_pooled_connections(self):
+        self.twilio.latency = 0.05
+        dispatcher = self._dispatcher()
+        results = dispatcher.send_many([(f'+9199999000{i:02d}', f'Message {i}') for i in range(9)])
+
+        self.assertTrue(all(sid and error is None for sid, error in results))
+        self.assertEqual(len(self.twilio.requests), 9)
+        address, path, form = self.twilio.requests[0]
+        self.assertEqual(path, '/2010-04-01/Accounts/AC123/Messages.json')
+        self.assertEqual(form['From'], 'whatsapp:+14155238886')
+        self.assertTrue(form['To'].startswith('whatsapp:+91'))
+        # Keep-alive connections are shared: never more than one per worker
+        self.assertLessEqual(len({address for address, _, _ in self.twilio.requests}), 3)
+
+    def test_rate_limit_spaces_out_sends(self):
+        dispatcher = self._dispatcher(rate=20, burst=1)
+        started = time.monotonic()
+        dispatcher.send_many([(f'+91999990000{i}', 'Hi') for i in range(5)])
+        # Four tokens have to be waited for at 20/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_token_bucket_waits_for_refill(self):
+        now = [0.0]
+        waits = []
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=waits.append)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [0, 0, 0.5, 1.0])
+        now[0] = 10.0
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_duplicates_within_window_are_coalesced(self):
+        dispatcher = self._dispatcher()
+        first = dispatcher.send('+919999900000', 'Payment approved')
+        second = dispatcher.send('whatsapp:+919999900000', 'Payment approved')
+        dispatcher.send('+919999900000', 'Booking confirmed')
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.twilio.requests), 2)
+
+        dispatcher = self._dispatcher(dedupe_seconds=0)
+        dispatcher.send('+919999900000', 'Payment approved')
+        dispatcher.send('+919999900000', 'Payment approved')
+        self.assertEqual(len(self.twilio.requests), 4)
+
+    def test_rejection_raises_and_is_not_coalesced(self):
+        dispatcher = self._dispatcher()
+        for _ in range(2):
+            with self.assertRaisesMessage(WhatsAppError, 'Invalid destination'):
+                dispatcher.send('+10000000000', 'Hi')
+        self.assertEqual(len(self.twilio.requests), 2)
+
+    def test_outbox_records_twilio_sid(self):
+        with override_settings(
+            TWILIO_ACCOUNT_SID='AC123', TWILIO_AUTH_TOKEN='token', TWILIO_API_URL=self.api_url,
+            WHATSAPP_RATE_PER_SECOND=1000,
+        ):
+            notification = mock.Mock(whatsapp_to='+919999900000', message='Hello')
+            from notifications.outbox import _send_whatsapp
+
+            sid = _send_whatsapp(notification)
+        self.assertEqual(sid, 'SM' + '1'.zfill(32))
+        self.assertEqual(self.twilio.requests[0][2]['Body'], 'Hello')
@@ -5,6 +5,10 @@ app_name = 'notifications'
 
 urlpatterns = [
     path('', views.notification_list, name='notification_list'),
+    path('unread-count/', views.unread_count_api, name='unread_count'),
+    path('mark-read/', views.mark_notifications_read, name='mark_read'),
+    path('stream/', views.notification_stream, name='stream'),
     path('activity/', views.activity_feed, name='activity_feed'),
+    path('activity/archive/', views.activity_archive, name='activity_archive'),
     path('callback/request/', views.request_callback, name='request_callback'),
 ]
\ No newline at end of file
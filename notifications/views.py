@@ -4,11 +4,15 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from collections import Counter
+import json
 from .models import Notification
 from .models import SupportRequest
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from urllib.parse import urlencode
 
 
 @login_required
@@ -55,47 +59,78 @@ def request_callback(request):
 	return redirect('accounts:client_portal')
 @login_required
 def notification_list(request):
-	"""List notifications with pagination and filters. Admin/Owner/Superuser sees all; others see own."""
+	"""List notifications with keyset pagination and filters. Admin/Owner/Superuser sees all; others see own."""
+	from .listing import list_filters, notification_page, status_facets
+
 	user = request.user
-	base_qs = Notification.objects.select_related('recipient', 'sent_by', 'related_booking', 'related_application', 'related_payment').order_by('-created_at')
-	if getattr(user, 'role', None) in ['ADMIN', 'OWNER'] or getattr(user, 'is_superuser', False):
-		qs = base_qs
-	else:
-		qs = base_qs.filter(recipient=user)
-
-	# Filters: status, channel, subject/message search, page_size
-	status = request.GET.get('status', '').strip()
-	channel = request.GET.get('channel', '').strip()
-	q = request.GET.get('q', '').strip()
+	filters = list_filters(request.GET)
 	page_size = request.GET.get('page_size') or '100'
 	try:
 		page_size = max(1, min(200, int(page_size)))
 	except Exception:
 		page_size = 100
 
-	if status:
-		qs = qs.filter(status=status)
-	if channel:
-		qs = qs.filter(channel=channel)
-	if q:
-		qs = qs.filter(Q(subject__icontains=q) | Q(message__icontains=q))
-
-	paginator = Paginator(qs, page_size)
-	page_number = request.GET.get('page')
-	page_obj = paginator.get_page(page_number)
-
-	status_counts = Counter(qs.values_list('status', flat=True))
+	page_obj = notification_page(user, request.GET, page_size)
 
 	return render(request, 'notifications/notification_list.html', {
 		'page_obj': page_obj,
-		'status_counts_items': list(status_counts.items()),
-		'filter_status': status,
-		'filter_channel': channel,
-		'filter_q': q,
+		'status_counts_items': status_facets(user, filters),
+		'filter_status': filters['status'],
+		'filter_channel': filters['channel'],
+		'filter_q': filters['q'],
 		'page_size': page_size,
+		'filter_query': urlencode({**{k: v for k, v in filters.items() if v}, 'page_size': page_size}),
 	})
 
 
+@login_required
+def unread_count_api(request):
+	"""JSON unread count for the navbar badge (cached; see notifications.listing)."""
+	from .listing import unread_count
+	return JsonResponse({'unread': unread_count(request.user)})
+
+
+@login_required
+@require_POST
+def mark_notifications_read(request):
+	"""Mark all of the current user's notifications as read."""
+	from .listing import mark_all_read
+	updated = mark_all_read(request.user)
+	if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+		return JsonResponse({'marked_read': updated, 'unread': 0})
+	messages.success(request, f'Marked {updated} notification(s) as read.')
+	return redirect('notifications:notification_list')
+
+
+async def notification_stream(request):
+	"""
+	Server-sent events with live notifications and pending-approval counts for staff users.
+
+	Needs an ASGI server; under WSGI it answers 204 so EventSource stops retrying
+	and the page keeps using the cached unread-count API.
+	"""
+	from asgiref.sync import sync_to_async
+	from django.core.handlers.asgi import ASGIRequest
+	from .stream import event_stream
+
+	user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+	if user is None or getattr(user, 'role', '').upper() == 'CLIENT':
+		return HttpResponse(status=403)
+	if not isinstance(request, ASGIRequest):
+		return HttpResponse(status=204)
+
+	last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+	try:
+		last_event_id = int(last_event_id) if last_event_id else None
+	except ValueError:
+		last_event_id = None
+
+	response = StreamingHttpResponse(event_stream(user, last_event_id), content_type='text/event-stream')
+	response['Cache-Control'] = 'no-cache'
+	response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+	return response
+
+
 @login_required
 def activity_feed(request):
 	"""
@@ -157,10 +192,18 @@ def activity_feed(request):
 	page_number = request.GET.get('page')
 	page_obj = paginator.get_page(page_number)
 	
-	# Get statistics
-	total_activities = activities_qs.count()
-	action_counts = Counter(activities_qs.values_list('action', flat=True))
-	entity_counts = Counter(activities_qs.values_list('entity_type', flat=True))
+	# Get statistics (grouped in the database; older entries live in the archive)
+	from django.db.models import Count
+	from activity_logs.models import ActivityLogSegment
+	total_activities = paginator.count
+	action_counts = {
+		row['action']: row['count']
+		for row in activities_qs.order_by().values('action').annotate(count=Count('id')).order_by('-count')
+	}
+	entity_counts = {
+		row['entity_type']: row['count']
+		for row in activities_qs.order_by().values('entity_type').annotate(count=Count('id')).order_by('-count')
+	}
 	
 	# Get unique users for filter dropdown
 	from django.contrib.auth import get_user_model
@@ -170,12 +213,14 @@ def activity_feed(request):
 	).order_by('first_name', 'last_name', 'email')
 	
 	# Role counts
-	role_activity_counts = {}
-	for role_choice in ['SALES', 'MANAGER', 'CLIENT', 'ADMIN', 'OWNER']:
-		role_users = User.objects.filter(role__iexact=role_choice).values_list('id', flat=True)
-		count = activities_qs.filter(user_id__in=role_users).count()
-		if count > 0:
-			role_activity_counts[role_choice] = count
+	role_totals = Counter()
+	for row in activities_qs.order_by().values('user__role').annotate(count=Count('id')):
+		role_totals[(row['user__role'] or '').upper()] += row['count']
+	role_activity_counts = {
+		role_choice: role_totals[role_choice]
+		for role_choice in ['SALES', 'MANAGER', 'CLIENT', 'ADMIN', 'OWNER']
+		if role_totals[role_choice] > 0
+	}
 	
 	context = {
 		'page_obj': page_obj,
@@ -192,6 +237,42 @@ def activity_feed(request):
 		'page_size': page_size,
 		'action_types': ActivityLog.ACTION_TYPES,
 		'entity_types': ActivityLog.ENTITY_TYPES,
+		'archive_segments': ActivityLogSegment.objects.all()[:24],
 	}
 	
 	return render(request, 'notifications/activity_feed.html', context)
+
+
+@login_required
+def activity_archive(request):
+	"""Download one archived month of activity logs (JSON lines), streamed from its segment."""
+	from datetime import datetime
+	from django.http import Http404
+	from django.utils import timezone
+	from activity_logs.archive import iter_archived
+
+	user_role = getattr(request.user, 'role', '').upper()
+	if not (user_role in ['ADMIN', 'OWNER'] or getattr(request.user, 'is_superuser', False)):
+		messages.error(request, 'You do not have permission to access the activity archive.')
+		return render(request, 'errors/403.html', status=403)
+
+	try:
+		month = datetime.strptime(request.GET.get('month', ''), '%Y-%m')
+	except ValueError:
+		raise Http404('Unknown archive month')
+	start = timezone.make_aware(month)
+	end = timezone.make_aware(month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1))
+
+	user_filter = request.GET.get('user', '').strip()
+	entries = iter_archived(
+		start=start,
+		end=end,
+		user_id=int(user_filter) if user_filter.isdigit() else None,
+		action=request.GET.get('action', '').strip() or None,
+		entity_type=request.GET.get('entity', '').strip() or None,
+		q=request.GET.get('q', '').strip() or None,
+	)
+	lines = (json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+	response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+	response['Content-Disposition'] = f'attachment; filename="activity-{month:%Y-%m}.jsonl"'
+	return response
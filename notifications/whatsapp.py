@@ -0,0 +1,206 @@
+"""
+WhatsApp dispatcher for Agnivridhi CRM
+
+Sends WhatsApp messages through Twilio's Messages REST API from a bounded
+thread pool. One dispatcher lives per process:
+
+- a single requests.Session keeps HTTPS connections to Twilio alive and
+  pooled (one per worker) instead of a new client and handshake per send
+- a token bucket holds the process to WHATSAPP_RATE_PER_SECOND, the
+  sender's messages-per-second limit at Twilio
+- the same body to the same number within WHATSAPP_DEDUPE_SECONDS is sent
+  once; later callers get the first send's result
+
+Usage:
+    from notifications.whatsapp import get_dispatcher
+
+    sid = get_dispatcher().send('+919876543210', 'Hello')        # blocks
+    future = get_dispatcher().submit('+919876543210', 'Hello')   # returns at once
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WhatsAppError(Exception):
+    """Twilio refused the message or could not be reached."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, at most ``capacity`` banked.
+
+    acquire() reserves a token and sleeps until it is due, so concurrent
+    callers queue up behind each other instead of bursting past the limit.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting if none is available. Returns the seconds waited."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+def normalize_number(number):
+    """'+9198...' -> 'whatsapp:+9198...' (Twilio's WhatsApp address format)."""
+    number = number.strip().replace(' ', '')
+    return number if number.startswith('whatsapp:') else f'whatsapp:{number}'
+
+
+class WhatsAppDispatcher:
+    """Long-lived, rate-limited, concurrent sender for Twilio WhatsApp messages."""
+
+    def __init__(self, account_sid=None, auth_token=None, from_number=None, api_url=None,
+                 rate=None, burst=None, workers=None, dedupe_seconds=None, timeout=10):
+        self.account_sid = account_sid or settings.TWILIO_ACCOUNT_SID
+        self.auth_token = auth_token or settings.TWILIO_AUTH_TOKEN
+        self.from_number = normalize_number(from_number or settings.TWILIO_WHATSAPP_FROM)
+        api_url = (api_url or getattr(settings, 'TWILIO_API_URL', 'https://api.twilio.com')).rstrip('/')
+        self.messages_url = f'{api_url}/2010-04-01/Accounts/{self.account_sid}/Messages.json'
+        self.timeout = timeout
+        self.workers = workers or getattr(settings, 'WHATSAPP_DISPATCH_THREADS', 4)
+        self.dedupe_seconds = (
+            getattr(settings, 'WHATSAPP_DEDUPE_SECONDS', 60) if dedupe_seconds is None else dedupe_seconds
+        )
+        self.bucket = TokenBucket(
+            rate or getattr(settings, 'WHATSAPP_RATE_PER_SECOND', 1),
+            burst or getattr(settings, 'WHATSAPP_RATE_BURST', None),
+        )
+
+        self.session = requests.Session()
+        self.session.auth = (self.account_sid, self.auth_token)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='whatsapp')
+
+        self._recent = {}  # (to, body digest) -> (submitted at, future)
+        self._recent_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.account_sid and self.auth_token)
+
+    def submit(self, to_number, body):
+        """
+        Queue a message on the worker pool and return a Future for its Twilio SID.
+
+        A message identical to one submitted for the same number within the
+        dedupe window returns that earlier Future instead of sending again
+        (unless the earlier send failed).
+        """
+        to_number = normalize_number(to_number)
+        key = (to_number, hashlib.sha256(body.encode('utf-8')).hexdigest())
+        now = time.monotonic()
+        with self._recent_lock:
+            self._recent = {
+                k: (at, future) for k, (at, future) in self._recent.items()
+                if now - at < self.dedupe_seconds
+            }
+            if key in self._recent:
+                future = self._recent[key][1]
+                if not (future.done() and future.exception()):
+                    logger.info('Coalesced duplicate WhatsApp message to %s', to_number)
+                    return future
+            future = self.executor.submit(self._post, to_number, body)
+            if self.dedupe_seconds:
+                self._recent[key] = (now, future)
+        return future
+
+    def send(self, to_number, body):
+        """Send one message and wait for it; returns the Twilio SID or raises WhatsAppError."""
+        return self.submit(to_number, body).result()
+
+    def send_many(self, messages):
+        """
+        Send (to_number, body) pairs concurrently.
+
+        Returns a list of (sid, error) pairs in the same order; one of the two is None.
+        """
+        futures = [self.submit(to_number, body) for to_number, body in messages]
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    def _post(self, to_number, body):
+        if not self.configured:
+            raise WhatsAppError('Twilio credentials are not configured')
+        self.bucket.acquire()
+        try:
+            response = self.session.post(
+                self.messages_url,
+                data={'From': self.from_number, 'To': to_number, 'Body': body},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise WhatsAppError(f'Twilio unreachable: {e}') from e
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.status_code >= 400:
+            raise WhatsAppError(
+                f"Twilio error {payload.get('code', response.status_code)}: "
+                f"{payload.get('message', response.reason)}"
+            )
+        logger.info('WhatsApp sent to %s. SID: %s', to_number, payload.get('sid'))
+        return payload.get('sid')
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+_dispatcher = None
+_dispatcher_key = None
+_dispatcher_lock = threading.Lock()
+
+
+def _settings_key():
+    return tuple(getattr(settings, name, None) for name in (
+        'TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_WHATSAPP_FROM', 'TWILIO_API_URL',
+        'WHATSAPP_RATE_PER_SECOND', 'WHATSAPP_RATE_BURST', 'WHATSAPP_DISPATCH_THREADS',
+        'WHATSAPP_DEDUPE_SECONDS',
+    ))
+
+
+def get_dispatcher():
+    """The process-wide WhatsAppDispatcher (rebuilt if the Twilio settings change)."""
+    global _dispatcher, _dispatcher_key
+    with _dispatcher_lock:
+        key = _settings_key()
+        if _dispatcher is None or key != _dispatcher_key:
+            if _dispatcher is not None:
+                _dispatcher.close()
+            _dispatcher = WhatsAppDispatcher()
+            _dispatcher_key = key
+        return _dispatcher
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment, RevenueEntry
+from .models import Payment, RevenueEntry, RevenueSnapshot, DailyRevenueRollup
 
 
 @admin.register(Payment)
@@ -49,10 +49,46 @@ class PaymentAdmin(admin.ModelAdmin):
 @admin.register(RevenueEntry)
 class RevenueEntryAdmin(admin.ModelAdmin):
     list_display = (
-        'client', 'total_pitched_amount', 'received_amount', 'pending_amount',
+        'client', 'pitched_delta', 'received_delta', 'pending_delta',
+        'total_pitched_amount', 'received_amount', 'pending_amount',
         'source', 'recorded_by', 'created_at'
     )
     list_filter = ('source', 'created_at', 'recorded_by')
     search_fields = ('client__company_name', 'recorded_by__username')
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
+
+    def has_change_permission(self, request, obj=None):
+        """Ledger entries are append-only; corrections are new ADJUSTMENT entries"""
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RevenueSnapshot)
+class RevenueSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('client', 'last_entry_id', 'total_pitched_amount', 'received_amount', 'pending_amount', 'entry_count', 'created_at')
+    search_fields = ('client__company_name',)
+    ordering = ('-created_at',)
+    readonly_fields = ('client', 'last_entry_id', 'total_pitched_amount', 'received_amount', 'pending_amount', 'entry_count', 'created_at')
+
+    def has_add_permission(self, request):
+        """Snapshots are written by the compact_revenue_ledger command"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyRevenueRollup)
+class DailyRevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'payment_method', 'received_by', 'status', 'total_amount', 'payment_count')
+    list_filter = ('status', 'payment_method', 'day')
+    ordering = ('-day',)
+    date_hierarchy = 'day'
+    readonly_fields = ('day', 'payment_method', 'received_by', 'status', 'total_amount', 'payment_count')
+
+    def has_add_permission(self, request):
+        """Rollup rows are maintained automatically"""
+        return False
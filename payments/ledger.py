@@ -0,0 +1,225 @@
+"""
+Client revenue ledger for Agnivridhi CRM
+
+RevenueEntry rows are append-only signed deltas; RevenueSnapshot rows fold
+every delta up to an entry id into a balance. A client's ledger balance is
+therefore "latest snapshot + deltas since", which costs one indexed read no
+matter how old the client is, and auditing a client only has to look at the
+deltas after its snapshot. compact_ledger() (compact_revenue_ledger command)
+periodically rolls old deltas into new snapshots.
+
+The revenue columns on Client remain the fast read path for pages. Every
+write to them appends the change here: Client.save() does so itself, and
+the queryset update()/bulk_update() paths (payment approval, bulk
+recompute, GST recalculation, the legacy sync commands) call
+record_revenue_change() or build entries in bulk. Each change first
+catches the ledger up with the stored columns if they had drifted, so the
+balance stays equal to them. audit_client_balances() reports clients whose
+columns drifted from their ledger.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import RevenueEntry, RevenueSnapshot
+
+
+BALANCE_FIELDS = {
+    'total_pitched_amount': 'pitched_delta',
+    'received_amount': 'received_delta',
+    'pending_amount': 'pending_delta',
+}
+
+ZERO = Decimal('0.00')
+
+
+def _zero_balance():
+    return {field: ZERO for field in BALANCE_FIELDS}
+
+
+def _delta(before, after, field):
+    return Decimal(after.get(field) or 0) - Decimal((before or {}).get(field) or 0)
+
+
+def build_revenue_entry(client_id, before, after, source, recorded_by=None, note=''):
+    """
+    Unsaved RevenueEntry for a change from ``before`` to ``after``.
+
+    ``before``/``after`` are dicts with total_pitched_amount, received_amount
+    and pending_amount (``before=None`` means a new client with no revenue).
+    """
+    return RevenueEntry(
+        client_id=client_id,
+        recorded_by=recorded_by,
+        source=source,
+        note=note,
+        pitched_delta=_delta(before, after, 'total_pitched_amount'),
+        received_delta=_delta(before, after, 'received_amount'),
+        pending_delta=_delta(before, after, 'pending_amount'),
+        total_pitched_amount=after.get('total_pitched_amount') or ZERO,
+        received_amount=after.get('received_amount') or ZERO,
+        pending_amount=after.get('pending_amount') or ZERO,
+    )
+
+
+CATCH_UP_NOTE = 'Ledger caught up with stored client revenue'
+
+
+def catch_up_entries(before_by_client, recorded_by=None):
+    """
+    ADJUSTMENT entries that bring each client's ledger balance to ``before``.
+
+    ``before_by_client`` maps client ids to the stored balance a change is
+    about to start from. Where the ledger disagrees (legacy data, or writes
+    made before every path was recorded) an entry for the difference is
+    returned, so the deltas of the change itself keep the ledger equal to
+    the stored columns.
+    """
+    if not before_by_client:
+        return []
+    balances = ledger_balances(list(before_by_client))
+    entries = []
+    for client_id, before in before_by_client.items():
+        ledger = balances.get(client_id, _zero_balance())
+        if any(Decimal(before.get(field) or 0) != ledger[field] for field in BALANCE_FIELDS):
+            entries.append(build_revenue_entry(client_id, ledger, before, 'ADJUSTMENT', recorded_by, CATCH_UP_NOTE))
+    return entries
+
+
+def record_revenue_change(client_id, before, after, source, recorded_by=None, note=''):
+    """
+    Append a ledger entry for a client revenue change and return it.
+
+    ``before=None`` means a new client with no ledger history; otherwise the
+    ledger is first caught up to ``before`` (see catch_up_entries()).
+    """
+    if before is not None:
+        for catch_up in catch_up_entries({client_id: before}, recorded_by):
+            catch_up.save()
+    entry = build_revenue_entry(client_id, before, after, source, recorded_by, note)
+    entry.save()
+    return entry
+
+
+def _latest_snapshot_id(client_ref):
+    return Subquery(
+        RevenueSnapshot.objects.filter(client_id=client_ref)
+        .order_by('-last_entry_id')
+        .values('last_entry_id')[:1]
+    )
+
+
+def ledger_balances(client_ids=None):
+    """
+    Ledger balance for many clients in two queries.
+
+    Returns {client_id: {'total_pitched_amount', 'received_amount',
+    'pending_amount'}} for every client that has a snapshot or entries.
+    """
+    snapshots = RevenueSnapshot.objects.filter(
+        last_entry_id=_latest_snapshot_id(OuterRef('client_id'))
+    )
+    entries = RevenueEntry.objects.annotate(
+        snapshot_last=Coalesce(_latest_snapshot_id(OuterRef('client_id')), Value(0))
+    ).filter(id__gt=F('snapshot_last'))
+    if client_ids is not None:
+        snapshots = snapshots.filter(client_id__in=client_ids)
+        entries = entries.filter(client_id__in=client_ids)
+
+    balances = {}
+    for snap in snapshots.values('client_id', *BALANCE_FIELDS):
+        balances[snap.pop('client_id')] = snap
+    sums = entries.values('client_id').annotate(
+        **{f'sum_{delta}': Sum(delta) for delta in BALANCE_FIELDS.values()}
+    )
+    for row in sums:
+        balance = balances.setdefault(row['client_id'], _zero_balance())
+        for field, delta in BALANCE_FIELDS.items():
+            balance[field] = balance[field] + (row[f'sum_{delta}'] or ZERO)
+    return balances
+
+
+def ledger_balance(client_id):
+    """Ledger balance for one client (zeros if it has no ledger history)."""
+    return ledger_balances([client_id]).get(client_id, _zero_balance())
+
+
+def audit_client_balances(client_ids=None):
+    """
+    Compare Client revenue columns with the ledger.
+
+    Returns a list of (client_id, field, stored, ledger) for every mismatch.
+    """
+    from clients.models import Client
+
+    balances = ledger_balances(client_ids)
+    clients = Client.objects.filter(Q(pk__in=list(balances)) | Q(received_amount__gt=0) | Q(total_pitched_amount__gt=0))
+    if client_ids is not None:
+        clients = clients.filter(pk__in=client_ids)
+
+    mismatches = []
+    for row in clients.values('pk', *BALANCE_FIELDS):
+        ledger = balances.get(row['pk'], _zero_balance())
+        for field in BALANCE_FIELDS:
+            if (row[field] or ZERO) != ledger[field]:
+                mismatches.append((row['pk'], field, row[field], ledger[field]))
+    return mismatches
+
+
+def compact_ledger(before, client_ids=None, prune=False):
+    """
+    Fold entries created before ``before`` into new per-client snapshots.
+
+    Only entries newer than each client's latest snapshot are folded. With
+    ``prune=True`` the folded entries are deleted afterwards (their totals
+    live on in the snapshot). Returns (snapshots_created, entries_folded).
+    """
+    cutoff_id = RevenueEntry.objects.filter(created_at__lt=before).aggregate(last=Max('id'))['last']
+    if cutoff_id is None:
+        return 0, 0
+
+    pending = RevenueEntry.objects.annotate(
+        snapshot_last=Coalesce(_latest_snapshot_id(OuterRef('client_id')), Value(0))
+    ).filter(id__gt=F('snapshot_last'), id__lte=cutoff_id)
+    if client_ids is not None:
+        pending = pending.filter(client_id__in=client_ids)
+
+    groups = list(pending.values('client_id').annotate(
+        last_id=Max('id'),
+        folded=Count('id'),
+        **{f'sum_{delta}': Sum(delta) for delta in BALANCE_FIELDS.values()}
+    ))
+    if not groups:
+        return 0, 0
+
+    previous = {
+        snap['client_id']: snap
+        for snap in RevenueSnapshot.objects.filter(
+            client_id__in=[g['client_id'] for g in groups],
+            last_entry_id=_latest_snapshot_id(OuterRef('client_id')),
+        ).values('client_id', 'entry_count', *BALANCE_FIELDS)
+    }
+
+    snapshots = []
+    for group in groups:
+        prev = previous.get(group['client_id'], {'entry_count': 0, **_zero_balance()})
+        snapshots.append(RevenueSnapshot(
+            client_id=group['client_id'],
+            last_entry_id=group['last_id'],
+            entry_count=prev['entry_count'] + group['folded'],
+            **{
+                field: prev[field] + (group[f'sum_{delta}'] or ZERO)
+                for field, delta in BALANCE_FIELDS.items()
+            },
+        ))
+    RevenueSnapshot.objects.bulk_create(snapshots)
+
+    folded = sum(g['folded'] for g in groups)
+    if prune:
+        doomed = RevenueEntry.objects.filter(id__lte=cutoff_id)
+        if client_ids is not None:
+            doomed = doomed.filter(client_id__in=client_ids)
+        # Queryset delete: bypasses the append-only guard on RevenueEntry.delete()
+        doomed.delete()
+    return len(snapshots), folded
@@ -0,0 +1,45 @@
+"""
+Roll old revenue ledger deltas into per-client snapshots.
+
+Usage:
+    python manage.py compact_revenue_ledger                 # fold entries older than 90 days
+    python manage.py compact_revenue_ledger --days 30 --prune
+    python manage.py compact_revenue_ledger --audit         # also compare Client columns with the ledger
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from payments.ledger import audit_client_balances, compact_ledger
+
+
+class Command(BaseCommand):
+    help = 'Fold revenue ledger entries older than N days into RevenueSnapshot rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Fold entries older than this many days (default 90)')
+        parser.add_argument('--prune', action='store_true', help='Delete folded entries after snapshotting them')
+        parser.add_argument('--audit', action='store_true', help='Report clients whose revenue columns differ from the ledger')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        self.stdout.write(f'Compacting revenue ledger entries created before {before:%Y-%m-%d %H:%M}...')
+
+        with transaction.atomic():
+            snapshots, folded = compact_ledger(before, prune=options['prune'])
+
+        pruned = ' and pruned' if options['prune'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {folded} entries folded{pruned} into {snapshots} snapshots'
+        ))
+
+        if options['audit']:
+            mismatches = audit_client_balances()
+            for client_id, field, stored, ledger in mismatches:
+                self.stdout.write(self.style.WARNING(
+                    f'  ⚠️  Client #{client_id} {field}: stored ₹{stored}, ledger ₹{ledger}'
+                ))
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS('✅ Client revenue columns match the ledger'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from payments.models import DailyRevenueRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup table from scratch using Payment records'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding daily revenue rollup from payments...')
+        rows = DailyRevenueRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rollup rebuilt: {rows} buckets written'))
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:29
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_rollup(apps, schema_editor):
+    """Backfill the rollup from existing payments"""
+    from django.db.models import Count, Sum
+    from django.db.models.functions import Coalesce, TruncDate
+
+    Payment = apps.get_model('payments', 'Payment')
+    DailyRevenueRollup = apps.get_model('payments', 'DailyRevenueRollup')
+    rows = (
+        Payment.objects
+        .annotate(day=TruncDate(Coalesce('payment_date', 'created_at')))
+        .values('day', 'payment_method', 'received_by_id', 'status')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    DailyRevenueRollup.objects.bulk_create([
+        DailyRevenueRollup(
+            day=row['day'],
+            payment_method=row['payment_method'],
+            received_by_id=row['received_by_id'],
+            status=row['status'],
+            total_amount=row['total'] or Decimal('0.00'),
+            payment_count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0005_simplify_payment_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Payment date (falls back to creation date)')),
+                ('payment_method', models.CharField(choices=[('UPI_QR', 'UPI QR'), ('BANK_TRANSFER', 'Bank Transfer (NEFT/RTGS/IMPS)'), ('CASH', 'Cash'), ('CHEQUE', 'Cheque/DD'), ('CARD', 'Card (POS/Swipe)'), ('OTHER', 'Other')], help_text='Payment method/channel', max_length=50)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending Verification'), ('CAPTURED', 'Payment Received'), ('FAILED', 'Failed/Disputed'), ('REFUNDED', 'Refunded')], help_text='Payment status', max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of payment amounts in this bucket', max_digits=14)),
+                ('payment_count', models.IntegerField(default=0, help_text='Number of payments in this bucket')),
+                ('received_by', models.ForeignKey(blank=True, help_text='Sales employee who recorded the payments', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='revenue_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue Rollup',
+                'verbose_name_plural': 'Daily Revenue Rollups',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['status', 'day'], name='payments_da_status_8b799b_idx'), models.Index(fields=['received_by', 'status'], name='payments_da_receive_a2f5c5_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenuerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'payment_method', 'received_by', 'status'), name='uniq_revenue_rollup_bucket'),
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:09
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_deltas(apps, schema_editor):
+    """Existing entries hold balances only; derive each one's delta from the previous entry."""
+    RevenueEntry = apps.get_model('payments', 'RevenueEntry')
+    previous = {}
+    batch = []
+    for entry in RevenueEntry.objects.order_by('client_id', 'created_at', 'id').iterator(chunk_size=2000):
+        prev = previous.get(entry.client_id, (Decimal('0.00'), Decimal('0.00'), Decimal('0.00')))
+        entry.pitched_delta = entry.total_pitched_amount - prev[0]
+        entry.received_delta = entry.received_amount - prev[1]
+        entry.pending_delta = entry.pending_amount - prev[2]
+        previous[entry.client_id] = (entry.total_pitched_amount, entry.received_amount, entry.pending_amount)
+        batch.append(entry)
+        if len(batch) >= 2000:
+            RevenueEntry.objects.bulk_update(batch, ['pitched_delta', 'received_delta', 'pending_delta'])
+            batch = []
+    if batch:
+        RevenueEntry.objects.bulk_update(batch, ['pitched_delta', 'received_delta', 'pending_delta'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0012_client_normalized_identifiers'),
+        ('payments', '0006_dailyrevenuerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.PositiveBigIntegerField(help_text='Highest RevenueEntry id included in this snapshot')),
+                ('total_pitched_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('received_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('entry_count', models.PositiveIntegerField(default=0, help_text='Ledger entries folded into this snapshot (cumulative)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Revenue Snapshot',
+                'verbose_name_plural': 'Revenue Snapshots',
+                'ordering': ['-last_entry_id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='revenueentry',
+            name='pending_delta',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Signed change to the pending amount', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='revenueentry',
+            name='pitched_delta',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Signed change to the total pitched amount', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='revenueentry',
+            name='received_delta',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Signed change to the received amount', max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='revenueentry',
+            name='source',
+            field=models.CharField(choices=[('CLIENT_CREATION', 'Client Creation'), ('MANUAL_UPDATE', 'Manual Update'), ('PAYMENT_CAPTURED', 'Payment Captured'), ('ADJUSTMENT', 'Recompute Adjustment'), ('OTHER', 'Other')], default='OTHER', help_text='Source/context of the revenue entry', max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='revenueentry',
+            index=models.Index(fields=['client', 'id'], name='payments_re_client__07f21d_idx'),
+        ),
+        migrations.AddField(
+            model_name='revenuesnapshot',
+            name='client',
+            field=models.ForeignKey(help_text='Client this balance belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='revenue_snapshots', to='clients.client'),
+        ),
+        migrations.AddIndex(
+            model_name='revenuesnapshot',
+            index=models.Index(fields=['client', '-last_entry_id'], name='payments_re_client__500009_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuesnapshot',
+            constraint=models.UniqueConstraint(fields=('client', 'last_entry_id'), name='unique_revenue_snapshot'),
+        ),
+        migrations.RunPython(backfill_deltas, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
 
+# Payment attributes that decide its DailyRevenueRollup bucket (see DailyRevenueRollup.state_for)
+ROLLUP_FIELDS = frozenset({'payment_date', 'created_at', 'payment_method', 'received_by_id', 'status', 'amount'})
+
 class Payment(models.Model):
     """
     Manual payment records - No payment gateway integration
@@ -173,6 +177,31 @@ class Payment(models.Model):
         ref = self.reference_id or f"#{self.pk or 'NEW'}"
         return f"Payment {ref} - ₹{self.amount} - {self.status}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot the rollup bucket only when it can be read without
+        # touching deferred fields; otherwise save() reads it from the row
+        if ROLLUP_FIELDS.issubset(field_names):
+            instance._rollup_state = DailyRevenueRollup.state_for(instance)
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self._rollup_state = DailyRevenueRollup.state_for(self)
+        elif ROLLUP_FIELDS.intersection(fields):
+            # Partly refreshed: the snapshot may no longer match the row
+            self.__dict__.pop('_rollup_state', None)
+    
+    def save(self, *args, **kwargs):
+        """Save and keep the daily revenue rollup in sync in the same transaction"""
+        with transaction.atomic():
+            if not self._state.adding and '_rollup_state' not in self.__dict__:
+                self._rollup_state = DailyRevenueRollup.stored_state(self.pk)
+            super().save(*args, **kwargs)
+            DailyRevenueRollup.sync_payment(self)
+    
     def is_successful(self):
         """Check if payment is successful"""
         return self.status == 'CAPTURED'
@@ -182,62 +211,69 @@ class Payment(models.Model):
         return self.is_successful() and self.refund_amount < self.amount
     
     def approve(self, approved_by_user):
-        """Approve manual payment"""
-        from django.utils import timezone
-        from decimal import Decimal
-        
-        self.status = self.Status.CAPTURED
-        self.approved_by = approved_by_user
-        self.approval_date = timezone.now()
-        if not self.payment_date:
-            self.payment_date = timezone.now()
-        self.save()
+        """
+        Approve manual payment and post its amount to the client's revenue.
         
-        # Update booking status if booking exists
-        if self.booking:
-            self.booking.status = 'PAID'
-            self.booking.payment_date = self.payment_date
-            self.booking.save()
+        Everything happens in one transaction with the payment row locked, so
+        concurrent approvals of the same payment post revenue only once.
+        Returns False if the payment had already been approved.
+        """
+        from django.utils import timezone
+        from .revenue import post_payment_revenue
         
-        # Update client revenue: increment received, recalc pending
-        if self.client and self.amount:
-            try:
-                self.client.received_amount = Decimal(self.client.received_amount or 0) + Decimal(self.amount)
-                self.client.save()  # save() will auto-recalc pending_amount
-                
-                # Log revenue entry
-                RevenueEntry.objects.create(
-                    client=self.client,
-                    recorded_by=approved_by_user,
-                    total_pitched_amount=self.client.total_pitched_amount,
-                    received_amount=self.client.received_amount,
-                    pending_amount=self.client.pending_amount,
-                    source='PAYMENT_CAPTURED',
-                    note=f'Payment approved: {self.reference_id or self.id} - ₹{self.amount}. {self.description or ""}'
-                )
-            except Exception:
-                # Don't break approval flow if revenue logging fails
-                pass
+        with transaction.atomic():
+            locked_status = (
+                Payment.objects.select_for_update()
+                .values_list('status', flat=True)
+                .get(pk=self.pk)
+            )
+            if locked_status == self.Status.CAPTURED:
+                self.refresh_from_db()
+                return False
+            
+            self.status = self.Status.CAPTURED
+            self.approved_by = approved_by_user
+            self.approval_date = timezone.now()
+            if not self.payment_date:
+                self.payment_date = timezone.now()
+            self.save()  # also moves the amount into the CAPTURED rollup bucket
+            
+            # Update booking status if booking exists
+            if self.booking:
+                self.booking.status = 'PAID'
+                self.booking.payment_date = self.payment_date
+                self.booking.save()
+            
+            # Increment received revenue under a client row lock
+            post_payment_revenue(self, approved_by_user)
+        return True
     
     def reject(self, rejected_by_user, reason=''):
         """Reject/dispute manual payment"""
         from django.utils import timezone
-        self.status = self.Status.FAILED
-        self.error_message = reason
-        self.approved_by = rejected_by_user
-        self.approval_date = timezone.now()
-        self.save()
+        with transaction.atomic():
+            self.status = self.Status.FAILED
+            self.error_message = reason
+            self.approved_by = rejected_by_user
+            self.approval_date = timezone.now()
+            self.save()  # also moves the amount into the FAILED rollup bucket
 
 
 class RevenueEntry(models.Model):
     """
-    Revenue log entries per client.
-    Captures timestamps, who recorded, and amounts for reporting.
+    Append-only revenue ledger per client.
+    
+    Each entry records the signed change (``*_delta``) to a client's pitched,
+    received and pending amounts, plus the resulting balance at the time of
+    recording. A client's ledger balance is its latest RevenueSnapshot plus
+    the deltas recorded after it (see payments.ledger). Entries are never
+    edited; corrections are new entries.
     """
     SOURCE_CHOICES = (
         ('CLIENT_CREATION', _('Client Creation')),
         ('MANUAL_UPDATE', _('Manual Update')),
         ('PAYMENT_CAPTURED', _('Payment Captured')),
+        ('ADJUSTMENT', _('Recompute Adjustment')),
         ('OTHER', _('Other')),
     )
 
@@ -256,6 +292,27 @@ class RevenueEntry(models.Model):
         help_text=_('User who recorded this entry')
     )
 
+    pitched_delta = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text=_('Signed change to the total pitched amount')
+    )
+
+    received_delta = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text=_('Signed change to the received amount')
+    )
+
+    pending_delta = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text=_('Signed change to the pending amount')
+    )
+
     total_pitched_amount = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -298,8 +355,213 @@ class RevenueEntry(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['client', '-created_at']),
+            models.Index(fields=['client', 'id']),
             models.Index(fields=['source']),
         ]
 
     def __str__(self):
         return f"RevenueEntry({self.client.company_name}) - ₹{self.received_amount} rec, ₹{self.pending_amount} pend"
+
+    def save(self, *args, **kwargs):
+        """Entries are append-only: only inserts are allowed"""
+        if not self._state.adding:
+            raise ValueError('RevenueEntry is append-only; record a new entry instead of editing one.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('RevenueEntry is append-only; use compact_revenue_ledger to prune folded entries.')
+
+
+class RevenueSnapshot(models.Model):
+    """
+    Client revenue balance folded from all ledger entries up to ``last_entry_id``.
+    
+    Written by the compact_revenue_ledger command so balance reads only need
+    the deltas recorded after the latest snapshot.
+    """
+    client = models.ForeignKey(
+        'clients.Client',
+        on_delete=models.CASCADE,
+        related_name='revenue_snapshots',
+        help_text=_('Client this balance belongs to')
+    )
+
+    last_entry_id = models.PositiveBigIntegerField(
+        help_text=_('Highest RevenueEntry id included in this snapshot')
+    )
+
+    total_pitched_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    received_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    pending_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    entry_count = models.PositiveIntegerField(
+        default=0,
+        help_text=_('Ledger entries folded into this snapshot (cumulative)')
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Revenue Snapshot')
+        verbose_name_plural = _('Revenue Snapshots')
+        ordering = ['-last_entry_id']
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'last_entry_id'], name='unique_revenue_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['client', '-last_entry_id']),
+        ]
+
+    def __str__(self):
+        return f"RevenueSnapshot({self.client_id} @ {self.last_entry_id}) - ₹{self.received_amount} rec"
+
+
+class DailyRevenueRollup(models.Model):
+    """
+    Incrementally maintained payment summary: one row per
+    day x payment_method x received_by x status.
+    Dashboards and reports aggregate this table instead of scanning Payment.
+    Kept in sync by Payment.save() and the post_delete signal; rebuild with
+    ``python manage.py rebuild_revenue_rollup``.
+    """
+    day = models.DateField(
+        help_text=_('Payment date (falls back to creation date)')
+    )
+
+    payment_method = models.CharField(
+        max_length=50,
+        choices=Payment.PAYMENT_VIA_CHOICES,
+        help_text=_('Payment method/channel')
+    )
+
+    received_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='revenue_rollups',
+        help_text=_('Sales employee who recorded the payments')
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=Payment.Status.choices,
+        help_text=_('Payment status')
+    )
+
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text=_('Sum of payment amounts in this bucket')
+    )
+
+    payment_count = models.IntegerField(
+        default=0,
+        help_text=_('Number of payments in this bucket')
+    )
+
+    class Meta:
+        verbose_name = _('Daily Revenue Rollup')
+        verbose_name_plural = _('Daily Revenue Rollups')
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'payment_method', 'received_by', 'status'],
+                name='uniq_revenue_rollup_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'day']),
+            models.Index(fields=['received_by', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_method} {self.status}: ₹{self.total_amount} ({self.payment_count})"
+
+    @staticmethod
+    def state_for(payment):
+        """Return ((day, method, received_by_id, status), amount) for a payment, or None if unsaved"""
+        from django.utils import timezone
+        when = payment.payment_date or payment.created_at
+        if not payment.pk or when is None:
+            return None
+        key = (timezone.localdate(when), payment.payment_method, payment.received_by_id, payment.status)
+        return key, Decimal(payment.amount or 0)
+
+    @classmethod
+    def stored_state(cls, payment_pk):
+        """state_for() of the payment as currently stored (None if the row is gone)"""
+        row = Payment.objects.filter(pk=payment_pk).only('pk', *ROLLUP_FIELDS).first()
+        return cls.state_for(row) if row is not None else None
+
+    @classmethod
+    def apply_delta(cls, key, amount, count):
+        """Add amount/count to a bucket, creating the row if needed (F() increments, no read-modify-write)"""
+        day, method, received_by_id, status = key
+        lookup = dict(day=day, payment_method=method, received_by_id=received_by_id, status=status)
+        updated = cls.objects.filter(**lookup).update(
+            total_amount=F('total_amount') + amount,
+            payment_count=F('payment_count') + count,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(total_amount=amount, payment_count=count, **lookup)
+        except IntegrityError:
+            # Row created concurrently - fall back to incrementing it
+            cls.objects.filter(**lookup).update(
+                total_amount=F('total_amount') + amount,
+                payment_count=F('payment_count') + count,
+            )
+
+    @classmethod
+    def sync_payment(cls, payment):
+        """Move a payment's contribution from its previous bucket to its current one"""
+        old = getattr(payment, '_rollup_state', None)
+        new = cls.state_for(payment)
+        if old == new:
+            return
+        if old is not None:
+            cls.apply_delta(old[0], -old[1], -1)
+        if new is not None:
+            cls.apply_delta(new[0], new[1], 1)
+        payment._rollup_state = new
+
+    @classmethod
+    def remove_payment(cls, payment):
+        """Drop a deleted payment's contribution"""
+        old = payment.__dict__.get('_rollup_state') or cls.state_for(payment)
+        if old is not None:
+            cls.apply_delta(old[0], -old[1], -1)
+        payment._rollup_state = None
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every bucket from Payment in a single grouped query. Returns rows written."""
+        from django.db.models import Count, Sum
+        from django.db.models.functions import Coalesce, TruncDate
+
+        rows = (
+            Payment.objects
+            .annotate(day=TruncDate(Coalesce('payment_date', 'created_at')))
+            .values('day', 'payment_method', 'received_by_id', 'status')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by()
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            objs = [
+                cls(
+                    day=row['day'],
+                    payment_method=row['payment_method'],
+                    received_by_id=row['received_by_id'],
+                    status=row['status'],
+                    total_amount=row['total'] or Decimal('0.00'),
+                    payment_count=row['count'],
+                )
+                for row in rows
+            ]
+            cls.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
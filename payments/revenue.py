@@ -0,0 +1,64 @@
+"""
+Revenue posting for approved payments
+
+Approving a payment adds its amount to the client's received revenue. Two
+managers approving payments for the same client at the same time used to
+race on a read-modify-write of Client.received_amount; here the client row
+is locked, the new totals are derived from the locked database values, and
+only the revenue columns are written back.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+
+REVENUE_FIELDS = (
+    'total_pitched_amount', 'received_amount', 'gst_percentage',
+    'gst_amount', 'total_with_gst', 'pending_amount',
+)
+
+
+def post_payment_revenue(payment, recorded_by=None):
+    """
+    Add ``payment.amount`` to its client's received revenue.
+
+    Runs in a transaction holding a row lock on the client, writes only the
+    revenue columns and appends a PAYMENT_CAPTURED ledger entry. The in-memory
+    ``payment.client`` (if loaded) is refreshed with the new totals.
+
+    Returns the dict of stored revenue values, or None if there is nothing
+    to post.
+    """
+    from clients.models import Client
+    from .ledger import record_revenue_change
+
+    if not payment.client_id or not payment.amount:
+        return None
+
+    with transaction.atomic():
+        current = (
+            Client.objects.select_for_update()
+            .only(*REVENUE_FIELDS)
+            .get(pk=payment.client_id)
+        )
+        values = Client.calculate_revenue(
+            current.total_pitched_amount,
+            Decimal(current.received_amount or 0) + Decimal(payment.amount),
+            current.gst_percentage,
+        )
+        Client.objects.filter(pk=payment.client_id).update(updated_at=timezone.now(), **values)
+
+        record_revenue_change(
+            payment.client_id,
+            before={f: getattr(current, f) for f in REVENUE_FIELDS},
+            after=values,
+            source='PAYMENT_CAPTURED',
+            recorded_by=recorded_by,
+            note=f'Payment approved: {payment.reference_id or payment.id} - ₹{payment.amount}. {payment.description or ""}'
+        )
+
+    if type(payment).client.field.is_cached(payment):
+        for field, value in values.items():
+            setattr(payment.client, field, value)
+    return values
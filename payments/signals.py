@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Payment, DailyRevenueRollup
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment_from_rollup(sender, instance, **kwargs):
+    """
+    Keep the daily revenue rollup in sync when a payment is deleted
+    (including cascades from Client deletion, which bypass Payment.delete()).
+    """
+    DailyRevenueRollup.remove_payment(instance)
@@ -1,3 +1,241 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from clients.models import Client
+from payments.ledger import audit_client_balances, compact_ledger, ledger_balance, record_revenue_change
+from payments.models import DailyRevenueRollup, Payment, RevenueEntry, RevenueSnapshot
+
+
+class DailyRevenueRollupTests(TestCase):
+    def setUp(self):
+        self.when = timezone.make_aware(datetime(2025, 3, 15, 12, 0))
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.client_obj = Client.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+        )
+
+    def _bucket(self, status):
+        return DailyRevenueRollup.objects.filter(status=status).values_list('total_amount', 'payment_count').first()
+
+    def test_rollup_follows_payment_lifecycle(self):
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal('100.00'), payment_method='CASH', payment_date=self.when,
+        )
+        self.assertEqual(self._bucket('PENDING'), (Decimal('100.00'), 1))
+
+        payment = Payment.objects.get(pk=payment.pk)
+        payment.approve(self.manager)
+        self.assertEqual(self._bucket('PENDING'), (Decimal('0.00'), 0))
+        self.assertEqual(self._bucket('CAPTURED'), (Decimal('100.00'), 1))
+
+        payment.delete()
+        self.assertEqual(self._bucket('CAPTURED'), (Decimal('0.00'), 0))
+
+    def test_deferred_loads_keep_rollup_in_sync(self):
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal('100.00'), payment_method='CASH', payment_date=self.when,
+        )
+        # Loading without the bucket fields must not touch them (it used to recurse)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual([p.pk for p in Payment.objects.only('id')], [payment.pk])
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # The previous bucket is read from the row instead
+        partial = Payment.objects.only('id', 'status').get(pk=payment.pk)
+        partial.status = 'CAPTURED'
+        partial.save()
+        self.assertEqual(self._bucket('PENDING'), (Decimal('0.00'), 0))
+        self.assertEqual(self._bucket('CAPTURED'), (Decimal('100.00'), 1))
+
+    def test_rebuild_matches_incremental_state(self):
+        for amount in ('10.00', '20.00'):
+            Payment.objects.create(
+                client=self.client_obj, amount=Decimal(amount), status='CAPTURED', payment_date=self.when,
+            )
+        # Bypass save() so the rollup drifts, then rebuild from scratch
+        Payment.objects.update(amount=Decimal('5.00'))
+        self.assertEqual(DailyRevenueRollup.rebuild(), 1)
+        self.assertEqual(self._bucket('CAPTURED'), (Decimal('10.00'), 2))
+
+
+class RevenuePostingTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.client_obj = Client.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+            total_pitched_amount=Decimal('1000.00'),
+        )
+
+    def _payment(self, amount):
+        return Payment.objects.create(
+            client=self.client_obj, amount=Decimal(amount), payment_date=timezone.now(), received_by=self.manager,
+        )
+
+    def test_concurrent_approvals_do_not_lose_updates(self):
+        # Both payments (and their clients) are loaded before either is approved
+        first = Payment.objects.select_related('client').get(pk=self._payment('100.00').pk)
+        second = Payment.objects.select_related('client').get(pk=self._payment('200.00').pk)
+        first.approve(self.manager)
+        second.approve(self.manager)
+
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.received_amount, Decimal('300.00'))
+        # 1000 + 18% GST - 300 received
+        self.assertEqual(self.client_obj.pending_amount, Decimal('880.00'))
+        self.assertEqual(second.client.received_amount, Decimal('300.00'))
+
+    def test_only_revenue_columns_written_and_posted_once(self):
+        payment = self._payment('100.00')
+        stale = Payment.objects.get(pk=payment.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(payment.approve(self.manager))
+        client_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "clients_client"')]
+        self.assertEqual(len(client_updates), 1)
+        self.assertNotIn('company_name', client_updates[0])
+
+        self.assertFalse(stale.approve(self.manager))
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.received_amount, Decimal('100.00'))
+        self.assertEqual(RevenueEntry.objects.filter(source='PAYMENT_CAPTURED').count(), 1)
+
+    def test_html_approve_view_posts_revenue(self):
+        payment = self._payment('250.00')
+        self.client.login(username='mgr', password='pass')
+        self.client.get(reverse('accounts:approve_payment', args=[payment.pk]))
+        payment.refresh_from_db()
+        self.client_obj.refresh_from_db()
+        self.assertEqual(payment.status, 'CAPTURED')
+        self.assertEqual(payment.approved_by, self.manager)
+        self.assertEqual(self.client_obj.received_amount, Decimal('250.00'))
+
+
+class RevenueLedgerTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='mgr', password='pass', role='MANAGER')
+        client_user = User.objects.create_user(username='cuser', password='pass', role='CLIENT')
+        self.client_obj = Client.objects.create(
+            user=client_user,
+            company_name='Acme Corp',
+            contact_person='John Doe',
+            contact_email='john@example.com',
+            contact_phone='9999999999',
+            total_pitched_amount=Decimal('1000.00'),
+        )
+
+    def _approve(self, amount):
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal(amount), payment_date=timezone.now(), received_by=self.manager,
+        )
+        payment.approve(self.manager)
+
+    def _stored(self):
+        self.client_obj.refresh_from_db()
+        return {
+            'total_pitched_amount': self.client_obj.total_pitched_amount,
+            'received_amount': self.client_obj.received_amount,
+            'pending_amount': self.client_obj.pending_amount,
+        }
+
+    def test_approval_appends_signed_deltas(self):
+        self._approve('100.00')
+        entry = RevenueEntry.objects.filter(source='PAYMENT_CAPTURED').get()
+        self.assertEqual(entry.received_delta, Decimal('100.00'))
+        self.assertEqual(entry.pending_delta, Decimal('-100.00'))
+        self.assertEqual(entry.pitched_delta, Decimal('0.00'))
+        self.assertEqual(ledger_balance(self.client_obj.pk), self._stored())
+        self.assertEqual(audit_client_balances(), [])
+
+    def test_compaction_keeps_balance(self):
+        self._approve('100.00')
+        self._approve('50.00')
+        expected = ledger_balance(self.client_obj.pk)
+
+        created, folded = compact_ledger(timezone.now() + timedelta(seconds=1), prune=True)
+        self.assertEqual((created, folded), (1, 3))
+        self.assertFalse(RevenueEntry.objects.exists())
+        self.assertEqual(RevenueSnapshot.objects.get().entry_count, 3)
+        self.assertEqual(ledger_balance(self.client_obj.pk), expected)
+
+        # Deltas after the snapshot are added on top of it
+        self._approve('25.00')
+        self.assertEqual(ledger_balance(self.client_obj.pk), self._stored())
+        self.assertEqual(compact_ledger(timezone.now() - timedelta(days=1)), (0, 0))
+
+    def test_entries_are_append_only(self):
+        entry = RevenueEntry.objects.get()
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_client_creation_and_save_are_recorded(self):
+        entry = RevenueEntry.objects.get()
+        self.assertEqual((entry.source, entry.pitched_delta), ('CLIENT_CREATION', Decimal('1000.00')))
+
+        self.client_obj.total_pitched_amount = Decimal('1500.00')
+        self.client_obj.save(revenue_recorded_by=self.manager, revenue_note='Upsell')
+        entry = RevenueEntry.objects.latest('id')
+        self.assertEqual((entry.source, entry.recorded_by, entry.pitched_delta), ('MANUAL_UPDATE', self.manager, Decimal('500.00')))
+        self.assertEqual(ledger_balance(self.client_obj.pk), self._stored())
+
+        # Saves that leave the balance alone add nothing, and do not even look at the ledger
+        client = Client.objects.get(pk=self.client_obj.pk)
+        client.company_name = 'Acme Corporation'
+        with CaptureQueriesContext(connection) as ctx:
+            client.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'payments_revenue' in q['sql']])
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT "clients_client"."total_pitched_amount"')])
+        self.assertEqual(RevenueEntry.objects.count(), 2)
+
+    def test_changes_after_drift_catch_the_ledger_up(self):
+        Client.objects.filter(pk=self.client_obj.pk).update(received_amount=Decimal('5.00'), pending_amount=Decimal('1175.00'))
+        self._approve('100.00')
+
+        catch_up, payment = RevenueEntry.objects.order_by('-id')[:2][::-1]
+        self.assertEqual((catch_up.source, catch_up.received_delta), ('ADJUSTMENT', Decimal('5.00')))
+        self.assertEqual(payment.received_delta, Decimal('100.00'))
+        self.assertEqual(ledger_balance(self.client_obj.pk), self._stored())
+        self.assertEqual(audit_client_balances(), [])
+
+    def test_sync_command_uses_ledger_balances(self):
+        record_revenue_change(
+            self.client_obj.pk,
+            before=ledger_balance(self.client_obj.pk),
+            after={'total_pitched_amount': Decimal('2000.00'), 'received_amount': Decimal('300.00'), 'pending_amount': Decimal('2060.00')},
+            source='MANUAL_UPDATE',
+        )
+        call_command('sync_revenue_from_entries', stdout=StringIO())
+        stored = self._stored()
+        self.assertEqual((stored['total_pitched_amount'], stored['received_amount']), (Decimal('2000.00'), Decimal('300.00')))
+
+        # Once pruned, only the snapshot is left to sync from
+        compact_ledger(timezone.now() + timedelta(seconds=1), prune=True)
+        Client.objects.filter(pk=self.client_obj.pk).update(received_amount=Decimal('0.00'))
+        call_command('sync_revenue_from_entries', stdout=StringIO())
+        self.assertEqual(self._stored()['received_amount'], Decimal('300.00'))
 
-# Create your tests here.
+    def test_audit_reports_drift(self):
+        Client.objects.filter(pk=self.client_obj.pk).update(received_amount=Decimal('5.00'))
+        self.assertEqual(
+            audit_client_balances(),
+            [(self.client_obj.pk, 'received_amount', Decimal('5.00'), Decimal('0.00'))],
+        )
@@ -6,6 +6,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from .models import Payment
 from .serializers import PaymentSerializer, PaymentListSerializer
 
@@ -88,19 +89,25 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Use the model's approve method which handles status and booking updates
-        payment.approve(request.user)
-        
-        # Log activity
+        # Use the model's approve method which handles status, booking, rollup and revenue updates
         from activity_logs.models import ActivityLog
-        ActivityLog.log_action(
-            request=request,
-            user=request.user,
-            action='APPROVE',
-            entity_type='PAYMENT',
-            entity_id=payment.id,
-            description=f'Approved payment of ₹{payment.amount} for {payment.client.company_name}'
-        )
+        with transaction.atomic():
+            if not payment.approve(request.user):
+                # Approved concurrently by someone else after the check above
+                return Response(
+                    {'detail': 'Payment is already approved.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Log activity
+            ActivityLog.log_action(
+                request=request,
+                user=request.user,
+                action='APPROVE',
+                entity_type='PAYMENT',
+                entity_id=payment.id,
+                description=f'Approved payment of ₹{payment.amount} for {payment.client.company_name}'
+            )
         
         # Send email notification
         try:
@@ -130,19 +137,20 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Use the model's reject method which sets status to FAILED
-        payment.reject(request.user, reason)
-        
-        # Log activity
+        # Use the model's reject method which sets status to FAILED and updates the rollup
         from activity_logs.models import ActivityLog
-        ActivityLog.log_action(
-            request=request,
-            user=request.user,
-            action='REJECT',
-            entity_type='PAYMENT',
-            entity_id=payment.id,
-            description=f'Rejected payment of ₹{payment.amount} for {payment.client.company_name}. Reason: {reason}'
-        )
+        with transaction.atomic():
+            payment.reject(request.user, reason)
+            
+            # Log activity
+            ActivityLog.log_action(
+                request=request,
+                user=request.user,
+                action='REJECT',
+                entity_type='PAYMENT',
+                entity_id=payment.id,
+                description=f'Rejected payment of ₹{payment.amount} for {payment.client.company_name}. Reason: {reason}'
+            )
         
         # Send email notification
         try: